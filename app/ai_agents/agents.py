@@ -11,16 +11,23 @@ Enhanced with:
 """
 
 import logging
+import os
 import uuid
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
 from pydantic import BaseModel
 
-from agents import Agent, Runner, function_tool, ModelSettings
+from agents import Agent, Runner, RunContextWrapper, function_tool, ModelSettings
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 
+from app.core.config import get_mcp_config
+from app.core.event_bus import event_context, get_event_bus, publish_event
+from app.core.tracing import get_current_span, trace_span, traced
+from app.jobs.scheduler import Lane, classify_lead_workflow, get_workflow_scheduler
 from app.supabase.supabase_client import SupabaseCRMClient
+from .batch_qualification import BatchQualificationEngine, BatchQualificationResult
+from .streaming import run_streamed_with_events
 from .memory import MemoryManager, InMemoryStore, SupabaseMemoryStore
 
 # Import MCP server management module
@@ -29,6 +36,7 @@ from .mcp.mcp_server_manager import (
     connect_mcp_servers_properly,
     get_all_mcp_servers_for_user,
 )
+from .mcp.retry_handler import with_deadline
 
 # Import schemas
 from app.schemas.lead_schema import LeadCreate
@@ -68,6 +76,7 @@ for logger_name in mcp_loggers:
 # ============================================================================
 
 
+@traced("agent.load_prompt")
 def load_agent_prompt(prompt_name: str) -> str:
     """
     Load agent prompt from file with fallback to default prompt.
@@ -207,6 +216,23 @@ class MeetingScheduleResult(BaseModel):
     scheduled_time: Optional[str]
 
 
+class LeadQualificationInput(BaseModel):
+    """Qualification decision for one lead (update_leads_qualification)"""
+
+    lead_id: str
+    qualified: bool
+    reason: str
+    score: float = 0.0
+
+
+class MeetingScheduleInput(BaseModel):
+    """Meeting to record for one lead (schedule_meetings_for_leads)"""
+
+    lead_id: str
+    meeting_url: str
+    event_type: str
+
+
 class IncomingMessage(BaseModel):
     """Structured input for incoming messages from various channels"""
 
@@ -236,6 +262,7 @@ class CoordinatorResponse(BaseModel):
 
 
 @function_tool
+@traced("tool.create_lead_in_database")
 def create_lead_in_database(
     name: str,
     email: str,
@@ -282,6 +309,9 @@ def create_lead_in_database(
             result += f"\n🔗 Source: {created_lead.source}"
 
             logger.info(f"✅ Lead created: {created_lead.id}")
+            publish_event(
+                "lead.created", lead_id=str(created_lead.id), email=created_lead.email
+            )
             return result
         else:
             error_msg = "Failed to create lead - no response from database"
@@ -294,56 +324,78 @@ def create_lead_in_database(
         return f"❌ {error_msg}"
 
 
+def _missing_leads(lead_ids: List[str], updated_leads: List[Any]) -> List[str]:
+    """Identifiers (ID or email) that did not match an updated lead."""
+    found = {str(lead.id) for lead in updated_leads} | {
+        lead.email for lead in updated_leads
+    }
+    return [lead_id for lead_id in lead_ids if lead_id not in found]
+
+
+def _publish_lead_updates(action: str, updated_leads: List[Any]) -> None:
+    """Announce CRM changes made by a tool on the agent event bus."""
+    for lead in updated_leads:
+        publish_event(
+            "lead.updated",
+            action=action,
+            lead_id=str(lead.id),
+            email=lead.email,
+            status=lead.status,
+        )
+
+
+def _workflow_owner(ctx: RunContextWrapper[TenantContext]) -> Optional[str]:
+    """User whose leads a CRM tool may update: the tenant of the agent run."""
+    user_id = getattr(ctx.context, "user_id", None)
+    return str(user_id) if user_id else None
+
+
+NO_OWNER_MESSAGE = "❌ Cannot update leads: the agent run has no user context"
+
+
+def _bulk_update_summary(
+    action: str, lead_ids: List[str], updated_leads: List[Any]
+) -> str:
+    result = f"✅ {action} {len(updated_leads)}/{len(lead_ids)} leads"
+    missing = _missing_leads(lead_ids, updated_leads)
+    if missing:
+        result += f"\n⚠️ Not found in database: {', '.join(missing)}"
+    return result
+
+
 @function_tool
+@traced("tool.update_lead_qualification")
 def update_lead_qualification(
-    lead_id: str, qualified: bool, reason: str, score: float = 0.0
+    ctx: RunContextWrapper[TenantContext],
+    lead_id: str,
+    qualified: bool,
+    reason: str,
+    score: float = 0.0,
 ) -> str:
     """
     Updates lead qualification status in CRM database.
 
     Args:
-        lead_id: Lead identifier to update
+        lead_id: Lead identifier (ID or email) to update
         qualified: Whether the lead is qualified
         reason: Reason for qualification decision
         score: Qualification score (0-100)
     """
     try:
-        from app.schemas.lead_schema import LeadUpdate
-
+        owner_id = _workflow_owner(ctx)
+        if not owner_id:
+            return NO_OWNER_MESSAGE
         db_client = SupabaseCRMClient()
 
-        # First, try to get the lead by email if lead_id looks like an email
-        lead = None
-        if "@" in lead_id:
-            lead = db_client.get_lead_by_email(lead_id)
-        else:
-            lead = db_client.get_lead(lead_id)
-
-        if not lead or not lead.id:
-            return f"Lead with identifier '{lead_id}' not found in database"
-
-        # Prepare metadata with qualification details
-        metadata = lead.metadata or {}
-        metadata.update(
-            {
-                "qualification_reason": reason,
-                "qualification_score": score,
-                "qualified_at": db_client._get_current_timestamp(),
-                "qualified_by": "ai_agent",
-            }
+        # One round trip: metadata is merged server-side by bulk_update_leads
+        updated = db_client.bulk_update_leads(
+            [db_client.qualification_update(lead_id, qualified, reason, score)], owner_id
         )
+        if not updated:
+            return f"Lead with identifier '{lead_id}' not found in database"
 
-        # Update the lead
-        updated_lead = db_client.update_lead(
-            lead.id,
-            LeadUpdate(
-                qualified=qualified,
-                status="qualified"
-                if qualified
-                else "new",  # Fixed: use "new" instead of "unqualified"
-                metadata=metadata,
-            ),
-        )
+        updated_lead = updated[0]
+        _publish_lead_updates("qualification", updated)
         logger.info(
             f"Lead qualification updated: {updated_lead.id} - qualified={qualified}"
         )
@@ -356,8 +408,49 @@ def update_lead_qualification(
 
 
 @function_tool
+@traced("tool.update_leads_qualification")
+def update_leads_qualification(
+    ctx: RunContextWrapper[TenantContext], updates: List[LeadQualificationInput]
+) -> str:
+    """
+    Updates the qualification of several leads in a single database call.
+    Prefer this over repeated update_lead_qualification calls.
+
+    Args:
+        updates: Qualification decisions, one per lead
+    """
+    try:
+        owner_id = _workflow_owner(ctx)
+        if not owner_id:
+            return NO_OWNER_MESSAGE
+        db_client = SupabaseCRMClient()
+        updated = db_client.bulk_update_leads(
+            [
+                db_client.qualification_update(
+                    update.lead_id, update.qualified, update.reason, update.score
+                )
+                for update in updates
+            ],
+            owner_id,
+        )
+        _publish_lead_updates("qualification", updated)
+        logger.info(f"✅ Bulk qualification updated {len(updated)} leads")
+        return _bulk_update_summary(
+            "Qualification updated for", [u.lead_id for u in updates], updated
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Error updating lead qualifications: {e}")
+        return f"❌ Error updating lead qualifications: {str(e)}"
+
+
+@function_tool
+@traced("tool.mark_lead_as_contacted")
 def mark_lead_as_contacted(
-    lead_id: str, contact_method: str, contact_details: str = ""
+    ctx: RunContextWrapper[TenantContext],
+    lead_id: str,
+    contact_method: str,
+    contact_details: str = "",
 ) -> str:
     """
     Marks a lead as contacted in the database and creates/updates contact record.
@@ -371,35 +464,25 @@ def mark_lead_as_contacted(
         logger.info("🔧 FUNCTION TOOL CALLED: mark_lead_as_contacted")
         logger.info(f"🔧 Parameters: lead_id={lead_id}, method={contact_method}")
 
+        owner_id = _workflow_owner(ctx)
+        if not owner_id:
+            return NO_OWNER_MESSAGE
         db_client = SupabaseCRMClient()
 
-        # Get the lead
-        lead = None
-        if "@" in lead_id:
-            lead = db_client.get_lead_by_email(lead_id)
-        else:
-            lead = db_client.get_lead(lead_id)
-
-        if not lead or not lead.id:
+        # Status, contact method and details are written in one update
+        updated = db_client.bulk_update_leads(
+            [db_client.contacted_update(lead_id, contact_method, contact_details)], owner_id
+        )
+        if not updated:
             logger.warning(f"⚠️ Lead not found: {lead_id}")
             return f"Lead with identifier '{lead_id}' not found in database"
 
-        # Mark as contacted using the dedicated method
-        updated_lead = db_client.mark_lead_as_contacted(lead.id, contact_method)
+        updated_lead = updated[0]
+        _publish_lead_updates("contacted", updated)
         logger.info(
             f"✅ Lead marked as contacted: {updated_lead.id} via {contact_method}"
         )
 
-        # Add contact details to metadata
-        if contact_details:
-            metadata = updated_lead.metadata or {}
-            metadata["last_contact_details"] = contact_details
-
-            from app.schemas.lead_schema import LeadUpdate
-
-            db_client.update_lead(lead.id, LeadUpdate(metadata=metadata))
-            logger.info("✅ Contact details added to metadata")
-
         # NOTE: Contact record creation is now handled by leadAdministrator via prompts
         logger.info(
             "ℹ️ Lead marked as contacted - contact record creation handled by leadAdministrator"
@@ -413,6 +496,47 @@ def mark_lead_as_contacted(
 
 
 @function_tool
+@traced("tool.mark_leads_contacted")
+def mark_leads_contacted(
+    ctx: RunContextWrapper[TenantContext],
+    lead_ids: List[str],
+    contact_method: str,
+    contact_details: str = "",
+) -> str:
+    """
+    Marks several leads as contacted in a single database call.
+    Prefer this over repeated mark_lead_as_contacted calls after outreach.
+
+    Args:
+        lead_ids: Lead identifiers (IDs or emails)
+        contact_method: Method used to contact (email, twitter, instagram, phone)
+        contact_details: Additional details about the contact attempt
+    """
+    try:
+        owner_id = _workflow_owner(ctx)
+        if not owner_id:
+            return NO_OWNER_MESSAGE
+        db_client = SupabaseCRMClient()
+        updated = db_client.bulk_update_leads(
+            [
+                db_client.contacted_update(lead_id, contact_method, contact_details)
+                for lead_id in lead_ids
+            ],
+            owner_id,
+        )
+        _publish_lead_updates("contacted", updated)
+        logger.info(f"✅ Marked {len(updated)} leads as contacted via {contact_method}")
+        return _bulk_update_summary(
+            f"Marked as contacted via {contact_method}:", lead_ids, updated
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Error marking leads as contacted: {e}")
+        return f"❌ Error marking leads as contacted: {str(e)}"
+
+
+@function_tool
+@traced("tool.get_leads_to_contact")
 def get_leads_to_contact(status: str = "qualified", limit: int = 10) -> str:
     """
     Gets a list of leads that need to be contacted.
@@ -450,7 +574,10 @@ def get_leads_to_contact(status: str = "qualified", limit: int = 10) -> str:
 
 
 @function_tool
-def schedule_meeting_for_lead(lead_id: str, meeting_url: str, event_type: str) -> str:
+@traced("tool.schedule_meeting_for_lead")
+def schedule_meeting_for_lead(
+    ctx: RunContextWrapper[TenantContext], lead_id: str, meeting_url: str, event_type: str
+) -> str:
     """
     Schedules a meeting for a qualified lead.
 
@@ -460,23 +587,19 @@ def schedule_meeting_for_lead(lead_id: str, meeting_url: str, event_type: str) -
         event_type: Type of meeting scheduled
     """
     try:
+        owner_id = _workflow_owner(ctx)
+        if not owner_id:
+            return NO_OWNER_MESSAGE
         db_client = SupabaseCRMClient()
 
-        # Get the lead
-        lead = None
-        if "@" in lead_id:
-            lead = db_client.get_lead_by_email(lead_id)
-        else:
-            lead = db_client.get_lead(lead_id)
-
-        if not lead or not lead.id:
-            return f"Lead with identifier '{lead_id}' not found in database"
-
-        # Schedule meeting using the dedicated method
-        updated_lead = db_client.schedule_meeting_for_lead(
-            lead.id, meeting_url, event_type
+        updated = db_client.bulk_update_leads(
+            [db_client.meeting_update(lead_id, meeting_url, event_type)], owner_id
         )
+        if not updated:
+            return f"Lead with identifier '{lead_id}' not found in database"
 
+        updated_lead = updated[0]
+        _publish_lead_updates("meeting_scheduled", updated)
         logger.info(f"Meeting scheduled for lead {updated_lead.id}: {meeting_url}")
 
         return f"Meeting scheduled for lead '{updated_lead.name}': {meeting_url}, type: {event_type}"
@@ -486,6 +609,40 @@ def schedule_meeting_for_lead(lead_id: str, meeting_url: str, event_type: str) -
         return f"Error scheduling meeting: {str(e)}"
 
 
+@function_tool
+@traced("tool.schedule_meetings_for_leads")
+def schedule_meetings_for_leads(
+    ctx: RunContextWrapper[TenantContext], meetings: List[MeetingScheduleInput]
+) -> str:
+    """
+    Records scheduled meetings for several leads in a single database call.
+
+    Args:
+        meetings: Meetings to record, one per lead
+    """
+    try:
+        owner_id = _workflow_owner(ctx)
+        if not owner_id:
+            return NO_OWNER_MESSAGE
+        db_client = SupabaseCRMClient()
+        updated = db_client.bulk_update_leads(
+            [
+                db_client.meeting_update(m.lead_id, m.meeting_url, m.event_type)
+                for m in meetings
+            ],
+            owner_id,
+        )
+        _publish_lead_updates("meeting_scheduled", updated)
+        logger.info(f"✅ Meetings recorded for {len(updated)} leads")
+        return _bulk_update_summary(
+            "Meetings scheduled for", [m.lead_id for m in meetings], updated
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Error scheduling meetings: {e}")
+        return f"❌ Error scheduling meetings: {str(e)}"
+
+
 # ============================================================================
 # MCP SERVERS SETUP - Following OpenAI Agents SDK Official Documentation
 # ============================================================================
@@ -593,6 +750,7 @@ def create_agents_with_proper_mcp_integration(
         tools=[
             get_leads_to_contact,  # Changed from get_crm_lead_data
             schedule_meeting_for_lead,
+            schedule_meetings_for_leads,
         ],
         mcp_servers=meeting_mcp_servers,  # Use safe list
     )
@@ -610,7 +768,9 @@ def create_agents_with_proper_mcp_integration(
             # Database operations only
             create_lead_in_database,
             update_lead_qualification,
+            update_leads_qualification,
             mark_lead_as_contacted,
+            mark_leads_contacted,
         ],
         mcp_servers=[],  # Lead Administrator works with local database only
     )
@@ -642,6 +802,7 @@ def create_agents_with_proper_mcp_integration(
             
             Database Integration:
             - Use mark_lead_as_contacted() for contact tracking
+            - After contacting several prospects, record them with one mark_leads_contacted() call
             - DO NOT create or qualify leads - that's the leadAdministrator's job
             
             Communication Tools:
@@ -659,6 +820,7 @@ def create_agents_with_proper_mcp_integration(
         tools=[
             # Essential database operations only
             mark_lead_as_contacted,
+            mark_leads_contacted,
             # Communication through MCP servers (if available)
         ],
         mcp_servers=coordinator_mcp_servers,  # Use safe list
@@ -703,6 +865,25 @@ class ModernLeadProcessor:
             "ModernLeadProcessor initialized with AgentSDK and dual memory system"
         )
 
+    async def run_coordinator(self, coordinator: Agent, prompt: str) -> Any:
+        """
+        Run the coordinator.
+
+        Runs are streamed so tokens, tool calls and handoffs reach
+        /ws/agent-events subscribers while the coordinator works. The
+        coordinator sends replies and updates the CRM through its tools and
+        handoffs, so its runs are never served from the run cache; only the
+        tool-free qualification analysis is (see
+        app.ai_agents.batch_qualification.AgentLeadAnalyzer).
+        """
+        with trace_span("workflow.runner_run", agent=coordinator.name):
+            # The tenant context tells the CRM tools whose leads they may update
+            return await run_streamed_with_events(
+                coordinator, prompt, context=self.tenant_context
+            )
+
+    @traced("workflow.process_incoming_message")
+    @with_deadline(lambda: get_mcp_config().mcp_run_deadline_seconds)
     async def process_incoming_message(
         self, message_data: IncomingMessage
     ) -> Dict[str, Any]:
@@ -710,6 +891,7 @@ class ModernLeadProcessor:
         Process incoming message from email, Instagram, or Twitter with direct coordinator response
         """
         workflow_id = str(uuid.uuid4())
+        user_id = self.tenant_context.user_id if self.tenant_context else "system"
 
         try:
             logger.info(
@@ -787,8 +969,15 @@ class ModernLeadProcessor:
                 tags=["coordinator", "message_processing"],
             )
 
-            # Run the coordinator workflow
-            coordinator_result = await Runner.run(coordinator, prompt)
+            # Run the coordinator workflow, publishing progress for the UI
+            with event_context(workflow_id, user_id):
+                publish_event(
+                    "workflow.started",
+                    workflow_type="incoming_message",
+                    lead_id=message_data.lead_id,
+                    channel=message_data.channel,
+                )
+                coordinator_result = await self.run_coordinator(coordinator, prompt)
 
             logger.info(f"✅ Message processed: {coordinator_result}")
 
@@ -812,12 +1001,24 @@ class ModernLeadProcessor:
                 metadata={"type": "message_processing_completion"},
             )
 
+            get_event_bus().publish(
+                "workflow.completed",
+                workflow_id=workflow_id,
+                user_id=user_id,
+                result=final_result["result"],
+            )
             return final_result
 
         except Exception as e:
             logger.error(
                 f"❌ Error processing {message_data.channel} message {workflow_id}: {str(e)}"
             )
+            get_event_bus().publish(
+                "workflow.failed",
+                workflow_id=workflow_id,
+                user_id=user_id,
+                error=str(e),
+            )
 
             # Store error in memory for debugging
             try:
@@ -895,6 +1096,19 @@ class ModernLeadProcessor:
             },
         }
 
+    async def qualify_prospects(
+        self, prospects: List[Any], user_id: Optional[str] = None
+    ) -> BatchQualificationResult:
+        """Qualify a prospect list with chunked, concurrent analysis and bulk writes."""
+        engine = BatchQualificationEngine(
+            chunk_size=int(os.getenv("QUALIFICATION_CHUNK_SIZE", "25")),
+            max_concurrency=int(os.getenv("QUALIFICATION_MAX_CONCURRENCY", "8")),
+            user_id=user_id,
+        )
+        return await engine.qualify(prospects)
+
+    @traced("workflow.process_lead_workflow")
+    @with_deadline(lambda: get_mcp_config().mcp_run_deadline_seconds)
     async def process_lead_workflow(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Complete lead processing workflow using AgentSDK with database integration.
@@ -910,6 +1124,11 @@ class ModernLeadProcessor:
             # Determine workflow type based on input data
             workflow_type = lead_data.get("workflow_type", "single_lead")
 
+            workflow_span = get_current_span()
+            if workflow_span:
+                workflow_span.set_attribute("workflow_id", workflow_id)
+                workflow_span.set_attribute("workflow_type", workflow_type)
+
             # ADD EXTENSIVE DEBUG LOGGING
             logger.info(
                 f"🔧 DEBUG: process_lead_workflow called with workflow_type: {workflow_type}"
@@ -932,25 +1151,37 @@ class ModernLeadProcessor:
             logger.info("🔧 DEBUG: This is the REAL AGENT WORKFLOW - NOT SIMPLIFIED")
 
             # Store initial workflow context in memory
-            await self.memory_manager.save_both(
-                agent_id="workflow_manager",
-                workflow_id=workflow_id,
-                content={
-                    "workflow_type": workflow_type,
-                    "lead_data": lead_data,
-                    "user_id": user_id,
-                    "status": "started",
-                    "debug_mode": lead_data.get("debug_mode", False),
-                    "real_workflow": True,
-                },
-                tags=["workflow_start", workflow_type, "real_workflow"],
-                metadata={"type": "workflow_initialization"},
-            )
+            with trace_span("workflow.memory_save", stage="start"):
+                await self.memory_manager.save_both(
+                    agent_id="workflow_manager",
+                    workflow_id=workflow_id,
+                    content={
+                        "workflow_type": workflow_type,
+                        "lead_data": lead_data,
+                        "user_id": user_id,
+                        "status": "started",
+                        "debug_mode": lead_data.get("debug_mode", False),
+                        "real_workflow": True,
+                    },
+                    tags=["workflow_start", workflow_type, "real_workflow"],
+                    metadata={"type": "workflow_initialization"},
+                )
 
             logger.info("🔧 DEBUG: Memory saved, about to create MCP servers")
 
+            # Qualify prospect lists in bulk before the coordinator runs, so the
+            # agents do not issue one update_lead_qualification call per prospect
+            batch_qualification = None
+            if lead_data.get("prospect_list") and lead_data.get(
+                "batch_qualification", True
+            ):
+                batch_qualification = await self.qualify_prospects(
+                    lead_data["prospect_list"], user_id
+                )
+
             # Create MCP servers for user integrations
-            mcp_servers = get_all_mcp_servers_for_user(user_id)
+            with trace_span("workflow.mcp_create"):
+                mcp_servers = get_all_mcp_servers_for_user(user_id)
             logger.info(f"🔧 DEBUG: Created {len(mcp_servers)} MCP servers")
 
             # Connect MCP servers automatically (but don't fail if they don't connect)
@@ -958,7 +1189,8 @@ class ModernLeadProcessor:
             if mcp_servers:
                 try:
                     logger.info("🔧 DEBUG: Attempting to connect MCP servers...")
-                    connected_result = await connect_mcp_servers(mcp_servers)
+                    with trace_span("workflow.mcp_connect", servers=len(mcp_servers)):
+                        connected_result = await connect_mcp_servers(mcp_servers)
                     connected_mcps = connected_result.get("servers", [])
                     if connected_mcps:
                         logger.info(
@@ -988,11 +1220,12 @@ class ModernLeadProcessor:
                 oauth_manager = OAuthIntegrationManager()
                 enabled_integrations = {}
                 try:
-                    enabled_integrations = (
-                        oauth_manager.get_enabled_integrations(user_id)
-                        if user_id
-                        else {}
-                    )
+                    with trace_span("workflow.oauth_lookup"):
+                        enabled_integrations = (
+                            oauth_manager.get_enabled_integrations(user_id)
+                            if user_id
+                            else {}
+                        )
                 except Exception as e:
                     logger.warning(
                         f"⚠️ Could not get enabled integrations: {e}. Continuing with empty list."
@@ -1038,6 +1271,7 @@ class ModernLeadProcessor:
                     tools=[
                         get_leads_to_contact,
                         schedule_meeting_for_lead,
+                        schedule_meetings_for_leads,
                     ],
                     mcp_servers=safe_mcp_servers,  # Use only connected servers
                 )
@@ -1055,7 +1289,9 @@ class ModernLeadProcessor:
                         # Database operations only
                         create_lead_in_database,
                         update_lead_qualification,
+                        update_leads_qualification,
                         mark_lead_as_contacted,
+                        mark_leads_contacted,
                     ],
                     mcp_servers=[],  # Lead Administrator works with local database only
                 )
@@ -1085,6 +1321,7 @@ class ModernLeadProcessor:
                         
                         Database Integration:
                         - Use mark_lead_as_contacted() for contact tracking
+                        - After contacting several prospects, record them with one mark_leads_contacted() call
                         - DO NOT create or qualify leads - that's the leadAdministrator's job
                         
                         Communication Tools:
@@ -1102,6 +1339,7 @@ class ModernLeadProcessor:
                     tools=[
                         # Essential database operations only
                         mark_lead_as_contacted,
+                        mark_leads_contacted,
                         # Communication through MCP servers (if available)
                     ],
                     mcp_servers=safe_mcp_servers,  # Use only connected servers
@@ -1114,7 +1352,8 @@ class ModernLeadProcessor:
                 }
 
             # Create agents with properly connected MCP servers
-            agents = create_agents_with_connected_mcps()
+            with trace_span("workflow.create_agents"):
+                agents = create_agents_with_connected_mcps()
 
             logger.info(
                 f"🔧 DEBUG: Created {len(agents)} agents: {list(agents.keys())}"
@@ -1135,23 +1374,29 @@ class ModernLeadProcessor:
             
             INSTRUCTIONS: Follow your coordinator prompt guidelines for {workflow_type} processing.
             """
+            if batch_qualification:
+                lead_context += f"""
+            QUALIFICATION (already stored in the CRM, do not re-qualify these leads):
+            {[outcome.to_dict() for outcome in batch_qualification.outcomes]}
+            """
 
             prompt = lead_context
             logger.info("🔧 DEBUG: Built workflow prompt with context")
 
             # Store the processing request in memory
-            await self.memory_manager.save_volatile(
-                agent_id="coordinator",
-                workflow_id=workflow_id,
-                content={
-                    "step": "workflow_processing",
-                    "prompt": prompt,
-                    "lead_data": lead_data,
-                    "agents_available": list(agents.keys()),
-                    "real_workflow": True,
-                },
-                tags=["coordinator", workflow_type, "real_workflow"],
-            )
+            with trace_span("workflow.memory_save", stage="context"):
+                await self.memory_manager.save_volatile(
+                    agent_id="coordinator",
+                    workflow_id=workflow_id,
+                    content={
+                        "step": "workflow_processing",
+                        "prompt": prompt,
+                        "lead_data": lead_data,
+                        "agents_available": list(agents.keys()),
+                        "real_workflow": True,
+                    },
+                    tags=["coordinator", workflow_type, "real_workflow"],
+                )
 
             logger.info(
                 f"🔧 DEBUG: About to run coordinator with prompt length: {len(prompt)}"
@@ -1162,7 +1407,16 @@ class ModernLeadProcessor:
             from agents import Runner
 
             logger.info("🔧 DEBUG: Calling Runner.run with coordinator agent")
-            coordinator_result = await Runner.run(coordinator, prompt)
+            with event_context(workflow_id, user_id):
+                workflow_tools = await self.create_workflow_tools_integration(
+                    workflow_id, user_id
+                )
+                publish_event(
+                    "workflow.started",
+                    workflow_type=workflow_type,
+                    tasks=workflow_tools["start_workflow"]["initialTasks"],
+                )
+                coordinator_result = await self.run_coordinator(coordinator, prompt)
 
             logger.info("🔧 DEBUG: Runner.run completed successfully")
             logger.info(
@@ -1183,6 +1437,9 @@ class ModernLeadProcessor:
                 "mcp_servers_available": len(mcp_servers),
                 "mcp_servers_connected": len(connected_mcps),
                 "real_workflow": True,
+                "batch_qualification": batch_qualification.to_dict()
+                if batch_qualification
+                else None,
                 "debug_info": {
                     "coordinator_result_type": str(type(coordinator_result)),
                     "has_final_output": hasattr(coordinator_result, "final_output"),
@@ -1190,16 +1447,23 @@ class ModernLeadProcessor:
                 },
             }
 
-            await self.memory_manager.save_both(
-                agent_id="workflow_manager",
-                workflow_id=workflow_id,
-                content=final_result,
-                tags=["workflow_complete", workflow_type, "real_workflow"],
-                metadata={"type": "workflow_completion"},
-            )
+            with trace_span("workflow.memory_save", stage="complete"):
+                await self.memory_manager.save_both(
+                    agent_id="workflow_manager",
+                    workflow_id=workflow_id,
+                    content=final_result,
+                    tags=["workflow_complete", workflow_type, "real_workflow"],
+                    metadata={"type": "workflow_completion"},
+                )
 
             logger.info("🔧 DEBUG: Final result prepared and saved to memory")
 
+            get_event_bus().publish(
+                "workflow.completed",
+                workflow_id=workflow_id,
+                user_id=user_id,
+                result=final_result["result"],
+            )
             return final_result
 
         except Exception as e:
@@ -1207,6 +1471,9 @@ class ModernLeadProcessor:
                 f"❌ Error in {workflow_type} workflow {workflow_id}: {str(e)}",
                 exc_info=True,
             )
+            get_event_bus().publish(
+                "workflow.failed", workflow_id=workflow_id, user_id=user_id, error=str(e)
+            )
 
             # Store error in memory for debugging
             try:
@@ -1277,9 +1544,19 @@ class ModernAgents:
             "ModernAgents system initialized with AgentSDK and dual memory system"
         )
 
+    @property
+    def scheduler_tenant_key(self) -> str:
+        """Fair-queuing key of this tenant in the workflow scheduler"""
+        return f"{self.tenant_context.tenant_id}:{self.tenant_context.user_id}"
+
     async def run_workflow(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute complete workflow using AgentSDK agents"""
-        return await self.processor.process_lead_workflow(lead_data)
+        return await get_workflow_scheduler().run(
+            classify_lead_workflow(lead_data),
+            self.scheduler_tenant_key,
+            self.processor.process_lead_workflow,
+            lead_data,
+        )
 
     def run_workflow_sync(self, lead_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -1292,8 +1569,14 @@ class ModernAgents:
     async def handle_incoming_message(self, message: IncomingMessage) -> Dict[str, Any]:
         """
         Handle incoming messages from various channels.
+        Replies to prospects run in the highest-priority scheduler lane.
         """
-        return await self.processor.process_incoming_message(message)
+        return await get_workflow_scheduler().run(
+            Lane.INBOUND_MESSAGE,
+            self.scheduler_tenant_key,
+            self.processor.process_incoming_message,
+            message,
+        )
 
     async def handle_email_message(self, email_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -0,0 +1,392 @@
+"""
+Batch lead qualification for prospect_list workflows.
+
+Instead of one coordinator run that issues an update_lead_qualification tool
+call (and its own lookup + update round trips) per prospect, the engine:
+- drops prospects without an email and repeated emails up front (reported
+  as failed outcomes), so concurrent chunks never create the same lead twice
+- splits the remaining prospect list into chunks
+- runs one structured-output LeadAnalysis call per prospect, concurrently,
+  bounded by a semaphore shared by all chunks
+- applies each chunk's qualification results with one lookup and one bulk
+  upsert
+
+Provides:
+- BatchQualificationEngine: chunked, concurrent qualification
+- BatchQualificationResult: per-run outcome and throughput (leads/minute)
+- AgentLeadAnalyzer: default analyzer running an Agent with output_type=LeadAnalysis;
+  the agent has no tools, so repeated analyses of the same prospect for the
+  same user are served from the run cache (app.ai_agents.run_cache) until
+  the lead is edited or deleted
+- SupabaseQualificationWriter: default bulk writer for the leads table
+"""
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.tracing import trace_span
+
+logger = logging.getLogger(__name__)
+
+QUALIFICATION_INSTRUCTIONS = """
+You qualify B2B sales prospects for PipeWise CRM.
+Given one prospect as JSON, return a LeadAnalysis:
+- lead_id: the prospect's email (or id when there is no email)
+- qualification_score: 0-100
+- qualified: true when the score is 70 or higher
+- key_factors, recommendations, risk_factors: short bullet strings
+- opportunity_size: "small", "medium" or "large"
+Base the analysis only on the data provided.
+"""
+
+# Columns copied from the existing lead, else the prospect, else the default
+_LEAD_COLUMNS = {
+    "name": None,
+    "email": None,
+    "company": "",
+    "phone": None,
+    "source": "prospect_list",
+}
+
+Prospect = Dict[str, Any]
+Analyzer = Callable[[Prospect], Awaitable[Any]]
+QualificationWriter = Callable[[List[Tuple[Prospect, Any]]], Awaitable[int]]
+
+
+def normalize_prospect(prospect: Any) -> Prospect:
+    """Accept prospect dicts or bare email strings."""
+    if isinstance(prospect, dict):
+        return prospect
+    return {"email": str(prospect)}
+
+
+def prospect_key(prospect: Prospect) -> str:
+    return str(prospect.get("email") or prospect.get("id") or "")
+
+
+@dataclass
+class QualificationOutcome:
+    """Qualification result for one prospect."""
+
+    prospect: Prospect
+    analysis: Optional[Any] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "prospect": prospect_key(self.prospect),
+            "qualified": getattr(self.analysis, "qualified", None),
+            "qualification_score": getattr(self.analysis, "qualification_score", None),
+            "error": self.error,
+        }
+
+
+@dataclass
+class BatchQualificationResult:
+    """Outcome of a batch qualification run."""
+
+    outcomes: List[QualificationOutcome] = field(default_factory=list)
+    chunks: int = 0
+    written: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.outcomes)
+
+    @property
+    def qualified(self) -> int:
+        return sum(1 for o in self.outcomes if getattr(o.analysis, "qualified", False))
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for o in self.outcomes if o.error)
+
+    @property
+    def leads_per_minute(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.total / self.elapsed_seconds * 60
+
+    def to_dict(self, include_outcomes: bool = False) -> Dict[str, Any]:
+        data = {
+            "total": self.total,
+            "qualified": self.qualified,
+            "failed": self.failed,
+            "written": self.written,
+            "chunks": self.chunks,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "leads_per_minute": round(self.leads_per_minute, 1),
+        }
+        if include_outcomes:
+            data["outcomes"] = [o.to_dict() for o in self.outcomes]
+        return data
+
+
+class AgentLeadAnalyzer:
+    """Runs a structured-output qualification agent for one prospect."""
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        user_id: Optional[str] = None,
+        cache: Any = None,
+        runner: Optional[Callable[[Any, str], Awaitable[Any]]] = None,
+    ):
+        """
+        Initialize the analyzer.
+
+        Args:
+            model: Model override for the qualification agent
+            user_id: User the prospects belong to; cached analyses are
+                never shared across users
+            cache: AgentRunCache; defaults to the global run cache (None
+                when AGENT_RUN_CACHE=off)
+            runner: Coroutine running the agent (defaults to Runner.run)
+        """
+        self.model = model
+        self.user_id = user_id
+        self._cache = cache
+        self._runner = runner
+        self._agent = None
+
+    def _get_agent(self):
+        if self._agent is None:
+            from agents import Agent
+
+            from app.ai_agents.agents import LeadAnalysis
+
+            kwargs = {"model": self.model} if self.model else {}
+            self._agent = Agent(
+                name="Lead Qualifier",
+                instructions=QUALIFICATION_INSTRUCTIONS,
+                output_type=LeadAnalysis,
+                **kwargs,
+            )
+        return self._agent
+
+    async def __call__(self, prospect: Prospect) -> Any:
+        from app.ai_agents.agents import LeadAnalysis
+        from app.ai_agents.run_cache import get_run_cache, has_side_effects
+
+        agent = self._get_agent()
+        prompt = json.dumps(prospect, default=str, ensure_ascii=False, sort_keys=True)
+        runner = self._runner
+        if runner is None:
+            from agents import Runner
+
+            runner = Runner.run
+
+        cache = self._cache if self._cache is not None else get_run_cache()
+        if cache is None or has_side_effects(agent):
+            return (await runner(agent, prompt)).final_output
+
+        # Keyed by the prospect's email, which invalidate_lead_runs() bumps
+        # when the lead is edited or deleted
+        result = await cache.run_agent(
+            agent,
+            prompt,
+            lead_id=prospect_key(prospect) or None,
+            runner=runner,
+            user_id=self.user_id,
+        )
+        output = result.final_output
+        # Cache hits hold the JSON form of the LeadAnalysis
+        return LeadAnalysis.model_validate(output) if isinstance(output, dict) else output
+
+
+class SupabaseQualificationWriter:
+    """Applies a chunk of qualification results with one lookup and one upsert."""
+
+    def __init__(self, db_client=None, user_id: Optional[str] = None):
+        self._db_client = db_client
+        self.user_id = user_id
+
+    @property
+    def db_client(self):
+        if self._db_client is None:
+            from app.supabase.supabase_client import SupabaseCRMClient
+
+            self._db_client = SupabaseCRMClient()
+        return self._db_client
+
+    def build_rows(
+        self, results: List[Tuple[Prospect, Any]], existing: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Build leads rows, merging qualification details into existing metadata."""
+        qualified_at = self.db_client._get_current_timestamp()
+        rows = []
+        for prospect, analysis in results:
+            email = prospect.get("email")
+            lead = existing.get(email)
+            metadata = dict((lead.metadata if lead else prospect.get("metadata")) or {})
+            metadata.update(
+                {
+                    "qualification_reason": "; ".join(analysis.key_factors),
+                    "qualification_score": analysis.qualification_score,
+                    "qualification_recommendations": analysis.recommendations,
+                    "qualification_risks": analysis.risk_factors,
+                    "opportunity_size": analysis.opportunity_size,
+                    "qualified_at": qualified_at,
+                    "qualified_by": "batch_qualification",
+                }
+            )
+            # PostgREST bulk upserts take their column list from the rows, so
+            # every row carries the same columns (current values for known leads)
+            row = {
+                column: getattr(lead, column, None) or prospect.get(column) or default
+                for column, default in _LEAD_COLUMNS.items()
+            }
+            row.update(
+                {
+                    "id": str(lead.id) if lead else None,
+                    "name": row["name"] or email,
+                    "user_id": str(lead.user_id)
+                    if lead and lead.user_id
+                    else self.user_id,
+                    "created_at": lead.created_at if lead else qualified_at,
+                    "contacted": bool(lead and lead.contacted),
+                    "meeting_scheduled": bool(lead and lead.meeting_scheduled),
+                    "qualified": analysis.qualified,
+                    "status": "qualified" if analysis.qualified else "new",
+                    "metadata": metadata,
+                }
+            )
+            rows.append(row)
+        return rows
+
+    def write_chunk(self, results: List[Tuple[Prospect, Any]]) -> int:
+        if not self.user_id:
+            raise ValueError("qualification results need an owner (user_id)")
+        if not all(p.get("email") for p, _ in results):
+            raise ValueError("every prospect written needs an email")
+        # Only the owner's leads are matched; another user's lead with the
+        # same email must not be overwritten
+        existing = self.db_client.get_leads_by_emails(
+            [p["email"] for p, _ in results], self.user_id
+        )
+        return len(self.db_client.bulk_upsert_leads(self.build_rows(results, existing)))
+
+    async def __call__(self, results: List[Tuple[Prospect, Any]]) -> int:
+        return await asyncio.to_thread(self.write_chunk, results)
+
+
+class BatchQualificationEngine:
+    """Chunked, concurrent lead qualification with bulk writes."""
+
+    def __init__(
+        self,
+        analyzer: Optional[Analyzer] = None,
+        writer: Optional[QualificationWriter] = None,
+        chunk_size: int = 25,
+        max_concurrency: int = 8,
+        user_id: Optional[str] = None,
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            analyzer: Coroutine returning a LeadAnalysis for one prospect
+            writer: Coroutine persisting one chunk of (prospect, analysis) pairs
+            chunk_size: Prospects per bulk write
+            max_concurrency: Maximum analyzer calls in flight across all chunks
+            user_id: Owner of leads created for unknown prospects
+        """
+        if chunk_size < 1 or max_concurrency < 1:
+            raise ValueError("chunk_size and max_concurrency must be positive")
+        self.analyzer = analyzer or AgentLeadAnalyzer(user_id=user_id)
+        self.writer = writer or SupabaseQualificationWriter(user_id=user_id)
+        self.chunk_size = chunk_size
+        self.max_concurrency = max_concurrency
+
+    async def _analyze(
+        self, prospect: Prospect, semaphore: asyncio.Semaphore
+    ) -> QualificationOutcome:
+        async with semaphore:
+            try:
+                return QualificationOutcome(prospect, analysis=await self.analyzer(prospect))
+            except Exception as e:
+                logger.warning(f"⚠️ Qualification failed for {prospect_key(prospect)}: {e}")
+                return QualificationOutcome(prospect, error=str(e))
+
+    async def _process_chunk(
+        self,
+        index: int,
+        chunk: List[Prospect],
+        semaphore: asyncio.Semaphore,
+        result: BatchQualificationResult,
+    ) -> List[QualificationOutcome]:
+        with trace_span("qualification.chunk", chunk=index, size=len(chunk)):
+            outcomes = await asyncio.gather(
+                *(self._analyze(prospect, semaphore) for prospect in chunk)
+            )
+            analyzed = [(o.prospect, o.analysis) for o in outcomes if o.analysis]
+            if analyzed:
+                try:
+                    with trace_span("qualification.bulk_write", rows=len(analyzed)):
+                        result.written += await self.writer(analyzed)
+                except Exception as e:
+                    logger.error(f"❌ Bulk qualification write failed (chunk {index}): {e}")
+                    for outcome in outcomes:
+                        if outcome.analysis:
+                            outcome.error = f"write failed: {e}"
+        return list(outcomes)
+
+    @staticmethod
+    def _screen(
+        prospects: List[Prospect],
+    ) -> Tuple[List[Prospect], List[QualificationOutcome]]:
+        """
+        Split prospects into those to qualify and failed outcomes.
+
+        Leads are matched by email and chunks are written concurrently, so a
+        prospect without an email cannot be written and a repeated email
+        would be created once per chunk it lands in.
+        """
+        accepted, rejected = [], []
+        seen = set()
+        for prospect in prospects:
+            email = prospect.get("email")
+            if not email:
+                rejected.append(QualificationOutcome(prospect, error="prospect has no email"))
+            elif email in seen:
+                rejected.append(QualificationOutcome(prospect, error=f"duplicate email {email}"))
+            else:
+                seen.add(email)
+                accepted.append(prospect)
+        return accepted, rejected
+
+    async def qualify(self, prospects: Sequence[Any]) -> BatchQualificationResult:
+        """Qualify all prospects and persist the results chunk by chunk."""
+        normalized, rejected = self._screen([normalize_prospect(p) for p in prospects])
+        chunks = [
+            normalized[i : i + self.chunk_size]
+            for i in range(0, len(normalized), self.chunk_size)
+        ]
+        result = BatchQualificationResult(chunks=len(chunks))
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        started = time.perf_counter()
+        with trace_span("qualification.batch", prospects=len(normalized) + len(rejected)):
+            # Chunks share the semaphore, so one chunk's bulk write overlaps
+            # with the next chunk's model calls.
+            per_chunk = await asyncio.gather(
+                *(
+                    self._process_chunk(i, chunk, semaphore, result)
+                    for i, chunk in enumerate(chunks)
+                )
+            )
+        result.elapsed_seconds = time.perf_counter() - started
+        result.outcomes = [
+            outcome for outcomes in per_chunk for outcome in outcomes
+        ] + rejected
+
+        logger.info(
+            f"✅ Batch qualification: {result.qualified}/{result.total} qualified, "
+            f"{result.failed} failed, {result.leads_per_minute:.1f} leads/min"
+        )
+        return result
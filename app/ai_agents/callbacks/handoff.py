@@ -13,6 +13,7 @@ import logging
 import asyncio
 
 from app.ai_agents.memory import MemoryManager
+from app.core.event_bus import publish_event
 
 # Now we can import from the agents library without conflict
 from agents import RunContextWrapper
@@ -150,6 +151,14 @@ def create_handoff_callback(
                 f"✅ Handoff {handoff_id} completed in {execution_time}ms: "
                 f"{result.result_summary}"
             )
+            publish_event(
+                "handoff.recorded",
+                handoff_id=handoff_id,
+                from_agent=from_agent_id,
+                to_agent=to_agent_id,
+                reason=input_data.reason if input_data else None,
+                success=True,
+            )
 
             return result
 
@@ -172,6 +181,14 @@ def create_handoff_callback(
             logger.error(
                 f"❌ Handoff {handoff_id} failed after {execution_time}ms: {e}"
             )
+            publish_event(
+                "handoff.recorded",
+                handoff_id=handoff_id,
+                from_agent=from_agent_id,
+                to_agent=to_agent_id,
+                success=False,
+                error=str(e),
+            )
 
             # Store error in memory for debugging
             try:
@@ -380,6 +380,11 @@ class AgentMCPFactory:
                 logger.warning(
                     f"⚠️ OAuth token expired for {service_name}, user {self.user_id}"
                 )
+                # Refresh in the background; this workflow does not wait for it
+                if oauth_tokens.refresh_token:
+                    from .oauth_refresh_scheduler import get_refresh_scheduler
+
+                    get_refresh_scheduler().request_refresh(self.user_id, service_name)
                 return False
 
             logger.info(
@@ -7,14 +7,22 @@ This module provides comprehensive automated alerting for MCP services including
 - Critical OAuth authentication failure alerts
 - Alert escalation and notification routing
 - Alert suppression and grouping
+- Queued, digest-batched notification delivery off the alerting path
+
+Rules are indexed by (alert_type, service) and keep sliding-window counters,
+so each incoming event only touches the rules that can match it.
+Escalations are kept on a timer heap and duplicate alerts are collapsed by
+fingerprint.
 """
 
 import asyncio
+import hashlib
+import heapq
+import itertools
 import json
-import time
-from typing import Dict, Any, List, Optional, Callable, Set
+from typing import Dict, Any, List, Optional, Callable, Set, Tuple
 from datetime import datetime, timedelta
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from enum import Enum
 from collections import defaultdict, deque
 import smtplib
@@ -25,6 +33,10 @@ import httpx
 import logging
 
 from app.ai_agents.mcp.structured_logger import get_mcp_logger, OperationType
+from app.ai_agents.mcp.notification_dispatcher import (
+    NotificationDispatcher,
+    QueuedNotification,
+)
 from app.ai_agents.mcp.health_monitor import (
     ServiceStatus,
     Alert as HealthAlert,
@@ -136,6 +148,10 @@ class AlertEvent:
     escalation_level: int = 0
     next_escalation_at: Optional[datetime] = None
 
+    # Deduplication
+    fingerprint: Optional[str] = None
+    occurrence_count: int = 1
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization."""
         result = asdict(self)
@@ -202,6 +218,42 @@ class NotificationChannel:
         self.notification_count += 1
 
 
+class SlidingWindowCounter:
+    """Event counter over a sliding time window.
+
+    Events are appended in time order and expired from the left, so each
+    update is amortized O(1).
+    """
+
+    def __init__(self, window: timedelta):
+        self.window = window
+        self.events: deque = deque()
+
+    def add(self, timestamp: datetime) -> int:
+        """Record an event and return the count inside the window."""
+        self.events.append(timestamp)
+        return self.count(timestamp)
+
+    def count(self, now: datetime) -> int:
+        """Expire old events and return the count inside the window."""
+        window_start = now - self.window
+        while self.events and self.events[0] < window_start:
+            self.events.popleft()
+        return len(self.events)
+
+
+def alert_fingerprint(alert_type: AlertType, service_name: str) -> str:
+    """
+    Stable fingerprint identifying duplicates of the same alert.
+
+    Only the condition (alert type and service) counts: repeated triggers,
+    other matching rules and other users of the service fold into the alert
+    already active for it.
+    """
+    raw = f"{alert_type.value}|{service_name}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
 class MCPAlertManager:
     """Main alert management system for MCP services."""
 
@@ -228,16 +280,38 @@ class MCPAlertManager:
         self.active_alerts: Dict[str, AlertEvent] = {}
         self.alert_history: deque = deque(maxlen=10000)
 
-        # Notification channels
+        # Rule index: alert_type -> service_name (None for all services) -> rules
+        self._rule_index: Dict[AlertType, Dict[Optional[str], List[AlertRule]]] = (
+            defaultdict(lambda: defaultdict(list))
+        )
+
+        # Active alert lookups for dedup and resolution
+        self._active_fingerprints: Dict[str, str] = {}
+        self._active_by_service_type: Dict[Tuple[str, AlertType], Set[str]] = (
+            defaultdict(set)
+        )
+
+        # Escalation timer heap of (next_escalation_at, seq, alert_id)
+        self._escalation_heap: List[Tuple[datetime, int, str]] = []
+        self._escalation_seq = itertools.count()
+        self._escalation_wakeup: Optional[asyncio.Event] = None
+
+        # Notification channels, delivered through per-channel queues
         self.notification_channels: Dict[str, NotificationChannel] = {}
+        self.notification_dispatcher = NotificationDispatcher(
+            deliver=self._deliver_notifications,
+            on_outcome=self._record_notifications,
+        )
+        self._http_client: Optional[httpx.AsyncClient] = None
 
         # Suppression tracking
         self.suppressed_alerts: Dict[str, datetime] = {}
 
         # State tracking for alert conditions
         self.service_downtime: Dict[str, datetime] = {}
-        self.rate_limit_incidents: Dict[str, List[datetime]] = defaultdict(list)
-        self.auth_failure_incidents: Dict[str, List[datetime]] = defaultdict(list)
+
+        # Sliding-window counters keyed by (rule_id, subject)
+        self.window_counters: Dict[Tuple[str, str], SlidingWindowCounter] = {}
 
         # Background tasks
         self.monitor_task: Optional[asyncio.Task] = None
@@ -373,21 +447,79 @@ class MCPAlertManager:
         )
 
     def add_alert_rule(self, rule: AlertRule) -> None:
-        """Add or update an alert rule."""
+        """Add or update an alert rule.
+
+        Re-add a rule after changing its alert_type or service_names so the
+        rule index picks up the change.
+        """
+        if rule.id in self.alert_rules:
+            self._unindex_rule(self.alert_rules[rule.id])
+
         self.alert_rules[rule.id] = rule
+        self._index_rule(rule)
         self.logger.info(f"Added alert rule: {rule.name} ({rule.id})")
 
     def remove_alert_rule(self, rule_id: str) -> bool:
         """Remove an alert rule."""
         if rule_id in self.alert_rules:
-            del self.alert_rules[rule_id]
+            self._unindex_rule(self.alert_rules.pop(rule_id))
             self.logger.info(f"Removed alert rule: {rule_id}")
             return True
         return False
 
+    def _index_rule(self, rule: AlertRule) -> None:
+        """Add a rule to the (alert_type, service) index."""
+        by_service = self._rule_index[rule.alert_type]
+        for service_name in rule.service_names or [None]:
+            by_service[service_name].append(rule)
+
+    def _unindex_rule(self, rule: AlertRule) -> None:
+        """Remove a rule and its window counters from the index."""
+        by_service = self._rule_index[rule.alert_type]
+        for service_name in rule.service_names or [None]:
+            if service_name in by_service:
+                by_service[service_name] = [
+                    r for r in by_service[service_name] if r is not rule
+                ]
+
+        for key in [key for key in self.window_counters if key[0] == rule.id]:
+            del self.window_counters[key]
+
+    def get_matching_rules(
+        self, alert_type: AlertType, service_name: str
+    ) -> List[AlertRule]:
+        """Get enabled rules of a type that apply to a service."""
+        by_service = self._rule_index.get(alert_type)
+        if not by_service:
+            return []
+
+        return [
+            rule
+            for rule in by_service.get(service_name, []) + by_service.get(None, [])
+            if rule.enabled
+        ]
+
+    def _record_window_event(
+        self, rule: AlertRule, subject: str, timestamp: datetime, default_minutes: int
+    ) -> SlidingWindowCounter:
+        """Record an event in the rule's sliding window for a subject."""
+        key = (rule.id, subject)
+        counter = self.window_counters.get(key)
+        if counter is None:
+            counter = SlidingWindowCounter(
+                timedelta(minutes=rule.threshold_duration_minutes or default_minutes)
+            )
+            self.window_counters[key] = counter
+
+        counter.add(timestamp)
+        return counter
+
     def add_notification_channel(self, channel: NotificationChannel) -> None:
         """Add or update a notification channel."""
         self.notification_channels[channel.name] = channel
+        self.notification_dispatcher.configure_channel(
+            channel.name, channel.max_notifications_per_hour
+        )
         self.logger.info(f"Added notification channel: {channel.name}")
 
     def remove_notification_channel(self, channel_name: str) -> bool:
@@ -412,31 +544,25 @@ class MCPAlertManager:
             # Check if downtime exceeds threshold
             downtime_duration = now - self.service_downtime[service_name]
 
-            for rule in self.alert_rules.values():
-                if (
-                    rule.alert_type == AlertType.SERVICE_UNAVAILABLE
-                    and rule.enabled
-                    and rule.matches_service(service_name)
-                ):
-                    threshold_minutes = rule.threshold_duration_minutes or 2
-
-                    if downtime_duration >= timedelta(minutes=threshold_minutes):
-                        alert_id = f"service_unavailable_{service_name}_{rule.id}"
-
-                        if alert_id not in self.active_alerts:
-                            await self._create_alert(
-                                alert_id=alert_id,
-                                rule=rule,
-                                service_name=service_name,
-                                title=f"Service {service_name} Unavailable",
-                                message=f"Service {service_name} has been unavailable for {downtime_duration.total_seconds() / 60:.1f} minutes",
-                                context_data={
-                                    "downtime_minutes": downtime_duration.total_seconds()
-                                    / 60,
-                                    "service_status": status.value,
-                                    "threshold_minutes": threshold_minutes,
-                                },
-                            )
+            for rule in self.get_matching_rules(
+                AlertType.SERVICE_UNAVAILABLE, service_name
+            ):
+                threshold_minutes = rule.threshold_duration_minutes or 2
+
+                if downtime_duration >= timedelta(minutes=threshold_minutes):
+                    await self._create_alert(
+                        alert_id=f"service_unavailable_{service_name}_{rule.id}",
+                        rule=rule,
+                        service_name=service_name,
+                        title=f"Service {service_name} Unavailable",
+                        message=f"Service {service_name} has been unavailable for {downtime_duration.total_seconds() / 60:.1f} minutes",
+                        context_data={
+                            "downtime_minutes": downtime_duration.total_seconds()
+                            / 60,
+                            "service_status": status.value,
+                            "threshold_minutes": threshold_minutes,
+                        },
+                    )
         else:
             # Service is healthy, clear downtime tracking and resolve alerts
             if service_name in self.service_downtime:
@@ -453,54 +579,30 @@ class MCPAlertManager:
             return
 
         now = datetime.now()
-        incidents = self.rate_limit_incidents[service_name]
 
-        # Add current incident
-        incidents.append(now)
-
-        # Clean up old incidents (older than 1 hour)
-        cutoff_time = now - timedelta(hours=1)
-        self.rate_limit_incidents[service_name] = [
-            incident for incident in incidents if incident >= cutoff_time
-        ]
-
-        # Check alert rules
-        for rule in self.alert_rules.values():
-            if (
-                rule.alert_type == AlertType.RATE_LIMIT_EXCEEDED
-                and rule.enabled
-                and rule.matches_service(service_name)
-            ):
-                threshold_value = rule.threshold_value or 5
-                threshold_minutes = rule.threshold_duration_minutes or 5
-
-                # Count incidents in the threshold window
-                window_start = now - timedelta(minutes=threshold_minutes)
-                recent_incidents = [
-                    incident
-                    for incident in self.rate_limit_incidents[service_name]
-                    if incident >= window_start
-                ]
-
-                if len(recent_incidents) >= threshold_value:
-                    alert_id = f"rate_limit_exceeded_{service_name}_{rule.id}"
-
-                    if alert_id not in self.active_alerts:
-                        await self._create_alert(
-                            alert_id=alert_id,
-                            rule=rule,
-                            service_name=service_name,
-                            title=f"Rate Limit Exceeded - {service_name}",
-                            message=f"Service {service_name} has hit rate limits {len(recent_incidents)} times in the last {threshold_minutes} minutes",
-                            context_data={
-                                "incidents_count": len(recent_incidents),
-                                "threshold_value": threshold_value,
-                                "threshold_minutes": threshold_minutes,
-                                "recent_incidents": [
-                                    inc.isoformat() for inc in recent_incidents
-                                ],
-                            },
-                        )
+        for rule in self.get_matching_rules(AlertType.RATE_LIMIT_EXCEEDED, service_name):
+            threshold_value = rule.threshold_value or 5
+            threshold_minutes = rule.threshold_duration_minutes or 5
+
+            counter = self._record_window_event(rule, service_name, now, 5)
+            incidents_count = len(counter.events)
+
+            if incidents_count >= threshold_value:
+                await self._create_alert(
+                    alert_id=f"rate_limit_exceeded_{service_name}_{rule.id}",
+                    rule=rule,
+                    service_name=service_name,
+                    title=f"Rate Limit Exceeded - {service_name}",
+                    message=f"Service {service_name} has hit rate limits {incidents_count} times in the last {threshold_minutes} minutes",
+                    context_data={
+                        "incidents_count": incidents_count,
+                        "threshold_value": threshold_value,
+                        "threshold_minutes": threshold_minutes,
+                        "recent_incidents": [
+                            inc.isoformat() for inc in counter.events
+                        ],
+                    },
+                )
 
     async def check_authentication_failures(
         self,
@@ -515,56 +617,34 @@ class MCPAlertManager:
 
         now = datetime.now()
         key = f"{service_name}:{user_id}"
-        incidents = self.auth_failure_incidents[key]
-
-        # Add current failure
-        incidents.append(now)
-
-        # Clean up old incidents (older than 1 hour)
-        cutoff_time = now - timedelta(hours=1)
-        self.auth_failure_incidents[key] = [
-            incident for incident in incidents if incident >= cutoff_time
-        ]
 
-        # Check alert rules
-        for rule in self.alert_rules.values():
-            if (
-                rule.alert_type == AlertType.AUTHENTICATION_FAILURE
-                and rule.enabled
-                and rule.matches_service(service_name)
-            ):
-                threshold_value = rule.threshold_value or 3
-                threshold_minutes = rule.threshold_duration_minutes or 10
-
-                # Count failures in the threshold window
-                window_start = now - timedelta(minutes=threshold_minutes)
-                recent_failures = [
-                    incident
-                    for incident in self.auth_failure_incidents[key]
-                    if incident >= window_start
-                ]
-
-                if len(recent_failures) >= threshold_value:
-                    alert_id = f"auth_failure_{service_name}_{user_id}_{rule.id}"
-
-                    if alert_id not in self.active_alerts:
-                        await self._create_alert(
-                            alert_id=alert_id,
-                            rule=rule,
-                            service_name=service_name,
-                            title=f"Authentication Failures - {service_name}",
-                            message=f"User {user_id} has failed authentication {len(recent_failures)} times for {service_name} in the last {threshold_minutes} minutes",
-                            context_data={
-                                "user_id": user_id,
-                                "failures_count": len(recent_failures),
-                                "threshold_value": threshold_value,
-                                "threshold_minutes": threshold_minutes,
-                                "error_code": error_code,
-                                "recent_failures": [
-                                    inc.isoformat() for inc in recent_failures
-                                ],
-                            },
-                        )
+        for rule in self.get_matching_rules(
+            AlertType.AUTHENTICATION_FAILURE, service_name
+        ):
+            threshold_value = rule.threshold_value or 3
+            threshold_minutes = rule.threshold_duration_minutes or 10
+
+            counter = self._record_window_event(rule, key, now, 10)
+            failures_count = len(counter.events)
+
+            if failures_count >= threshold_value:
+                await self._create_alert(
+                    alert_id=f"auth_failure_{service_name}_{user_id}_{rule.id}",
+                    rule=rule,
+                    service_name=service_name,
+                    title=f"Authentication Failures - {service_name}",
+                    message=f"User {user_id} has failed authentication {failures_count} times for {service_name} in the last {threshold_minutes} minutes",
+                    context_data={
+                        "user_id": user_id,
+                        "failures_count": failures_count,
+                        "threshold_value": threshold_value,
+                        "threshold_minutes": threshold_minutes,
+                        "error_code": error_code,
+                        "recent_failures": [
+                            inc.isoformat() for inc in counter.events
+                        ],
+                    },
+                )
 
     async def _create_alert(
         self,
@@ -575,11 +655,26 @@ class MCPAlertManager:
         message: str,
         context_data: Dict[str, Any],
     ) -> Optional[AlertEvent]:
-        """Create a new alert event."""
+        """Create a new alert event.
+
+        An alert whose fingerprint (alert type and service) matches an active
+        alert is folded into it as another occurrence, carrying the latest
+        message and context, instead of creating a duplicate.
+        """
         # Check if alert is suppressed
         if self._is_alert_suppressed(alert_id, rule):
             return None
 
+        fingerprint = alert_fingerprint(rule.alert_type, service_name)
+        existing_id = self._active_fingerprints.get(fingerprint)
+        if existing_id in self.active_alerts:
+            existing = self.active_alerts[existing_id]
+            existing.occurrence_count += 1
+            existing.last_updated = datetime.now()
+            existing.message = message
+            existing.context_data.update(context_data)
+            return existing
+
         # Create alert event
         alert = AlertEvent(
             id=alert_id,
@@ -593,11 +688,15 @@ class MCPAlertManager:
             context_data=context_data,
             next_escalation_at=datetime.now()
             + timedelta(minutes=rule.escalation_delay_minutes),
+            fingerprint=fingerprint,
         )
 
         # Store alert
         self.active_alerts[alert_id] = alert
         self.alert_history.append(alert)
+        self._active_fingerprints[fingerprint] = alert_id
+        self._active_by_service_type[(service_name, rule.alert_type)].add(alert_id)
+        self._schedule_escalation(alert)
 
         # Log alert creation
         with self.mcp_logger.operation_context(
@@ -638,12 +737,17 @@ class MCPAlertManager:
     async def _send_alert_notifications(
         self, alert: AlertEvent, rule: AlertRule
     ) -> None:
-        """Send notifications for an alert."""
+        """
+        Queue notifications for an alert on each of the rule's channels.
+
+        Delivery happens on the dispatcher's workers, so a slow channel never
+        delays alert evaluation or other channels.
+        """
         for channel_type in rule.channels:
             # Find matching notification channel
             channel = None
             for ch in self.notification_channels.values():
-                if ch.channel_type == channel_type and ch.can_send_notification():
+                if ch.channel_type == channel_type and ch.enabled:
                     channel = ch
                     break
 
@@ -653,44 +757,122 @@ class MCPAlertManager:
                 )
                 continue
 
-            try:
-                success = await self._send_notification(channel, alert, rule)
-
-                if success:
-                    channel.record_notification()
-                    alert.notifications_sent.append(
-                        {
-                            "channel": channel.name,
-                            "channel_type": channel_type.value,
-                            "timestamp": datetime.now().isoformat(),
-                            "success": True,
-                        }
-                    )
-                else:
-                    alert.notifications_sent.append(
-                        {
-                            "channel": channel.name,
-                            "channel_type": channel_type.value,
-                            "timestamp": datetime.now().isoformat(),
-                            "success": False,
-                            "error": "Notification failed",
-                        }
-                    )
-
-            except Exception as e:
-                self.logger.error(
-                    f"Failed to send notification via {channel.name}: {str(e)}"
-                )
+            if not self.notification_dispatcher.submit(
+                channel.name, alert, rule, escalation_level=alert.escalation_level
+            ):
                 alert.notifications_sent.append(
                     {
                         "channel": channel.name,
                         "channel_type": channel_type.value,
                         "timestamp": datetime.now().isoformat(),
                         "success": False,
-                        "error": str(e),
+                        "error": "Notification queue full",
                     }
                 )
 
+    async def _deliver_notifications(
+        self, channel_name: str, batch: List[QueuedNotification]
+    ) -> bool:
+        """
+        Deliver a batch of queued alerts to a channel, as a digest if needed.
+
+        Called once per attempt; the outcome is recorded on the alerts by
+        _record_notifications once the dispatcher is done with the batch.
+        """
+        channel = self.notification_channels.get(channel_name)
+        if not channel:
+            self.logger.warning(f"Notification channel removed: {channel_name}")
+            return False
+
+        if len(batch) == 1:
+            alert, rule = self._notified_alert(batch[0]), batch[0].rule
+        else:
+            alert, rule = self._build_digest(channel_name, batch), batch[0].rule
+
+        success = await self._send_notification(channel, alert, rule)
+        if success:
+            channel.record_notification()
+        return success
+
+    def _record_notifications(
+        self,
+        channel_name: str,
+        batch: List[QueuedNotification],
+        success: bool,
+        attempts: int,
+    ) -> None:
+        """Record one delivery per alert and channel, with its attempt count."""
+        channel = self.notification_channels.get(channel_name)
+        for item in batch:
+            record = {
+                "channel": channel_name,
+                "channel_type": channel.channel_type.value if channel else None,
+                "timestamp": datetime.now().isoformat(),
+                "success": success,
+                "attempts": attempts,
+                "escalation_level": item.escalation_level,
+            }
+            if len(batch) > 1:
+                record["digest_id"] = self._digest_id(channel_name, batch)
+            if not success:
+                record["error"] = "Notification failed"
+            item.alert.notifications_sent.append(record)
+
+    @staticmethod
+    def _notified_alert(item: QueuedNotification) -> AlertEvent:
+        """The alert as notified: escalations get their title prefixed on a copy."""
+        if not item.escalation_level:
+            return item.alert
+        return replace(
+            item.alert,
+            title=f"[ESCALATED {item.escalation_level}x] {item.alert.title}",
+        )
+
+    @staticmethod
+    def _digest_id(channel_name: str, batch: List[QueuedNotification]) -> str:
+        """Digest id, the same on every delivery attempt of the batch."""
+        return f"digest_{channel_name}_{int(batch[0].enqueued_at * 1000)}"
+
+    def _build_digest(
+        self, channel_name: str, batch: List[QueuedNotification]
+    ) -> AlertEvent:
+        """Combine several queued alerts into a single digest alert."""
+        severity_order = [
+            AlertSeverity.INFO,
+            AlertSeverity.WARNING,
+            AlertSeverity.ERROR,
+            AlertSeverity.CRITICAL,
+        ]
+        alerts = [self._notified_alert(item) for item in batch]
+        severity = max(
+            (alert.severity for alert in alerts), key=severity_order.index
+        )
+        services = sorted({alert.service_name for alert in alerts})
+
+        return AlertEvent(
+            id=self._digest_id(channel_name, batch),
+            rule_id=batch[0].rule.id,
+            alert_type=alerts[0].alert_type,
+            severity=severity,
+            title=f"{len(alerts)} MCP alerts",
+            message="\n".join(
+                f"[{alert.severity.value.upper()}] {alert.title}: {alert.message}"
+                for alert in alerts
+            ),
+            service_name=", ".join(services),
+            timestamp=datetime.now(),
+            context_data={
+                "digest": True,
+                "alert_ids": [alert.id for alert in alerts],
+            },
+        )
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client for Slack and webhook notifications."""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(timeout=10.0)
+        return self._http_client
+
     async def _send_notification(
         self, channel: NotificationChannel, alert: AlertEvent, rule: AlertRule
     ) -> bool:
@@ -728,9 +910,20 @@ class MCPAlertManager:
         body = self._format_alert_message(alert, rule, format_type="email")
         msg.attach(MIMEText(body, "html"))
 
-        # Send email
+        # Send email (smtplib is blocking, keep it off the event loop)
+        try:
+            await asyncio.to_thread(self._send_smtp_message, config, msg)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Email send failed: {str(e)}")
+            return False
+
+    @staticmethod
+    def _send_smtp_message(config: Dict[str, Any], msg: MIMEMultipart) -> None:
+        """Send an email message over SMTP (blocking)."""
+        server = smtplib.SMTP(config["smtp_server"], config["smtp_port"], timeout=30)
         try:
-            server = smtplib.SMTP(config["smtp_server"], config["smtp_port"])
             if config.get("use_tls", True):
                 server.starttls()
 
@@ -738,12 +931,8 @@ class MCPAlertManager:
                 server.login(config["username"], config["password"])
 
             server.send_message(msg)
+        finally:
             server.quit()
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Email send failed: {str(e)}")
-            return False
 
     async def _send_slack_notification(
         self, channel: NotificationChannel, alert: AlertEvent, rule: AlertRule
@@ -796,9 +985,8 @@ class MCPAlertManager:
 
         # Send to Slack
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(webhook_url, json=message)
-                return response.status_code == 200
+            response = await self._get_http_client().post(webhook_url, json=message)
+            return response.status_code == 200
 
         except Exception as e:
             self.logger.error(f"Slack notification failed: {str(e)}")
@@ -827,16 +1015,16 @@ class MCPAlertManager:
             headers = config.get("headers", {})
             method = config.get("method", "POST").upper()
 
-            async with httpx.AsyncClient() as client:
-                if method == "POST":
-                    response = await client.post(url, json=payload, headers=headers)
-                elif method == "PUT":
-                    response = await client.put(url, json=payload, headers=headers)
-                else:
-                    self.logger.error(f"Unsupported webhook method: {method}")
-                    return False
+            client = self._get_http_client()
+            if method == "POST":
+                response = await client.post(url, json=payload, headers=headers)
+            elif method == "PUT":
+                response = await client.put(url, json=payload, headers=headers)
+            else:
+                self.logger.error(f"Unsupported webhook method: {method}")
+                return False
 
-                return 200 <= response.status_code < 300
+            return 200 <= response.status_code < 300
 
         except Exception as e:
             self.logger.error(f"Webhook notification failed: {str(e)}")
@@ -889,15 +1077,13 @@ Context: {json.dumps(alert.context_data, indent=2)}
         self, service_name: str, alert_type: AlertType
     ) -> None:
         """Resolve all active alerts of a specific type for a service."""
-        alerts_to_resolve = []
-
-        for alert_id, alert in self.active_alerts.items():
-            if (
-                alert.service_name == service_name
-                and alert.alert_type == alert_type
-                and alert.status == AlertStatus.ACTIVE
-            ):
-                alerts_to_resolve.append(alert_id)
+        alerts_to_resolve = [
+            alert_id
+            for alert_id in self._active_by_service_type.get(
+                (service_name, alert_type), ()
+            )
+            if self.active_alerts[alert_id].status == AlertStatus.ACTIVE
+        ]
 
         for alert_id in alerts_to_resolve:
             await self.resolve_alert(alert_id, "system", "Service recovered")
@@ -907,22 +1093,21 @@ Context: {json.dumps(alert.context_data, indent=2)}
         if len(self.active_alerts) <= self.max_active_alerts:
             return
 
-        # Sort alerts by timestamp (oldest first)
-        sorted_alerts = sorted(self.active_alerts.items(), key=lambda x: x[1].timestamp)
-
-        # Remove oldest alerts
+        # Active alerts are kept in creation order, so the oldest come first
         alerts_to_remove = (
             len(self.active_alerts) - self.max_active_alerts + 100
         )  # Remove extra for buffer
+        oldest_alerts = list(
+            itertools.islice(self.active_alerts.items(), alerts_to_remove)
+        )
 
-        for i in range(min(alerts_to_remove, len(sorted_alerts))):
-            alert_id, alert = sorted_alerts[i]
+        for alert_id, alert in oldest_alerts:
             if alert.status == AlertStatus.ACTIVE:
                 await self.resolve_alert(
                     alert_id, "system", "Auto-resolved due to alert limit"
                 )
             else:
-                del self.active_alerts[alert_id]
+                self._remove_active_alert(alert_id)
 
     async def acknowledge_alert(
         self, alert_id: str, acknowledged_by: str, notes: str = ""
@@ -952,7 +1137,7 @@ Context: {json.dumps(alert.context_data, indent=2)}
         alert.context_data["resolved_by"] = resolved_by
 
         # Remove from active alerts
-        del self.active_alerts[alert_id]
+        self._remove_active_alert(alert_id)
 
         self.logger.info(f"Alert resolved: {alert_id} by {resolved_by}")
         return True
@@ -964,7 +1149,7 @@ Context: {json.dumps(alert.context_data, indent=2)}
         if alert_id in self.active_alerts:
             alert = self.active_alerts[alert_id]
             alert.update_status(AlertStatus.SUPPRESSED)
-            del self.active_alerts[alert_id]
+            self._remove_active_alert(alert_id)
 
         # Track suppression
         self.suppressed_alerts[alert_id] = datetime.now()
@@ -974,6 +1159,50 @@ Context: {json.dumps(alert.context_data, indent=2)}
         )
         return True
 
+    def _remove_active_alert(self, alert_id: str) -> None:
+        """Remove an alert from the active set and its lookup indexes.
+
+        Pending escalation heap entries are dropped lazily when popped.
+        """
+        alert = self.active_alerts.pop(alert_id, None)
+        if alert is None:
+            return
+
+        if self._active_fingerprints.get(alert.fingerprint) == alert_id:
+            del self._active_fingerprints[alert.fingerprint]
+
+        key = (alert.service_name, alert.alert_type)
+        alert_ids = self._active_by_service_type.get(key)
+        if alert_ids is not None:
+            alert_ids.discard(alert_id)
+            if not alert_ids:
+                del self._active_by_service_type[key]
+
+    def _schedule_escalation(self, alert: AlertEvent) -> None:
+        """Push the alert's next escalation onto the timer heap."""
+        if not alert.next_escalation_at:
+            return
+
+        heapq.heappush(
+            self._escalation_heap,
+            (alert.next_escalation_at, next(self._escalation_seq), alert.id),
+        )
+
+        # Wake the monitoring loop if this is now the earliest deadline
+        if (
+            self._escalation_wakeup is not None
+            and self._escalation_heap[0][2] == alert.id
+        ):
+            self._escalation_wakeup.set()
+
+    def _seconds_until_next_escalation(self) -> float:
+        """Seconds until the earliest pending escalation, capped by the interval."""
+        if not self._escalation_heap:
+            return self.alert_check_interval
+
+        delay = (self._escalation_heap[0][0] - datetime.now()).total_seconds()
+        return min(max(delay, 0), self.alert_check_interval)
+
     async def start_monitoring(self) -> None:
         """Start the alert monitoring loop."""
         if self.is_running:
@@ -981,6 +1210,7 @@ Context: {json.dumps(alert.context_data, indent=2)}
             return
 
         self.is_running = True
+        self._escalation_wakeup = asyncio.Event()
         self.monitor_task = asyncio.create_task(self._monitoring_loop())
 
         self.logger.info("Started alert monitoring")
@@ -999,6 +1229,11 @@ Context: {json.dumps(alert.context_data, indent=2)}
             except asyncio.CancelledError:
                 pass
 
+        await self.notification_dispatcher.stop()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
         self.logger.info("Stopped alert monitoring")
 
     async def _monitoring_loop(self) -> None:
@@ -1013,8 +1248,15 @@ Context: {json.dumps(alert.context_data, indent=2)}
                 # Clean up old incidents
                 await self._cleanup_old_incidents()
 
-                # Wait for next check
-                await asyncio.sleep(self.alert_check_interval)
+                # Sleep until the next escalation is due or a new one is scheduled
+                self._escalation_wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._escalation_wakeup.wait(),
+                        timeout=self._seconds_until_next_escalation(),
+                    )
+                except asyncio.TimeoutError:
+                    pass
 
             except asyncio.CancelledError:
                 self.logger.info("Alert monitoring loop cancelled")
@@ -1024,55 +1266,49 @@ Context: {json.dumps(alert.context_data, indent=2)}
                 await asyncio.sleep(self.alert_check_interval)
 
     async def _check_escalations(self) -> None:
-        """Check for alerts that need escalation."""
+        """Escalate alerts whose timers have expired on the escalation heap."""
         now = datetime.now()
 
-        for alert in list(self.active_alerts.values()):
-            if (
-                alert.status == AlertStatus.ACTIVE
-                and alert.next_escalation_at
-                and now >= alert.next_escalation_at
-            ):
-                # Escalate alert
-                alert.escalation_level += 1
-                rule = self.alert_rules.get(alert.rule_id)
+        # Drain due entries first so rescheduled escalations wait for next cycle
+        due_entries = []
+        while self._escalation_heap and self._escalation_heap[0][0] <= now:
+            due_entries.append(heapq.heappop(self._escalation_heap))
 
-                if rule:
-                    alert.next_escalation_at = now + timedelta(
-                        minutes=rule.escalation_delay_minutes
-                    )
+        for due_at, _, alert_id in due_entries:
+            alert = self.active_alerts.get(alert_id)
 
-                    # Send escalation notification
-                    alert.title = f"[ESCALATED {alert.escalation_level}x] {alert.title}"
-                    await self._send_alert_notifications(alert, rule)
+            # Skip stale entries for resolved or rescheduled alerts
+            if (
+                alert is None
+                or alert.status != AlertStatus.ACTIVE
+                or alert.next_escalation_at != due_at
+            ):
+                continue
 
-                    self.logger.warning(
-                        f"Alert escalated: {alert.id} (level {alert.escalation_level})"
-                    )
+            # Escalate alert
+            alert.escalation_level += 1
+            rule = self.alert_rules.get(alert.rule_id)
 
-    async def _cleanup_old_incidents(self) -> None:
-        """Clean up old incident tracking data."""
-        cutoff_time = datetime.now() - timedelta(hours=24)
+            if rule:
+                alert.next_escalation_at = now + timedelta(
+                    minutes=rule.escalation_delay_minutes
+                )
+                self._schedule_escalation(alert)
 
-        # Clean rate limit incidents
-        for service_name in list(self.rate_limit_incidents.keys()):
-            incidents = self.rate_limit_incidents[service_name]
-            self.rate_limit_incidents[service_name] = [
-                incident for incident in incidents if incident >= cutoff_time
-            ]
+                # Send escalation notification (titled from escalation_level)
+                await self._send_alert_notifications(alert, rule)
 
-            if not self.rate_limit_incidents[service_name]:
-                del self.rate_limit_incidents[service_name]
+                self.logger.warning(
+                    f"Alert escalated: {alert.id} (level {alert.escalation_level})"
+                )
 
-        # Clean auth failure incidents
-        for key in list(self.auth_failure_incidents.keys()):
-            incidents = self.auth_failure_incidents[key]
-            self.auth_failure_incidents[key] = [
-                incident for incident in incidents if incident >= cutoff_time
-            ]
+    async def _cleanup_old_incidents(self) -> None:
+        """Drop window counters that no longer hold any events."""
+        now = datetime.now()
 
-            if not self.auth_failure_incidents[key]:
-                del self.auth_failure_incidents[key]
+        for key in list(self.window_counters.keys()):
+            if self.window_counters[key].count(now) == 0:
+                del self.window_counters[key]
 
     def get_active_alerts(self) -> List[Dict[str, Any]]:
         """Get all active alerts."""
@@ -1100,6 +1336,7 @@ Context: {json.dumps(alert.context_data, indent=2)}
                 1 for rule in self.alert_rules.values() if rule.enabled
             ),
             "notification_channels": len(self.notification_channels),
+            "notification_delivery": self.notification_dispatcher.get_statistics(),
         }
 
 
@@ -16,6 +16,8 @@ from enum import Enum
 
 from app.core.config import get_settings, get_mcp_config
 
+from .circuit_breaker import get_circuit_breaker_registry
+
 logger = logging.getLogger(__name__)
 
 
@@ -62,58 +64,6 @@ class MCPOperationResult:
         }
 
 
-class CircuitBreaker:
-    """Circuit breaker implementation for MCP operations"""
-
-    def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60):
-        self.failure_threshold = failure_threshold
-        self.recovery_timeout = recovery_timeout
-        self.failure_count = 0
-        self.last_failure_time: Optional[datetime] = None
-        self.state = MCPServerState.DISCONNECTED
-
-    def can_execute(self) -> bool:
-        """Check if operation can be executed"""
-        if self.state != MCPServerState.CIRCUIT_OPEN:
-            return True
-
-        # Check if we should attempt recovery
-        if (
-            self.last_failure_time
-            and datetime.now() - self.last_failure_time
-            > timedelta(seconds=self.recovery_timeout)
-        ):
-            logger.info("🔄 Circuit breaker attempting recovery...")
-            self.state = MCPServerState.CONNECTING  # Half-open state
-            return True
-
-        return False
-
-    def record_success(self) -> None:
-        """Record successful operation"""
-        self.failure_count = 0
-        self.state = MCPServerState.CONNECTED
-        logger.debug(
-            "✅ Circuit breaker: Operation successful, resetting failure count"
-        )
-
-    def record_failure(self) -> None:
-        """Record failed operation"""
-        self.failure_count += 1
-        self.last_failure_time = datetime.now()
-
-        if self.failure_count >= self.failure_threshold:
-            self.state = MCPServerState.CIRCUIT_OPEN
-            logger.warning(
-                f"⚡ Circuit breaker opened after {self.failure_count} failures. "
-                f"Will retry in {self.recovery_timeout} seconds"
-            )
-        else:
-            logger.debug(
-                f"❌ Circuit breaker: Failure {self.failure_count}/{self.failure_threshold}"
-            )
-
-
 class BaseMCPServer(ABC):
     """
     Base class for all MCP server implementations.
@@ -147,12 +97,9 @@ class BaseMCPServer(ABC):
         self.last_health_check: Optional[datetime] = None
         self.health_check_failures = 0
 
-        # Initialize circuit breaker
-        circuit_config = self.mcp_config.get_circuit_breaker_config()
-        self.circuit_breaker = CircuitBreaker(
-            failure_threshold=circuit_config["failure_threshold"],
-            recovery_timeout=circuit_config["recovery_timeout"],
-        )
+        # Service-wide circuit breaker, shared with every other instance of
+        # this service (instances are recreated per workflow)
+        self.circuit_breaker = get_circuit_breaker_registry().get(service_name)
 
         # Initialize logging
         self.logger = logging.getLogger(f"mcp.{service_name}")
@@ -211,7 +158,7 @@ class BaseMCPServer(ABC):
         last_error = None
 
         # Check circuit breaker
-        if not self.circuit_breaker.can_execute():
+        if not await self.circuit_breaker.allow():
             self.logger.warning(f"⚡ Circuit breaker open for {self.service_name}")
             return MCPOperationResult(
                 success=False,
@@ -237,7 +184,7 @@ class BaseMCPServer(ABC):
                 result = await self.execute_operation(operation, **kwargs)
 
                 if result.success:
-                    self.circuit_breaker.record_success()
+                    await self.circuit_breaker.record_success()
                     result.retry_count = retry_count
                     result.duration_ms = (time.time() - start_time) * 1000
 
@@ -268,7 +215,7 @@ class BaseMCPServer(ABC):
                 await asyncio.sleep(delay)
 
         # All retries exhausted
-        self.circuit_breaker.record_failure()
+        await self.circuit_breaker.record_failure()
         duration_ms = (time.time() - start_time) * 1000
 
         self.logger.error(
@@ -450,9 +397,11 @@ class BaseMCPServer(ABC):
             "circuit_breaker": {
                 "state": self.circuit_breaker.state.value,
                 "failure_count": self.circuit_breaker.failure_count,
-                "failure_threshold": self.circuit_breaker.failure_threshold,
+                "failure_rate_threshold": self.circuit_breaker.config.failure_rate,
                 "last_failure": (
-                    self.circuit_breaker.last_failure_time.isoformat()
+                    datetime.fromtimestamp(
+                        self.circuit_breaker.last_failure_time
+                    ).isoformat()
                     if self.circuit_breaker.last_failure_time
                     else None
                 ),
@@ -0,0 +1,492 @@
+"""
+MCP Circuit Breakers
+
+Circuit breakers shared by every MCP server instance of a service, so a
+service that is down stays short-circuited across workflows (MCP servers are
+recreated per workflow) and, with the Redis store, across worker processes.
+
+Provides:
+- CircuitBreakerConfig: sliding-window failure-rate thresholds and half-open
+  probe limits, defaulting to MCPConfig
+- BreakerState: closed, open, half_open
+- CircuitBreaker: breaker for one (service, scope) key; scope is a user id
+  or "global"
+- InMemoryBreakerStore: per-process state (default)
+- RedisBreakerStore: state shared across processes through Redis
+- CircuitBreakerRegistry: breakers keyed by (service, user or global)
+- get_circuit_breaker_registry(), set_circuit_breaker_registry(): global
+  instance
+
+State machine:
+- closed: calls pass; outcomes are counted in time buckets over the last
+  window_seconds. Once at least minimum_calls were seen and the failure
+  rate reaches failure_rate, the breaker opens.
+- open: calls are rejected with MCPCircuitOpenError until
+  recovery_timeout has elapsed, then the breaker turns half-open.
+- half_open: at most half_open_max_calls probe calls are let through. Any
+  probe failure reopens the breaker; when that many probes succeeded it
+  closes.
+
+Only failures that say something about service health (connection,
+timeout, network, unavailable) count; authentication or validation errors
+do not trip a breaker shared by other users.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import get_mcp_config
+
+from .error_handler import (
+    BaseMCPError,
+    MCPCircuitOpenError,
+    MCPErrorCategory,
+    get_error_handler,
+)
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import WatchError
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    WatchError = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_SCOPE = "global"
+WINDOW_BUCKETS = 10
+
+BREAKER_FAILURE_CATEGORIES = {
+    MCPErrorCategory.CONNECTION,
+    MCPErrorCategory.TIMEOUT,
+    MCPErrorCategory.NETWORK,
+    MCPErrorCategory.SERVICE_UNAVAILABLE,
+}
+
+
+class BreakerState(Enum):
+    """Circuit breaker states"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class CircuitBreakerConfig:
+    """Thresholds of a circuit breaker."""
+
+    failure_rate: float = 0.5
+    minimum_calls: int = 5
+    window_seconds: float = 60.0
+    recovery_timeout: float = 60.0
+    half_open_max_calls: int = 3
+
+    @classmethod
+    def from_mcp_config(cls) -> "CircuitBreakerConfig":
+        config = get_mcp_config().get_circuit_breaker_config()
+        return cls(
+            failure_rate=config["failure_rate"],
+            minimum_calls=config["failure_threshold"],
+            window_seconds=config["window_seconds"],
+            recovery_timeout=config["recovery_timeout"],
+            half_open_max_calls=config["half_open_max_calls"],
+        )
+
+    @property
+    def bucket_seconds(self) -> float:
+        return max(self.window_seconds / WINDOW_BUCKETS, 0.001)
+
+
+def new_breaker_state() -> Dict[str, Any]:
+    """Serializable state of one breaker, as kept by the stores."""
+    return {
+        "state": BreakerState.CLOSED.value,
+        "changed_at": 0.0,
+        "probes": 0,
+        "probe_successes": 0,
+        "last_failure_at": None,
+        "buckets": {},
+    }
+
+
+def _window_counts(
+    state: Dict[str, Any], config: CircuitBreakerConfig, now: float
+) -> Tuple[int, int]:
+    """Drop buckets outside the window; return (calls, failures) within it."""
+    oldest = int((now - config.window_seconds) // config.bucket_seconds)
+    buckets = {
+        index: counts
+        for index, counts in state["buckets"].items()
+        if int(index) > oldest
+    }
+    state["buckets"] = buckets
+    calls = sum(successes + failures for successes, failures in buckets.values())
+    failures = sum(failures for _, failures in buckets.values())
+    return calls, failures
+
+
+def _transition(state: Dict[str, Any], new_state: BreakerState, now: float) -> None:
+    state["state"] = new_state.value
+    state["changed_at"] = now
+    state["probes"] = 0
+    state["probe_successes"] = 0
+    if new_state != BreakerState.OPEN:
+        state["buckets"] = {}
+
+
+def acquire_permission(
+    state: Dict[str, Any], config: CircuitBreakerConfig, now: float
+) -> Tuple[bool, Optional[float]]:
+    """Decide whether a call may proceed; returns (allowed, retry_after)."""
+    if state["state"] == BreakerState.OPEN.value:
+        remaining = state["changed_at"] + config.recovery_timeout - now
+        if remaining > 0:
+            return False, remaining
+        _transition(state, BreakerState.HALF_OPEN, now)
+
+    if state["state"] == BreakerState.HALF_OPEN.value:
+        # Probes whose outcome was never recorded (crashed worker) expire
+        if now - state["changed_at"] > config.recovery_timeout:
+            _transition(state, BreakerState.HALF_OPEN, now)
+        if state["probes"] >= config.half_open_max_calls:
+            return False, config.bucket_seconds
+        state["probes"] += 1
+
+    return True, None
+
+
+def record_outcome(
+    state: Dict[str, Any], config: CircuitBreakerConfig, now: float, success: bool
+) -> None:
+    """Record a call outcome and apply the resulting state transition."""
+    if not success:
+        state["last_failure_at"] = now
+
+    if state["state"] == BreakerState.HALF_OPEN.value:
+        if not success:
+            _transition(state, BreakerState.OPEN, now)
+            return
+        state["probe_successes"] += 1
+        if state["probe_successes"] >= config.half_open_max_calls:
+            _transition(state, BreakerState.CLOSED, now)
+        return
+
+    if state["state"] == BreakerState.OPEN.value:
+        return  # late result of a call admitted before the breaker opened
+
+    bucket = str(int(now // config.bucket_seconds))
+    counts = state["buckets"].setdefault(bucket, [0, 0])
+    counts[0 if success else 1] += 1
+
+    calls, failures = _window_counts(state, config, now)
+    if (
+        not success
+        and calls >= config.minimum_calls
+        and failures / calls >= config.failure_rate
+    ):
+        _transition(state, BreakerState.OPEN, now)
+
+
+Mutation = Callable[[Dict[str, Any]], Any]
+
+
+class InMemoryBreakerStore:
+    """Keeps breaker state in this process."""
+
+    def __init__(self):
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    async def update(self, key: str, mutate: Mutation) -> Any:
+        """Apply mutate to the state of key atomically and return its result."""
+        with self._lock:
+            state = self._states.setdefault(key, new_breaker_state())
+            return mutate(state)
+
+    async def get(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(self._states.get(key, new_breaker_state())))
+
+    async def reset(self, key: str) -> None:
+        with self._lock:
+            self._states.pop(key, None)
+
+
+class RedisBreakerStore:
+    """Keeps breaker state in Redis so every worker shares it."""
+
+    def __init__(
+        self,
+        redis_url: str = "",
+        namespace: str = "pipewise:circuit",
+        client: Any = None,
+        ttl_seconds: int = 3600,
+        max_retries: int = 10,
+    ):
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is required for shared circuit breakers")
+
+        self.client = client or aioredis.from_url(redis_url, decode_responses=True)
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_retries = max_retries
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def update(self, key: str, mutate: Mutation) -> Any:
+        """Optimistic read-modify-write (WATCH/MULTI), retried on contention."""
+        redis_key = self._key(key)
+        async with self.client.pipeline(transaction=True) as pipe:
+            for _ in range(self.max_retries):
+                try:
+                    await pipe.watch(redis_key)
+                    raw = await pipe.get(redis_key)
+                    state = json.loads(raw) if raw else new_breaker_state()
+                    result = mutate(state)
+                    pipe.multi()
+                    pipe.set(redis_key, json.dumps(state), ex=self.ttl_seconds)
+                    await pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+        raise RuntimeError(f"Circuit breaker state for {key} is too contended")
+
+    async def get(self, key: str) -> Dict[str, Any]:
+        raw = await self.client.get(self._key(key))
+        return json.loads(raw) if raw else new_breaker_state()
+
+    async def reset(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one service and scope.
+
+    Store errors never block calls: if the state cannot be read the call is
+    allowed, so a Redis outage degrades to no circuit breaking.
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        scope: str = GLOBAL_SCOPE,
+        config: Optional[CircuitBreakerConfig] = None,
+        store: Any = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.service_name = service_name
+        self.scope = scope
+        self.config = config or CircuitBreakerConfig.from_mcp_config()
+        self.store = store or InMemoryBreakerStore()
+        self.clock = clock
+
+        # Last observed state, for synchronous status reporting
+        self.state = BreakerState.CLOSED
+        self.failure_count = 0
+        self.last_failure_time: Optional[float] = None
+        self.rejected = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.service_name}:{self.scope}"
+
+    def _observe(self, state: Dict[str, Any]) -> None:
+        self.state = BreakerState(state["state"])
+        self.failure_count = sum(f for _, f in state["buckets"].values())
+        self.last_failure_time = state["last_failure_at"]
+
+    async def acquire(self) -> Tuple[bool, Optional[float]]:
+        """Ask permission for a call; returns (allowed, retry_after_seconds)."""
+        now = self.clock()
+
+        def mutate(state):
+            result = acquire_permission(state, self.config, now)
+            self._observe(state)
+            return result
+
+        try:
+            allowed, retry_after = await self.store.update(self.key, mutate)
+        except Exception as e:
+            logger.debug(f"Circuit breaker store unavailable for {self.key}: {e}")
+            return True, None
+
+        if not allowed:
+            self.rejected += 1
+        return allowed, retry_after
+
+    async def allow(self) -> bool:
+        """True if a call may proceed now."""
+        allowed, _ = await self.acquire()
+        return allowed
+
+    async def check(self) -> None:
+        """Raise MCPCircuitOpenError if the call must be short-circuited."""
+        allowed, retry_after = await self.acquire()
+        if not allowed:
+            raise MCPCircuitOpenError(
+                self.service_name,
+                retry_after_seconds=retry_after,
+                context={"scope": self.scope},
+            )
+
+    async def _record(self, success: bool) -> None:
+        now = self.clock()
+        previous = self.state
+
+        def mutate(state):
+            record_outcome(state, self.config, now, success)
+            self._observe(state)
+
+        try:
+            await self.store.update(self.key, mutate)
+        except Exception as e:
+            logger.debug(f"Circuit breaker store unavailable for {self.key}: {e}")
+            return
+
+        if self.state != previous:
+            if self.state == BreakerState.OPEN:
+                logger.warning(
+                    f"⚡ Circuit breaker opened for {self.key}. "
+                    f"Will retry in {self.config.recovery_timeout} seconds"
+                )
+            elif self.state == BreakerState.CLOSED:
+                logger.info(f"✅ Circuit breaker closed for {self.key}")
+
+    async def record_success(self) -> None:
+        await self._record(True)
+
+    async def record_failure(self) -> None:
+        await self._record(False)
+
+    @staticmethod
+    def is_breaker_failure(error: Exception) -> bool:
+        """Whether an error indicates the service itself is unhealthy."""
+        if isinstance(error, MCPCircuitOpenError):
+            return False
+        if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+            return True
+        if not isinstance(error, BaseMCPError):
+            error = get_error_handler().classify_error(error)
+        return error.category in BREAKER_FAILURE_CATEGORIES
+
+    async def record_error(self, error: Exception) -> None:
+        """Record a failed call; errors unrelated to service health count as success."""
+        await self._record(not self.is_breaker_failure(error))
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run func through the breaker."""
+        await self.check()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            await self.record_error(e)
+            raise
+        await self.record_success()
+        return result
+
+    async def reset(self) -> None:
+        await self.store.reset(self.key)
+        self._observe(new_breaker_state())
+
+    async def get_state(self) -> Dict[str, Any]:
+        """Current shared state (refreshes the observed state)."""
+        state = await self.store.get(self.key)
+        self._observe(state)
+        return state
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "service": self.service_name,
+            "scope": self.scope,
+            "state": self.state.value,
+            "failure_count": self.failure_count,
+            "last_failure_time": self.last_failure_time,
+            "rejected": self.rejected,
+        }
+
+
+class CircuitBreakerRegistry:
+    """Circuit breakers keyed by (service, user id or global)."""
+
+    def __init__(
+        self,
+        store: Any = None,
+        config: Optional[CircuitBreakerConfig] = None,
+        service_configs: Optional[Dict[str, CircuitBreakerConfig]] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.store = store or InMemoryBreakerStore()
+        self.config = config
+        self.service_configs = service_configs or {}
+        self.clock = clock
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service_name: str, user_id: Optional[str] = None) -> CircuitBreaker:
+        """Breaker of a service for one user, or the service-wide breaker."""
+        key = (service_name, user_id or GLOBAL_SCOPE)
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                config = self.service_configs.get(service_name) or self.config
+                breaker = CircuitBreaker(
+                    service_name,
+                    scope=key[1],
+                    config=config,
+                    store=self.store,
+                    clock=self.clock,
+                )
+                self._breakers[key] = breaker
+            return breaker
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {
+            "breakers": len(breakers),
+            "open": [b.key for b in breakers if b.state == BreakerState.OPEN],
+            "half_open": [b.key for b in breakers if b.state == BreakerState.HALF_OPEN],
+            "rejected": sum(b.rejected for b in breakers),
+        }
+
+
+def create_circuit_breaker_registry() -> CircuitBreakerRegistry:
+    """Build the registry from MCP configuration (MCP_CIRCUIT_BREAKER_BACKEND)."""
+    backend = get_mcp_config().mcp_circuit_breaker_backend.lower()
+    if backend == "redis":
+        from app.core.config import get_settings
+
+        return CircuitBreakerRegistry(RedisBreakerStore(get_settings().REDIS_URL))
+    return CircuitBreakerRegistry(InMemoryBreakerStore())
+
+
+_registry: Optional[CircuitBreakerRegistry] = None
+
+
+def get_circuit_breaker_registry() -> CircuitBreakerRegistry:
+    """Get the global circuit breaker registry."""
+    global _registry
+    if _registry is None:
+        _registry = create_circuit_breaker_registry()
+    return _registry
+
+
+def set_circuit_breaker_registry(registry: Optional[CircuitBreakerRegistry]) -> None:
+    """Replace the global registry (used by tests)."""
+    global _registry
+    _registry = registry
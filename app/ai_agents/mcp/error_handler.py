@@ -322,6 +322,26 @@ class MCPServiceUnavailableError(BaseMCPError):
         )
 
 
+class MCPCircuitOpenError(MCPServiceUnavailableError):
+    """Call rejected without reaching the service because its circuit is open"""
+
+    def __init__(
+        self,
+        service_name: str,
+        retry_after_seconds: Optional[float] = None,
+        message: str = "",
+        **kwargs,
+    ):
+        if not message:
+            message = f"Circuit breaker is open for {service_name}"
+        context = kwargs.get("context") or {}
+        if retry_after_seconds is not None:
+            context["retry_after_seconds"] = retry_after_seconds
+        kwargs["context"] = context
+        super().__init__(service_name=service_name, message=message, **kwargs)
+        self.retry_after_seconds = retry_after_seconds
+
+
 class MCPTimeoutError(BaseMCPError):
     """Operation timeout"""
 
@@ -10,6 +10,7 @@ This module provides comprehensive health monitoring for all MCP services includ
 """
 
 import asyncio
+import random
 import time
 import logging
 from typing import Dict, Any, List, Optional, Callable, Set, Union, Awaitable
@@ -21,6 +22,13 @@ from collections import defaultdict, deque
 import statistics
 import httpx
 
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 from app.ai_agents.mcp.error_handler import (
     MCPConnectionError,
     MCPOperationError,
@@ -181,6 +189,44 @@ class Alert:
         }
 
 
+class StubHealthTransport(httpx.AsyncBaseTransport):
+    """
+    Local stub transport for offline health checks and load testing.
+
+    Answers every request without touching the network. Responses are chosen
+    per host, so individual services can be made slow or failing.
+    """
+
+    def __init__(
+        self,
+        default_status: int = 200,
+        default_latency_ms: float = 0.0,
+        host_status: Optional[Dict[str, int]] = None,
+        host_latency_ms: Optional[Dict[str, float]] = None,
+    ):
+        self.default_status = default_status
+        self.default_latency_ms = default_latency_ms
+        self.host_status: Dict[str, int] = host_status or {}
+        self.host_latency_ms: Dict[str, float] = host_latency_ms or {}
+        self.request_count = 0
+        self.requests_by_host: Dict[str, int] = defaultdict(int)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.request_count += 1
+        self.requests_by_host[host] += 1
+
+        latency_ms = self.host_latency_ms.get(host, self.default_latency_ms)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        return httpx.Response(
+            self.host_status.get(host, self.default_status),
+            json={"status": "ok"},
+            request=request,
+        )
+
+
 class MCPHealthMonitor:
     """Main health monitoring system for MCP services."""
 
@@ -190,20 +236,44 @@ class MCPHealthMonitor:
         alert_threshold: int = 3,  # Alert after 3 consecutive failures
         timeout: int = 30,  # 30 second timeout for health checks
         enable_auto_alerts: bool = True,
+        max_concurrent_checks: int = 4,
+        jitter_ratio: float = 0.1,
+        max_backoff_interval: int = 1800,  # 30 minutes
+        transport: Optional[httpx.AsyncBaseTransport] = None,
     ):
         """
         Initialize the health monitor.
 
         Args:
-            check_interval: Time between health checks in seconds
+            check_interval: Default time between health checks in seconds
             alert_threshold: Number of consecutive failures before alerting
             timeout: Timeout for individual health checks in seconds
             enable_auto_alerts: Whether to automatically generate alerts
+            max_concurrent_checks: Maximum number of probes in flight at once
+            jitter_ratio: Random spread applied to each probe interval (0.1 = ±10%)
+            max_backoff_interval: Upper bound for the backed-off interval of
+                unhealthy services, in seconds
+            transport: Optional httpx transport for the shared client, e.g.
+                StubHealthTransport for offline load tests
         """
         self.check_interval = check_interval
         self.alert_threshold = alert_threshold
         self.timeout = timeout
         self.enable_auto_alerts = enable_auto_alerts
+        self.max_concurrent_checks = max_concurrent_checks
+        self.jitter_ratio = jitter_ratio
+        self.max_backoff_interval = max_backoff_interval
+        self.transport = transport
+
+        # Shared pooled HTTP client, created lazily inside the running loop
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._check_semaphore = asyncio.Semaphore(max_concurrent_checks)
+
+        # Per-service scheduling (monotonic time of the next probe)
+        self.service_intervals: Dict[str, int] = {}
+        self.next_check_at: Dict[str, float] = {}
+        self._probe_tasks: Dict[str, asyncio.Task] = {}  # in-flight scheduled probes
+        self._probe_finished = asyncio.Event()  # wakes the loop to reschedule
 
         # Service monitoring data
         self.metrics: Dict[str, ServiceMetrics] = {}
@@ -248,6 +318,7 @@ class MCPHealthMonitor:
         service_name: str,
         config: Dict[str, Any],
         health_checker: Optional[Callable] = None,
+        check_interval: Optional[int] = None,
     ) -> None:
         """
         Register a service for monitoring.
@@ -256,10 +327,20 @@ class MCPHealthMonitor:
             service_name: Name of the service
             config: Service configuration including endpoints and credentials
             health_checker: Custom health check function for the service
+            check_interval: Probe interval for this service in seconds,
+                defaults to the monitor-wide check_interval
         """
         self.service_configs[service_name] = config
         self.metrics[service_name] = ServiceMetrics(service_name=service_name)
 
+        if check_interval:
+            self.service_intervals[service_name] = check_interval
+
+        # Spread first probes across the interval instead of firing together
+        self.next_check_at[service_name] = time.monotonic() + random.uniform(
+            0, self.jitter_ratio * self.get_check_interval(service_name)
+        )
+
         if health_checker:
             self.health_checkers[service_name] = health_checker
 
@@ -267,6 +348,58 @@ class MCPHealthMonitor:
             f"Registered service for monitoring", extra={"service_name": service_name}
         )
 
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared HTTP client used by all probes.
+
+        Connections are kept alive between probes (and multiplexed over
+        HTTP/2 when h2 is installed), so repeated checks against the same
+        host skip the TCP and TLS handshakes.
+        """
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=HTTP2_AVAILABLE and self.transport is None,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrent_checks * 2,
+                    max_keepalive_connections=self.max_concurrent_checks * 2,
+                    keepalive_expiry=max(self.check_interval * 2, 60),
+                ),
+                transport=self.transport,
+            )
+        return self._http_client
+
+    async def close(self) -> None:
+        """Close the shared HTTP client."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def get_check_interval(self, service_name: str) -> float:
+        """
+        Get the current probe interval for a service.
+
+        Unhealthy services back off exponentially with each consecutive
+        failure, up to max_backoff_interval, so a down service is not probed
+        at full rate.
+        """
+        interval = self.service_intervals.get(service_name, self.check_interval)
+
+        metrics = self.metrics.get(service_name)
+        if metrics and metrics.consecutive_failures > 0:
+            backoff = interval * (2 ** min(metrics.consecutive_failures, 10))
+            interval = max(interval, min(backoff, self.max_backoff_interval))
+
+        return interval
+
+    def _schedule_next_check(self, service_name: str) -> None:
+        """Schedule the next probe for a service with jitter applied."""
+        interval = self.get_check_interval(service_name)
+        jitter = random.uniform(-self.jitter_ratio, self.jitter_ratio) * interval
+        self.next_check_at[service_name] = time.monotonic() + max(
+            interval + jitter, 1
+        )
+
     def register_default_health_checkers(self) -> None:
         """Register default health checkers for known services."""
         self.health_checkers.update(
@@ -287,31 +420,31 @@ class MCPHealthMonitor:
         start_time = time.time()
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {"Authorization": f"Bearer {config.get('api_key')}"}
-                response = await client.get(
-                    "https://api.sendgrid.com/v3/user/profile", headers=headers
-                )
+            client = self._get_http_client()
+            headers = {"Authorization": f"Bearer {config.get('api_key')}"}
+            response = await client.get(
+                "https://api.sendgrid.com/v3/user/profile", headers=headers
+            )
 
-                response_time = (time.time() - start_time) * 1000
+            response_time = (time.time() - start_time) * 1000
 
-                if response.status_code == 200:
-                    return HealthCheckResult(
-                        service_name="sendgrid",
-                        status=ServiceStatus.HEALTHY,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        details={"status_code": response.status_code},
-                    )
-                else:
-                    return HealthCheckResult(
-                        service_name="sendgrid",
-                        status=ServiceStatus.DEGRADED,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        error_message=f"HTTP {response.status_code}",
-                        details={"status_code": response.status_code},
-                    )
+            if response.status_code == 200:
+                return HealthCheckResult(
+                    service_name="sendgrid",
+                    status=ServiceStatus.HEALTHY,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    details={"status_code": response.status_code},
+                )
+            else:
+                return HealthCheckResult(
+                    service_name="sendgrid",
+                    status=ServiceStatus.DEGRADED,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    error_message=f"HTTP {response.status_code}",
+                    details={"status_code": response.status_code},
+                )
 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -328,31 +461,31 @@ class MCPHealthMonitor:
         start_time = time.time()
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {"Authorization": f"Bearer {config.get('bearer_token')}"}
-                response = await client.get(
-                    "https://api.twitter.com/2/users/me", headers=headers
-                )
+            client = self._get_http_client()
+            headers = {"Authorization": f"Bearer {config.get('bearer_token')}"}
+            response = await client.get(
+                "https://api.twitter.com/2/users/me", headers=headers
+            )
 
-                response_time = (time.time() - start_time) * 1000
+            response_time = (time.time() - start_time) * 1000
 
-                if response.status_code == 200:
-                    return HealthCheckResult(
-                        service_name="twitter",
-                        status=ServiceStatus.HEALTHY,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        details={"status_code": response.status_code},
-                    )
-                else:
-                    return HealthCheckResult(
-                        service_name="twitter",
-                        status=ServiceStatus.DEGRADED,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        error_message=f"HTTP {response.status_code}",
-                        details={"status_code": response.status_code},
-                    )
+            if response.status_code == 200:
+                return HealthCheckResult(
+                    service_name="twitter",
+                    status=ServiceStatus.HEALTHY,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    details={"status_code": response.status_code},
+                )
+            else:
+                return HealthCheckResult(
+                    service_name="twitter",
+                    status=ServiceStatus.DEGRADED,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    error_message=f"HTTP {response.status_code}",
+                    details={"status_code": response.status_code},
+                )
 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -369,31 +502,31 @@ class MCPHealthMonitor:
         start_time = time.time()
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {"Authorization": f"Bearer {config.get('access_token')}"}
-                response = await client.get(
-                    "https://api.calendly.com/users/me", headers=headers
-                )
+            client = self._get_http_client()
+            headers = {"Authorization": f"Bearer {config.get('access_token')}"}
+            response = await client.get(
+                "https://api.calendly.com/users/me", headers=headers
+            )
 
-                response_time = (time.time() - start_time) * 1000
+            response_time = (time.time() - start_time) * 1000
 
-                if response.status_code == 200:
-                    return HealthCheckResult(
-                        service_name="calendly",
-                        status=ServiceStatus.HEALTHY,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        details={"status_code": response.status_code},
-                    )
-                else:
-                    return HealthCheckResult(
-                        service_name="calendly",
-                        status=ServiceStatus.DEGRADED,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        error_message=f"HTTP {response.status_code}",
-                        details={"status_code": response.status_code},
-                    )
+            if response.status_code == 200:
+                return HealthCheckResult(
+                    service_name="calendly",
+                    status=ServiceStatus.HEALTHY,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    details={"status_code": response.status_code},
+                )
+            else:
+                return HealthCheckResult(
+                    service_name="calendly",
+                    status=ServiceStatus.DEGRADED,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    error_message=f"HTTP {response.status_code}",
+                    details={"status_code": response.status_code},
+                )
 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -414,32 +547,32 @@ class MCPHealthMonitor:
         try:
             # For Google Calendar, we'll check the calendar list endpoint
             # This would require proper OAuth token handling
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {"Authorization": f"Bearer {config.get('access_token')}"}
-                response = await client.get(
-                    "https://www.googleapis.com/calendar/v3/users/me/calendarList",
-                    headers=headers,
-                )
+            client = self._get_http_client()
+            headers = {"Authorization": f"Bearer {config.get('access_token')}"}
+            response = await client.get(
+                "https://www.googleapis.com/calendar/v3/users/me/calendarList",
+                headers=headers,
+            )
 
-                response_time = (time.time() - start_time) * 1000
+            response_time = (time.time() - start_time) * 1000
 
-                if response.status_code == 200:
-                    return HealthCheckResult(
-                        service_name="google_calendar",
-                        status=ServiceStatus.HEALTHY,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        details={"status_code": response.status_code},
-                    )
-                else:
-                    return HealthCheckResult(
-                        service_name="google_calendar",
-                        status=ServiceStatus.DEGRADED,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        error_message=f"HTTP {response.status_code}",
-                        details={"status_code": response.status_code},
-                    )
+            if response.status_code == 200:
+                return HealthCheckResult(
+                    service_name="google_calendar",
+                    status=ServiceStatus.HEALTHY,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    details={"status_code": response.status_code},
+                )
+            else:
+                return HealthCheckResult(
+                    service_name="google_calendar",
+                    status=ServiceStatus.DEGRADED,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    error_message=f"HTTP {response.status_code}",
+                    details={"status_code": response.status_code},
+                )
 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -461,30 +594,30 @@ class MCPHealthMonitor:
             base_url = config.get("base_url", "https://api.pipedrive.com/v1")
             api_token = config.get("api_token")
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(
-                    f"{base_url}/users/me", params={"api_token": api_token}
-                )
+            client = self._get_http_client()
+            response = await client.get(
+                f"{base_url}/users/me", params={"api_token": api_token}
+            )
 
-                response_time = (time.time() - start_time) * 1000
+            response_time = (time.time() - start_time) * 1000
 
-                if response.status_code == 200:
-                    return HealthCheckResult(
-                        service_name="pipedrive",
-                        status=ServiceStatus.HEALTHY,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        details={"status_code": response.status_code},
-                    )
-                else:
-                    return HealthCheckResult(
-                        service_name="pipedrive",
-                        status=ServiceStatus.DEGRADED,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        error_message=f"HTTP {response.status_code}",
-                        details={"status_code": response.status_code},
-                    )
+            if response.status_code == 200:
+                return HealthCheckResult(
+                    service_name="pipedrive",
+                    status=ServiceStatus.HEALTHY,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    details={"status_code": response.status_code},
+                )
+            else:
+                return HealthCheckResult(
+                    service_name="pipedrive",
+                    status=ServiceStatus.DEGRADED,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    error_message=f"HTTP {response.status_code}",
+                    details={"status_code": response.status_code},
+                )
 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -507,31 +640,31 @@ class MCPHealthMonitor:
             instance_url = config.get("instance_url")
             access_token = config.get("access_token")
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {"Authorization": f"Bearer {access_token}"}
-                response = await client.get(
-                    f"{instance_url}/services/data/v54.0/sobjects/", headers=headers
-                )
+            client = self._get_http_client()
+            headers = {"Authorization": f"Bearer {access_token}"}
+            response = await client.get(
+                f"{instance_url}/services/data/v54.0/sobjects/", headers=headers
+            )
 
-                response_time = (time.time() - start_time) * 1000
+            response_time = (time.time() - start_time) * 1000
 
-                if response.status_code == 200:
-                    return HealthCheckResult(
-                        service_name="salesforce",
-                        status=ServiceStatus.HEALTHY,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        details={"status_code": response.status_code},
-                    )
-                else:
-                    return HealthCheckResult(
-                        service_name="salesforce",
-                        status=ServiceStatus.DEGRADED,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        error_message=f"HTTP {response.status_code}",
-                        details={"status_code": response.status_code},
-                    )
+            if response.status_code == 200:
+                return HealthCheckResult(
+                    service_name="salesforce",
+                    status=ServiceStatus.HEALTHY,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    details={"status_code": response.status_code},
+                )
+            else:
+                return HealthCheckResult(
+                    service_name="salesforce",
+                    status=ServiceStatus.DEGRADED,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    error_message=f"HTTP {response.status_code}",
+                    details={"status_code": response.status_code},
+                )
 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -551,31 +684,31 @@ class MCPHealthMonitor:
             api_domain = config.get("api_domain", "www.zohoapis.com")
             access_token = config.get("access_token")
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
-                response = await client.get(
-                    f"https://{api_domain}/crm/v2/org", headers=headers
-                )
+            client = self._get_http_client()
+            headers = {"Authorization": f"Zoho-oauthtoken {access_token}"}
+            response = await client.get(
+                f"https://{api_domain}/crm/v2/org", headers=headers
+            )
 
-                response_time = (time.time() - start_time) * 1000
+            response_time = (time.time() - start_time) * 1000
 
-                if response.status_code == 200:
-                    return HealthCheckResult(
-                        service_name="zoho",
-                        status=ServiceStatus.HEALTHY,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        details={"status_code": response.status_code},
-                    )
-                else:
-                    return HealthCheckResult(
-                        service_name="zoho",
-                        status=ServiceStatus.DEGRADED,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        error_message=f"HTTP {response.status_code}",
-                        details={"status_code": response.status_code},
-                    )
+            if response.status_code == 200:
+                return HealthCheckResult(
+                    service_name="zoho",
+                    status=ServiceStatus.HEALTHY,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    details={"status_code": response.status_code},
+                )
+            else:
+                return HealthCheckResult(
+                    service_name="zoho",
+                    status=ServiceStatus.DEGRADED,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    error_message=f"HTTP {response.status_code}",
+                    details={"status_code": response.status_code},
+                )
 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -597,29 +730,29 @@ class MCPHealthMonitor:
             base_url = config.get("base_url", "https://api.pipedream.com/v1")
             api_key = config.get("api_key")
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                headers = {"Authorization": f"Bearer {api_key}"}
-                response = await client.get(f"{base_url}/users/me", headers=headers)
+            client = self._get_http_client()
+            headers = {"Authorization": f"Bearer {api_key}"}
+            response = await client.get(f"{base_url}/users/me", headers=headers)
 
-                response_time = (time.time() - start_time) * 1000
+            response_time = (time.time() - start_time) * 1000
 
-                if response.status_code == 200:
-                    return HealthCheckResult(
-                        service_name="pipedream",
-                        status=ServiceStatus.HEALTHY,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        details={"status_code": response.status_code},
-                    )
-                else:
-                    return HealthCheckResult(
-                        service_name="pipedream",
-                        status=ServiceStatus.DEGRADED,
-                        response_time_ms=response_time,
-                        timestamp=datetime.now(),
-                        error_message=f"HTTP {response.status_code}",
-                        details={"status_code": response.status_code},
-                    )
+            if response.status_code == 200:
+                return HealthCheckResult(
+                    service_name="pipedream",
+                    status=ServiceStatus.HEALTHY,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    details={"status_code": response.status_code},
+                )
+            else:
+                return HealthCheckResult(
+                    service_name="pipedream",
+                    status=ServiceStatus.DEGRADED,
+                    response_time_ms=response_time,
+                    timestamp=datetime.now(),
+                    error_message=f"HTTP {response.status_code}",
+                    details={"status_code": response.status_code},
+                )
 
         except Exception as e:
             response_time = (time.time() - start_time) * 1000
@@ -663,7 +796,8 @@ class MCPHealthMonitor:
             )
 
         try:
-            result = await health_checker(config)
+            async with self._check_semaphore:
+                result = await health_checker(config)
 
             # Update metrics
             if service_name in self.metrics:
@@ -891,31 +1025,66 @@ class MCPHealthMonitor:
             except asyncio.CancelledError:
                 pass
 
+        probes = list(self._probe_tasks.values())
+        for probe in probes:
+            probe.cancel()
+        await asyncio.gather(*probes, return_exceptions=True)
+        self._probe_tasks.clear()
+
+        await self.close()
+
         self.logger.info("Stopped health monitoring")
 
     async def _monitoring_loop(self) -> None:
-        """Main monitoring loop that runs periodic health checks."""
+        """
+        Main monitoring loop that runs periodic health checks.
+
+        Each service is probed on its own jittered schedule; the loop wakes up
+        for whichever service is due next. Every probe runs as its own task,
+        so a slow or timing-out probe only delays its own next check.
+        """
         self.logger.info("Health monitoring loop started")
 
         while self.is_running:
             try:
-                start_time = time.time()
-
-                # Perform health checks for all services
-                results = await self.check_all_services()
-
-                check_duration = time.time() - start_time
+                self._probe_finished.clear()
+                now = time.monotonic()
+                due_services = [
+                    service_name
+                    for service_name in self.service_configs
+                    if service_name not in self._probe_tasks
+                    and self.next_check_at.get(service_name, 0) <= now
+                ]
+
+                for service_name in due_services:
+                    self._probe_tasks[service_name] = asyncio.create_task(
+                        self._scheduled_probe(service_name),
+                        name=f"health_probe_{service_name}",
+                    )
+                if due_services:
+                    self.logger.debug(
+                        f"Started {len(due_services)} health probes",
+                        extra={"services_checked": len(due_services)},
+                    )
 
-                self.logger.info(
-                    f"Completed health check cycle in {check_duration:.2f}s",
-                    extra={
-                        "services_checked": len(results),
-                        "cycle_duration": check_duration,
-                    },
+                # Wait until the next idle service is due
+                next_due = min(
+                    (
+                        self.next_check_at.get(service_name, now)
+                        for service_name in self.service_configs
+                        if service_name not in self._probe_tasks
+                    ),
+                    default=time.monotonic() + self.check_interval,
                 )
-
-                # Wait for next check interval
-                await asyncio.sleep(self.check_interval)
+                try:
+                    await asyncio.wait_for(
+                        self._probe_finished.wait(),
+                        timeout=min(
+                            max(next_due - time.monotonic(), 0.1), self.check_interval
+                        ),
+                    )
+                except asyncio.TimeoutError:
+                    pass
 
             except asyncio.CancelledError:
                 self.logger.info("Health monitoring loop cancelled")
@@ -925,6 +1094,17 @@ class MCPHealthMonitor:
                 # Continue monitoring even if there's an error
                 await asyncio.sleep(self.check_interval)
 
+    async def _scheduled_probe(self, service_name: str) -> None:
+        """Probe one service, then schedule its next check from when it finished."""
+        try:
+            await self.check_service_health(service_name)
+        except Exception as e:
+            self.logger.error(f"Health probe for {service_name} failed: {str(e)}")
+        finally:
+            self._schedule_next_check(service_name)
+            self._probe_tasks.pop(service_name, None)
+            self._probe_finished.set()
+
     def get_service_metrics(self, service_name: Optional[str] = None) -> Dict[str, Any]:
         """
         Get performance metrics for services.
@@ -331,7 +331,7 @@ class MCPCRMManager:
 
             # mark_lead_as_contacted only accepts lead_id and contact_method
             updated_lead = self.db_client.mark_lead_as_contacted(
-                lead.id, contact_method
+                lead.id, contact_method, owner_id=self.user_id
             )
             logger.info(f"✅ Lead {lead.id} marked as contacted in local database")
             return True
@@ -7,6 +7,8 @@ and management logic extracted from agents.py.
 Provides:
 - MCP server creation for different integration types
 - Connection management and comprehensive error handling
+- Concurrent server connection with per-server timeouts, retries and a
+  quorum/deadline for partial results
 - OAuth integration checking
 - Local MCP server creation
 - Integration with retry logic and circuit breaker patterns
@@ -15,18 +17,29 @@ Following PRD: prd-pipedream-mcp-integration.md
 Enhanced with error handling system from Task 2.0
 """
 
+import asyncio
 import os
 import logging
 import tempfile
 from typing import Dict, Any, List, Optional, Union
 
+from app.core.config import get_mcp_config
+from app.core.tracing import instrument_mcp_server, trace_span
+
 from .error_handler import (
     MCPConnectionError,
     MCPConfigurationError,
     MCPAuthenticationError,
+    MCPTimeoutError,
     get_error_handler,
 )
-from .retry_handler import retry_mcp_operation
+from .retry_handler import (
+    RetryStrategy,
+    create_retry_strategy_from_config,
+    remaining_time,
+    retry_async_operation,
+    retry_mcp_operation,
+)
 from .oauth_integration import (
     OAuthTokens,
     MCPCredentials,
@@ -59,50 +72,141 @@ def create_pipedream_mcp_servers(user_id: Optional[str] = None) -> List[Any]:
     return []
 
 
-@retry_mcp_operation(max_attempts=3, service_name="mcp_connection", log_attempts=True)
-async def connect_mcp_servers_properly(mcp_servers: List[Any]) -> List[Any]:
+def _server_name(server: Any) -> str:
+    return getattr(server, "name", type(server).__name__)
+
+
+async def connect_mcp_server(
+    server: Any,
+    connect_timeout: float,
+    strategy: Optional[RetryStrategy] = None,
+) -> Any:
     """
-    Connect MCP servers with comprehensive error handling and retry logic.
+    Connect one MCP server with a per-attempt timeout, retrying only this server.
 
     Args:
-        mcp_servers: List of MCP server configurations
+        server: MCP server to connect
+        connect_timeout: Seconds allowed for each connection attempt
+        strategy: Retry strategy (MCP configuration defaults if not provided)
 
     Returns:
-        List of successfully connected MCP servers
+        The connected, instrumented server
 
     Raises:
-        MCPConnectionError: If critical connection failures occur
+        BaseMCPError: If every attempt fails
     """
-    connected = []
-    error_handler = get_error_handler()
+    server_name = _server_name(server)
 
-    for server in mcp_servers:
+    async def attempt_connect() -> None:
         try:
-            # Get server name for better error reporting
-            server_name = getattr(server, "name", type(server).__name__)
-
-            # Actually connect the server with timeout
-            await server.connect()
-            logger.info(f"✅ MCP server connected successfully: {server_name}")
-            connected.append(server)
-
-        except Exception as raw_error:
-            # Classify and handle the error
-            server_name = getattr(server, "name", type(server).__name__)
-            mcp_error = error_handler.handle_error(
-                raw_error,
+            with trace_span("mcp.connect", server=server_name):
+                await asyncio.wait_for(server.connect(), timeout=connect_timeout)
+        except asyncio.TimeoutError:
+            raise MCPTimeoutError(
                 service_name=server_name,
                 operation="connect_server",
-                context={"server_type": type(server).__name__},
+                timeout_seconds=connect_timeout,
             )
 
-            # Log user-friendly error message
-            logger.warning(f"⚠️ {mcp_error.get_user_friendly_message()}")
+    await retry_async_operation(
+        attempt_connect,
+        strategy or create_retry_strategy_from_config("mcp_connection"),
+        server_name,
+        "connect_server",
+    )
+    logger.info(f"✅ MCP server connected successfully: {server_name}")
+    return instrument_mcp_server(server)
+
+
+async def connect_mcp_servers_properly(
+    mcp_servers: List[Any],
+    connect_timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    quorum: Optional[int] = None,
+    strategy: Optional[RetryStrategy] = None,
+) -> List[Any]:
+    """
+    Connect MCP servers concurrently with comprehensive error handling.
+
+    Every server connects in its own task with a per-attempt timeout and its
+    own retries, so a hanging endpoint neither blocks the others nor causes
+    servers that already connected to be reconnected. The call returns as
+    soon as `quorum` servers are connected or `deadline` expires; servers
+    still connecting at that point are cancelled.
 
-            # Continue with other servers instead of failing completely
-            continue
+    Args:
+        mcp_servers: List of MCP server configurations
+        connect_timeout: Seconds per connection attempt
+            (default: MCP_CONNECTION_TIMEOUT)
+        deadline: Seconds for the whole fan-out (default: MCP_TIMEOUT_SECONDS),
+            cut short by the caller's deadline_scope()
+        quorum: Connected servers needed to return early (default: all)
+        strategy: Per-server retry strategy (default: MCP configuration)
+
+    Returns:
+        List of successfully connected MCP servers, in input order
+
+    Raises:
+        MCPConnectionError: If no server could be connected
+    """
+    if not mcp_servers:
+        return []
+
+    mcp_config = get_mcp_config()
+    connect_timeout = connect_timeout or mcp_config.mcp_connection_timeout
+    deadline = deadline or mcp_config.mcp_timeout_seconds
+    remaining = remaining_time()
+    if remaining is not None:
+        deadline = min(deadline, max(remaining, 0.0))
+    needed = min(quorum or len(mcp_servers), len(mcp_servers))
+    error_handler = get_error_handler()
+
+    loop = asyncio.get_running_loop()
+    stop_at = loop.time() + deadline
+    tasks = {
+        asyncio.create_task(connect_mcp_server(server, connect_timeout, strategy)): server
+        for server in mcp_servers
+    }
+    connected_by_server: Dict[int, Any] = {}
+    pending = set(tasks)
+
+    with trace_span("mcp.connect_all", servers=len(mcp_servers), quorum=needed):
+        try:
+            while pending and len(connected_by_server) < needed:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=max(0.0, stop_at - loop.time()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    break  # deadline reached
+
+                for task in done:
+                    server = tasks[task]
+                    try:
+                        connected_by_server[id(server)] = task.result()
+                    except Exception as raw_error:
+                        # Classify and handle the error
+                        mcp_error = error_handler.handle_error(
+                            raw_error,
+                            service_name=_server_name(server),
+                            operation="connect_server",
+                            context={"server_type": type(server).__name__},
+                        )
+
+                        # Log user-friendly error message
+                        logger.warning(f"⚠️ {mcp_error.get_user_friendly_message()}")
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.info(
+                    f"⏱️ Continuing without {len(pending)} MCP servers still connecting "
+                    f"({len(connected_by_server)}/{len(mcp_servers)} connected)"
+                )
 
-    if not connected and mcp_servers:
+    if not connected_by_server:
         # All servers failed to connect
         raise MCPConnectionError(
             service_name="mcp_servers",
@@ -110,7 +214,11 @@ async def connect_mcp_servers_properly(mcp_servers: List[Any]) -> List[Any]:
             context={"total_servers": len(mcp_servers)},
         )
 
-    return connected
+    return [
+        connected_by_server[id(server)]
+        for server in mcp_servers
+        if id(server) in connected_by_server
+    ]
 
 
 async def connect_mcp_servers(mcp_servers: List[Any]) -> Dict[str, Any]:
@@ -460,8 +568,14 @@ def get_lead_administrator_mcp_servers(user_id: Optional[str] = None) -> List[An
     return mcp_servers
 
 
+# Hedging is safe: an expired token is refreshed through the scheduler's
+# single-flight refresh, which a hedged duplicate joins
 @retry_mcp_operation(
-    max_attempts=3, service_name="oauth_credentials", log_attempts=True
+    max_attempts=3,
+    service_name="oauth_credentials",
+    service_arg="service_name",
+    log_attempts=True,
+    hedge=True,
 )
 async def get_mcp_credentials_for_user(
     user_id: str, service_name: str
@@ -501,11 +615,10 @@ async def get_mcp_credentials_for_user(
                 f"⚠️ OAuth token expired for user {user_id}, service {service_name}"
             )
 
-            # Try to refresh the token using the dedicated refresh manager
-            from .oauth_token_refresh import get_token_refresh_manager
+            # Refresh now, joining a background refresh already in flight
+            from .oauth_refresh_scheduler import get_refresh_scheduler
 
-            refresh_manager = get_token_refresh_manager()
-            refresh_result = await refresh_manager.refresh_mcp_token(
+            refresh_result = await get_refresh_scheduler().refresh_now(
                 user_id, service_name
             )
 
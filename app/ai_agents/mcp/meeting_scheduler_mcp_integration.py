@@ -433,7 +433,7 @@ class MCPSchedulingManager:
                 return False
 
             updated_lead = self.db_client.schedule_meeting_for_lead(
-                lead.id, meeting_url, event_type
+                lead.id, meeting_url, event_type, owner_id=self.user_id
             )
             logger.info(f"✅ Lead {lead.id} updated with meeting: {meeting_url}")
             return True
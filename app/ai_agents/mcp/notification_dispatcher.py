@@ -0,0 +1,365 @@
+"""
+Notification dispatcher for MCP alerts.
+
+This module moves alert notification delivery off the alerting path:
+- Per-channel queues drained by a dedicated worker pool
+- Coalescing of queued alerts into digests
+- Per-channel token-bucket rate limiting
+- Retry with exponential backoff using RetryStrategy, reporting each
+  delivery's outcome once with its attempt count
+- A local HTTP sink for exercising webhook deliveries in tests
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.ai_agents.mcp.retry_handler import RetryStrategy
+from app.core.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueuedNotification:
+    """An alert waiting for delivery on a channel."""
+
+    alert: Any
+    rule: Any
+    escalation_level: int = 0  # alert's level when this notification was queued
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+# Delivery callback: (channel_name, notifications) -> success
+DeliveryCallback = Callable[[str, List[QueuedNotification]], Awaitable[bool]]
+
+# Outcome callback: (channel_name, notifications, success, attempts)
+OutcomeCallback = Callable[[str, List[QueuedNotification], bool, int], None]
+
+
+class NotificationDispatcher:
+    """Queue-backed, rate-limited notification delivery."""
+
+    def __init__(
+        self,
+        deliver: DeliveryCallback,
+        workers_per_channel: int = 1,
+        max_queue_size: int = 1000,
+        digest_window_seconds: float = 2.0,
+        max_digest_size: int = 20,
+        retry_strategy: Optional[RetryStrategy] = None,
+        on_outcome: Optional[OutcomeCallback] = None,
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            deliver: Coroutine that delivers a batch of notifications to a channel
+            workers_per_channel: Number of workers draining each channel queue
+            max_queue_size: Per-channel queue bound; new alerts are dropped when full
+            digest_window_seconds: How long a worker waits to coalesce alerts
+            max_digest_size: Maximum number of alerts per delivery
+            retry_strategy: Backoff strategy for failed deliveries
+            on_outcome: Called once per batch after it was delivered or
+                gave up, with the number of attempts made
+        """
+        self.deliver = deliver
+        self.on_outcome = on_outcome
+        self.workers_per_channel = workers_per_channel
+        self.max_queue_size = max_queue_size
+        self.digest_window_seconds = digest_window_seconds
+        self.max_digest_size = max_digest_size
+        self.retry_strategy = retry_strategy or RetryStrategy(
+            max_attempts=3, base_delay=1.0, max_delay=30.0
+        )
+
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.rate_limiters: Dict[str, TokenBucket] = {}
+        self.workers: Dict[str, List[asyncio.Task]] = defaultdict(list)
+
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {
+                "enqueued": 0,
+                "delivered": 0,
+                "failed": 0,
+                "dropped": 0,
+                "retries": 0,
+                "digests": 0,
+            }
+        )
+
+    def configure_channel(
+        self, channel_name: str, max_per_hour: int, burst: Optional[int] = None
+    ) -> None:
+        """Set the token-bucket rate limit for a channel."""
+        self.rate_limiters[channel_name] = TokenBucket(
+            rate_per_second=max_per_hour / 3600,
+            capacity=burst or max(1, min(max_per_hour, 10)),
+        )
+
+    def submit(
+        self, channel_name: str, alert: Any, rule: Any, escalation_level: int = 0
+    ) -> bool:
+        """
+        Queue an alert for delivery on a channel without waiting.
+
+        Returns:
+            False if the channel queue is full and the alert was dropped
+        """
+        queue = self._get_queue(channel_name)
+        self._ensure_workers(channel_name)
+
+        try:
+            queue.put_nowait(
+                QueuedNotification(
+                    alert=alert, rule=rule, escalation_level=escalation_level
+                )
+            )
+        except asyncio.QueueFull:
+            self.stats[channel_name]["dropped"] += 1
+            logger.warning(f"Notification queue full for {channel_name}, dropping alert")
+            return False
+
+        self.stats[channel_name]["enqueued"] += 1
+        return True
+
+    def _get_queue(self, channel_name: str) -> asyncio.Queue:
+        queue = self.queues.get(channel_name)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self.queues[channel_name] = queue
+        return queue
+
+    def _ensure_workers(self, channel_name: str) -> None:
+        workers = [task for task in self.workers[channel_name] if not task.done()]
+        while len(workers) < self.workers_per_channel:
+            workers.append(
+                asyncio.create_task(
+                    self._worker(channel_name),
+                    name=f"notification_worker_{channel_name}",
+                )
+            )
+        self.workers[channel_name] = workers
+
+    async def _collect_batch(
+        self, queue: asyncio.Queue
+    ) -> List[QueuedNotification]:
+        """Wait for one notification, then coalesce more within the digest window."""
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.digest_window_seconds
+
+        while len(batch) < self.max_digest_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _worker(self, channel_name: str) -> None:
+        queue = self.queues[channel_name]
+
+        while True:
+            batch = await self._collect_batch(queue)
+            try:
+                limiter = self.rate_limiters.get(channel_name)
+                if limiter:
+                    await limiter.acquire()
+
+                await self._deliver_with_retry(channel_name, batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Notification worker error on {channel_name}: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _deliver_with_retry(
+        self, channel_name: str, batch: List[QueuedNotification]
+    ) -> bool:
+        stats = self.stats[channel_name]
+        if len(batch) > 1:
+            stats["digests"] += 1
+
+        for attempt in range(self.retry_strategy.max_attempts):
+            try:
+                if await self.deliver(channel_name, batch):
+                    stats["delivered"] += len(batch)
+                    self._report(channel_name, batch, True, attempt + 1)
+                    return True
+            except Exception as e:
+                logger.warning(
+                    f"Notification delivery to {channel_name} raised: {str(e)}"
+                )
+
+            if attempt + 1 < self.retry_strategy.max_attempts:
+                stats["retries"] += 1
+                await asyncio.sleep(self.retry_strategy.calculate_delay(attempt))
+
+        stats["failed"] += len(batch)
+        logger.error(
+            f"Notification delivery to {channel_name} failed after "
+            f"{self.retry_strategy.max_attempts} attempts"
+        )
+        self._report(channel_name, batch, False, self.retry_strategy.max_attempts)
+        return False
+
+    def _report(
+        self,
+        channel_name: str,
+        batch: List[QueuedNotification],
+        success: bool,
+        attempts: int,
+    ) -> None:
+        if self.on_outcome is None:
+            return
+        try:
+            self.on_outcome(channel_name, batch, success, attempts)
+        except Exception as e:
+            logger.error(f"Notification outcome callback failed for {channel_name}: {e}")
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait until every queued notification has been processed."""
+        await asyncio.wait_for(
+            asyncio.gather(*(queue.join() for queue in self.queues.values())),
+            timeout=timeout,
+        )
+
+    async def stop(self, drain_timeout: Optional[float] = 10.0) -> None:
+        """Drain the queues (up to drain_timeout) and stop the workers."""
+        if drain_timeout:
+            try:
+                await self.drain(timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Timed out draining notification queues")
+
+        tasks = [task for workers in self.workers.values() for task in workers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get per-channel delivery statistics and queue depths."""
+        return {
+            channel_name: {
+                **stats,
+                "queue_depth": self.queues[channel_name].qsize()
+                if channel_name in self.queues
+                else 0,
+            }
+            for channel_name, stats in self.stats.items()
+        }
+
+
+class LocalHTTPSink:
+    """
+    Minimal local HTTP server that records JSON request bodies.
+
+    Intended for tests and load tests of webhook-style deliveries. Every
+    request is answered with the configured status code after an optional
+    delay.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        status_code: int = 200,
+        delay_seconds: float = 0.0,
+    ):
+        self.host = host
+        self.port = port
+        self.status_code = status_code
+        self.delay_seconds = delay_seconds
+        self.requests: List[Dict[str, Any]] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "LocalHTTPSink":
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "LocalHTTPSink":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        method, path, _ = request_line.decode().split(" ", 2)
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, value = line.decode().split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        return method, path, headers, body
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                try:
+                    payload = json.loads(body) if body else None
+                except ValueError:
+                    payload = body.decode(errors="replace")
+
+                self.requests.append(
+                    {
+                        "method": method,
+                        "path": path,
+                        "headers": headers,
+                        "json": payload,
+                        "body": body,
+                    }
+                )
+
+                if self.delay_seconds:
+                    await asyncio.sleep(self.delay_seconds)
+
+                writer.write(
+                    f"HTTP/1.1 {self.status_code} OK\r\n"
+                    "Content-Type: application/json\r\n"
+                    "Content-Length: 2\r\n\r\n{}".encode()
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
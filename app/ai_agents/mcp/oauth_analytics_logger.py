@@ -12,17 +12,34 @@ Key Features:
 - Structured logging for analytics
 - Supabase integration for data storage
 - Real-time analytics dashboard data
+- Non-blocking logging: events go to a bounded ring buffer (oldest dropped
+  and counted when full) and a background task writes them in batches
+- Failed batches are retried with backoff, then spilled to a local file and
+  re-sent once storage is reachable; a spilled batch that keeps failing while
+  new batches are stored is moved to a dead-letter file. The buffer is
+  flushed on shutdown
+- Spill and dead-letter file I/O of the background flusher runs in a worker
+  thread, off the event loop
+- Summaries read the oauth_analytics_daily rollup maintained by the database
+  (app/scripts/create_oauth_analytics_rollups.sql), a page at a time so the
+  PostgREST row cap cannot truncate them
 
 Following PRD: Task 3.0 - Integrar MCP con Sistema OAuth Existente
 """
 
+import asyncio
 import logging
 import json
+import os
+import threading
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Any, Callable, Dict, List, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from app.core.config import get_mcp_config
+
 from .error_handler import get_error_handler
 from .oauth_integration import OAuthProvider
 
@@ -93,12 +110,68 @@ class OAuthAnalyticsLogger:
     integrations to provide insights for optimization and troubleshooting.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval_seconds: Optional[float] = None,
+        max_buffer_size: Optional[int] = None,
+        spill_path: Optional[str] = None,
+        max_attempts: int = 3,
+        base_retry_delay: float = 1.0,
+        store: Any = None,
+        max_spill_attempts: int = 5,
+    ):
+        """
+        Initialize the logger; unset limits default to MCPConfig.
+
+        Args:
+            batch_size: Events per insert; a full batch wakes the flusher early
+            flush_interval_seconds: Longest an event waits in the buffer
+            max_buffer_size: Ring buffer capacity; the oldest event is dropped
+                when it is full
+            spill_path: File receiving batches that could not be stored
+            max_attempts: Insert attempts before a batch is spilled
+            base_retry_delay: First backoff between attempts
+            store: Callable inserting a list of event rows (tests); defaults
+                to the oauth_analytics table
+            max_spill_attempts: Failed resends of a spilled batch (while new
+                batches are stored) before it moves to spill_path + ".dead"
+        """
+        config = get_mcp_config()
         self.error_handler = get_error_handler()
-        self._event_buffer = []  # Buffer events for batch processing
-        self._buffer_size = 100  # Flush buffer when it reaches this size
-        self._last_flush = datetime.now()
-        self._flush_interval = timedelta(minutes=5)  # Flush every 5 minutes
+        self._buffer_size = batch_size
+        self._flush_interval = (
+            flush_interval_seconds
+            if flush_interval_seconds is not None
+            else config.mcp_oauth_analytics_flush_interval
+        )
+        self._event_buffer: deque = deque(
+            maxlen=max_buffer_size or config.mcp_oauth_analytics_buffer_size
+        )
+        self.spill_path = (
+            spill_path if spill_path is not None else config.mcp_oauth_analytics_spill_path
+        ) or None
+        self.dead_letter_path = f"{self.spill_path}.dead" if self.spill_path else None
+        self.max_attempts = max_attempts
+        self.max_spill_attempts = max_spill_attempts
+        self.base_retry_delay = base_retry_delay
+        self._store = store or self._store_events_in_supabase
+
+        self._lock = threading.Lock()  # events may be logged from worker threads
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushing = False
+        self._stopping = False
+
+        self.stats = {
+            "logged": 0,
+            "stored": 0,
+            "dropped": 0,
+            "failed_batches": 0,
+            "spilled": 0,
+            "dead_lettered": 0,
+        }
 
     def log_oauth_event(
         self,
@@ -144,14 +217,21 @@ class OAuthAnalyticsLogger:
                 metadata=metadata,
             )
 
-            # Add to buffer
-            self._event_buffer.append(event)
+            # Add to buffer; a full ring buffer drops its oldest event
+            with self._lock:
+                if len(self._event_buffer) == self._event_buffer.maxlen:
+                    self.stats["dropped"] += 1
+                self._event_buffer.append(event)
+                self.stats["logged"] += 1
+                buffered = len(self._event_buffer)
 
             # Log to standard logger for immediate visibility
             self._log_to_standard_logger(event)
 
-            # Check if we need to flush
-            self._check_and_flush_buffer()
+            # Start the flusher, or wake it early when a batch is ready
+            self._ensure_flusher()
+            if buffered >= self._buffer_size:
+                self._wake()
 
         except Exception as e:
             logger.error(f"❌ Error logging OAuth analytics event: {e}")
@@ -186,53 +266,213 @@ class OAuthAnalyticsLogger:
         else:
             logger.warning(log_message)
 
-    def _check_and_flush_buffer(self) -> None:
-        """Check if buffer needs to be flushed and flush if necessary"""
-        should_flush = (
-            len(self._event_buffer) >= self._buffer_size
-            or datetime.now() - self._last_flush >= self._flush_interval
-        )
+    # ===================== BACKGROUND FLUSHER =====================
 
-        if should_flush:
-            self._flush_buffer()
+    def _ensure_flusher(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Logged outside the loop; the flusher starts on the next async log or start()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = loop.create_task(self._run(), name="oauth_analytics_flusher")
 
-    def _flush_buffer(self) -> None:
-        """Flush event buffer to storage"""
-        if not self._event_buffer:
+    def _wake(self) -> None:
+        if self._loop is None or self._wakeup is None or self._loop.is_closed():
             return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # loop closed meanwhile
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            count = min(self._buffer_size, len(self._event_buffer))
+            return [self._event_buffer.popleft().to_dict() for _ in range(count)]
+
+    async def flush(self) -> int:
+        """Write everything buffered (and previously spilled); returns rows stored."""
+        if self._flushing:
+            return 0
+        self._flushing = True
+        try:
+            stored, available = 0, True
+            while batch := self._take_batch():
+                if available and await self._store_with_retry(batch):
+                    stored += len(batch)
+                else:
+                    # Storage is down; spill the rest rather than retry every batch
+                    available = False
+                    await asyncio.to_thread(self._spill, batch)
+            if available:
+                # New rows going in shows storage is up, so a spilled batch
+                # failing now is counted against that batch
+                stored += await self._resend_spilled(storage_healthy=stored > 0)
+        finally:
+            self._flushing = False
+        if stored:
+            logger.info(f"📊 Flushed {stored} OAuth analytics events to storage")
+        return stored
+
+    async def _store_with_retry(self, rows: List[Dict[str, Any]]) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await asyncio.to_thread(self._store, rows)
+                self.stats["stored"] += len(rows)
+                return True
+            except Exception as e:
+                self.stats["failed_batches"] += 1
+                logger.warning(
+                    f"⚠️ Storing {len(rows)} OAuth analytics events failed "
+                    f"(attempt {attempt}/{self.max_attempts}): {e}"
+                )
+                if attempt < self.max_attempts and not self._stopping:
+                    await asyncio.sleep(self.base_retry_delay * (2 ** (attempt - 1)))
+        return False
+
+    # ===================== SPILL FILE =====================
 
+    def _spill(self, rows: List[Dict[str, Any]], attempts: int = 0) -> None:
+        """Append one batch to the spill file as a single line."""
+        if not self.spill_path:
+            self.stats["dropped"] += len(rows)
+            logger.error(f"❌ Dropping {len(rows)} OAuth analytics events (no spill file)")
+            return
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as spill:
+                spill.write(json.dumps({"attempts": attempts, "rows": rows}, default=str) + "\n")
+            self.stats["spilled"] += len(rows)
+        except OSError as e:
+            self.stats["dropped"] += len(rows)
+            logger.error(f"❌ Could not spill OAuth analytics events: {e}")
+
+    def _read_spilled(self) -> List[Dict[str, Any]]:
+        """Spilled batches ({"attempts", "rows"}); older files held one row per line."""
+        batches, loose_rows = [], []
+        if not os.path.exists(self.spill_path):
+            return batches
+        with open(self.spill_path, encoding="utf-8") as spill:
+            for line in spill:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line after a crash
+                if isinstance(entry, dict) and isinstance(entry.get("rows"), list):
+                    batches.append({"attempts": int(entry.get("attempts", 0)), "rows": entry["rows"]})
+                else:
+                    loose_rows.append(entry)
+        for i in range(0, len(loose_rows), self._buffer_size):
+            batches.append({"attempts": 0, "rows": loose_rows[i : i + self._buffer_size]})
+        return batches
+
+    def _dead_letter(self, batch: Dict[str, Any]) -> None:
+        """Move a spilled batch storage keeps rejecting out of the resend path."""
+        rows = batch["rows"]
         try:
-            # Store events in Supabase
-            self._store_events_in_supabase(self._event_buffer)
+            with open(self.dead_letter_path, "a", encoding="utf-8") as dead_letter:
+                dead_letter.write(json.dumps(batch, default=str) + "\n")
+        except OSError as e:
+            logger.error(f"❌ Could not dead-letter OAuth analytics events: {e}")
+        self.stats["dead_lettered"] += len(rows)
+        logger.error(
+            f"❌ Dead-lettered {len(rows)} OAuth analytics events after "
+            f"{batch['attempts']} failed resends"
+        )
 
-            # Clear buffer
-            events_count = len(self._event_buffer)
-            self._event_buffer.clear()
-            self._last_flush = datetime.now()
+    async def _resend_spilled(self, storage_healthy: bool = False) -> int:
+        """
+        Store batches spilled earlier, removing them from the file once stored.
 
-            logger.info(f"📊 Flushed {events_count} OAuth analytics events to storage")
+        Stops at the first batch that fails. When storage_healthy is set the
+        failure is counted against that batch, and a batch failing
+        max_spill_attempts times is moved to the dead-letter file so it
+        cannot hold back the batches behind it; during an outage nothing is
+        counted.
 
-        except Exception as e:
-            logger.error(f"❌ Error flushing OAuth analytics buffer: {e}")
+        Returns rows stored.
+        """
+        if not self.spill_path:
+            return 0
+        batches = await asyncio.to_thread(self._read_spilled)
+        if not batches:
+            return 0
+
+        stored = 0
+        remaining: List[Dict[str, Any]] = []
+        for index, batch in enumerate(batches):
+            if await self._store_with_retry(batch["rows"]):
+                stored += len(batch["rows"])
+                continue
+            remaining = batches[index:]
+            if storage_healthy:
+                batch["attempts"] += 1
+                if batch["attempts"] >= self.max_spill_attempts:
+                    await asyncio.to_thread(self._dead_letter, batch)
+                    remaining = batches[index + 1 :]
+            break
+
+        await asyncio.to_thread(self._rewrite_spilled, remaining)
+        if stored:
+            logger.info(f"🔁 Re-sent {stored} spilled OAuth analytics events")
+        return stored
+
+    def _rewrite_spilled(self, batches: List[Dict[str, Any]]) -> None:
+        """Replace the spill file with the batches still to be sent."""
+        if not batches:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+            return
+        with open(self.spill_path, "w", encoding="utf-8") as spill:
+            for batch in batches:
+                spill.write(json.dumps(batch, default=str) + "\n")
 
-    def _store_events_in_supabase(self, events: List[OAuthAnalyticsEvent]) -> None:
-        """Store events in Supabase analytics table"""
-        try:
-            from app.supabase.supabase_client import get_supabase_client
+    def _store_events_in_supabase(self, rows: List[Dict[str, Any]]) -> None:
+        """Store event rows in the Supabase analytics table; raises on failure"""
+        from app.supabase.supabase_client import get_supabase_client
 
-            supabase = get_supabase_client()
+        supabase = get_supabase_client()
 
-            # Convert events to dictionaries for storage
-            event_data = [event.to_dict() for event in events]
+        # Insert into oauth_analytics table
+        supabase.table("oauth_analytics").insert(rows).execute()
 
-            # Insert into oauth_analytics table
-            supabase.table("oauth_analytics").insert(event_data).execute()
+        logger.debug(f"📊 Stored {len(rows)} OAuth analytics events in Supabase")
 
-            logger.debug(f"📊 Stored {len(events)} OAuth analytics events in Supabase")
+    # ===================== LIFECYCLE =====================
 
-        except Exception as e:
-            logger.error(f"❌ Error storing OAuth analytics events in Supabase: {e}")
-            # Continue without failing - analytics should not break main functionality
+    async def start(self) -> None:
+        """Start the background flusher."""
+        self._ensure_flusher()
+
+    async def stop(self) -> None:
+        """Stop the flusher and write (or spill) everything still buffered."""
+        self._stopping = True
+        if self._task is not None:
+            self._wake()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {**self.stats, "buffered": len(self._event_buffer)}
 
     def log_token_validation(
         self,
@@ -374,8 +614,63 @@ class OAuthAnalyticsLogger:
         )
 
     def force_flush(self) -> None:
-        """Force flush of event buffer"""
-        self._flush_buffer()
+        """Force flush of event buffer (blocking; for scripts without a loop)"""
+        while batch := self._take_batch():
+            try:
+                self._store(batch)
+                self.stats["stored"] += len(batch)
+            except Exception as e:
+                logger.error(f"❌ Error flushing OAuth analytics buffer: {e}")
+                self._spill(batch)
+
+    def _load_rollups(self, days: int, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Read daily rollup rows for the last `days` days.
+
+        Falls back to counting raw events where the rollup table is not
+        installed, so summaries keep working before the migration runs.
+        """
+        from app.supabase.supabase_client import get_supabase_client
+
+        supabase = get_supabase_client()
+        since = (datetime.now() - timedelta(days=days)).date()
+
+        def rollups():
+            query = (
+                supabase.table(ROLLUP_TABLE)
+                .select(", ".join(ROLLUP_COLUMNS))
+                .gte("day", since.isoformat())
+            )
+            if user_id:
+                query = query.eq("user_id", user_id)
+            # Pages need a stable order: the rollup's primary key
+            for column in ROLLUP_COLUMNS[:-1]:
+                query = query.order(column)
+            return query
+
+        def events():
+            query = (
+                supabase.table("oauth_analytics")
+                .select("user_id, service_name, oauth_provider, event_type, status, timestamp")
+                .gte("timestamp", since.isoformat())
+            )
+            if user_id:
+                query = query.eq("user_id", user_id)
+            return query.order("timestamp")
+
+        try:
+            return select_all_pages(rollups)
+        except Exception as e:
+            logger.warning(f"⚠️ OAuth analytics rollups unavailable, counting raw events: {e}")
+
+        return [
+            {
+                **event,
+                "day": datetime.fromisoformat(event["timestamp"]).date().isoformat(),
+                "event_count": 1,
+            }
+            for event in select_all_pages(events)
+        ]
 
     def get_analytics_summary(self, user_id: str, days: int = 7) -> Dict[str, Any]:
         """
@@ -389,74 +684,15 @@ class OAuthAnalyticsLogger:
             Dictionary with analytics summary
         """
         try:
-            from app.supabase.supabase_client import get_supabase_client
-
-            supabase = get_supabase_client()
-
-            # Calculate date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            # Query analytics data
-            response = (
-                supabase.table("oauth_analytics")
-                .select("*")
-                .eq("user_id", user_id)
-                .gte("timestamp", start_date.isoformat())
-                .lte("timestamp", end_date.isoformat())
-                .execute()
-            )
-
-            if not response.data:
-                return {
-                    "total_events": 0,
-                    "success_rate": 0.0,
-                    "services_used": [],
-                    "event_types": {},
-                    "providers": {},
-                    "daily_usage": {},
-                }
-
-            events = response.data
-
-            # Calculate metrics
-            total_events = len(events)
-            success_events = len([e for e in events if e["status"] == "success"])
-            success_rate = (
-                (success_events / total_events) * 100 if total_events > 0 else 0
-            )
-
-            # Services used
-            services_used = list(set(e["service_name"] for e in events))
-
-            # Event types breakdown
-            event_types = {}
-            for event in events:
-                event_type = event["event_type"]
-                event_types[event_type] = event_types.get(event_type, 0) + 1
-
-            # OAuth providers breakdown
-            providers = {}
-            for event in events:
-                provider = event["oauth_provider"]
-                if provider:
-                    providers[provider] = providers.get(provider, 0) + 1
-
-            # Daily usage
-            daily_usage = {}
-            for event in events:
-                event_date = (
-                    datetime.fromisoformat(event["timestamp"]).date().isoformat()
-                )
-                daily_usage[event_date] = daily_usage.get(event_date, 0) + 1
+            totals = summarize_rollups(self._load_rollups(days, user_id=user_id))
 
             return {
-                "total_events": total_events,
-                "success_rate": round(success_rate, 2),
-                "services_used": services_used,
-                "event_types": event_types,
-                "providers": providers,
-                "daily_usage": daily_usage,
+                "total_events": totals["total"],
+                "success_rate": _percentage(totals["success"], totals["total"]),
+                "services_used": sorted(totals["services"]),
+                "event_types": totals["event_types"],
+                "providers": totals["providers"],
+                "daily_usage": totals["daily"],
             }
 
         except Exception as e:
@@ -482,81 +718,21 @@ class OAuthAnalyticsLogger:
             Dictionary with system analytics
         """
         try:
-            from app.supabase.supabase_client import get_supabase_client
-
-            supabase = get_supabase_client()
-
-            # Calculate date range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days)
-
-            # Query analytics data
-            response = (
-                supabase.table("oauth_analytics")
-                .select("*")
-                .gte("timestamp", start_date.isoformat())
-                .lte("timestamp", end_date.isoformat())
-                .execute()
-            )
-
-            if not response.data:
-                return {
-                    "total_events": 0,
-                    "unique_users": 0,
-                    "success_rate": 0.0,
-                    "top_services": [],
-                    "top_providers": [],
-                    "error_rate_by_service": {},
-                }
-
-            events = response.data
-
-            # Calculate metrics
-            total_events = len(events)
-            unique_users = len(set(e["user_id"] for e in events))
-            success_events = len([e for e in events if e["status"] == "success"])
-            success_rate = (
-                (success_events / total_events) * 100 if total_events > 0 else 0
-            )
+            totals = summarize_rollups(self._load_rollups(days))
 
-            # Top services
-            service_counts = {}
-            for event in events:
-                service = event["service_name"]
-                service_counts[service] = service_counts.get(service, 0) + 1
-
-            top_services = sorted(
-                service_counts.items(), key=lambda x: x[1], reverse=True
-            )[:5]
-
-            # Top providers
-            provider_counts = {}
-            for event in events:
-                provider = event["oauth_provider"]
-                if provider:
-                    provider_counts[provider] = provider_counts.get(provider, 0) + 1
-
-            top_providers = sorted(
-                provider_counts.items(), key=lambda x: x[1], reverse=True
-            )[:5]
-
-            # Error rate by service
-            error_rate_by_service = {}
-            for service in service_counts:
-                service_events = [e for e in events if e["service_name"] == service]
-                service_failures = [
-                    e for e in service_events if e["status"] == "failure"
-                ]
-                error_rate = (len(service_failures) / len(service_events)) * 100
-                error_rate_by_service[service] = round(error_rate, 2)
+            def top(counts: Dict[str, int]) -> List[tuple]:
+                return sorted(counts.items(), key=lambda x: x[1], reverse=True)[:5]
 
             return {
-                "total_events": total_events,
-                "unique_users": unique_users,
-                "success_rate": round(success_rate, 2),
-                "top_services": top_services,
-                "top_providers": top_providers,
-                "error_rate_by_service": error_rate_by_service,
+                "total_events": totals["total"],
+                "unique_users": len(totals["users"]),
+                "success_rate": _percentage(totals["success"], totals["total"]),
+                "top_services": top(totals["services"]),
+                "top_providers": top(totals["providers"]),
+                "error_rate_by_service": {
+                    service: _percentage(totals["service_failures"].get(service, 0), count)
+                    for service, count in totals["services"].items()
+                },
             }
 
         except Exception as e:
@@ -572,6 +748,72 @@ class OAuthAnalyticsLogger:
             }
 
 
+ROLLUP_TABLE = "oauth_analytics_daily"
+ROLLUP_PAGE_SIZE = 1000  # PostgREST's default max-rows
+ROLLUP_COLUMNS = (
+    "day",
+    "user_id",
+    "service_name",
+    "oauth_provider",
+    "event_type",
+    "status",
+    "event_count",
+)
+
+
+def select_all_pages(
+    build_query: Callable[[], Any], page_size: int = ROLLUP_PAGE_SIZE
+) -> List[Dict[str, Any]]:
+    """Run an ordered Supabase select a page at a time and return every row."""
+    rows: List[Dict[str, Any]] = []
+    while True:
+        page = (
+            build_query().range(len(rows), len(rows) + page_size - 1).execute().data
+            or []
+        )
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+def summarize_rollups(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add up daily rollup rows into the counters the summaries report."""
+    totals = {
+        "total": 0,
+        "success": 0,
+        "users": set(),
+        "services": {},
+        "service_failures": {},
+        "event_types": {},
+        "providers": {},
+        "daily": {},
+    }
+    for row in rows:
+        count = int(row.get("event_count") or 0)
+        service = row["service_name"]
+        totals["total"] += count
+        totals["users"].add(row["user_id"])
+        if row["status"] == OAuthEventStatus.SUCCESS.value:
+            totals["success"] += count
+        elif row["status"] == OAuthEventStatus.FAILURE.value:
+            totals["service_failures"][service] = (
+                totals["service_failures"].get(service, 0) + count
+            )
+        for key, value in (
+            ("services", service),
+            ("event_types", row["event_type"]),
+            ("providers", row.get("oauth_provider")),
+            ("daily", str(row["day"])[:10]),
+        ):
+            if value:
+                totals[key][value] = totals[key].get(value, 0) + count
+    return totals
+
+
+def _percentage(part: int, total: int) -> float:
+    return round(part / total * 100, 2) if total else 0.0
+
+
 # Global analytics logger instance
 _oauth_analytics_logger = OAuthAnalyticsLogger()
 
@@ -586,6 +828,11 @@ def get_oauth_analytics_logger() -> OAuthAnalyticsLogger:
     return _oauth_analytics_logger
 
 
+async def shutdown_oauth_analytics_logger() -> None:
+    """Write (or spill) buffered analytics events on application shutdown."""
+    await _oauth_analytics_logger.stop()
+
+
 def log_oauth_event(
     event_type: OAuthEventType,
     status: OAuthEventStatus,
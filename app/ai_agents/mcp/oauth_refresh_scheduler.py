@@ -0,0 +1,427 @@
+"""
+Proactive OAuth Token Refresh Scheduler
+
+Refreshes OAuth tokens in the background shortly before they expire, so
+workflows find valid tokens instead of paying refresh latency (or dropping
+the service) on first use after expiry.
+
+Provides:
+- OAuthRefreshScheduler: min-heap of (due_at, user_id, service) built from a
+  bulk user_accounts scan; due tokens are refreshed with bounded concurrency
+  and a token bucket per OAuth provider, and concurrent refreshes of the
+  same token share one in-flight refresh
+- get_refresh_scheduler(), set_refresh_scheduler(): global instance
+- start_refresh_scheduler(), shutdown_refresh_scheduler(): lifecycle hooks
+  for application startup and shutdown (shutdown also closes the refresh
+  manager's pooled provider clients); startup refuses several workers
+  without the Redis refresh lock
+
+Each refresh, retries included, runs within mcp_timeout_seconds (or the
+deadline of the workflow that asked for it, if earlier).
+
+A token is due mcp_oauth_token_refresh_threshold seconds before it
+expires. Failed refreshes are retried with backoff and given up after
+max_failures; the next full scan schedules the token again.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import get_mcp_config
+from app.core.rate_limit import TokenBucket
+
+from .retry_handler import deadline_scope
+from .oauth_token_refresh import (
+    SERVICE_PROVIDERS,
+    RefreshResult,
+    decode_account_data,
+    get_token_refresh_manager,
+    parse_expires_at,
+)
+
+logger = logging.getLogger(__name__)
+
+RefreshKey = Tuple[str, str]  # (user_id, service)
+AccountLoader = Callable[[], Awaitable[List[Dict[str, Any]]]]
+
+SCAN_PAGE_SIZE = 1000
+
+
+async def load_connected_accounts(page_size: int = SCAN_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """Read every connected user_accounts row, a page at a time."""
+    from app.supabase.supabase_client import get_supabase_admin_client
+
+    supabase = get_supabase_admin_client()
+
+    def fetch_page(offset: int) -> List[Dict[str, Any]]:
+        response = (
+            supabase.table("user_accounts")
+            .select("user_id, service, account_data")
+            .eq("connected", True)
+            .range(offset, offset + page_size - 1)
+            .execute()
+        )
+        return response.data or []
+
+    rows: List[Dict[str, Any]] = []
+    while True:
+        page = await asyncio.to_thread(fetch_page, len(rows))
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+
+
+class OAuthRefreshScheduler:
+    """Keeps OAuth tokens fresh ahead of their expiry."""
+
+    def __init__(
+        self,
+        manager: Any = None,
+        lead_seconds: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+        scan_interval_seconds: Optional[float] = None,
+        retry_delay_seconds: float = 60.0,
+        max_failures: int = 5,
+        account_loader: Optional[AccountLoader] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize the scheduler; unset limits default to MCPConfig.
+
+        Args:
+            manager: OAuthTokenRefreshManager performing the refreshes
+            lead_seconds: Refresh this long before a token expires
+            concurrency: Maximum refreshes in flight
+            rate_per_second: Refreshes per second per OAuth provider
+            scan_interval_seconds: Interval between full user_accounts scans
+            retry_delay_seconds: First backoff after a failed refresh
+            max_failures: Consecutive failures before a token is given up
+            account_loader: Returns connected user_accounts rows
+            clock: Wall-clock time source (expiry times are wall-clock)
+        """
+        config = get_mcp_config()
+        self.manager = manager or get_token_refresh_manager()
+        self.lead_seconds = (
+            lead_seconds if lead_seconds is not None
+            else config.mcp_oauth_token_refresh_threshold
+        )
+        self.concurrency = concurrency or config.mcp_oauth_refresh_concurrency
+        self.rate_per_second = rate_per_second or config.mcp_oauth_refresh_rate_per_second
+        self.scan_interval_seconds = (
+            scan_interval_seconds or config.mcp_oauth_refresh_scan_interval
+        )
+        self.retry_delay_seconds = retry_delay_seconds
+        self.max_failures = max_failures
+        self.account_loader = account_loader or load_connected_accounts
+        self.clock = clock
+
+        self._heap: List[Tuple[float, int, RefreshKey]] = []
+        self._due: Dict[RefreshKey, float] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()  # schedule() may be called from worker threads
+        self._failures: Dict[RefreshKey, int] = {}
+        self._inflight: Dict[RefreshKey, asyncio.Task] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._next_scan = 0.0
+
+        self.stats = {"scans": 0, "scheduled": 0, "refreshed": 0, "failed": 0, "coalesced": 0}
+
+    # ===================== SCHEDULING =====================
+
+    def schedule(self, user_id: str, service: str, expires_at: Any) -> bool:
+        """
+        Schedule a refresh ahead of expires_at (datetime or epoch seconds).
+
+        Replaces any earlier schedule for the same token.
+        """
+        if isinstance(expires_at, datetime):
+            expires_at = expires_at.timestamp()
+        if expires_at is None:
+            return False
+        self._push((user_id, service), float(expires_at) - self.lead_seconds)
+        return True
+
+    def request_refresh(self, user_id: str, service: str) -> bool:
+        """
+        Ask for a refresh as soon as possible without waiting for it.
+
+        When the scheduler is not running, nothing would drain its heap, so
+        the refresh starts right away on the caller's event loop instead;
+        without a loop (worker threads) the request is logged and dropped.
+
+        Returns:
+            Whether a refresh was queued or started
+        """
+        key = (user_id, service)
+        if self.is_running:
+            self._push(key, self.clock())
+            return True
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning(
+                f"⚠️ OAuth refresh scheduler is not running; expired {service} "
+                f"token of user {user_id} was not refreshed"
+            )
+            return False
+        self._start_refresh(key)
+        return True
+
+    def _push(self, key: RefreshKey, due_at: float) -> None:
+        with self._lock:
+            self._due[key] = due_at
+            heapq.heappush(self._heap, (due_at, next(self._sequence), key))
+            self.stats["scheduled"] += 1
+        self._wake()
+
+    def _wake(self) -> None:
+        if self._loop is None or self._wakeup is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _pop_due(self, now: float) -> List[RefreshKey]:
+        """Remove and return tokens due by now, skipping superseded heap entries."""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due_at, _, key = heapq.heappop(self._heap)
+                if self._due.get(key) == due_at:
+                    del self._due[key]
+                    due.append(key)
+        return due
+
+    def _next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)  # drop superseded entries
+            return self._heap[0][0] if self._heap else None
+
+    async def scan(self) -> int:
+        """Rebuild the schedule from one bulk read of connected accounts."""
+        rows = await self.account_loader()
+        schedule: Dict[RefreshKey, float] = {}
+        for row in rows:
+            account_data = decode_account_data(row.get("account_data"))
+            if not account_data or not account_data.get("refresh_token"):
+                continue  # nothing we could refresh
+            expires_at = parse_expires_at(account_data.get("expires_at"))
+            if expires_at is None:
+                continue
+            key = (str(row["user_id"]), row["service"])
+            schedule[key] = expires_at.timestamp() - self.lead_seconds
+
+        with self._lock:
+            # Tokens no longer connected drop out; their heap entries go stale
+            self._due = dict(schedule)
+            self._heap = [
+                (due_at, next(self._sequence), key) for key, due_at in schedule.items()
+            ]
+            heapq.heapify(self._heap)
+            self.stats["scans"] += 1
+        self._next_scan = self.clock() + self.scan_interval_seconds
+        logger.info(f"🔄 OAuth refresh schedule rebuilt: {len(schedule)} tokens tracked")
+        self._wake()
+        return len(schedule)
+
+    # ===================== REFRESHING =====================
+
+    async def refresh_now(self, user_id: str, service: str) -> RefreshResult:
+        """Refresh a token now, joining a refresh already in flight for it."""
+        return await asyncio.shield(self._start_refresh((user_id, service)))
+
+    def _start_refresh(self, key: RefreshKey) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return task
+        task = asyncio.create_task(self._refresh(key), name=f"oauth_refresh_{key[1]}")
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    def _bucket_for(self, service: str) -> TokenBucket:
+        provider = SERVICE_PROVIDERS.get(service)
+        name = provider.value if provider else service
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_per_second, capacity=max(1.0, self.rate_per_second))
+            self._buckets[name] = bucket
+        return bucket
+
+    async def _refresh(self, key: RefreshKey) -> RefreshResult:
+        user_id, service = key
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            await self._bucket_for(service).acquire()
+            try:
+                with deadline_scope(get_mcp_config().mcp_timeout_seconds):
+                    result = await self.manager.refresh_mcp_token(
+                        user_id, service, force_refresh=True
+                    )
+            except Exception as e:
+                result = RefreshResult(success=False, error_message=str(e))
+
+        if result.success and result.expires_at:
+            self._failures.pop(key, None)
+            self.stats["refreshed"] += 1
+            self.schedule(user_id, service, result.expires_at)
+            return result
+
+        self.stats["failed"] += 1
+        failures = self._failures.get(key, 0) + 1
+        if failures >= self.max_failures:
+            self._failures.pop(key, None)
+            logger.error(
+                f"❌ Giving up background refresh of {service} for user {user_id} "
+                f"after {failures} failures: {result.error_message}"
+            )
+        else:
+            self._failures[key] = failures
+            delay = self.retry_delay_seconds * (2 ** (failures - 1))
+            self._push(key, self.clock() + delay)
+            logger.warning(
+                f"⚠️ Background refresh of {service} for user {user_id} failed, "
+                f"retrying in {delay:.0f}s: {result.error_message}"
+            )
+        return result
+
+    # ===================== LIFECYCLE =====================
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Start the scheduler loop; the first scan runs immediately."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="oauth_refresh_scheduler")
+        logger.info("✅ OAuth refresh scheduler started")
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            now = self.clock()
+            if now >= self._next_scan:
+                try:
+                    await self.scan()
+                except Exception as e:
+                    logger.error(f"❌ OAuth refresh scan failed: {e}")
+                    self._next_scan = now + min(self.scan_interval_seconds, 60)
+
+            for key in self._pop_due(self.clock()):
+                self._start_refresh(key)
+
+            wake_at = self._next_scan
+            next_due = self._next_due()
+            if next_due is not None:
+                wake_at = min(wake_at, next_due)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=max(0.0, wake_at - self.clock())
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        """Stop the loop and cancel refreshes still in flight."""
+        # wait_for can swallow a cancel that races the wakeup, so also flag it
+        self._stopping = True
+        self._wake()
+        tasks = [t for t in [self._task, *self._inflight.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        logger.info("🛑 OAuth refresh scheduler stopped")
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            tracked = len(self._due)
+        return {
+            **self.stats,
+            "tracked": tracked,
+            "in_flight": len(self._inflight),
+            "next_due_in": (
+                max(0.0, next_due - self.clock())
+                if (next_due := self._next_due()) is not None
+                else None
+            ),
+        }
+
+
+_refresh_scheduler: Optional[OAuthRefreshScheduler] = None
+
+
+def get_refresh_scheduler() -> OAuthRefreshScheduler:
+    """Get the global OAuth refresh scheduler."""
+    global _refresh_scheduler
+    if _refresh_scheduler is None:
+        _refresh_scheduler = OAuthRefreshScheduler()
+    return _refresh_scheduler
+
+
+def set_refresh_scheduler(scheduler: Optional[OAuthRefreshScheduler]) -> None:
+    """Replace the global scheduler (used by tests)."""
+    global _refresh_scheduler
+    _refresh_scheduler = scheduler
+
+
+async def start_refresh_scheduler() -> None:
+    """
+    Start background refreshes if enabled (MCP_OAUTH_REFRESH_SCHEDULER_ENABLED).
+
+    Every worker process runs its own scheduler, so with several workers
+    (WEB_CONCURRENCY > 1) refreshes must be single-flighted through Redis
+    (MCP_OAUTH_REFRESH_LOCK_BACKEND=redis): with per-process locks two
+    workers would redeem the same rotating refresh token and one of them
+    would invalidate the other's.
+
+    Raises:
+        RuntimeError: Several workers with the per-process lock
+    """
+    config = get_mcp_config()
+    if not config.mcp_oauth_refresh_scheduler_enabled:
+        return
+
+    from app.core.config import get_settings
+
+    workers = get_settings().WEB_CONCURRENCY
+    if workers > 1 and config.mcp_oauth_refresh_lock_backend.lower() != "redis":
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={workers}: the OAuth refresh scheduler needs "
+            "MCP_OAUTH_REFRESH_LOCK_BACKEND=redis with several workers"
+        )
+    await get_refresh_scheduler().start()
+
+
+async def shutdown_refresh_scheduler() -> None:
+    """Stop the global scheduler and close the refresh manager's connections."""
+    if _refresh_scheduler is not None:
+        await _refresh_scheduler.stop()
+    await get_token_refresh_manager().close()
@@ -11,25 +11,34 @@ Key Features:
 - Get analytics data for integrations
 - Real-time status updates
 - Comprehensive error handling
+- Constant query count per status check: one bulk read of the user's
+  user_accounts rows and one aggregated last-used query, evaluated in memory
 
 Following PRD: Task 3.0 - Integrar MCP con Sistema OAuth Existente
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from .mcp_server_manager import validate_oauth_tokens_for_service
 from .oauth_integration import (
     OAuthProvider,
+    OAuthTokens,
     MCPServiceType,
     validate_oauth_scopes,
     get_supported_services,
 )
 from .oauth_analytics_logger import get_oauth_analytics_logger
-from .oauth_token_refresh import get_token_refresh_manager
+from .oauth_token_refresh import (
+    SERVICE_PROVIDERS,
+    decode_account_data,
+    get_token_refresh_manager,
+    parse_expires_at,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -105,6 +114,8 @@ async def get_user_oauth_status(
     try:
         # Get supported services
         supported_services = get_supported_services()
+        service_names = [s["service_name"] for s in supported_services]
+        providers = {s["service_name"]: s["oauth_provider"] for s in supported_services}
 
         # Get token refresh manager
         refresh_manager = get_token_refresh_manager()
@@ -112,80 +123,83 @@ async def get_user_oauth_status(
         # Get analytics logger
         analytics_logger = get_oauth_analytics_logger()
 
-        integrations = []
-
-        for service_info in supported_services:
-            service_name = service_info["service_name"]
-            provider_name = service_info["oauth_provider"]
+        # Two queries for all services, run together
+        accounts, last_used_dates = await asyncio.gather(
+            _load_user_accounts(user_id),
+            _get_last_used_dates(user_id, service_names),
+        )
 
+        statuses: Dict[str, Dict[str, Any]] = {}
+        for service_name in service_names:
             try:
-                # Check if tokens exist and are valid
-                is_connected = await _check_integration_connection(
-                    user_id, service_name
+                statuses[service_name] = _evaluate_account(
+                    user_id, service_name, accounts.get(service_name)
                 )
-                is_valid = (
-                    validate_oauth_tokens_for_service(user_id, service_name)
-                    if is_connected
-                    else False
+            except Exception as e:
+                statuses[service_name] = {"error": e}
+
+        # Refresh expiring tokens if requested; providers differ, so in parallel
+        if refresh_expired:
+            expiring = [
+                name
+                for name, status in statuses.items()
+                if status.get("is_valid") and status.get("expires_soon")
+            ]
+            refresh_results = await asyncio.gather(
+                *(refresh_manager.refresh_mcp_token(user_id, name) for name in expiring),
+                return_exceptions=True,
+            )
+            for service_name, refresh_result in zip(expiring, refresh_results):
+                if isinstance(refresh_result, Exception) or not refresh_result.success:
+                    continue
+                status = statuses[service_name]
+                status["expires_at"] = refresh_result.expires_at
+                status["expires_soon"] = False
+                if refresh_result.new_tokens:
+                    status["tokens"] = refresh_result.new_tokens
+
+                # Log refresh success
+                analytics_logger.log_token_refresh(
+                    user_id=user_id,
+                    service_name=service_name,
+                    oauth_provider=_get_oauth_provider_from_name(
+                        providers[service_name]
+                    ),
+                    success=True,
                 )
 
-                # Get token info
-                token_info = await _get_token_info(user_id, service_name)
+        integrations = []
 
-                expires_at = token_info.get("expires_at")
-                expires_soon = False
+        for service_info in supported_services:
+            service_name = service_info["service_name"]
+            provider_name = service_info["oauth_provider"]
+            status = statuses[service_name]
 
-                if expires_at and is_valid:
-                    expires_soon = datetime.now() >= (
-                        expires_at - timedelta(minutes=10)
-                    )
+            try:
+                if "error" in status:
+                    raise status["error"]
 
-                    # Refresh expired tokens if requested
-                    if refresh_expired and expires_soon:
-                        refresh_result = await refresh_manager.refresh_mcp_token(
-                            user_id, service_name
-                        )
-                        if refresh_result.success:
-                            is_valid = True
-                            expires_at = refresh_result.expires_at
-                            expires_soon = False
-
-                            # Log refresh success
-                            analytics_logger.log_token_refresh(
-                                user_id=user_id,
-                                service_name=service_name,
-                                oauth_provider=_get_oauth_provider_from_name(
-                                    provider_name
-                                ),
-                                success=True,
-                            )
+                is_valid = status["is_valid"]
 
                 # Check OAuth scopes if requested
                 has_required_scopes = False
-                if check_permissions and is_valid:
-                    oauth_tokens = await _get_oauth_tokens_for_validation(
-                        user_id, service_name
-                    )
-                    if oauth_tokens:
-                        service_type = _get_service_type_from_name(service_name)
-                        if service_type:
-                            has_required_scopes = validate_oauth_scopes(
-                                oauth_tokens, service_type
-                            )
-
-                # Get last used info
-                last_used = await _get_last_used_date(user_id, service_name)
+                if check_permissions and is_valid and status["tokens"]:
+                    service_type = _get_service_type_from_name(service_name)
+                    if service_type:
+                        has_required_scopes = validate_oauth_scopes(
+                            status["tokens"], service_type
+                        )
 
                 # Create integration status
                 integration_status = OAuthIntegrationStatus(
                     service_name=service_name,
                     provider=provider_name,
-                    is_connected=is_connected,
+                    is_connected=status["is_connected"],
                     is_valid=is_valid,
-                    expires_at=expires_at,
-                    expires_soon=expires_soon,
+                    expires_at=status["expires_at"],
+                    expires_soon=status["expires_soon"],
                     has_required_scopes=has_required_scopes,
-                    last_used=last_used,
+                    last_used=last_used_dates.get(service_name),
                     error_message=None,
                 )
 
@@ -440,70 +454,122 @@ async def validate_user_oauth_permissions(
 
 
 # Helper functions
-async def _check_integration_connection(user_id: str, service_name: str) -> bool:
-    """Check if integration is connected"""
-    try:
-        from app.supabase.supabase_client import get_supabase_client
+LAST_USED_FALLBACK_ROWS = 500
 
-        supabase = get_supabase_client()
 
+async def _load_user_accounts(user_id: str) -> Dict[str, Dict[str, Any]]:
+    """Read all of a user's user_accounts rows in one query, keyed by service"""
+    from app.supabase.supabase_client import get_supabase_admin_client
+
+    supabase = get_supabase_admin_client()
+
+    def fetch() -> List[Dict[str, Any]]:
         response = (
             supabase.table("user_accounts")
-            .select("connected")
+            .select("service, connected, account_data, created_at, updated_at")
             .eq("user_id", user_id)
-            .eq("service", service_name)
-            .single()
             .execute()
         )
+        return response.data or []
 
-        return bool(response.data and response.data.get("connected"))
+    return {row["service"]: row for row in await asyncio.to_thread(fetch)}
 
-    except Exception:
-        return False
 
+def _expires_within(expires_at: datetime, minutes: float = 0) -> bool:
+    """Compare with now in the timezone expires_at was stored in"""
+    now = datetime.now(expires_at.tzinfo) if expires_at.tzinfo else datetime.now()
+    return now >= expires_at - timedelta(minutes=minutes)
 
-async def _get_token_info(user_id: str, service_name: str) -> Dict[str, Any]:
-    """Get token information"""
-    try:
-        from app.supabase.supabase_client import get_supabase_client
 
-        supabase = get_supabase_client()
+def _evaluate_account(
+    user_id: str, service_name: str, row: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Derive a service's status from its user_accounts row, without queries.
 
-        response = (
-            supabase.table("user_accounts")
-            .select("account_data, created_at, updated_at")
-            .eq("user_id", user_id)
-            .eq("service", service_name)
-            .single()
-            .execute()
+    Mirrors validate_oauth_tokens_for_service: a connected row with an access
+    token is valid unless it has a parseable expires_at in the past.
+    """
+    status = {
+        "is_connected": bool(row and row.get("connected")),
+        "is_valid": False,
+        "expires_at": None,
+        "expires_soon": False,
+        "tokens": None,
+    }
+    if not status["is_connected"]:
+        return status
+
+    account_data = decode_account_data(row.get("account_data", {}))
+    if not account_data or not account_data.get("access_token"):
+        return status
+
+    expires_at = parse_expires_at(account_data.get("expires_at"))
+    status["expires_at"] = expires_at
+    status["is_valid"] = expires_at is None or not _expires_within(expires_at)
+    if expires_at and status["is_valid"]:
+        status["expires_soon"] = _expires_within(expires_at, minutes=10)
+
+    provider = SERVICE_PROVIDERS.get(service_name)
+    if provider:
+        status["tokens"] = OAuthTokens(
+            access_token=account_data["access_token"],
+            refresh_token=account_data.get("refresh_token"),
+            token_type=account_data.get("token_type", "Bearer"),
+            expires_at=expires_at,
+            scope=account_data.get("scope"),
+            provider=provider,
+            user_id=user_id,
+            service_account_id=(account_data.get("metadata") or {}).get(
+                "service_account_id"
+            ),
         )
+    return status
 
-        if not response.data:
-            return {}
 
-        data = response.data
-        account_data = data.get("account_data", {})
-        expires_at = None
+async def _get_last_used_dates(
+    user_id: str, service_names: List[str]
+) -> Dict[str, datetime]:
+    """
+    Get the last used date of every service in one query.
 
-        # Get expires_at from account_data
-        if account_data.get("expires_at"):
-            expires_at = datetime.fromisoformat(
-                account_data["expires_at"].replace("Z", "+00:00")
-            )
+    Uses the oauth_last_used() aggregate (app/scripts/create_oauth_status_functions.sql);
+    where it is not installed, reads the user's most recent events instead.
+    """
+    try:
+        from app.supabase.supabase_client import get_supabase_client
 
-        return {
-            "expires_at": expires_at,
-            "created_at": datetime.fromisoformat(
-                data["created_at"].replace("Z", "+00:00")
-            )
-            if data.get("created_at")
-            else None,
-            "updated_at": datetime.fromisoformat(
-                data["updated_at"].replace("Z", "+00:00")
+        # SupabaseCRMClient only wraps table(); rpc() lives on the raw client
+        supabase = get_supabase_client().client
+
+        def fetch() -> List[Tuple[str, str]]:
+            try:
+                response = supabase.rpc(
+                    "oauth_last_used", {"user_id_param": user_id}
+                ).execute()
+                return [(r["service_name"], r["last_used"]) for r in response.data or []]
+            except Exception as e:
+                logger.debug(f"oauth_last_used() unavailable, using recent events: {e}")
+
+            response = (
+                supabase.table("oauth_analytics")
+                .select("service_name, timestamp")
+                .eq("user_id", user_id)
+                .in_("service_name", service_names)
+                .order("timestamp", desc=True)
+                .limit(LAST_USED_FALLBACK_ROWS)
+                .execute()
             )
-            if data.get("updated_at")
-            else None,
-        }
+            return [(r["service_name"], r["timestamp"]) for r in response.data or []]
+
+        last_used: Dict[str, datetime] = {}
+        for service_name, timestamp in await asyncio.to_thread(fetch):
+            parsed = parse_expires_at(timestamp)
+            if parsed and (
+                service_name not in last_used or parsed > last_used[service_name]
+            ):
+                last_used[service_name] = parsed
+        return last_used
 
     except Exception:
         return {}
@@ -519,32 +585,6 @@ async def _get_oauth_tokens_for_validation(user_id: str, service_name: str):
         return None
 
 
-async def _get_last_used_date(user_id: str, service_name: str) -> Optional[datetime]:
-    """Get last used date for a service"""
-    try:
-        from app.supabase.supabase_client import get_supabase_client
-
-        supabase = get_supabase_client()
-
-        response = (
-            supabase.table("oauth_analytics")
-            .select("timestamp")
-            .eq("user_id", user_id)
-            .eq("service_name", service_name)
-            .order("timestamp", desc=True)
-            .limit(1)
-            .execute()
-        )
-
-        if response.data:
-            return datetime.fromisoformat(response.data[0]["timestamp"])
-
-        return None
-
-    except Exception:
-        return None
-
-
 async def _get_system_health() -> Dict[str, Any]:
     """Get system health information"""
     try:
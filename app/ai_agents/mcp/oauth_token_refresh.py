@@ -11,15 +11,26 @@ Key Features:
 - Supabase integration for token storage
 - Retry logic for failed refresh attempts
 - Comprehensive error handling
+- Single-flight refreshes: concurrent callers for the same (user, service)
+  share one in-flight refresh, and with MCP_OAUTH_REFRESH_LOCK_BACKEND=redis
+  a short Redis lock does the same across workers
+- One pooled HTTP client per provider, reused by every refresh
 
 Following PRD: Task 3.0 - Integrar MCP con Sistema OAuth Existente
 """
 
+import asyncio
 import logging
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 
+import httpx
+
+from app.core.config import get_mcp_config
+
 from .error_handler import (
     MCPAuthenticationError,
     MCPConfigurationError,
@@ -29,8 +40,51 @@ from .error_handler import (
 from .retry_handler import retry_mcp_operation
 from .oauth_integration import OAuthTokens, OAuthProvider
 
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Service name (user_accounts.service) -> OAuth provider
+SERVICE_PROVIDERS: Dict[str, OAuthProvider] = {
+    "google_calendar": OAuthProvider.GOOGLE,
+    "google": OAuthProvider.GOOGLE,
+    "twitter": OAuthProvider.TWITTER,
+    "sendgrid": OAuthProvider.SENDGRID,
+    "calendly_v2": OAuthProvider.CALENDLY,
+    "calendly": OAuthProvider.CALENDLY,
+    "pipedrive": OAuthProvider.PIPEDRIVE,
+    "salesforce_rest_api": OAuthProvider.SALESFORCE,
+    "salesforce": OAuthProvider.SALESFORCE,
+    "zoho_crm": OAuthProvider.ZOHO,
+}
+
+
+def decode_account_data(account_data_raw: Any) -> Optional[Dict[str, Any]]:
+    """Return user_accounts.account_data as a dict, decrypting it if needed."""
+    if isinstance(account_data_raw, str):
+        from app.core.security import safe_decrypt
+
+        return safe_decrypt(account_data_raw)
+    if isinstance(account_data_raw, dict):
+        return account_data_raw
+    return None
+
+
+def parse_expires_at(value: Any) -> Optional[datetime]:
+    """Parse an ISO expires_at value; None when missing or malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (ValueError, TypeError):
+        return None
+
 
 @dataclass
 class RefreshResult:
@@ -42,27 +96,145 @@ class RefreshResult:
     expires_at: Optional[datetime] = None
 
 
+# Deletes the lock only if it still holds our token, so an expired lock that
+# another worker re-acquired is never released by us
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisRefreshLock:
+    """Short-lived Redis lock serializing refreshes of one token across workers."""
+
+    def __init__(
+        self,
+        redis_url: str = "",
+        namespace: str = "pipewise:oauth_refresh",
+        client: Any = None,
+    ):
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is required for the shared refresh lock")
+
+        self.client = client or aioredis.from_url(redis_url, decode_responses=True)
+        self.namespace = namespace
+        self._release = self.client.register_script(RELEASE_LOCK_LUA)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def acquire(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """Take the lock; returns the owner token, or None if another worker holds it."""
+        token = uuid.uuid4().hex
+        acquired = await self.client.set(
+            self._key(key), token, nx=True, px=max(1, int(ttl_seconds * 1000))
+        )
+        return token if acquired else None
+
+    async def release(self, key: str, token: str) -> None:
+        await self._release(keys=[self._key(key)], args=[token])
+
+    async def wait_released(
+        self, key: str, timeout: float, poll_seconds: float = 0.1
+    ) -> bool:
+        """Wait until the lock is gone; False if it is still held after timeout."""
+        deadline = time.monotonic() + timeout
+        while await self.client.exists(self._key(key)):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll_seconds)
+        return True
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def create_refresh_lock() -> Optional[RedisRefreshLock]:
+    """Build the cross-worker lock from MCP configuration, if enabled."""
+    if get_mcp_config().mcp_oauth_refresh_lock_backend.lower() != "redis":
+        return None
+    from app.core.config import get_settings
+
+    return RedisRefreshLock(get_settings().REDIS_URL)
+
+
 class OAuthTokenRefreshManager:
     """
     Manages OAuth token refresh operations for different providers.
 
     Handles automatic refresh of expired tokens and updates them in Supabase.
     Each provider has specific refresh logic and API endpoints.
+
+    Refreshes are single-flight per (user_id, service): rotating providers
+    (Salesforce, Zoho, Twitter) invalidate a refresh token once it is used,
+    so two concurrent refreshes would leave one caller with a dead token.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        lock: Optional[RedisRefreshLock] = None,
+        lock_ttl_seconds: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            lock: Cross-worker refresh lock; defaults to the configured backend
+            lock_ttl_seconds: Lifetime of the lock, and how long another
+                worker's refresh is waited for
+            transport: Optional httpx transport for the provider clients (tests)
+        """
         self.error_handler = get_error_handler()
         self._refresh_cache = {}  # Cache refresh results to avoid repeated calls
+        self._lock = lock
+        self._lock_resolved = lock is not None
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.transport = transport
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._http_clients: Dict[OAuthProvider, httpx.AsyncClient] = {}
+        self.stats = {"refreshes": 0, "coalesced": 0, "refreshed_elsewhere": 0}
+
+    def _get_refresh_lock(self) -> Optional[RedisRefreshLock]:
+        if not self._lock_resolved:
+            self._lock_resolved = True
+            try:
+                self._lock = create_refresh_lock()
+            except Exception as e:
+                logger.warning(f"⚠️ OAuth refresh lock unavailable, using per-process only: {e}")
+        return self._lock
+
+    def _get_http_client(self, provider: OAuthProvider) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for a provider's token endpoint."""
+        client = self._http_clients.get(provider)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=30.0,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                transport=self.transport,
+            )
+            self._http_clients[provider] = client
+        return client
+
+    async def close(self) -> None:
+        """Close the pooled provider clients and the lock connection."""
+        clients, self._http_clients = list(self._http_clients.values()), {}
+        for client in clients:
+            await client.aclose()
+        if self._lock is not None:
+            await self._lock.close()
+            self._lock, self._lock_resolved = None, False
 
-    @retry_mcp_operation(
-        max_attempts=3, service_name="token_refresh", log_attempts=True
-    )
     async def refresh_mcp_token(
         self, user_id: str, service_name: str, force_refresh: bool = False
     ) -> RefreshResult:
         """
         Refresh OAuth token for a specific service.
 
+        Concurrent calls for the same user and service share one refresh.
+
         Args:
             user_id: User identifier
             service_name: Name of the service
@@ -71,6 +243,28 @@ class OAuthTokenRefreshManager:
         Returns:
             RefreshResult with success status and new tokens
         """
+        key = (str(user_id), service_name)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._refresh_token(user_id, service_name, force_refresh)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # Shielded so one caller timing out does not cancel the others' refresh
+        return await asyncio.shield(task)
+
+    @retry_mcp_operation(
+        max_attempts=3,
+        service_name="token_refresh",
+        service_arg="service_name",
+        log_attempts=True,
+    )
+    async def _refresh_token(
+        self, user_id: str, service_name: str, force_refresh: bool
+    ) -> RefreshResult:
         try:
             # Get current token info
             current_tokens = await self._get_current_tokens(user_id, service_name)
@@ -97,22 +291,39 @@ class OAuthTokenRefreshManager:
                 logger.debug(f"Using cached refresh result for {service_name}")
                 return cached_result
 
-            # Perform provider-specific refresh
-            result = await self._refresh_by_provider(current_tokens, service_name)
-
-            if result.success and result.new_tokens:
-                # Update tokens in Supabase
-                await self._update_tokens_in_supabase(
-                    user_id, service_name, result.new_tokens
+            lock = self._get_refresh_lock()
+            lock_token = None
+            if lock is not None:
+                lock_token, elsewhere = await self._acquire_refresh_lock(
+                    lock, user_id, service_name, cache_key, current_tokens
                 )
-                logger.info(f"✅ Successfully refreshed OAuth token for {service_name}")
+                if elsewhere is not None:
+                    return elsewhere
+
+            try:
+                # Perform provider-specific refresh
+                self.stats["refreshes"] += 1
+                result = await self._refresh_by_provider(current_tokens, service_name)
+
+                if result.success and result.new_tokens:
+                    # Update tokens in Supabase
+                    await self._update_tokens_in_supabase(
+                        user_id, service_name, result.new_tokens
+                    )
+                    logger.info(f"✅ Successfully refreshed OAuth token for {service_name}")
 
-                # Cache the result
-                self._cache_refresh_result(cache_key, result)
-            else:
-                logger.warning(
-                    f"⚠️ Failed to refresh token for {service_name}: {result.error_message}"
-                )
+                    # Cache the result
+                    self._cache_refresh_result(cache_key, result)
+                else:
+                    logger.warning(
+                        f"⚠️ Failed to refresh token for {service_name}: {result.error_message}"
+                    )
+            finally:
+                if lock_token is not None:
+                    try:
+                        await lock.release(cache_key, lock_token)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Could not release OAuth refresh lock: {e}")
 
             return result
 
@@ -128,6 +339,44 @@ class OAuthTokenRefreshManager:
                 success=False, error_message=mcp_error.get_user_friendly_message()
             )
 
+    async def _acquire_refresh_lock(
+        self,
+        lock: RedisRefreshLock,
+        user_id: str,
+        service_name: str,
+        cache_key: str,
+        current_tokens: OAuthTokens,
+    ) -> Tuple[Optional[str], Optional[RefreshResult]]:
+        """
+        Take the cross-worker lock for a refresh.
+
+        Returns (lock_token, None) when this worker should refresh, or
+        (None, result) when another worker already stored new tokens. If the
+        lock store fails or the other worker gives up, the refresh proceeds
+        without the lock.
+        """
+        ttl = self.lock_ttl_seconds or get_mcp_config().mcp_oauth_refresh_lock_ttl
+        try:
+            lock_token = await lock.acquire(cache_key, ttl)
+            if lock_token is None:
+                await lock.wait_released(cache_key, timeout=ttl)
+        except Exception as e:
+            logger.warning(f"⚠️ OAuth refresh lock failed, refreshing without it: {e}")
+            return None, None
+
+        # Another worker may have refreshed while we waited, or just before
+        # we took the lock; its stored tokens are newer than ours
+        latest = await self._get_current_tokens(user_id, service_name)
+        if latest and latest.access_token != current_tokens.access_token:
+            if lock_token is not None:
+                await lock.release(cache_key, lock_token)
+            self.stats["refreshed_elsewhere"] += 1
+            logger.debug(f"Using tokens refreshed by another worker for {service_name}")
+            return None, RefreshResult(
+                success=True, new_tokens=latest, expires_at=latest.expires_at
+            )
+        return lock_token, None
+
     async def _refresh_by_provider(
         self, current_tokens: OAuthTokens, service_name: str
     ) -> RefreshResult:
@@ -172,8 +421,6 @@ class OAuthTokenRefreshManager:
     async def _refresh_google_token(self, tokens: OAuthTokens) -> RefreshResult:
         """Refresh Google OAuth token"""
         try:
-            import httpx
-
             # Google OAuth 2.0 token refresh endpoint
             refresh_url = "https://oauth2.googleapis.com/token"
 
@@ -197,30 +444,30 @@ class OAuthTokenRefreshManager:
                 "client_secret": client_secret,
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(refresh_url, data=refresh_data)
-                response.raise_for_status()
-
-                token_data = response.json()
-
-                # Create new tokens
-                new_tokens = OAuthTokens(
-                    access_token=token_data["access_token"],
-                    refresh_token=token_data.get("refresh_token", tokens.refresh_token),
-                    token_type=token_data.get("token_type", "Bearer"),
-                    expires_at=datetime.now()
-                    + timedelta(seconds=token_data.get("expires_in", 3600)),
-                    scope=token_data.get("scope", tokens.scope),
-                    provider=OAuthProvider.GOOGLE,
-                    user_id=tokens.user_id,
-                    service_account_id=tokens.service_account_id,
-                )
+            client = self._get_http_client(OAuthProvider.GOOGLE)
+            response = await client.post(refresh_url, data=refresh_data)
+            response.raise_for_status()
+
+            token_data = response.json()
+
+            # Create new tokens
+            new_tokens = OAuthTokens(
+                access_token=token_data["access_token"],
+                refresh_token=token_data.get("refresh_token", tokens.refresh_token),
+                token_type=token_data.get("token_type", "Bearer"),
+                expires_at=datetime.now()
+                + timedelta(seconds=token_data.get("expires_in", 3600)),
+                scope=token_data.get("scope", tokens.scope),
+                provider=OAuthProvider.GOOGLE,
+                user_id=tokens.user_id,
+                service_account_id=tokens.service_account_id,
+            )
 
-                return RefreshResult(
-                    success=True,
-                    new_tokens=new_tokens,
-                    expires_at=new_tokens.expires_at,
-                )
+            return RefreshResult(
+                success=True,
+                new_tokens=new_tokens,
+                expires_at=new_tokens.expires_at,
+            )
 
         except Exception as e:
             logger.error(f"❌ Google token refresh failed: {e}")
@@ -231,8 +478,6 @@ class OAuthTokenRefreshManager:
     async def _refresh_twitter_token(self, tokens: OAuthTokens) -> RefreshResult:
         """Refresh Twitter OAuth token"""
         try:
-            import httpx
-
             # Twitter OAuth 2.0 token refresh endpoint
             refresh_url = "https://api.twitter.com/2/oauth2/token"
 
@@ -267,32 +512,32 @@ class OAuthTokenRefreshManager:
                 "Content-Type": "application/x-www-form-urlencoded",
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    refresh_url, data=refresh_data, headers=headers
-                )
-                response.raise_for_status()
-
-                token_data = response.json()
-
-                # Create new tokens
-                new_tokens = OAuthTokens(
-                    access_token=token_data["access_token"],
-                    refresh_token=token_data.get("refresh_token", tokens.refresh_token),
-                    token_type=token_data.get("token_type", "Bearer"),
-                    expires_at=datetime.now()
-                    + timedelta(seconds=token_data.get("expires_in", 7200)),
-                    scope=token_data.get("scope", tokens.scope),
-                    provider=OAuthProvider.TWITTER,
-                    user_id=tokens.user_id,
-                    service_account_id=tokens.service_account_id,
-                )
+            client = self._get_http_client(OAuthProvider.TWITTER)
+            response = await client.post(
+                refresh_url, data=refresh_data, headers=headers
+            )
+            response.raise_for_status()
+
+            token_data = response.json()
+
+            # Create new tokens
+            new_tokens = OAuthTokens(
+                access_token=token_data["access_token"],
+                refresh_token=token_data.get("refresh_token", tokens.refresh_token),
+                token_type=token_data.get("token_type", "Bearer"),
+                expires_at=datetime.now()
+                + timedelta(seconds=token_data.get("expires_in", 7200)),
+                scope=token_data.get("scope", tokens.scope),
+                provider=OAuthProvider.TWITTER,
+                user_id=tokens.user_id,
+                service_account_id=tokens.service_account_id,
+            )
 
-                return RefreshResult(
-                    success=True,
-                    new_tokens=new_tokens,
-                    expires_at=new_tokens.expires_at,
-                )
+            return RefreshResult(
+                success=True,
+                new_tokens=new_tokens,
+                expires_at=new_tokens.expires_at,
+            )
 
         except Exception as e:
             logger.error(f"❌ Twitter token refresh failed: {e}")
@@ -311,8 +556,6 @@ class OAuthTokenRefreshManager:
     async def _refresh_calendly_token(self, tokens: OAuthTokens) -> RefreshResult:
         """Refresh Calendly OAuth token"""
         try:
-            import httpx
-
             # Calendly OAuth 2.0 token refresh endpoint
             refresh_url = "https://auth.calendly.com/oauth/token"
 
@@ -336,30 +579,30 @@ class OAuthTokenRefreshManager:
                 "client_secret": client_secret,
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(refresh_url, data=refresh_data)
-                response.raise_for_status()
-
-                token_data = response.json()
-
-                # Create new tokens
-                new_tokens = OAuthTokens(
-                    access_token=token_data["access_token"],
-                    refresh_token=token_data.get("refresh_token", tokens.refresh_token),
-                    token_type=token_data.get("token_type", "Bearer"),
-                    expires_at=datetime.now()
-                    + timedelta(seconds=token_data.get("expires_in", 3600)),
-                    scope=token_data.get("scope", tokens.scope),
-                    provider=OAuthProvider.CALENDLY,
-                    user_id=tokens.user_id,
-                    service_account_id=tokens.service_account_id,
-                )
+            client = self._get_http_client(OAuthProvider.CALENDLY)
+            response = await client.post(refresh_url, data=refresh_data)
+            response.raise_for_status()
+
+            token_data = response.json()
+
+            # Create new tokens
+            new_tokens = OAuthTokens(
+                access_token=token_data["access_token"],
+                refresh_token=token_data.get("refresh_token", tokens.refresh_token),
+                token_type=token_data.get("token_type", "Bearer"),
+                expires_at=datetime.now()
+                + timedelta(seconds=token_data.get("expires_in", 3600)),
+                scope=token_data.get("scope", tokens.scope),
+                provider=OAuthProvider.CALENDLY,
+                user_id=tokens.user_id,
+                service_account_id=tokens.service_account_id,
+            )
 
-                return RefreshResult(
-                    success=True,
-                    new_tokens=new_tokens,
-                    expires_at=new_tokens.expires_at,
-                )
+            return RefreshResult(
+                success=True,
+                new_tokens=new_tokens,
+                expires_at=new_tokens.expires_at,
+            )
 
         except Exception as e:
             logger.error(f"❌ Calendly token refresh failed: {e}")
@@ -370,8 +613,6 @@ class OAuthTokenRefreshManager:
     async def _refresh_pipedrive_token(self, tokens: OAuthTokens) -> RefreshResult:
         """Refresh Pipedrive OAuth token"""
         try:
-            import httpx
-
             # Pipedrive OAuth 2.0 token refresh endpoint
             refresh_url = "https://oauth.pipedrive.com/oauth/token"
 
@@ -395,30 +636,30 @@ class OAuthTokenRefreshManager:
                 "client_secret": client_secret,
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(refresh_url, data=refresh_data)
-                response.raise_for_status()
-
-                token_data = response.json()
-
-                # Create new tokens
-                new_tokens = OAuthTokens(
-                    access_token=token_data["access_token"],
-                    refresh_token=token_data.get("refresh_token", tokens.refresh_token),
-                    token_type=token_data.get("token_type", "Bearer"),
-                    expires_at=datetime.now()
-                    + timedelta(seconds=token_data.get("expires_in", 3600)),
-                    scope=token_data.get("scope", tokens.scope),
-                    provider=OAuthProvider.PIPEDRIVE,
-                    user_id=tokens.user_id,
-                    service_account_id=tokens.service_account_id,
-                )
+            client = self._get_http_client(OAuthProvider.PIPEDRIVE)
+            response = await client.post(refresh_url, data=refresh_data)
+            response.raise_for_status()
+
+            token_data = response.json()
+
+            # Create new tokens
+            new_tokens = OAuthTokens(
+                access_token=token_data["access_token"],
+                refresh_token=token_data.get("refresh_token", tokens.refresh_token),
+                token_type=token_data.get("token_type", "Bearer"),
+                expires_at=datetime.now()
+                + timedelta(seconds=token_data.get("expires_in", 3600)),
+                scope=token_data.get("scope", tokens.scope),
+                provider=OAuthProvider.PIPEDRIVE,
+                user_id=tokens.user_id,
+                service_account_id=tokens.service_account_id,
+            )
 
-                return RefreshResult(
-                    success=True,
-                    new_tokens=new_tokens,
-                    expires_at=new_tokens.expires_at,
-                )
+            return RefreshResult(
+                success=True,
+                new_tokens=new_tokens,
+                expires_at=new_tokens.expires_at,
+            )
 
         except Exception as e:
             logger.error(f"❌ Pipedrive token refresh failed: {e}")
@@ -429,8 +670,6 @@ class OAuthTokenRefreshManager:
     async def _refresh_salesforce_token(self, tokens: OAuthTokens) -> RefreshResult:
         """Refresh Salesforce OAuth token"""
         try:
-            import httpx
-
             # Salesforce OAuth 2.0 token refresh endpoint
             # The instance URL is stored in service_account_id
             instance_url = tokens.service_account_id or "https://login.salesforce.com"
@@ -456,32 +695,32 @@ class OAuthTokenRefreshManager:
                 "client_secret": client_secret,
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(refresh_url, data=refresh_data)
-                response.raise_for_status()
-
-                token_data = response.json()
-
-                # Create new tokens
-                new_tokens = OAuthTokens(
-                    access_token=token_data["access_token"],
-                    refresh_token=token_data.get("refresh_token", tokens.refresh_token),
-                    token_type=token_data.get("token_type", "Bearer"),
-                    expires_at=datetime.now()
-                    + timedelta(seconds=token_data.get("expires_in", 3600)),
-                    scope=token_data.get("scope", tokens.scope),
-                    provider=OAuthProvider.SALESFORCE,
-                    user_id=tokens.user_id,
-                    service_account_id=token_data.get(
-                        "instance_url", tokens.service_account_id
-                    ),
-                )
+            client = self._get_http_client(OAuthProvider.SALESFORCE)
+            response = await client.post(refresh_url, data=refresh_data)
+            response.raise_for_status()
+
+            token_data = response.json()
+
+            # Create new tokens
+            new_tokens = OAuthTokens(
+                access_token=token_data["access_token"],
+                refresh_token=token_data.get("refresh_token", tokens.refresh_token),
+                token_type=token_data.get("token_type", "Bearer"),
+                expires_at=datetime.now()
+                + timedelta(seconds=token_data.get("expires_in", 3600)),
+                scope=token_data.get("scope", tokens.scope),
+                provider=OAuthProvider.SALESFORCE,
+                user_id=tokens.user_id,
+                service_account_id=token_data.get(
+                    "instance_url", tokens.service_account_id
+                ),
+            )
 
-                return RefreshResult(
-                    success=True,
-                    new_tokens=new_tokens,
-                    expires_at=new_tokens.expires_at,
-                )
+            return RefreshResult(
+                success=True,
+                new_tokens=new_tokens,
+                expires_at=new_tokens.expires_at,
+            )
 
         except Exception as e:
             logger.error(f"❌ Salesforce token refresh failed: {e}")
@@ -493,8 +732,6 @@ class OAuthTokenRefreshManager:
     async def _refresh_zoho_token(self, tokens: OAuthTokens) -> RefreshResult:
         """Refresh Zoho OAuth token"""
         try:
-            import httpx
-
             # Zoho OAuth 2.0 token refresh endpoint
             # The API domain is stored in service_account_id
             api_domain = tokens.service_account_id or "https://accounts.zoho.com"
@@ -519,32 +756,32 @@ class OAuthTokenRefreshManager:
                 "client_secret": client_secret,
             }
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(refresh_url, data=refresh_data)
-                response.raise_for_status()
-
-                token_data = response.json()
-
-                # Create new tokens
-                new_tokens = OAuthTokens(
-                    access_token=token_data["access_token"],
-                    refresh_token=token_data.get("refresh_token", tokens.refresh_token),
-                    token_type=token_data.get("token_type", "Bearer"),
-                    expires_at=datetime.now()
-                    + timedelta(seconds=token_data.get("expires_in", 3600)),
-                    scope=token_data.get("scope", tokens.scope),
-                    provider=OAuthProvider.ZOHO,
-                    user_id=tokens.user_id,
-                    service_account_id=token_data.get(
-                        "api_domain", tokens.service_account_id
-                    ),
-                )
+            client = self._get_http_client(OAuthProvider.ZOHO)
+            response = await client.post(refresh_url, data=refresh_data)
+            response.raise_for_status()
+
+            token_data = response.json()
+
+            # Create new tokens
+            new_tokens = OAuthTokens(
+                access_token=token_data["access_token"],
+                refresh_token=token_data.get("refresh_token", tokens.refresh_token),
+                token_type=token_data.get("token_type", "Bearer"),
+                expires_at=datetime.now()
+                + timedelta(seconds=token_data.get("expires_in", 3600)),
+                scope=token_data.get("scope", tokens.scope),
+                provider=OAuthProvider.ZOHO,
+                user_id=tokens.user_id,
+                service_account_id=token_data.get(
+                    "api_domain", tokens.service_account_id
+                ),
+            )
 
-                return RefreshResult(
-                    success=True,
-                    new_tokens=new_tokens,
-                    expires_at=new_tokens.expires_at,
-                )
+            return RefreshResult(
+                success=True,
+                new_tokens=new_tokens,
+                expires_at=new_tokens.expires_at,
+            )
 
         except Exception as e:
             logger.error(f"❌ Zoho token refresh failed: {e}")
@@ -613,20 +850,7 @@ class OAuthTokenRefreshManager:
                 return None
 
             # Map service name to provider
-            provider_mapping = {
-                "google_calendar": OAuthProvider.GOOGLE,
-                "google": OAuthProvider.GOOGLE,
-                "twitter": OAuthProvider.TWITTER,
-                "sendgrid": OAuthProvider.SENDGRID,
-                "calendly_v2": OAuthProvider.CALENDLY,
-                "calendly": OAuthProvider.CALENDLY,
-                "pipedrive": OAuthProvider.PIPEDRIVE,
-                "salesforce_rest_api": OAuthProvider.SALESFORCE,
-                "salesforce": OAuthProvider.SALESFORCE,
-                "zoho_crm": OAuthProvider.ZOHO,
-            }
-
-            provider = provider_mapping.get(service_name)
+            provider = SERVICE_PROVIDERS.get(service_name)
             if not provider:
                 logger.warning(
                     f"⚠️ Unknown OAuth provider for token refresh: {service_name}"
@@ -753,44 +977,23 @@ class OAuthTokenRefreshManager:
             if not response.data:
                 return {}
 
-            results = {}
-            cutoff_time = datetime.now() + timedelta(minutes=minutes_before_expiry)
-
+            cutoff = time.time() + minutes_before_expiry * 60
+            expiring = []
             for integration in response.data:
                 service_name = integration["service"]
-                account_data_raw = integration.get("account_data", {})
-
-                # Decrypt account_data if it's encrypted
-                if isinstance(account_data_raw, str):
-                    from app.core.security import safe_decrypt
-
-                    account_data = safe_decrypt(account_data_raw)
-                elif isinstance(account_data_raw, dict):
-                    account_data = account_data_raw
-                else:
-                    continue
-
-                expires_at_str = (
+                account_data = decode_account_data(integration.get("account_data", {}))
+                expires_at = parse_expires_at(
                     account_data.get("expires_at") if account_data else None
                 )
+                if expires_at and expires_at.timestamp() <= cutoff:
+                    logger.info(f"🔄 Refreshing expiring token for {service_name}")
+                    expiring.append(service_name)
 
-                if expires_at_str:
-                    try:
-                        expires_at = datetime.fromisoformat(
-                            expires_at_str.replace("Z", "+00:00")
-                        )
-
-                        if expires_at <= cutoff_time:
-                            logger.info(
-                                f"🔄 Refreshing expiring token for {service_name}"
-                            )
-                            result = await self.refresh_mcp_token(user_id, service_name)
-                            results[service_name] = result
-                    except (ValueError, TypeError) as e:
-                        logger.warning(
-                            f"⚠️ Invalid expires_at format for {service_name}: {e}"
-                        )
-                        continue
+            # Services refresh against different providers, so run them together
+            refreshed = await asyncio.gather(
+                *(self.refresh_mcp_token(user_id, service) for service in expiring)
+            )
+            results = dict(zip(expiring, refreshed))
 
             return results
 
@@ -6,22 +6,48 @@ This module provides comprehensive retry logic for MCP operations, including:
 - Retry decorator for automatic retries (maximum 3 attempts)
 - Configurable retry strategies
 - Integration with error handling system
+- Short-circuiting through the shared circuit breakers (circuit_breaker.py)
+- RetryBudget: per-service token bucket capping retries to a fraction of
+  the traffic
+- deadline_scope(), with_deadline(): caller deadlines propagated to every
+  retried call; agent runs and background token refreshes set one
+- hedged_call(): hedged requests for idempotent reads slower than p95
+- Sync retries that never sleep on an event loop thread
 
 Following PRD: Task 2.2 and 2.3 - Implementar función de backoff exponencial y decorador retry
 """
 
 import asyncio
+import contextvars
+import inspect
 import logging
 import random
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
 from functools import wraps
-from typing import Any, Callable, Dict, List, Optional, Type, Union
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Type,
+    Union,
+)
 from datetime import datetime, timedelta
 
+from .circuit_breaker import get_circuit_breaker_registry
 from .error_handler import (
     BaseMCPError,
+    MCPCircuitOpenError,
     MCPErrorCategory,
     MCPErrorHandler,
+    MCPTimeoutError,
     get_error_handler,
 )
 from app.core.config import get_mcp_config
@@ -275,6 +301,241 @@ class RetryContext:
         }
 
 
+class RetryBudget:
+    """
+    Token bucket limiting the retries of one service.
+
+    Every request deposits `ratio` tokens and every retry (or hedged request)
+    spends one, so retries stay a bounded fraction of the traffic instead of
+    multiplying the load on a service that is already failing. A small
+    time-based refill (`min_per_second`) keeps low-traffic services able to
+    retry at all.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_second: float = 1.0,
+        max_tokens: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.clock = clock
+        self.tokens = max_tokens
+        self.rejected = 0
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(
+            self.max_tokens, self.tokens + (now - self._updated) * self.min_per_second
+        )
+        self._updated = now
+
+    def record_request(self) -> None:
+        """Deposit tokens for a first attempt."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """Spend a token for a retry; False when the budget is exhausted."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            self.rejected += 1
+            return False
+
+
+_retry_budgets: Dict[str, RetryBudget] = {}
+_retry_budgets_lock = threading.Lock()
+
+
+def get_retry_budget(service_name: str) -> RetryBudget:
+    """Get the shared retry budget of a service (created from MCP configuration)."""
+    with _retry_budgets_lock:
+        budget = _retry_budgets.get(service_name)
+        if budget is None:
+            mcp_config = get_mcp_config()
+            budget = RetryBudget(
+                ratio=mcp_config.mcp_retry_budget_ratio,
+                min_per_second=mcp_config.mcp_retry_budget_min_per_second,
+            )
+            _retry_budgets[service_name] = budget
+        return budget
+
+
+def set_retry_budget(service_name: str, budget: Optional[RetryBudget]) -> None:
+    """Replace or drop the retry budget of a service (used by tests)."""
+    with _retry_budgets_lock:
+        if budget is None:
+            _retry_budgets.pop(service_name, None)
+        else:
+            _retry_budgets[service_name] = budget
+
+
+# Absolute time.monotonic() deadline of the current call chain
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "mcp_deadline", default=None
+)
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[None]:
+    """
+    Bound everything called inside the block to `seconds` from now.
+
+    Nested scopes keep the earlier deadline. Retried operations stop retrying
+    when the next backoff would pass the deadline, and async attempts are
+    cancelled when it expires. The deadline follows the call into tasks and
+    asyncio.to_thread workers.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the caller's deadline (None without a deadline)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def with_deadline(seconds: Union[float, Callable[[], float]]) -> Callable:
+    """
+    Decorator running an async entry point inside deadline_scope(seconds).
+
+    `seconds` may be a callable, read on every call (e.g. from MCPConfig).
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            limit = seconds() if callable(seconds) else seconds
+            with deadline_scope(limit):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class LatencyTracker:
+    """Recent latencies of one operation, for hedging decisions."""
+
+    def __init__(self, max_samples: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency at quantile q, or None until enough samples were seen."""
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_latency_trackers: Dict[str, LatencyTracker] = {}
+
+
+def get_latency_tracker(key: str) -> LatencyTracker:
+    tracker = _latency_trackers.get(key)
+    if tracker is None:
+        tracker = _latency_trackers.setdefault(key, LatencyTracker())
+    return tracker
+
+
+async def hedged_call(
+    invoke: Callable[[], Awaitable[Any]],
+    hedge_after: float,
+    budget: Optional[RetryBudget] = None,
+) -> Any:
+    """
+    Run invoke(); if it has not finished after hedge_after seconds, start a
+    second identical request and return whichever succeeds first.
+
+    Only for idempotent reads. The hedge spends a retry budget token and is
+    skipped when none is left. Requests still running when the call returns,
+    fails or is cancelled are cancelled.
+    """
+    requests = [asyncio.ensure_future(invoke())]
+    try:
+        done, _ = await asyncio.wait(requests, timeout=hedge_after)
+        if done or (budget is not None and not budget.try_acquire()):
+            return await requests[0]
+
+        logger.debug(f"🪁 Hedging request after {hedge_after:.3f}s")
+        requests.append(asyncio.ensure_future(invoke()))
+        pending = set(requests)
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                first_error = first_error or task.exception()
+        raise first_error
+    finally:
+        for task in requests:
+            if not task.done():
+                task.cancel()
+
+
+def _in_event_loop_thread() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+async def _invoke_within_deadline(
+    invoke: Callable[[], Awaitable[Any]], service_name: str, op_name: str
+) -> Any:
+    """Await one attempt, cancelled when the caller's deadline expires."""
+    remaining = remaining_time()
+    if remaining is None:
+        return await invoke()
+    if remaining <= 0:
+        raise MCPTimeoutError(
+            service_name=service_name,
+            operation=op_name,
+            message=f"Deadline exceeded before {op_name} on {service_name}",
+        )
+    try:
+        return await asyncio.wait_for(invoke(), timeout=remaining)
+    except asyncio.TimeoutError:
+        raise MCPTimeoutError(
+            service_name=service_name,
+            operation=op_name,
+            timeout_seconds=round(remaining, 3),
+        )
+
+
+def _retry_blocker(delay: float, budget: Optional[RetryBudget]) -> Optional[str]:
+    """Reason a due retry must not happen (deadline or budget), else None."""
+    remaining = remaining_time()
+    if remaining is not None and delay >= remaining:
+        return f"deadline in {max(remaining, 0):.1f}s leaves no time for a retry"
+    if budget is not None and not budget.try_acquire():
+        return "retry budget exhausted"
+    return None
+
+
 def retry_mcp_operation(
     max_attempts: int = 3,
     strategy: Optional[RetryStrategy] = None,
@@ -282,6 +543,11 @@ def retry_mcp_operation(
     operation_name: str = "",
     error_handler: Optional[MCPErrorHandler] = None,
     log_attempts: bool = True,
+    circuit_breaker: bool = True,
+    service_arg: Optional[str] = None,
+    retry_budget: bool = True,
+    hedge: bool = False,
+    hedge_percentile: float = 0.95,
 ):
     """
     Decorator for automatic retry of MCP operations with exponential backoff.
@@ -291,6 +557,17 @@ def retry_mcp_operation(
     - Exponential backoff: 1s, 2s, 4s, 8s
     - Smart error classification and retry decisions
     - Comprehensive logging and debugging
+    - Async operations with a service_name go through the service's shared
+      circuit breaker: while it is open, calls fail immediately with
+      MCPCircuitOpenError instead of being attempted and retried
+    - Retries of a service draw from its shared RetryBudget, so an outage
+      does not multiply the load by max_attempts
+    - The caller's deadline_scope() bounds attempts and backoff
+    - Optional hedging for idempotent reads: once the p95 latency of the
+      operation is exceeded, a second request races the first
+
+    Sync operations never sleep on an event loop thread: called from async
+    code they fail after the first attempt instead of retrying.
 
     Args:
         max_attempts: Maximum number of retry attempts
@@ -299,6 +576,14 @@ def retry_mcp_operation(
         operation_name: Name of the operation (auto-detected if not provided)
         error_handler: Error handler instance (uses global if not provided)
         log_attempts: Whether to log retry attempts
+        circuit_breaker: Whether to use the service's circuit breaker
+        service_arg: Argument naming the service the call talks to (e.g. the
+            provider a token is refreshed with); the breaker and retry budget
+            are then kept per "service_name:<value>" instead of one shared by
+            every provider behind service_name
+        retry_budget: Whether retries draw from the service's retry budget
+        hedge: Hedge slow calls (only for idempotent async operations)
+        hedge_percentile: Latency quantile after which a hedge is sent
 
     Usage:
         @retry_mcp_operation(max_attempts=3, service_name="sendgrid")
@@ -306,6 +591,11 @@ def retry_mcp_operation(
             # Operation that might fail
             pass
 
+        @retry_mcp_operation(service_name="calendly", hedge=True)
+        async def list_event_types(user_id):
+            # Idempotent read, safe to hedge
+            pass
+
         @retry_mcp_operation(strategy=custom_strategy)
         def sync_operation():
             # Synchronous operation
@@ -328,99 +618,168 @@ def retry_mcp_operation(
         # Determine operation name
         op_name = operation_name or func.__name__
 
-        if is_async:
-
-            @wraps(func)
-            async def async_wrapper(*args, **kwargs):
-                context = RetryContext(op_name, service_name)
-
-                for attempt in range(retry_strategy.max_attempts):
+        signature = inspect.signature(func) if service_arg else None
+        tracker = get_latency_tracker(f"{service_name}:{op_name}") if hedge else None
+
+        def scope_of(args, kwargs) -> str:
+            """Breaker and budget key: service_name, narrowed by service_arg."""
+            if signature is None:
+                return service_name
+            bound = signature.bind_partial(*args, **kwargs)
+            target = bound.arguments.get(service_arg)
+            return f"{service_name}:{target}" if target else service_name
+
+        def get_breaker(scope: str):
+            if not (circuit_breaker and service_name):
+                return None
+            return get_circuit_breaker_registry().get(scope)
+
+        def get_budget(scope: str) -> Optional[RetryBudget]:
+            if not (retry_budget and service_name):
+                return None
+            budget = get_retry_budget(scope)
+            budget.record_request()
+            return budget
+
+        def classify(raw_error: Exception) -> BaseMCPError:
+            if isinstance(raw_error, BaseMCPError):
+                return raw_error
+            return handler.classify_error(raw_error, service_name, op_name)
+
+        def next_delay(mcp_error: BaseMCPError, attempt: int) -> Optional[float]:
+            """Backoff before the next attempt, or None if it must not be retried."""
+            if not retry_strategy.should_retry(mcp_error, attempt + 1):
+                return None
+            if attempt + 1 >= retry_strategy.max_attempts:
+                return None
+
+            # Check for rate limit retry-after
+            rate_limit_delay = retry_strategy.get_retry_after_seconds(mcp_error)
+            if rate_limit_delay:
+                logger.info(f"⏱️ Rate limited, waiting {rate_limit_delay}s as requested")
+                return rate_limit_delay
+            return retry_strategy.calculate_delay(attempt)
+
+        def log_retry(mcp_error: BaseMCPError, attempt: int, delay: float) -> None:
+            if log_attempts:
+                logger.warning(
+                    f"❌ {op_name} failed on attempt {attempt + 1}: "
+                    f"{mcp_error.get_user_friendly_message()[:50]}... "
+                    f"Retrying in {delay:.1f}s"
+                )
+
+        def log_final_failure(
+            context: RetryContext,
+            mcp_error: BaseMCPError,
+            attempt: int,
+            blocked: Optional[str],
+        ) -> None:
+            if not log_attempts:
+                return
+            if blocked:
+                logger.error(f"🛑 {op_name} not retried: {blocked}")
+            elif attempt + 1 >= retry_strategy.max_attempts:
+                logger.error(
+                    f"💥 {op_name} failed after {retry_strategy.max_attempts} attempts. "
+                    f"Total time: {time.time() - context.start_time:.1f}s"
+                )
+            else:
+                logger.error(
+                    f"🛑 {op_name} failed with non-retryable error: "
+                    f"{mcp_error.category.value}"
+                )
+
+            # Log retry summary for debugging
+            logger.debug(f"Retry summary for {op_name}: {context.get_summary()}")
+
+        async def run_with_retries(
+            invoke: Callable[[], Awaitable[Any]], args: tuple, kwargs: dict
+        ) -> Any:
+            context = RetryContext(op_name, service_name)
+            scope = scope_of(args, kwargs)
+            breaker = get_breaker(scope)
+            budget = get_budget(scope)
+
+            for attempt in range(retry_strategy.max_attempts):
+                if breaker:
                     try:
-                        if log_attempts and attempt > 0:
-                            logger.info(
-                                f"🔄 Retrying {op_name} on {service_name} "
-                                f"(attempt {attempt + 1}/{retry_strategy.max_attempts})"
+                        await breaker.check()
+                    except MCPCircuitOpenError as open_error:
+                        # Fail fast: retrying an open circuit only adds load
+                        context.record_attempt(open_error)
+                        if log_attempts:
+                            logger.warning(
+                                f"⚡ {op_name} short-circuited: breaker open for "
+                                f"{breaker.key}"
                             )
+                        raise
 
-                        # Execute the operation
-                        result = await func(*args, **kwargs)
-
-                        # Success - record and return
-                        context.record_attempt(success=True)
-
-                        if log_attempts and attempt > 0:
-                            logger.info(
-                                f"✅ {op_name} succeeded on attempt {attempt + 1} "
-                                f"after {context.total_delay:.1f}s total delay"
-                            )
+                try:
+                    if log_attempts and attempt > 0:
+                        logger.info(
+                            f"🔄 Retrying {op_name} on {service_name} "
+                            f"(attempt {attempt + 1}/{retry_strategy.max_attempts})"
+                        )
 
-                        return result
+                    # Execute the operation, hedging when it runs slower than usual
+                    started = time.monotonic()
+                    hedge_after = tracker.percentile(hedge_percentile) if tracker else None
+                    if hedge_after is not None:
+                        result = await hedged_call(
+                            lambda: _invoke_within_deadline(invoke, service_name, op_name),
+                            hedge_after,
+                            budget,
+                        )
+                    else:
+                        result = await _invoke_within_deadline(
+                            invoke, service_name, op_name
+                        )
+                    if tracker:
+                        tracker.record(time.monotonic() - started)
+
+                    # Success - record and return
+                    context.record_attempt(success=True)
+                    if breaker:
+                        await breaker.record_success()
+
+                    if log_attempts and attempt > 0:
+                        logger.info(
+                            f"✅ {op_name} succeeded on attempt {attempt + 1} "
+                            f"after {context.total_delay:.1f}s total delay"
+                        )
 
-                    except Exception as raw_error:
-                        # Classify and handle the error
-                        if isinstance(raw_error, BaseMCPError):
-                            mcp_error = raw_error
-                        else:
-                            mcp_error = handler.classify_error(
-                                raw_error, service_name, op_name
-                            )
+                    return result
 
-                        # Check if we should retry
-                        should_retry = retry_strategy.should_retry(
-                            mcp_error, attempt + 1
-                        )
+                except Exception as raw_error:
+                    # Classify and handle the error
+                    mcp_error = classify(raw_error)
+                    if breaker:
+                        await breaker.record_error(mcp_error)
 
-                        # Calculate delay for next attempt
-                        if should_retry and attempt + 1 < retry_strategy.max_attempts:
-                            # Check for rate limit retry-after
-                            rate_limit_delay = retry_strategy.get_retry_after_seconds(
-                                mcp_error
-                            )
-                            if rate_limit_delay:
-                                delay = rate_limit_delay
-                                logger.info(
-                                    f"⏱️ Rate limited, waiting {delay}s as requested"
-                                )
-                            else:
-                                delay = retry_strategy.calculate_delay(attempt)
-
-                            # Record attempt and wait
-                            context.record_attempt(mcp_error, delay)
+                    delay = next_delay(mcp_error, attempt)
+                    blocked = _retry_blocker(delay, budget) if delay is not None else None
 
-                            if log_attempts:
-                                logger.warning(
-                                    f"❌ {op_name} failed on attempt {attempt + 1}: "
-                                    f"{mcp_error.get_user_friendly_message()[:50]}... "
-                                    f"Retrying in {delay:.1f}s"
-                                )
+                    if delay is not None and not blocked:
+                        # Record attempt and wait
+                        context.record_attempt(mcp_error, delay)
+                        log_retry(mcp_error, attempt, delay)
+                        await asyncio.sleep(delay)
+                    else:
+                        # No more retries - record final failure
+                        context.record_attempt(mcp_error)
+                        log_final_failure(context, mcp_error, attempt, blocked)
 
-                            await asyncio.sleep(delay)
-                        else:
-                            # No more retries - record final failure
-                            context.record_attempt(mcp_error)
+                        # Re-raise the last error
+                        raise mcp_error
 
-                            if log_attempts:
-                                if attempt + 1 >= retry_strategy.max_attempts:
-                                    logger.error(
-                                        f"💥 {op_name} failed after {retry_strategy.max_attempts} attempts. "
-                                        f"Total time: {time.time() - context.start_time:.1f}s"
-                                    )
-                                else:
-                                    logger.error(
-                                        f"🛑 {op_name} failed with non-retryable error: "
-                                        f"{mcp_error.category.value}"
-                                    )
-
-                            # Log retry summary for debugging
-                            if log_attempts:
-                                summary = context.get_summary()
-                                logger.debug(f"Retry summary for {op_name}: {summary}")
+            # This should never be reached
+            raise RuntimeError("Retry loop completed without result")
 
-                            # Re-raise the last error
-                            raise mcp_error
+        if is_async:
 
-                # This should never be reached
-                raise RuntimeError("Retry loop completed without result")
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await run_with_retries(lambda: func(*args, **kwargs), args, kwargs)
 
             return async_wrapper
 
@@ -429,6 +788,7 @@ def retry_mcp_operation(
             @wraps(func)
             def sync_wrapper(*args, **kwargs):
                 context = RetryContext(op_name, service_name)
+                budget = get_budget(scope_of(args, kwargs))
 
                 for attempt in range(retry_strategy.max_attempts):
                     try:
@@ -438,6 +798,14 @@ def retry_mcp_operation(
                                 f"(attempt {attempt + 1}/{retry_strategy.max_attempts})"
                             )
 
+                        remaining = remaining_time()
+                        if remaining is not None and remaining <= 0:
+                            raise MCPTimeoutError(
+                                service_name=service_name,
+                                operation=op_name,
+                                message=f"Deadline exceeded before {op_name} on {service_name}",
+                            )
+
                         # Execute the operation
                         result = func(*args, **kwargs)
 
@@ -454,63 +822,25 @@ def retry_mcp_operation(
 
                     except Exception as raw_error:
                         # Classify and handle the error
-                        if isinstance(raw_error, BaseMCPError):
-                            mcp_error = raw_error
-                        else:
-                            mcp_error = handler.classify_error(
-                                raw_error, service_name, op_name
-                            )
-
-                        # Check if we should retry
-                        should_retry = retry_strategy.should_retry(
-                            mcp_error, attempt + 1
-                        )
-
-                        # Calculate delay for next attempt
-                        if should_retry and attempt + 1 < retry_strategy.max_attempts:
-                            # Check for rate limit retry-after
-                            rate_limit_delay = retry_strategy.get_retry_after_seconds(
-                                mcp_error
-                            )
-                            if rate_limit_delay:
-                                delay = rate_limit_delay
-                                logger.info(
-                                    f"⏱️ Rate limited, waiting {delay}s as requested"
-                                )
-                            else:
-                                delay = retry_strategy.calculate_delay(attempt)
-
-                            # Record attempt and wait
+                        mcp_error = classify(raw_error)
+
+                        delay = next_delay(mcp_error, attempt)
+                        blocked = None
+                        if delay is not None and _in_event_loop_thread():
+                            # Sleeping here would stall every task on the loop
+                            blocked = "called on the event loop thread, not retried"
+                        elif delay is not None:
+                            blocked = _retry_blocker(delay, budget)
+
+                        if delay is not None and not blocked:
+                            # Record attempt and wait (worker threads only)
                             context.record_attempt(mcp_error, delay)
-
-                            if log_attempts:
-                                logger.warning(
-                                    f"❌ {op_name} failed on attempt {attempt + 1}: "
-                                    f"{mcp_error.get_user_friendly_message()[:50]}... "
-                                    f"Retrying in {delay:.1f}s"
-                                )
-
+                            log_retry(mcp_error, attempt, delay)
                             time.sleep(delay)
                         else:
                             # No more retries - record final failure
                             context.record_attempt(mcp_error)
-
-                            if log_attempts:
-                                if attempt + 1 >= retry_strategy.max_attempts:
-                                    logger.error(
-                                        f"💥 {op_name} failed after {retry_strategy.max_attempts} attempts. "
-                                        f"Total time: {time.time() - context.start_time:.1f}s"
-                                    )
-                                else:
-                                    logger.error(
-                                        f"🛑 {op_name} failed with non-retryable error: "
-                                        f"{mcp_error.category.value}"
-                                    )
-
-                            # Log retry summary for debugging
-                            if log_attempts:
-                                summary = context.get_summary()
-                                logger.debug(f"Retry summary for {op_name}: {summary}")
+                            log_final_failure(context, mcp_error, attempt, blocked)
 
                             # Re-raise the last error
                             raise mcp_error
@@ -572,6 +902,8 @@ async def retry_async_operation(
     """
     Manually retry an async operation with the specified strategy.
 
+    Honors the caller's deadline_scope() and the service's retry budget.
+
     Args:
         operation: Async function to retry
         strategy: Retry strategy (uses default if not provided)
@@ -589,10 +921,15 @@ async def retry_async_operation(
     handler = get_error_handler()
     op_name = operation_name or getattr(operation, "__name__", "unknown_operation")
     context = RetryContext(op_name, service_name)
+    budget = get_retry_budget(service_name) if service_name else None
+    if budget:
+        budget.record_request()
 
     for attempt in range(retry_strategy.max_attempts):
         try:
-            result = await operation(*args, **kwargs)
+            result = await _invoke_within_deadline(
+                lambda: operation(*args, **kwargs), service_name, op_name
+            )
             context.record_attempt(success=True)
             return result
 
@@ -606,6 +943,11 @@ async def retry_async_operation(
 
             if should_retry and attempt + 1 < retry_strategy.max_attempts:
                 delay = retry_strategy.calculate_delay(attempt)
+                blocked = _retry_blocker(delay, budget)
+                if blocked:
+                    logger.warning(f"🛑 {op_name} not retried: {blocked}")
+                    context.record_attempt(mcp_error)
+                    raise mcp_error
                 context.record_attempt(mcp_error, delay)
                 await asyncio.sleep(delay)
             else:
@@ -624,12 +966,17 @@ def retry_sync_operation(
     """
     Manually retry a sync operation with the specified strategy.
 
-    Similar to retry_async_operation but for synchronous functions.
+    Similar to retry_async_operation but for synchronous functions. It only
+    backs off on worker threads: on an event loop thread the first failure
+    is raised instead of blocking the loop.
     """
     retry_strategy = strategy or create_retry_strategy_from_config(service_name)
     handler = get_error_handler()
     op_name = operation_name or getattr(operation, "__name__", "unknown_operation")
     context = RetryContext(op_name, service_name)
+    budget = get_retry_budget(service_name) if service_name else None
+    if budget:
+        budget.record_request()
 
     for attempt in range(retry_strategy.max_attempts):
         try:
@@ -647,6 +994,14 @@ def retry_sync_operation(
 
             if should_retry and attempt + 1 < retry_strategy.max_attempts:
                 delay = retry_strategy.calculate_delay(attempt)
+                if _in_event_loop_thread():
+                    blocked = "called on the event loop thread"
+                else:
+                    blocked = _retry_blocker(delay, budget)
+                if blocked:
+                    logger.warning(f"🛑 {op_name} not retried: {blocked}")
+                    context.record_attempt(mcp_error)
+                    raise mcp_error
                 context.record_attempt(mcp_error, delay)
                 time.sleep(delay)
             else:
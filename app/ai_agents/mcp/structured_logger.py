@@ -13,7 +13,7 @@ import logging
 import json
 import time
 import uuid
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict, field
 from enum import Enum
@@ -205,6 +205,48 @@ class PerformanceMetrics:
         return result
 
 
+@dataclass
+class StatisticsBucket:
+    """Pre-aggregated usage and authentication counters for one minute."""
+
+    minute: datetime
+
+    # (service_name, agent_type) -> counters
+    usage: Dict[Tuple[str, str], Dict[str, float]] = field(default_factory=dict)
+
+    # service_name -> counters
+    auth: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def add_usage(
+        self, service_name: str, agent_type: str, success: bool, execution_time_ms: float
+    ) -> None:
+        """Fold a usage event into the bucket counters."""
+        counters = self.usage.get((service_name, agent_type))
+        if counters is None:
+            counters = {"operations": 0, "success": 0, "total_time_ms": 0.0}
+            self.usage[(service_name, agent_type)] = counters
+
+        counters["operations"] += 1
+        counters["total_time_ms"] += execution_time_ms
+        if success:
+            counters["success"] += 1
+
+    def add_auth(
+        self, service_name: str, success: bool, error_code: Optional[str]
+    ) -> None:
+        """Fold an authentication event into the bucket counters."""
+        counters = self.auth.get(service_name)
+        if counters is None:
+            counters = {"total": 0, "success": 0, "error_types": defaultdict(int)}
+            self.auth[service_name] = counters
+
+        counters["total"] += 1
+        if success:
+            counters["success"] += 1
+        elif error_code:
+            counters["error_types"][error_code] += 1
+
+
 class MCPStructuredLogger:
     """Main structured logging system for MCP operations."""
 
@@ -246,6 +288,11 @@ class MCPStructuredLogger:
         self.auth_logs: deque = deque(maxlen=5000)
         self.performance_metrics: deque = deque(maxlen=20000)
 
+        # Per-minute aggregates backing the windowed statistics queries.
+        # Buckets are appended in time order, so expiry only pops from the left.
+        self.stat_buckets: deque = deque()
+        self._bucket_lock = threading.Lock()
+
         # Usage statistics
         self.usage_stats: Dict[str, Dict[str, Any]] = defaultdict(
             lambda: {
@@ -464,6 +511,10 @@ class MCPStructuredLogger:
 
         # Store in memory for analytics
         self.usage_logs.append(usage_log)
+        with self._bucket_lock:
+            self._get_bucket(usage_log.timestamp).add_usage(
+                service_name, agent_type, success, execution_time_ms
+            )
 
         # Update usage statistics
         key = f"{service_name}:{agent_type}"
@@ -535,6 +586,10 @@ class MCPStructuredLogger:
 
         # Store in memory for analytics
         self.auth_logs.append(auth_log)
+        with self._bucket_lock:
+            self._get_bucket(auth_log.timestamp).add_auth(
+                service_name, success, error_code
+            )
 
         # Log the event
         log_level = LogLevel.INFO if success else LogLevel.ERROR
@@ -656,48 +711,86 @@ class MCPStructuredLogger:
         # Log the record
         self.logger.handle(record)
 
+    def _get_bucket(self, timestamp: datetime) -> StatisticsBucket:
+        """Return the bucket for the timestamp's minute, expiring old buckets.
+
+        Must be called with ``_bucket_lock`` held.
+        """
+        minute = timestamp.replace(second=0, microsecond=0)
+
+        if self.stat_buckets and self.stat_buckets[-1].minute >= minute:
+            return self.stat_buckets[-1]
+
+        bucket = StatisticsBucket(minute=minute)
+        self.stat_buckets.append(bucket)
+        self._expire_buckets(minute - timedelta(hours=self.metrics_retention_hours))
+        return bucket
+
+    def _expire_buckets(self, cutoff_time: datetime) -> None:
+        """Drop buckets older than the cutoff. Must hold ``_bucket_lock``."""
+        while self.stat_buckets and self.stat_buckets[0].minute < cutoff_time:
+            self.stat_buckets.popleft()
+
+    def _buckets_in_window(
+        self, time_window_hours: Optional[int]
+    ) -> List[StatisticsBucket]:
+        """Return the buckets inside the window, newest first."""
+        with self._bucket_lock:
+            if not time_window_hours:
+                return list(reversed(self.stat_buckets))
+
+            cutoff_minute = (
+                datetime.now() - timedelta(hours=time_window_hours)
+            ).replace(second=0, microsecond=0)
+
+            buckets = []
+            for bucket in reversed(self.stat_buckets):
+                if bucket.minute < cutoff_minute:
+                    break
+                buckets.append(bucket)
+            return buckets
+
     def get_usage_statistics(
         self,
         service_name: Optional[str] = None,
         time_window_hours: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """Get usage statistics for analysis."""
-        if time_window_hours:
-            cutoff_time = datetime.now() - timedelta(hours=time_window_hours)
-            filtered_logs = [
-                log for log in self.usage_logs if log.timestamp >= cutoff_time
-            ]
-        else:
-            filtered_logs = list(self.usage_logs)
+        """
+        Get usage statistics for analysis.
 
-        if service_name:
-            filtered_logs = [
-                log for log in filtered_logs if log.service_name == service_name
-            ]
+        Statistics are summed over the per-minute buckets, so the cost depends
+        on the window length rather than on the number of logged events.
+        """
+        by_service = defaultdict(
+            lambda: {"operations": 0, "success": 0, "avg_time": 0}
+        )
+        total_operations = 0
+        successful_operations = 0
+        total_execution_time = 0.0
+
+        for bucket in self._buckets_in_window(time_window_hours):
+            for (bucket_service, agent_type), counters in bucket.usage.items():
+                if service_name and bucket_service != service_name:
+                    continue
+
+                stats = by_service[f"{bucket_service}:{agent_type}"]
+                stats["operations"] += counters["operations"]
+                stats["success"] += counters["success"]
+                stats["avg_time"] += counters["total_time_ms"]
+
+                total_operations += counters["operations"]
+                successful_operations += counters["success"]
+                total_execution_time += counters["total_time_ms"]
 
-        # Calculate statistics
-        total_operations = len(filtered_logs)
-        successful_operations = sum(1 for log in filtered_logs if log.success)
         failed_operations = total_operations - successful_operations
 
         if total_operations > 0:
-            avg_execution_time = (
-                sum(log.execution_time_ms for log in filtered_logs) / total_operations
-            )
+            avg_execution_time = total_execution_time / total_operations
             success_rate = (successful_operations / total_operations) * 100
         else:
             avg_execution_time = 0
             success_rate = 0
 
-        # Group by service and agent
-        by_service = defaultdict(lambda: {"operations": 0, "success": 0, "avg_time": 0})
-        for log in filtered_logs:
-            key = f"{log.service_name}:{log.agent_type}"
-            by_service[key]["operations"] += 1
-            if log.success:
-                by_service[key]["success"] += 1
-            by_service[key]["avg_time"] += log.execution_time_ms
-
         # Calculate averages
         for stats in by_service.values():
             if stats["operations"] > 0:
@@ -727,14 +820,6 @@ class MCPStructuredLogger:
         self, time_window_hours: Optional[int] = None
     ) -> Dict[str, Any]:
         """Get authentication statistics for analysis."""
-        if time_window_hours:
-            cutoff_time = datetime.now() - timedelta(hours=time_window_hours)
-            filtered_logs = [
-                log for log in self.auth_logs if log.timestamp >= cutoff_time
-            ]
-        else:
-            filtered_logs = list(self.auth_logs)
-
         # Group by service
         by_service = defaultdict(
             lambda: {
@@ -745,16 +830,14 @@ class MCPStructuredLogger:
             }
         )
 
-        for log in filtered_logs:
-            stats = by_service[log.service_name]
-            stats["total_attempts"] += 1
-
-            if log.success:
-                stats["successful_attempts"] += 1
-            else:
-                stats["failed_attempts"] += 1
-                if log.error_code:
-                    stats["error_types"][log.error_code] += 1
+        for bucket in self._buckets_in_window(time_window_hours):
+            for service_name, counters in bucket.auth.items():
+                stats = by_service[service_name]
+                stats["total_attempts"] += counters["total"]
+                stats["successful_attempts"] += counters["success"]
+                stats["failed_attempts"] += counters["total"] - counters["success"]
+                for error_code, count in counters["error_types"].items():
+                    stats["error_types"][error_code] += count
 
         # Calculate success rates
         for stats in by_service.values():
@@ -765,48 +848,34 @@ class MCPStructuredLogger:
 
         return {"by_service": dict(by_service), "time_window_hours": time_window_hours}
 
+    def cleanup_old_metrics(self) -> None:
+        """
+        Drop entries older than the retention period.
+
+        All stores are appended in time order, so expiry pops from the left
+        until the first retained entry instead of rebuilding each deque.
+        """
+        cutoff_time = datetime.now() - timedelta(hours=self.metrics_retention_hours)
+
+        for logs in (
+            self.connection_logs,
+            self.usage_logs,
+            self.auth_logs,
+            self.performance_metrics,
+        ):
+            while logs and logs[0].timestamp < cutoff_time:
+                logs.popleft()
+
+        with self._bucket_lock:
+            self._expire_buckets(cutoff_time)
+
     def start_cleanup_task(self) -> None:
         """Start the background cleanup task for old metrics."""
 
         async def cleanup_old_metrics():
             while True:
                 try:
-                    cutoff_time = datetime.now() - timedelta(
-                        hours=self.metrics_retention_hours
-                    )
-
-                    # Clean up old logs
-                    self.connection_logs = deque(
-                        (
-                            log
-                            for log in self.connection_logs
-                            if log.timestamp >= cutoff_time
-                        ),
-                        maxlen=self.connection_logs.maxlen,
-                    )
-
-                    self.usage_logs = deque(
-                        (
-                            log
-                            for log in self.usage_logs
-                            if log.timestamp >= cutoff_time
-                        ),
-                        maxlen=self.usage_logs.maxlen,
-                    )
-
-                    self.auth_logs = deque(
-                        (log for log in self.auth_logs if log.timestamp >= cutoff_time),
-                        maxlen=self.auth_logs.maxlen,
-                    )
-
-                    self.performance_metrics = deque(
-                        (
-                            log
-                            for log in self.performance_metrics
-                            if log.timestamp >= cutoff_time
-                        ),
-                        maxlen=self.performance_metrics.maxlen,
-                    )
+                    self.cleanup_old_metrics()
 
                     # Sleep for 1 hour before next cleanup
                     await asyncio.sleep(3600)
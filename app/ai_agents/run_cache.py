@@ -0,0 +1,512 @@
+"""
+Result cache for agent runs.
+
+Repeated webhook deliveries, job retries and duplicate form submissions
+send the same input to the same agents. The cache stores the final output
+of a Runner.run call under a key hashed from:
+- the agent definition version (name, model, instructions, tools, handoffs,
+  MCP servers and output type of the agent and its handoff targets)
+- the normalized prompt (whitespace collapsed, per-run ids removed)
+- the user (tenant) the run belongs to, and the message id when the run
+  answers one
+- the lead id
+- the lead's state version, bumped by invalidate_lead() when the data the
+  tools can see changes outside the agents
+
+Only runs without side effects may be cached: a cache hit skips the tools,
+so an agent that sends messages or writes to the CRM (see has_side_effects())
+must always run. The tool-free qualification analysis of prospect lists
+(app.ai_agents.batch_qualification.AgentLeadAnalyzer) is cached this way; the
+coordinator never is. The lead update and delete endpoints invalidate a
+lead's cached analyses.
+
+Provides:
+- AgentRunCache: TTL cache with explicit invalidation and in-flight
+  deduplication (concurrent identical runs share one Runner.run)
+- DiskRunCacheBackend: JSON files on local disk (default)
+- RedisRunCacheBackend: shared cache across workers, with a lock so
+  identical runs in different processes also share one run
+- get_run_cache(), set_run_cache(): global instance
+- invalidate_lead_runs(): invalidate a lead on the global cache
+- has_side_effects(): whether a run calls tools and must not be cached
+
+Configuration (environment):
+- AGENT_RUN_CACHE: "disk" (default), "redis" or "off"
+- AGENT_RUN_CACHE_DIR: disk backend directory (default .cache/agent_runs)
+- AGENT_RUN_CACHE_TTL_SECONDS: entry lifetime (default 3600)
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Optional Redis backend
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+CACHE_FORMAT_VERSION = 2
+
+
+def _hash(material: Any) -> str:
+    encoded = json.dumps(material, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _describe_agent(agent: Any, seen: set) -> Dict[str, Any]:
+    if id(agent) in seen:
+        return {"name": getattr(agent, "name", None)}
+    seen.add(id(agent))
+
+    instructions = getattr(agent, "instructions", None)
+    if callable(instructions):
+        instructions = getattr(instructions, "__qualname__", repr(instructions))
+    output_type = getattr(agent, "output_type", None)
+
+    return {
+        "name": getattr(agent, "name", None),
+        "model": str(getattr(agent, "model", None)),
+        "model_settings": repr(getattr(agent, "model_settings", None)),
+        "instructions": instructions,
+        "tools": sorted(getattr(tool, "name", repr(tool)) for tool in agent.tools),
+        "mcp_servers": sorted(
+            getattr(server, "name", type(server).__name__)
+            for server in getattr(agent, "mcp_servers", [])
+        ),
+        "output_type": getattr(output_type, "__name__", repr(output_type)),
+        "handoffs": [
+            _describe_agent(getattr(handoff, "agent", handoff), seen)
+            for handoff in getattr(agent, "handoffs", [])
+        ],
+    }
+
+
+def agent_definition_version(agent: Any) -> str:
+    """Hash of everything in an agent definition that can change its output."""
+    return _hash(_describe_agent(agent, set()))[:16]
+
+
+def has_side_effects(agent: Any, seen: Optional[set] = None) -> bool:
+    """Whether the agent or an agent it hands off to can call tools."""
+    seen = set() if seen is None else seen
+    if id(agent) in seen:
+        return False
+    seen.add(id(agent))
+    if getattr(agent, "tools", None) or getattr(agent, "mcp_servers", None):
+        return True
+    return any(
+        has_side_effects(getattr(handoff, "agent", handoff), seen)
+        for handoff in getattr(agent, "handoffs", [])
+    )
+
+
+def normalize_prompt(prompt: str, volatile: Iterable[str] = ()) -> str:
+    """Remove per-run values (workflow ids, ...) and collapse whitespace."""
+    for value in volatile:
+        if value:
+            prompt = prompt.replace(str(value), "")
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def serialize_output(output: Any) -> Any:
+    """JSON-safe form of a run's final output (pydantic models become dicts)."""
+    if hasattr(output, "model_dump"):
+        return output.model_dump(mode="json")
+    return json.loads(json.dumps(output, default=str))
+
+
+@dataclass
+class CachedRunResult:
+    """Final output of an agent run, fresh or served from the cache."""
+
+    final_output: Any
+    cache_key: str
+    cache_hit: bool = False
+    shared: bool = False  # joined an identical run that was already in flight
+
+
+class DiskRunCacheBackend:
+    """Stores cache entries as JSON files on local disk."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        safe = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / f"{safe}.json"
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        expires_at = entry.get("expires_at")
+        if expires_at is not None and expires_at < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _write(self, key: str, value: Any, ttl_seconds: Optional[float]) -> None:
+        entry = {
+            "value": value,
+            "expires_at": time.time() + ttl_seconds if ttl_seconds else None,
+        }
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(entry, default=str), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = await asyncio.to_thread(self._read, key)
+        return entry["value"] if entry else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float]) -> None:
+        await asyncio.to_thread(self._write, key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+    async def incr(self, key: str) -> int:
+        entry = await asyncio.to_thread(self._read, key)
+        value = int(entry["value"]) + 1 if entry else 1
+        await asyncio.to_thread(self._write, key, value, None)
+        return value
+
+    async def clear(self) -> None:
+        def _clear():
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+        await asyncio.to_thread(_clear)
+
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> bool:
+        return True  # single host: in-process deduplication is sufficient
+
+    async def release_lock(self, key: str) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
+
+
+class RedisRunCacheBackend:
+    """Stores cache entries in Redis, shared by all workers."""
+
+    def __init__(
+        self,
+        redis_url: str,
+        namespace: str = "pipewise:agent_runs",
+        client: Any = None,
+    ):
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is required for the Redis run cache")
+
+        self.client = client or aioredis.from_url(redis_url, decode_responses=True)
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        data = await self.client.get(self._key(key))
+        return json.loads(data) if data else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float]) -> None:
+        await self.client.set(
+            self._key(key),
+            json.dumps(value, default=str),
+            ex=int(ttl_seconds) if ttl_seconds else None,
+        )
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+    async def incr(self, key: str) -> int:
+        return int(await self.client.incr(self._key(key)))
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(f"{self.namespace}:*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def acquire_lock(self, key: str, ttl_seconds: float) -> bool:
+        return bool(
+            await self.client.set(
+                self._key(f"lock:{key}"), "1", nx=True, ex=max(1, int(ttl_seconds))
+            )
+        )
+
+    async def release_lock(self, key: str) -> None:
+        await self.client.delete(self._key(f"lock:{key}"))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class AgentRunCache:
+    """TTL cache of agent run outputs with in-flight deduplication."""
+
+    def __init__(
+        self,
+        backend: Any,
+        ttl_seconds: float = 3600,
+        lock_timeout_seconds: float = 600,
+        lock_poll_seconds: float = 0.5,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            backend: DiskRunCacheBackend or RedisRunCacheBackend
+            ttl_seconds: Lifetime of cached outputs
+            lock_timeout_seconds: How long another process's identical run is
+                waited for before running anyway
+            lock_poll_seconds: Poll interval while waiting for that run
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.lock_poll_seconds = lock_poll_seconds
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {"hits": 0, "misses": 0, "shared": 0, "stores": 0, "errors": 0}
+
+    @staticmethod
+    def _state_key(lead_id: str) -> str:
+        return f"state:{lead_id}"
+
+    async def state_version(self, lead_id: Optional[str]) -> int:
+        """Current tool-visible state version of a lead (0 until invalidated)."""
+        if not lead_id:
+            return 0
+        try:
+            return int(await self.backend.get(self._state_key(lead_id)) or 0)
+        except Exception as e:
+            logger.warning(f"⚠️ Run cache state lookup failed: {e}")
+            return 0
+
+    async def invalidate_lead(self, *lead_ids: Optional[str]) -> None:
+        """Make every cached run for these leads (ids or emails) unreachable."""
+        for lead_id in filter(None, lead_ids):
+            try:
+                await self.backend.incr(self._state_key(str(lead_id)))
+            except Exception as e:
+                logger.warning(f"⚠️ Run cache invalidation failed for {lead_id}: {e}")
+
+    async def invalidate(self, key: str) -> None:
+        """Drop one cached run."""
+        await self.backend.delete(f"run:{key}")
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    async def make_key(
+        self,
+        agent: Any,
+        prompt: str,
+        lead_id: Optional[str] = None,
+        volatile: Iterable[str] = (),
+        user_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+    ) -> str:
+        """Cache key of running agent on prompt for lead_id, scoped to the user."""
+        return _hash(
+            [
+                CACHE_FORMAT_VERSION,
+                agent_definition_version(agent),
+                normalize_prompt(prompt, volatile),
+                str(user_id or ""),
+                str(message_id or ""),
+                str(lead_id or ""),
+                await self.state_version(str(lead_id) if lead_id else None),
+            ]
+        )
+
+    async def _load(self, key: str) -> Optional[Any]:
+        try:
+            return await self.backend.get(f"run:{key}")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ Run cache read failed: {e}")
+            return None
+
+    async def _store(self, key: str, output: Any, ttl_seconds: float) -> None:
+        try:
+            await self.backend.set(f"run:{key}", {"final_output": output}, ttl_seconds)
+            self.stats["stores"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"⚠️ Run cache write failed: {e}")
+
+    async def _wait_for_remote_run(self, key: str) -> Optional[Any]:
+        deadline = time.monotonic() + self.lock_timeout_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.lock_poll_seconds)
+            cached = await self._load(key)
+            if cached is not None:
+                return cached
+            if await self.backend.acquire_lock(key, self.lock_timeout_seconds):
+                return None  # the other run finished without storing; run it here
+        return None
+
+    async def _execute(
+        self, key: str, run: Callable[[], Awaitable[Any]], ttl_seconds: float
+    ) -> CachedRunResult:
+        cached = await self._load(key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return CachedRunResult(cached["final_output"], key, cache_hit=True)
+
+        locked = await self.backend.acquire_lock(key, self.lock_timeout_seconds)
+        if not locked:
+            cached = await self._wait_for_remote_run(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                return CachedRunResult(cached["final_output"], key, cache_hit=True)
+
+        self.stats["misses"] += 1
+        try:
+            result = await run()
+            output = serialize_output(getattr(result, "final_output", result))
+            await self._store(key, output, ttl_seconds)
+            return CachedRunResult(getattr(result, "final_output", result), key)
+        finally:
+            await self.backend.release_lock(key)
+
+    async def get_or_run(
+        self,
+        key: str,
+        run: Callable[[], Awaitable[Any]],
+        ttl_seconds: Optional[float] = None,
+    ) -> CachedRunResult:
+        """
+        Return the cached output for key, or run() and cache its final_output.
+
+        Concurrent calls with the same key share a single run(). Failed runs
+        are not cached; their exception reaches every waiting caller.
+        """
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["shared"] += 1
+            result = await asyncio.shield(in_flight)
+            return CachedRunResult(
+                result.final_output, key, cache_hit=result.cache_hit, shared=True
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await self._execute(
+                key, run, self.ttl_seconds if ttl_seconds is None else ttl_seconds
+            )
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def run_agent(
+        self,
+        agent: Any,
+        prompt: str,
+        lead_id: Optional[str] = None,
+        volatile: Iterable[str] = (),
+        runner: Optional[Callable[[Any, str], Awaitable[Any]]] = None,
+        user_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+    ) -> CachedRunResult:
+        """
+        Run agent on prompt through the cache.
+
+        Args:
+            agent: Agent to run
+            prompt: Input sent to the agent
+            lead_id: Lead the run is about (scopes invalidate_lead)
+            volatile: Per-run values in the prompt to ignore in the key
+            runner: Coroutine running the agent (defaults to Runner.run)
+            user_id: User the run belongs to; runs are never shared across users
+            message_id: Message the run answers, if any
+        """
+        if runner is None:
+            from agents import Runner
+
+            runner = Runner.run
+
+        key = await self.make_key(
+            agent, prompt, lead_id, volatile, user_id=user_id, message_id=message_id
+        )
+        return await self.get_or_run(key, lambda: runner(agent, prompt))
+
+    def get_statistics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "in_flight": len(self._in_flight),
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+def create_run_cache() -> Optional[AgentRunCache]:
+    """Build the run cache from environment configuration (None when off)."""
+    backend_name = os.getenv("AGENT_RUN_CACHE", "disk").lower()
+    ttl_seconds = float(os.getenv("AGENT_RUN_CACHE_TTL_SECONDS", "3600"))
+
+    if backend_name == "off":
+        return None
+    if backend_name == "redis":
+        from app.core.config import get_settings
+
+        backend = RedisRunCacheBackend(get_settings().CELERY_BROKER_URL)
+    else:
+        backend = DiskRunCacheBackend(
+            os.getenv("AGENT_RUN_CACHE_DIR", ".cache/agent_runs")
+        )
+    return AgentRunCache(backend, ttl_seconds=ttl_seconds)
+
+
+_run_cache: Optional[AgentRunCache] = None
+_run_cache_configured = False
+
+
+def get_run_cache() -> Optional[AgentRunCache]:
+    """Get the global run cache (None when AGENT_RUN_CACHE=off)."""
+    global _run_cache, _run_cache_configured
+    if not _run_cache_configured:
+        _run_cache = create_run_cache()
+        _run_cache_configured = True
+    return _run_cache
+
+
+def set_run_cache(cache: Optional[AgentRunCache]) -> None:
+    """Replace the global run cache (used by tests)."""
+    global _run_cache, _run_cache_configured
+    _run_cache = cache
+    _run_cache_configured = True
+
+
+async def invalidate_lead_runs(*lead_ids: Optional[str]) -> None:
+    """Invalidate cached runs for leads (ids or emails) after external changes."""
+    cache = get_run_cache()
+    if cache is not None:
+        await cache.invalidate_lead(*lead_ids)
@@ -0,0 +1,87 @@
+"""
+Streamed agent runs that forward progress to the agent event bus.
+
+Provides:
+- stream_event_payload(): maps an Agents SDK stream event to an
+  (event type, payload) pair, or None for events the UI does not show
+- run_streamed_with_events(): drop-in replacement for Runner.run that runs
+  the agent with Runner.run_streamed and publishes tokens, tool calls,
+  handoffs and messages while the run is in progress
+
+Events are attributed to the workflow bound with
+app.core.event_bus.event_context().
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from agents import Agent, ItemHelpers, Runner
+
+from app.core.event_bus import publish_event
+
+logger = logging.getLogger(__name__)
+
+_TOOL_OUTPUT_PREVIEW = 500
+
+
+def _tool_name(raw_item: Any) -> Optional[str]:
+    name = getattr(raw_item, "name", None)
+    if name is None and isinstance(raw_item, dict):
+        name = raw_item.get("name")
+    return name
+
+
+def stream_event_payload(event: Any) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """Translate one stream event into an agent event type and payload."""
+    if event.type == "raw_response_event":
+        data = event.data
+        if getattr(data, "type", None) == "response.output_text.delta":
+            return "agent.token", {"delta": data.delta}
+        return None
+
+    if event.type == "agent_updated_stream_event":
+        return "agent.updated", {"agent": event.new_agent.name}
+
+    if event.type != "run_item_stream_event":
+        return None
+
+    item = event.item
+    agent_name = getattr(getattr(item, "agent", None), "name", None)
+    if event.name == "tool_called":
+        return "tool.called", {
+            "agent": agent_name,
+            "tool": _tool_name(item.raw_item),
+        }
+    if event.name == "tool_output":
+        return "tool.output", {
+            "agent": agent_name,
+            "output": str(item.output)[:_TOOL_OUTPUT_PREVIEW],
+        }
+    if event.name == "handoff_occured":
+        return "handoff", {
+            "from_agent": item.source_agent.name,
+            "to_agent": item.target_agent.name,
+        }
+    if event.name == "message_output_created":
+        return "agent.message", {
+            "agent": agent_name,
+            "text": ItemHelpers.text_message_output(item),
+        }
+    return None
+
+
+async def run_streamed_with_events(agent: Agent, prompt: str, **kwargs) -> Any:
+    """
+    Run an agent like Runner.run while publishing its progress.
+
+    Returns the streaming run result once the run completes; like the result
+    of Runner.run it exposes final_output.
+    """
+    result = Runner.run_streamed(agent, prompt, **kwargs)
+    async for event in result.stream_events():
+        mapped = stream_event_payload(event)
+        if mapped is not None:
+            event_type, payload = mapped
+            publish_event(event_type, **payload)
+
+    return result
@@ -4,6 +4,7 @@ import logging
 from datetime import datetime
 
 from app.ai_agents.agents import ModernAgents as Agents
+from app.ai_agents.run_cache import invalidate_lead_runs
 from app.auth.middleware import get_current_user
 from app.models.user import User
 from app.supabase.supabase_client import SupabaseCRMClient
@@ -167,6 +168,7 @@ async def update_lead(
     """Actualizar lead"""
     try:
         updated_lead = crm_client.update_lead(lead_id, updates)
+        await invalidate_lead_runs(lead_id, updated_lead.email)
         return updated_lead
 
     except Exception as e:
@@ -184,6 +186,7 @@ async def delete_lead(
 ):
     """Eliminar lead"""
     try:
+        lead = crm_client.get_lead(lead_id)
         success = crm_client.delete_lead(lead_id)
 
         if not success:
@@ -191,6 +194,8 @@ async def delete_lead(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Lead not found"
             )
 
+        # Cached qualification analyses are keyed by the lead's email
+        await invalidate_lead_runs(lead_id, lead.email if lead else None)
         return {"message": "Lead deleted successfully", "id": lead_id}
 
     except HTTPException:
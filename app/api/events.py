@@ -1,48 +1,107 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import JSONResponse
-from typing import Dict
+from typing import Awaitable, Callable, Optional
 import time
 import asyncio
 import logging
 
+from app.core.event_bus import EventSubscription, get_event_bus
+from app.core.rate_limit import get_rate_limiter
+
 router = APIRouter(prefix="/ws", tags=["events"])
 
-# Simple in-memory rate limiter (token -> [timestamps])
-# For production, replace with Redis or database-backed limiter.
+# Incoming client messages allowed per token (approx 2 msg/s)
 _RATE_LIMIT_WINDOW = 60  # seconds
-_RATE_LIMIT_MAX = 120  # max messages per window (approx 2 msg/s)
-_token_usage: Dict[str, list[float]] = {}
+_RATE_LIMIT_MAX = 120  # max messages per window
 _logger = logging.getLogger("agent_ws")
 
 
 async def _check_rate_limit(token: str) -> bool:
     """Return True if allowed, False if rate-limit exceeded."""
-    now = time.time()
-    window_start = now - _RATE_LIMIT_WINDOW
-    timestamps = _token_usage.setdefault(token, [])
-    # Drop timestamps outside window
-    _token_usage[token] = [ts for ts in timestamps if ts >= window_start]
-    if len(_token_usage[token]) >= _RATE_LIMIT_MAX:
-        return False
-    _token_usage[token].append(now)
-    return True
+    decision = await get_rate_limiter().check(
+        f"ws:{token}", _RATE_LIMIT_MAX, period=_RATE_LIMIT_WINDOW
+    )
+    return decision.allowed
+
+
+# Resolves a WebSocket token to the user id whose events it may receive
+TokenResolver = Callable[[str], Awaitable[Optional[str]]]
+_token_resolver: Optional[TokenResolver] = None
+
+
+async def _validate_with_auth_client(token: str) -> Optional[str]:
+    from app.auth.auth_client import AuthenticationClient
+
+    result = await AuthenticationClient().validate_token(token)
+    return result.user_id if result.valid else None
+
+
+def get_token_resolver() -> TokenResolver:
+    """Get the resolver that maps WebSocket tokens to user ids."""
+    return _token_resolver or _validate_with_auth_client
+
+
+def set_token_resolver(resolver: Optional[TokenResolver]) -> None:
+    """Replace the token resolver (used by tests)."""
+    global _token_resolver
+    _token_resolver = resolver
+
+
+async def _forward_events(ws: WebSocket, subscription: EventSubscription) -> None:
+    """Send bus events to the client, reporting events dropped for slowness."""
+    reported_drops = 0
+    try:
+        while True:
+            event = await subscription.get()
+            if subscription.dropped > reported_drops:
+                await ws.send_json(
+                    {
+                        "type": "events_dropped",
+                        "count": subscription.dropped - reported_drops,
+                        "ts": time.time(),
+                    }
+                )
+                reported_drops = subscription.dropped
+            await ws.send_json(event.to_dict())
+    except Exception as e:
+        # The client went away; the receive loop handles the disconnect
+        _logger.debug("Agent WS event forwarding stopped: %s", e)
 
 
 @router.websocket("/agent-events")
 async def agent_events_socket(ws: WebSocket):
     """WebSocket endpoint that streams agent plan events to the client.
 
-    The client must supply a `token` query parameter for authentication. A very
-    lightweight in-memory rate limiter is applied per token.
+    The client must supply a `token` query parameter for authentication and
+    only receives events of its own workflows; an optional `workflow_id` query
+    parameter narrows the stream to one workflow. Each client has a bounded
+    queue: a client that falls behind loses the oldest events and is told how
+    many were dropped. A very lightweight in-memory rate limiter is applied
+    per token.
     """
     token = ws.query_params.get("token")
     if not token:
         await ws.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
+    try:
+        user_id = await get_token_resolver()(token)
+    except Exception as e:
+        _logger.warning("Agent WS token validation failed: %s", e)
+        user_id = None
+    if not user_id:
+        await ws.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
     # Accept the WebSocket connection
     await ws.accept()
-    _logger.info("Agent WS connected token=%s ip=%s", token, ws.client.host)
+    _logger.info("Agent WS connected user=%s ip=%s", user_id, ws.client.host)
+
+    bus = get_event_bus()
+    subscription = bus.subscribe(
+        user_id=user_id, workflow_id=ws.query_params.get("workflow_id")
+    )
+    sender = asyncio.create_task(_forward_events(ws, subscription))
 
     try:
         while True:
@@ -68,7 +127,7 @@ async def agent_events_socket(ws: WebSocket):
             # Currently, this WS is server-push only, so ignore incoming.
             _logger.debug("Received client message token=%s: %s", token, msg)
     except WebSocketDisconnect:
-        _logger.info("Agent WS disconnected token=%s", token)
+        _logger.info("Agent WS disconnected user=%s", user_id)
     finally:
-        # Clean up usage to avoid mem-leak
-        _token_usage.pop(token, None)
+        sender.cancel()
+        bus.unsubscribe(subscription)
@@ -81,10 +81,6 @@ class CalendlyClient:
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/integrations", tags=["integrations"])
 
-# Store for user integrations (in production, use database)
-user_integrations = {}
-
-
 # Pydantic Models
 class IntegrationConfig(BaseModel):
     """Base configuration for any integration"""
@@ -175,24 +171,16 @@ class WebhookEvent(BaseModel):
 
 
 # Helper functions
-from cryptography.fernet import Fernet
-
-# Generate or use existing Fernet key for encryption
-_FERNET_KEY = os.environ.get("PIPEWISE_FERNET_KEY")
-if not _FERNET_KEY:
-    # Generate a new key for development (in production, this should be persistent)
-    _FERNET_KEY = Fernet.generate_key().decode()
-    logger.warning(
-        "Generated new Fernet key for development. In production, use PIPEWISE_FERNET_KEY environment variable."
-    )
-
-_FERNET = Fernet(_FERNET_KEY.encode() if isinstance(_FERNET_KEY, str) else _FERNET_KEY)
+from app.core.integration_store import get_integration_cipher, get_integration_store
 
 
 def encrypt_sensitive_data(data: str) -> str:
     """Encrypt sensitive data like API keys using Fernet symmetric encryption"""
     try:
-        return _FERNET.encrypt(data.encode()).decode()
+        return get_integration_cipher().encrypt(data.encode()).decode()
+    except RuntimeError:
+        # No encryption key configured; never store the secret unencrypted
+        raise
     except Exception as e:
         logger.error(f"Encryption error: {e}")
         # In development, return the data as-is with a warning
@@ -203,7 +191,9 @@ def encrypt_sensitive_data(data: str) -> str:
 def decrypt_sensitive_data(encrypted_data: str) -> str:
     """Decrypt sensitive data like API keys using Fernet symmetric encryption"""
     try:
-        return _FERNET.decrypt(encrypted_data.encode()).decode()
+        return get_integration_cipher().decrypt(encrypted_data.encode()).decode()
+    except RuntimeError:
+        raise
     except Exception as e:
         logger.error(f"Decryption error: {e}")
         # In development, assume data is not encrypted
@@ -213,24 +203,22 @@ def decrypt_sensitive_data(encrypted_data: str) -> str:
 
 def get_user_integration(user_id: str, platform: str) -> Optional[Dict[str, Any]]:
     """Get user integration configuration"""
-    return user_integrations.get(f"{user_id}_{platform}")
+    return get_integration_store().get(user_id, platform)
+
+
+def get_user_integrations(user_id: str) -> Dict[str, Dict[str, Any]]:
+    """Get all of a user's integration configurations (platform -> config)"""
+    return get_integration_store().get_all(user_id)
 
 
 def save_user_integration(user_id: str, platform: str, config: Dict[str, Any]):
     """Save user integration configuration"""
-    user_integrations[f"{user_id}_{platform}"] = {
-        **config,
-        "updated_at": datetime.utcnow(),
-        "user_id": user_id,
-        "platform": platform,
-    }
+    get_integration_store().save(user_id, platform, config)
 
 
 def delete_user_integration(user_id: str, platform: str):
     """Delete user integration configuration"""
-    key = f"{user_id}_{platform}"
-    if key in user_integrations:
-        del user_integrations[key]
+    get_integration_store().delete(user_id, platform)
 
 
 # Import actual auth dependency
@@ -341,8 +329,11 @@ async def list_integrations(current_user: dict = Depends(get_current_user)):
         user_id = current_user["id"]
         integrations = []
 
+        # All of the user's integrations in one read
+        user_configs = get_user_integrations(user_id)
+
         # Calendly integration
-        calendly_config = get_user_integration(user_id, "calendly")
+        calendly_config = user_configs.get("calendly")
         calendly_status = "disconnected"
         calendly_stats = {"meetings_scheduled": 0, "links_created": 0}
         calendly_error = None
@@ -391,7 +382,7 @@ async def list_integrations(current_user: dict = Depends(get_current_user)):
             ("twitter", "X (Twitter)"),
             ("email", "Email Integration"),
         ]:
-            config = get_user_integration(user_id, platform)
+            config = user_configs.get(platform)
             integrations.append(
                 IntegrationStatus(
                     id=platform,
@@ -929,7 +920,7 @@ async def enable_mcp_integration(
                 detail="Use the disable endpoint to disable integrations",
             )
 
-        # Save to in-memory storage
+        # Save to the integration store
         user_id = current_user.get("id", "user_123")
         integration_config = {
             "id": integration_id,
@@ -0,0 +1,121 @@
+"""
+Job status API.
+
+Endpoints for following background jobs queued by the workflow endpoints:
+- GET /api/jobs/stats: queue depth and worker statistics (admins)
+- GET /api/jobs/{job_id}: current job status and result (polling)
+- WS /api/jobs/{job_id}/ws?token=...: pushes status changes until the job finishes
+
+Jobs carry lead data and workflow results, so a job is only visible to the
+user who queued it (and to admins); anyone else gets 404 as if it did not exist.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+
+from app.api.events import get_token_resolver
+from app.auth.middleware import get_admin_user, get_current_user
+from app.jobs.queue import Job
+from app.jobs.workflows import get_job_queue
+from app.models.user import User
+from app.schemas.auth_schema import UserRole
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+# Re-read the store this often so updates made by other processes
+# (Redis backend) reach WebSocket clients too.
+WS_POLL_INTERVAL_SECONDS = 1.0
+
+
+def job_accepted_response(job_dict: Dict[str, Any], created: bool) -> Dict[str, Any]:
+    """Body returned with 202 Accepted by endpoints that enqueue jobs."""
+    job_id = job_dict["id"]
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": job_dict["status"],
+        "deduplicated": not created,
+        "status_url": f"/api/jobs/{job_id}",
+        "websocket_url": f"/api/jobs/{job_id}/ws",
+    }
+
+
+def _is_visible(job: Optional[Job], user_id: str, is_admin: bool = False) -> bool:
+    """Whether a job exists and belongs to the user (admins see every job)."""
+    return job is not None and (is_admin or job.user_id == str(user_id))
+
+
+@router.get("/stats")
+async def get_job_statistics(admin_user: User = Depends(get_admin_user)):
+    """Get job queue statistics."""
+    return await get_job_queue().get_statistics()
+
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str, current_user: User = Depends(get_current_user)):
+    """Get the current status of one of the user's jobs."""
+    job = await get_job_queue().get_job(job_id)
+    if not _is_visible(job, current_user.id, current_user.role == UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found"
+        )
+    return job.to_dict()
+
+
+@router.websocket("/{job_id}/ws")
+async def job_status_socket(ws: WebSocket, job_id: str):
+    """Stream job status changes, closing once the job completes or fails.
+
+    The client must supply a `token` query parameter; only the user who
+    queued the job may follow it.
+    """
+    token = ws.query_params.get("token")
+    user_id = None
+    if token:
+        try:
+            user_id = await get_token_resolver()(token)
+        except Exception as e:
+            logger.warning(f"Job status socket token validation failed: {e}")
+
+    queue = get_job_queue()
+    job = await queue.get_job(job_id) if user_id else None
+    if not _is_visible(job, user_id):
+        await ws.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await ws.accept()
+    updates = queue.subscribe(job_id)
+    last_sent = None
+
+    try:
+        while True:
+            current = job.to_dict()
+            if current != last_sent:
+                await ws.send_json(current)
+                last_sent = current
+            if job.is_terminal:
+                break
+
+            try:
+                await asyncio.wait_for(updates.get(), timeout=WS_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            job = await queue.get_job(job_id) or job
+
+        await ws.close()
+    except WebSocketDisconnect:
+        logger.debug(f"Job status socket for {job_id} disconnected")
+    finally:
+        queue.unsubscribe(job_id, updates)
@@ -3,6 +3,7 @@ import os
 import logging
 from contextlib import asynccontextmanager
 from fastapi import (
+    Depends,
     FastAPI,
     Request,
     HTTPException,
@@ -20,7 +21,10 @@ from app.auth.supabase_auth_client import (
     get_supabase_auth_client,
     cleanup_supabase_auth_keys,
 )
+from app.core.tracing import RequestProfiler
 from app.auth.utils import get_client_ip
+from app.auth.middleware import get_current_user
+from app.models.user import User
 
 
 # Importaciones de routers (movidas al principio)
@@ -42,6 +46,16 @@ from app.ai_agents.agents import TenantContext, ModernLeadProcessor
 from app.api.user_config_router import router as user_config_router
 from app.api.oauth_router import router as oauth_router
 from app.api.health_router import router as health_router
+from app.api.jobs import job_accepted_response, router as jobs_router
+from app.jobs.workflows import enqueue_lead_workflow, shutdown_job_queue
+from app.jobs.ingest import get_webhook_ingest, shutdown_webhook_ingest
+from app.jobs.delivery import shutdown_webhook_delivery
+from app.auth.write_behind import shutdown_auth_writer
+from app.ai_agents.mcp.oauth_refresh_scheduler import (
+    shutdown_refresh_scheduler,
+    start_refresh_scheduler,
+)
+from app.ai_agents.mcp.oauth_analytics_logger import shutdown_oauth_analytics_logger
 
 # Cargar variables de entorno
 load_dotenv()
@@ -73,6 +87,18 @@ async def lifespan(app: FastAPI):
     # Inicializar tareas de limpieza
     await schedule_cleanup_tasks()
 
+    # Refrescar tokens OAuth antes de que expiren
+    try:
+        await start_refresh_scheduler()
+    except Exception as e:
+        logger.error(f"❌ OAuth refresh scheduler failed to start: {e}")
+
+    # Procesar webhooks pendientes de una ejecución anterior
+    try:
+        await get_webhook_ingest().start()
+    except Exception as e:
+        logger.error(f"❌ Webhook ingest consumer failed to start: {e}")
+
     logger.info("✅ Application started successfully")
 
     yield
@@ -113,6 +139,39 @@ async def schedule_cleanup_tasks():
 
 async def cleanup_resources():
     """Limpiar recursos al cerrar"""
+    try:
+        # Antes que la cola de jobs: el consumidor todavía encola workflows
+        await shutdown_webhook_ingest()
+    except Exception as e:
+        logger.error(f"Error stopping webhook ingest consumer: {e}")
+
+    try:
+        # Entregar los webhooks salientes encolados
+        await shutdown_webhook_delivery()
+    except Exception as e:
+        logger.error(f"Error stopping webhook delivery: {e}")
+
+    try:
+        await shutdown_job_queue()
+    except Exception as e:
+        logger.error(f"Error stopping job queue: {e}")
+
+    try:
+        await shutdown_refresh_scheduler()
+    except Exception as e:
+        logger.error(f"Error stopping OAuth refresh scheduler: {e}")
+
+    try:
+        await shutdown_oauth_analytics_logger()
+    except Exception as e:
+        logger.error(f"Error flushing OAuth analytics: {e}")
+
+    try:
+        # Escribir auditoría y sesiones pendientes antes de salir
+        await shutdown_auth_writer()
+    except Exception as e:
+        logger.error(f"Error flushing auth writes: {e}")
+
     try:
         supabase_auth_client = await get_supabase_auth_client()
         await supabase_auth_client.close()
@@ -168,6 +227,15 @@ app.add_middleware(TrustedHostMiddleware, allowed_hosts=trusted_hosts)
 # ===================== MIDDLEWARE PERSONALIZADO =====================
 
 
+request_profiler = RequestProfiler()
+
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """Opt-in pyinstrument profile and span summary via the X-Profile header"""
+    return await request_profiler(request, call_next)
+
+
 @app.middleware("http")
 async def security_headers_middleware(request: Request, call_next):
     """Agregar headers de seguridad"""
@@ -373,6 +441,9 @@ app.include_router(leads_router)
 # Incluir router de health check para MCP
 app.include_router(health_router)
 
+# Incluir router de estado de jobs en segundo plano
+app.include_router(jobs_router)
+
 # ===================== ENDPOINTS DE WORKFLOW =====================
 
 
@@ -391,69 +462,60 @@ async def test_connection():
     }
 
 
-@app.post("/api/process-lead-workflow")
-async def process_lead_workflow_endpoint(lead_data: dict):
+@app.post("/api/process-lead-workflow", status_code=202)
+async def process_lead_workflow_endpoint(
+    lead_data: dict, request: Request, current_user: User = Depends(get_current_user)
+):
     """
-    Endpoint para procesar workflows de leads desde el frontend.
+    Endpoint para encolar workflows de leads desde el frontend.
+
+    El workflow se ejecuta en el pool de workers en segundo plano; la respuesta
+    202 incluye el job_id para consultar el estado vía polling o WebSocket.
+    Un header Idempotency-Key (o la identidad del lead) evita duplicados.
+    El dueño del job es el usuario autenticado, nunca un userId del payload.
     """
     try:
-        logger.info(f"🚀 Processing REAL workflow request - NOT SIMPLIFIED")
+        user_id = str(current_user.id)
+        logger.info(f"🚀 Queueing REAL workflow request for user: {user_id}")
         logger.info(f"📋 Lead data received: {lead_data}")
 
-        # Force debugging logs
-        logger.info(f"🔧 DEBUG: About to create TenantContext")
-
-        # Create tenant context for the workflow
-        tenant_context = TenantContext(
-            tenant_id="default",
-            user_id=lead_data.get("userId", "system"),
-            is_premium=False,
-            api_limits={"calls_per_hour": 100},
-            features_enabled=["lead_qualification", "meeting_scheduling"],
-        )
-
-        logger.info(f"🔧 DEBUG: TenantContext created successfully")
-        logger.info(f"🔧 DEBUG: About to create ModernLeadProcessor")
-
-        # Initialize the Modern Lead Processor with agents
-        processor = ModernLeadProcessor(tenant_context)
-
-        logger.info(
-            f"🔧 DEBUG: ModernLeadProcessor created, about to call process_lead_workflow"
-        )
-        logger.info(f"🔧 DEBUG: Lead data for workflow: {lead_data}")
+        # Tenant context for the workflow, rebuilt by the worker
+        tenant = {
+            "tenant_id": "default",
+            "user_id": user_id,
+            "is_premium": False,
+            "api_limits": {"calls_per_hour": 100},
+            "features_enabled": ["lead_qualification", "meeting_scheduling"],
+        }
 
         # Force the workflow to run in REAL mode, not simplified
         # Add debugging flag to lead_data to track it through the workflow
         enhanced_lead_data = {
             **lead_data,
+            "userId": user_id,
             "debug_mode": True,
             "force_real_workflow": True,
             "workflow_source": "frontend_endpoint",
         }
 
-        # Process the lead workflow with real AI agents
-        logger.info(
-            f"🔧 DEBUG: Calling processor.process_lead_workflow with enhanced data"
+        job, created = await enqueue_lead_workflow(
+            enhanced_lead_data,
+            tenant,
+            idempotency_key=request.headers.get("Idempotency-Key"),
         )
-        result = await processor.process_lead_workflow(enhanced_lead_data)
 
         logger.info(
-            f"🔧 DEBUG: Workflow completed, result status: {result.get('status', 'unknown')}"
+            f"✅ REAL Workflow queued as job {job.id} (new={created}, status={job.status.value})"
         )
-        logger.info(f"✅ REAL Workflow processed successfully: {result['status']}")
-
-        return {
-            "success": True,
-            "data": result,
-            "message": "Real workflow processed successfully with AI agents",
-            "workflow_type": "REAL_AI_WORKFLOW",
-            "debug_info": {
-                "endpoint": "process_lead_workflow_endpoint",
-                "forced_real_mode": True,
-                "processor_type": str(type(processor)),
+
+        return JSONResponse(
+            status_code=202,
+            content={
+                **job_accepted_response(job.to_dict(), created),
+                "message": "Workflow queued for processing with AI agents",
+                "workflow_type": "REAL_AI_WORKFLOW",
             },
-        }
+        )
 
     except Exception as e:
         logger.error(f"❌ Error in workflow endpoint: {e}", exc_info=True)
@@ -494,6 +556,41 @@ async def health_check():
     }
 
 
+async def webhook_ingest_metrics() -> str:
+    """Métricas del consumidor de webhooks en formato Prometheus"""
+    try:
+        stats = await get_webhook_ingest().get_statistics()
+    except Exception as e:
+        logger.warning(f"Webhook ingest metrics unavailable: {e}")
+        return ""
+
+    return f"""
+# HELP pipewise_webhook_ingest_backlog Webhooks appended but not yet processed
+# TYPE pipewise_webhook_ingest_backlog gauge
+pipewise_webhook_ingest_backlog {stats["backlog"] or 0}
+
+# HELP pipewise_webhook_ingest_lag_seconds Age of the oldest webhook in the last batch
+# TYPE pipewise_webhook_ingest_lag_seconds gauge
+pipewise_webhook_ingest_lag_seconds {stats["lag_seconds"]}
+
+# HELP pipewise_webhook_ingest_throughput Webhooks handled per second (last minute)
+# TYPE pipewise_webhook_ingest_throughput gauge
+pipewise_webhook_ingest_throughput {stats["throughput_per_second"]}
+
+# HELP pipewise_webhook_ingest_processed_total Webhooks processed
+# TYPE pipewise_webhook_ingest_processed_total counter
+pipewise_webhook_ingest_processed_total {stats["processed"]}
+
+# HELP pipewise_webhook_ingest_duplicates_total Duplicate webhooks skipped
+# TYPE pipewise_webhook_ingest_duplicates_total counter
+pipewise_webhook_ingest_duplicates_total {stats["duplicates"]}
+
+# HELP pipewise_webhook_ingest_dead_lettered_total Webhooks moved to the dead letter
+# TYPE pipewise_webhook_ingest_dead_lettered_total counter
+pipewise_webhook_ingest_dead_lettered_total {stats["dead_lettered"]}
+"""
+
+
 @app.get("/metrics")
 async def get_metrics():
     """Obtener métricas del sistema en formato Prometheus"""
@@ -518,6 +615,7 @@ pipewise_health_status 1
 # TYPE pipewise_timestamp_seconds gauge
 pipewise_timestamp_seconds {datetime.utcnow().timestamp()}
 """
+        metrics_text += await webhook_ingest_metrics()
 
         return PlainTextResponse(content=metrics_text, media_type="text/plain")
 
@@ -551,11 +649,12 @@ if __name__ == "__main__":
 
 # ===================== CONFIGURACIÓN DE PRODUCCIÓN =====================
 
-# Para producción, usar:
-# gunicorn main:app -w 4 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000
+# Para producción, usar (WEB_CONCURRENCY fija el número de workers y le indica
+# a la app que hay varios procesos; requiere los backends redis):
+# WEB_CONCURRENCY=4 gunicorn main:app -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000
 
 # O con uvicorn:
-# uvicorn main:app --host 0.0.0.0 --port 8000 --workers 4
+# WEB_CONCURRENCY=4 uvicorn main:app --host 0.0.0.0 --port 8000
 
 
 # ===================== TAREAS PROGRAMADAS (OPCIONAL) =====================
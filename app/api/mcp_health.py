@@ -6,6 +6,7 @@ This module provides REST API endpoints for monitoring MCP services health inclu
 - /health/mcp/{service_name} - Specific service health details
 - /health/mcp/metrics - Performance metrics summary
 - /health/mcp/alerts - Active alerts and alert history
+- /health/mcp/usage - Windowed usage and authentication statistics
 - /health/mcp/dashboard - Complete health dashboard data
 """
 
@@ -92,6 +93,24 @@ class DashboardResponse(BaseModel):
     trends: Dict[str, Any] = Field(
         default_factory=dict, description="Performance trends"
     )
+    usage: Dict[str, Any] = Field(
+        default_factory=dict, description="Usage and authentication statistics"
+    )
+
+
+class UsageStatisticsResponse(BaseModel):
+    """Response model for usage and authentication statistics."""
+
+    timestamp: str = Field(description="Statistics timestamp")
+    time_window_hours: Optional[int] = Field(
+        None, description="Time window in hours (None for full retention)"
+    )
+    usage: Dict[str, Any] = Field(
+        default_factory=dict, description="Usage statistics by service and agent"
+    )
+    authentication: Dict[str, Any] = Field(
+        default_factory=dict, description="Authentication statistics by service"
+    )
 
 
 # Create router
@@ -197,6 +216,48 @@ async def get_mcp_health_status():
         )
 
 
+@router.get("/mcp/usage", response_model=UsageStatisticsResponse)
+async def get_mcp_usage_statistics(
+    time_window_hours: Optional[int] = Query(
+        1, description="Time window in hours", ge=1, le=168
+    ),
+    service_name: Optional[str] = Query(
+        None, description="Restrict usage statistics to one service"
+    ),
+):
+    """
+    Get usage and authentication statistics for MCP services.
+
+    Statistics are served from the structured logger's per-minute buckets,
+    so the response time does not grow with the number of logged events.
+
+    Args:
+        time_window_hours: Time window for the statistics
+        service_name: Optional service to filter usage statistics by
+
+    Returns:
+        Usage and authentication statistics for the time window
+    """
+    try:
+        mcp_logger = get_mcp_logger()
+
+        return UsageStatisticsResponse(
+            timestamp=datetime.now().isoformat(),
+            time_window_hours=time_window_hours,
+            usage=mcp_logger.get_usage_statistics(
+                service_name=service_name, time_window_hours=time_window_hours
+            ),
+            authentication=mcp_logger.get_authentication_statistics(
+                time_window_hours=time_window_hours
+            ),
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get usage statistics: {str(e)}"
+        )
+
+
 @router.get("/mcp/{service_name}", response_model=ServiceHealthResponse)
 async def get_service_health(service_name: str):
     """
@@ -420,6 +481,7 @@ async def get_mcp_dashboard():
         health_status = await get_mcp_health_status()
         metrics = await get_mcp_metrics(time_window="5m")
         alerts = await get_mcp_alerts(limit=20)
+        usage = await get_mcp_usage_statistics(time_window_hours=1, service_name=None)
 
         # Calculate trends
         performance_monitor = get_performance_monitor()
@@ -436,7 +498,11 @@ async def get_mcp_dashboard():
                 trends[service_name] = service_summary["trends"]
 
         response = DashboardResponse(
-            health=health_status, metrics=metrics, alerts=alerts, trends=trends
+            health=health_status,
+            metrics=metrics,
+            alerts=alerts,
+            trends=trends,
+            usage=usage.model_dump(),
         )
 
         return response
@@ -16,9 +16,9 @@ from app.ai_agents.agents import ModernAgents
 # FIXED: Import existing storage system from integrations.py
 from app.api.integrations import (
     get_user_integration,
+    get_user_integrations,
     save_user_integration,
     delete_user_integration,
-    user_integrations,
 )
 
 from app.supabase.supabase_client import get_supabase_client
@@ -72,7 +72,7 @@ async def get_user_accounts(request: Request, user: User = Depends(get_current_u
 async def save_user_account(
     account_data: Dict[str, Any], user: User = Depends(get_current_user)
 ):
-    """Save or update user account configuration using the existing in-memory storage system"""
+    """Save or update user account configuration in the integration store"""
     try:
         required_fields = ["account_id", "account_type", "configuration"]
         if not all(field in account_data for field in required_fields):
@@ -138,12 +138,8 @@ async def disconnect_user_account(
             return {"success": True, "message": f"Redirected to OAuth disconnect"}
 
         # Otherwise handle as API key account using existing system
-        for key in list(user_integrations.keys()):
-            if (
-                key.startswith(f"{user_id}_")
-                and user_integrations[key].get("account_id") == account_id
-            ):
-                platform = key.split(f"{user_id}_", 1)[1]
+        for platform, config in get_user_integrations(user_id).items():
+            if config.get("account_id") == account_id:
                 delete_user_integration(user_id, platform)
                 logger.info(f"Deleted account {account_id} for user {user_id}")
                 return {
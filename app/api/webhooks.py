@@ -1,7 +1,8 @@
 # app/api/webhooks.py - Rutas para webhooks y notificaciones
-from fastapi import APIRouter, HTTPException, status, Depends, Request, BackgroundTasks
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
+import asyncio
 import logging
 import json
 from datetime import datetime
@@ -14,7 +15,18 @@ from app.schemas.crm_schema import (
     NotificationResponse,
     IntegrationConfig,
 )
-from app.auth.utils import get_client_ip, hash_token
+from app.auth.utils import get_client_ip
+from app.jobs.delivery import WebhookDestination, get_webhook_delivery
+from app.jobs.ingest import (
+    EMAIL_EVENT,
+    FORM_SUBMISSION,
+    INBOUND_TOKEN_HEADER,
+    LEAD_CAPTURE,
+    IngestRecord,
+    create_inbound_webhook_token,
+    get_webhook_ingest,
+    resolve_inbound_webhook_owner,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,94 +37,169 @@ router = APIRouter(prefix="/webhooks", tags=["Webhooks & Notifications"])
 # ===================== WEBHOOKS ENTRANTES =====================
 
 
-@router.post("/lead-capture")
-async def capture_lead_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks,
-):
-    """Capturar leads desde formularios web externos"""
+async def _read_payload(request: Request) -> Any:
+    """Leer el cuerpo JSON del webhook (400 si no es JSON válido)"""
     try:
-        client_ip = get_client_ip(request)
-        data = await request.json()
-
-        # Validar datos mínimos requeridos
-        required_fields = ["name", "email"]
-        for field in required_fields:
-            if field not in data:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Missing required field: {field}",
-                )
-
-        # Procesar lead en background
-        background_tasks.add_task(process_webhook_lead, data, client_ip)
-
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content={
-                "success": True,
-                "message": "Lead received and will be processed",
-                "timestamp": datetime.utcnow().isoformat(),
-            },
+        return await request.json()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON payload"
         )
 
+
+async def _webhook_owner(request: Request) -> str:
+    """
+    Usuario al que pertenece el webhook entrante.
+
+    El emisor no está autenticado, así que el dueño nunca se toma del cuerpo:
+    la URL lleva ?owner=<user id> y el token emitido por
+    POST /webhooks/inbound/token va en la cabecera X-PipeWise-Webhook-Token.
+    Un token en la URL no se acepta: quedaría en logs de proxies y accesos.
+    """
+    owner_id = request.query_params.get("owner")
+    token = request.headers.get(INBOUND_TOKEN_HEADER)
+    try:
+        owner = await asyncio.to_thread(resolve_inbound_webhook_owner, owner_id, token)
     except Exception as e:
-        logger.error(f"Webhook lead capture error: {e}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"error": "Failed to process webhook", "detail": str(e)},
+        logger.error(f"Webhook owner lookup failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook could not be verified, retry later",
+        )
+    if owner is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing webhook token",
         )
+    return owner
 
 
-@router.post("/form-submission")
-async def form_submission_webhook(
+async def _ingest(
     request: Request,
-    background_tasks: BackgroundTasks,
-):
-    """Webhook para formularios de contacto"""
+    kind: str,
+    payload: Dict[str, Any],
+    client_ip: Optional[str],
+    owner_id: str,
+) -> IngestRecord:
+    """
+    Añadir el webhook al log de ingesta duradero.
+
+    Es el único trabajo hecho dentro de la petición; el consumidor crea los
+    leads y dispara los workflows. Si el log no está disponible se responde
+    503 para que el emisor reintente.
+    """
     try:
-        data = await request.json()
-        client_ip = get_client_ip(request)
+        return await get_webhook_ingest().submit(
+            kind,
+            payload,
+            client_ip=client_ip,
+            idempotency_key=request.headers.get("Idempotency-Key"),
+            owner_id=owner_id,
+        )
+    except Exception as e:
+        logger.error(f"Webhook ingest append failed ({kind}): {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook could not be queued, retry later",
+        )
 
-        # Agregar metadata
-        data["source"] = "form_webhook"
-        data["ip_address"] = client_ip
-        data["received_at"] = datetime.utcnow().isoformat()
 
-        # Procesar en background
-        background_tasks.add_task(process_form_submission, data)
+@router.post("/lead-capture")
+async def capture_lead_webhook(request: Request, owner_id: str = Depends(_webhook_owner)):
+    """Capturar leads desde formularios web externos"""
+    data = await _read_payload(request)
+    if not isinstance(data, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON object"
+        )
 
-        return {"status": "received", "message": "Form submission processed"}
+    # Validar datos mínimos requeridos
+    required_fields = ["name", "email"]
+    for field in required_fields:
+        if field not in data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing required field: {field}",
+            )
 
-    except Exception as e:
-        logger.error(f"Form submission webhook error: {e}")
+    record = await _ingest(request, LEAD_CAPTURE, data, get_client_ip(request), owner_id)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "success": True,
+            "message": "Lead received and will be processed",
+            "idempotency_key": record.idempotency_key,
+            "timestamp": datetime.utcnow().isoformat(),
+        },
+    )
+
+
+@router.post("/form-submission")
+async def form_submission_webhook(
+    request: Request, owner_id: str = Depends(_webhook_owner)
+):
+    """Webhook para formularios de contacto"""
+    data = await _read_payload(request)
+    if not isinstance(data, dict):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to process form submission",
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON object"
         )
 
+    # IP y hora de recepción viajan en el registro, no en el payload, para
+    # que un reenvío idéntico tenga la misma clave de idempotencia
+    data.setdefault("source", "form_webhook")
+    await _ingest(request, FORM_SUBMISSION, data, get_client_ip(request), owner_id)
 
-@router.post("/email-event")
-async def email_event_webhook(
-    request: Request,
-    background_tasks: BackgroundTasks,
-):
-    """Webhook para eventos de email (opens, clicks, bounces)"""
-    try:
-        data = await request.json()
+    return {"status": "received", "message": "Form submission processed"}
 
-        # Procesar evento de email
-        background_tasks.add_task(process_email_event, data)
 
-        return {"status": "received"}
+@router.post("/email-event")
+async def email_event_webhook(request: Request, owner_id: str = Depends(_webhook_owner)):
+    """Webhook para eventos de email (opens, clicks, bounces)"""
+    data = await _read_payload(request)
 
-    except Exception as e:
-        logger.error(f"Email event webhook error: {e}")
+    # Proveedores como SendGrid envían listas de eventos
+    payload = {"events": data} if isinstance(data, list) else data
+    if not isinstance(payload, dict):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to process email event",
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON object"
         )
 
+    await _ingest(request, EMAIL_EVENT, payload, get_client_ip(request), owner_id)
+
+    return {"status": "received"}
+
+
+@router.post("/inbound/token")
+async def rotate_inbound_webhook_token(
+    request: Request, current_user: User = Depends(get_current_user)
+):
+    """
+    Emitir el token de los webhooks entrantes del usuario (revoca el anterior).
+
+    El token solo se muestra en esta respuesta; se guarda hasheado. Las URLs
+    no lo incluyen: el emisor debe enviarlo en la cabecera indicada.
+    """
+    owner_id = str(current_user.id)
+    token = await asyncio.to_thread(create_inbound_webhook_token, owner_id)
+    query = f"?owner={owner_id}"
+    return {
+        "token": token,
+        "header": INBOUND_TOKEN_HEADER,
+        "urls": {
+            "lead_capture": f"{request.url_for('capture_lead_webhook')}{query}",
+            "form_submission": f"{request.url_for('form_submission_webhook')}{query}",
+            "email_event": f"{request.url_for('email_event_webhook')}{query}",
+        },
+    }
+
+
+@router.get("/ingest/stats")
+async def get_ingest_stats(admin_user: User = Depends(get_admin_user)):
+    """Métricas del consumidor de webhooks (backlog, lag y throughput)"""
+    return await get_webhook_ingest().get_statistics()
+
 
 # ===================== NOTIFICACIONES =====================
 
@@ -210,35 +297,12 @@ async def delete_notification(
 async def get_integrations(
     current_user: User = Depends(get_current_user),
 ):
-    """Obtener configuraciones de integración"""
+    """Obtener los destinos de webhooks salientes del usuario"""
     try:
-        # Solo admins pueden ver todas las integraciones
-        if current_user.role.value != "admin":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
-            )
-
-        # Simular integraciones
-        integrations = [
-            {
-                "id": "zapier_001",
-                "name": "Zapier Integration",
-                "type": "automation",
-                "enabled": True,
-                "webhook_url": "https://hooks.zapier.com/hooks/catch/...",
-                "events": ["lead_created", "opportunity_won"],
-            },
-            {
-                "id": "mailchimp_001",
-                "name": "MailChimp Sync",
-                "type": "email_marketing",
-                "enabled": False,
-                "webhook_url": None,
-                "events": ["lead_created", "contact_updated"],
-            },
-        ]
-
-        return {"integrations": integrations}
+        destinations = await get_webhook_delivery().load_destinations(str(current_user.id))
+        return {
+            "integrations": [destination.to_public_dict() for destination in destinations]
+        }
 
     except Exception as e:
         logger.error(f"Get integrations error: {e}")
@@ -251,20 +315,54 @@ async def get_integrations(
 @router.post("/integrations")
 async def create_integration(
     integration_data: IntegrationConfig,
-    admin_user: User = Depends(get_admin_user),
+    current_user: User = Depends(get_current_user),
 ):
-    """Crear nueva integración"""
+    """
+    Crear nueva integración.
+
+    Con webhook_url se registra como destino de webhooks salientes del
+    usuario: solo recibe sus propios eventos. config admite "events" (vacío
+    = todos), "batch", "max_batch_size", "headers" y "secret". El destino se
+    guarda con el secreto cifrado; el secreto de firma solo se devuelve en
+    esta respuesta. La URL debe ser https y resolver a direcciones públicas, y
+    no se admiten headers como Host, Authorization, Cookie o hop-by-hop.
+    """
+    if not integration_data.webhook_url:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="webhook_url is required"
+        )
+
     try:
-        # Implementar creación de integración
+        config = integration_data.config
+        destination = WebhookDestination(
+            url=integration_data.webhook_url,
+            events=list(config.get("events", [])),
+            batch=bool(config.get("batch", False)),
+            max_batch_size=int(config.get("max_batch_size", 50)),
+            enabled=integration_data.enabled,
+            headers=dict(config.get("headers", {})),
+            owner_id=str(current_user.id),
+        )
+        if config.get("secret"):
+            destination.secret = config["secret"]
+        await get_webhook_delivery().add_destination(destination)
+
         return {
-            "id": "integration_123",
+            "id": destination.id,
             "name": integration_data.name,
             "type": integration_data.type,
-            "enabled": integration_data.enabled,
-            "webhook_url": integration_data.webhook_url,
+            "enabled": destination.enabled,
+            "webhook_url": destination.url,
+            "events": destination.events,
+            "batch": destination.batch,
+            "signing_secret": destination.secret,
             "created_at": datetime.utcnow().isoformat(),
         }
 
+    except (TypeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid config: {e}"
+        )
     except Exception as e:
         logger.error(f"Create integration error: {e}")
         raise HTTPException(
@@ -273,6 +371,27 @@ async def create_integration(
         )
 
 
+@router.delete("/integrations/{integration_id}")
+async def delete_integration(
+    integration_id: str,
+    current_user: User = Depends(get_current_user),
+):
+    """Eliminar un destino de webhooks salientes del usuario"""
+    if not await get_webhook_delivery().remove_destination(
+        str(current_user.id), integration_id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Integration not found"
+        )
+    return {"message": "Integration deleted", "id": integration_id}
+
+
+@router.get("/delivery/stats")
+async def get_delivery_stats(admin_user: User = Depends(get_admin_user)):
+    """Métricas de entrega por destino (entregados, reintentos, dead letter, cola)"""
+    return get_webhook_delivery().get_statistics()
+
+
 # ===================== WEBHOOKS SALIENTES =====================
 
 
@@ -294,13 +413,14 @@ async def trigger_webhook_event(
             source="manual_trigger",
         )
 
-        # Procesar webhook en background
-        # background_tasks.add_task(send_webhook_event, webhook_event)
+        # Encolar para entrega en segundo plano a los destinos del admin
+        destinations = await send_webhook_event(webhook_event, str(admin_user.id))
 
         return {
             "success": True,
             "event_type": event_type,
             "message": "Webhook event triggered",
+            "destinations": destinations,
             "timestamp": webhook_event.timestamp.isoformat(),
         }
 
@@ -315,69 +435,15 @@ async def trigger_webhook_event(
 # ===================== FUNCIONES AUXILIARES =====================
 
 
-async def process_webhook_lead(lead_data: dict, ip_address: str):
-    """Procesar lead recibido por webhook"""
-    try:
-        logger.info(f"Processing webhook lead: {lead_data['email']}")
-
-        # Aquí integrar con el sistema de CRM
-        # 1. Validar y limpiar datos
-        # 2. Crear lead en la base de datos
-        # 3. Ejecutar agentes de IA si es necesario
-        # 4. Enviar notificaciones
-
-        # Simular procesamiento
-        lead_id = f"lead_{hash_token(lead_data['email'])[:8]}"
-
-        logger.info(f"Webhook lead processed successfully: {lead_id}")
-
-    except Exception as e:
-        logger.error(f"Error processing webhook lead: {e}")
-
-
-async def process_form_submission(form_data: dict):
-    """Procesar envío de formulario"""
-    try:
-        logger.info(
-            f"Processing form submission from {form_data.get('source', 'unknown')}"
-        )
-
-        # Implementar lógica de procesamiento
-        # 1. Validar datos del formulario
-        # 2. Crear lead o contacto
-        # 3. Enviar email de confirmación
-        # 4. Notificar al equipo de ventas
-
-    except Exception as e:
-        logger.error(f"Error processing form submission: {e}")
-
-
-async def process_email_event(event_data: dict):
-    """Procesar evento de email"""
-    try:
-        event_type = event_data.get("event", "unknown")
-        logger.info(f"Processing email event: {event_type}")
-
-        # Implementar lógica según el tipo de evento
-        # - open: Marcar email como abierto
-        # - click: Registrar click en enlace
-        # - bounce: Marcar email como inválido
-        # - complaint: Manejar queja de spam
-
-    except Exception as e:
-        logger.error(f"Error processing email event: {e}")
-
-
-async def send_webhook_event(webhook_event: WebhookEvent):
-    """Enviar evento a webhooks configurados"""
-    try:
-        logger.info(f"Sending webhook event: {webhook_event.event_type}")
-
-        # Implementar envío a URLs configuradas
-        # 1. Obtener integraciones activas para este evento
-        # 2. Preparar payload
-        # 3. Enviar HTTP POST a cada webhook URL
-        # 4. Manejar reintentos en caso de error
+async def send_webhook_event(webhook_event: WebhookEvent, owner_id: str) -> int:
+    """
+    Enviar evento a los webhooks configurados por owner_id.
 
-    except Exception as e:
-        logger.error(f"Error sending webhook event: {e}")
+    Solo encola el evento por destino suscrito; el motor de entrega firma,
+    agrupa y reintenta en segundo plano. Devuelve el número de destinos.
+    """
+    destinations = await get_webhook_delivery().publish_event(webhook_event, owner_id)
+    logger.info(
+        f"Queued webhook event {webhook_event.event_type} for {destinations} destinations"
+    )
+    return destinations
@@ -1,4 +1,5 @@
 # app/auth/auth_client.py
+import asyncio
 import os
 import jwt
 import pyotp
@@ -15,6 +16,8 @@ from supabase import create_client, Client
 from gotrue.errors import AuthApiError
 from passlib.context import CryptContext
 
+from app.auth.user_cache import get_user_profile_cache, invalidate_user_profile
+from app.auth.write_behind import AuthWriteBehind, get_auth_writer
 from app.models.user import User, UserSession
 from app.schemas.auth_schema import (
     UserRegisterRequest,
@@ -151,6 +154,7 @@ class AuthenticationClient:
                 raise Exception("Failed to create user record")
 
             user = User(**result.data[0])
+            await invalidate_user_profile(user.id)
 
             # Log del evento de registro exitoso
             await self._log_auth_event(
@@ -597,6 +601,8 @@ class AuthenticationClient:
             if not result.data:
                 raise Exception("Failed to update user 2FA settings")
 
+            await invalidate_user_profile(user_id)
+
             # Limpiar datos pendientes
             await self._cleanup_pending_2fa(user_id)
 
@@ -683,6 +689,8 @@ class AuthenticationClient:
             if not result.data:
                 raise Exception("Failed to disable 2FA")
 
+            await invalidate_user_profile(user_id)
+
             # Log del evento
             await self._log_auth_event(
                 user_id=user_id, action="2fa_disable", success=True
@@ -716,6 +724,26 @@ class AuthenticationClient:
             logger.error(f"Get user by ID error: {e}")
             return None
 
+    async def get_cached_user(self, user_id: str) -> Optional[User]:
+        """Obtener usuario para autenticar requests, desde la caché de perfiles (sin secretos)"""
+
+        async def load() -> Optional[Dict[str, Any]]:
+            result = (
+                self.admin_client.table("users")
+                .select("*")
+                .eq("id", user_id)
+                .limit(1)
+                .execute()
+            )
+            return result.data[0] if result.data else None
+
+        try:
+            row = await get_user_profile_cache().get(str(user_id), load)
+            return User(**row) if row else None
+        except Exception as e:
+            logger.error(f"Get cached user error: {e}")
+            return None
+
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Obtener usuario por email usando el cliente de admin para bypass RLS"""
         try:
@@ -789,7 +817,11 @@ class AuthenticationClient:
                 "revoked": False,
             }
 
-            result = self.client.table("user_sessions").insert(session_data).execute()
+            # Escrito en línea: el refresh token solo es válido con su sesión,
+            # y otro worker puede recibir el refresh antes que la cola escriba
+            result = await asyncio.to_thread(
+                self.client.table("user_sessions").insert(session_data).execute
+            )
 
             if not result.data:
                 raise Exception("Failed to create session")
@@ -826,7 +858,7 @@ class AuthenticationClient:
                 "timestamp": self._get_current_timestamp().isoformat(),
             }
 
-            self.client.table("auth_audit_logs").insert(log_data).execute()
+            self._get_auth_writer().upsert("auth_audit_logs", log_data)
 
         except Exception as e:
             logger.error(f"Auth logging error: {e}")
@@ -839,13 +871,15 @@ class AuthenticationClient:
                 "last_activity": self._get_current_timestamp().isoformat(),
             }
 
-            self.client.table("users").update(update_data).eq(
-                "id", str(user_id)
-            ).execute()
+            self._get_auth_writer().update("users", update_data, id=str(user_id))
 
         except Exception as e:
             logger.error(f"Update last login error: {e}")
 
+    def _get_auth_writer(self) -> AuthWriteBehind:
+        """Cola de escritura en segundo plano para auditoría y último login"""
+        return get_auth_writer(self.client)
+
     # ===================== MÉTODOS REDIS INTEGRADOS =====================
 
     def _get_redis_client(self):
@@ -1052,6 +1086,7 @@ class AuthenticationClient:
                     raise Exception("Failed to create user record")
 
                 new_user = User(**result.data[0])
+                await invalidate_user_profile(user_id)
 
                 # Create session for new user
                 access_token, refresh_token = await self._create_user_session(
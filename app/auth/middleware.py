@@ -56,7 +56,7 @@ class AuthMiddleware:
 
             # Obtener usuario completo
             logger.info(f"👤 Fetching user by ID: {token_data.user_id}")
-            user = await self.auth_client.get_user_by_id(token_data.user_id)
+            user = await self.auth_client.get_cached_user(token_data.user_id)
 
             if not user:
                 logger.error(f"❌ User not found for ID: {token_data.user_id}")
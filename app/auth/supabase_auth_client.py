@@ -8,6 +8,7 @@ import json
 import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
+from app.core.rate_limit import get_rate_limiter
 from app.supabase.supabase_client import SupabaseCRMClient
 
 logger = logging.getLogger(__name__)
@@ -212,59 +213,20 @@ class SupabaseAuthClient:
     async def check_rate_limit(
         self, identifier: str, limit: int, window: int = 3600
     ) -> Dict[str, Any]:
-        """Verificar rate limiting usando Supabase"""
-        try:
-            # Clean up expired rate limit entries first
-            await self._cleanup_expired_rate_limits()
-
-            window_start = datetime.utcnow() - timedelta(seconds=window)
-
-            # Count requests in the current window
-            result = (
-                self.client.table("rate_limits")
-                .select("*")
-                .eq("identifier", identifier)
-                .gte("created_at", window_start.isoformat())
-                .execute()
-            )
-
-            current_count = len(result.data)
-
-            # Add current request
-            self.client.table("rate_limits").insert(
-                {
-                    "identifier": identifier,
-                    "created_at": datetime.utcnow().isoformat(),
-                    "expires_at": (
-                        datetime.utcnow() + timedelta(seconds=window)
-                    ).isoformat(),
-                }
-            ).execute()
-
-            new_count = current_count + 1
-
-            return {
-                "allowed": new_count <= limit,
-                "count": new_count,
-                "limit": limit,
-                "window": window,
-                "reset_time": int(
-                    (datetime.utcnow() + timedelta(seconds=window)).timestamp()
-                ),
-            }
-
-        except Exception as e:
-            logger.error(f"Error checking rate limit: {e}")
-            # Allow request if rate limiting fails
-            return {
-                "allowed": True,
-                "count": 0,
-                "limit": limit,
-                "window": window,
-                "reset_time": int(
-                    (datetime.utcnow() + timedelta(seconds=window)).timestamp()
-                ),
-            }
+        """Verificar rate limiting con el limitador compartido (sin consultas a Supabase)"""
+        decision = await get_rate_limiter().check(
+            f"auth:{identifier}", limit, period=window
+        )
+        return {
+            "allowed": decision.allowed,
+            "count": limit - decision.remaining,
+            "limit": limit,
+            "window": window,
+            "retry_after": decision.retry_after,
+            "reset_time": int(
+                (datetime.utcnow() + timedelta(seconds=decision.reset_after)).timestamp()
+            ),
+        }
 
     # ===================== CACHE DE SESIONES =====================
 
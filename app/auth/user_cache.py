@@ -0,0 +1,242 @@
+"""
+User profile cache for authenticated requests.
+
+Every authenticated request resolves the caller's `users` row (role, active
+flag, 2FA state) after validating the token. The row changes rarely, so it
+is cached per process with a short TTL and, optionally, shared across
+workers through Redis.
+
+Provides:
+- UserProfileCache: LRU of user rows keyed by user id, with TTL, negative
+  caching of missing users, single-flight loading and explicit invalidation
+- RedisProfileStore: optional L2 shared by every worker
+- get_user_profile_cache(), set_user_profile_cache(): global instance
+- invalidate_user_profile(): drop a user after a profile, role or 2FA change
+
+Secrets (password hash, TOTP secrets, backup codes) are never cached; code
+that needs them reads the user directly.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SENSITIVE_FIELDS = ("password_hash", "totp_secret", "totp_secret_temp", "backup_codes")
+
+# Stored for users that do not exist, so repeated lookups do not hit the database
+_MISSING = {"__missing__": True}
+
+ProfileLoader = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+
+def _public_profile(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in row.items() if k not in SENSITIVE_FIELDS}
+
+
+class RedisProfileStore:
+    """Shares cached profiles across workers; failures degrade to L1 only."""
+
+    def __init__(
+        self,
+        redis_url: str = "",
+        namespace: str = "pipewise:user_profile",
+        client: Any = None,
+    ):
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is required for the shared profile cache")
+
+        self.client = client or aioredis.from_url(redis_url, decode_responses=True)
+        self.namespace = namespace
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.namespace}:{user_id}"
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.client.get(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"⚠️ Profile cache L2 read failed: {e}")
+            return None
+        return json.loads(raw) if raw else None
+
+    async def set(self, user_id: str, row: Dict[str, Any], ttl_seconds: float) -> None:
+        try:
+            await self.client.set(
+                self._key(user_id),
+                json.dumps(row, default=str),
+                px=max(1, int(ttl_seconds * 1000)),
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Profile cache L2 write failed: {e}")
+
+    async def delete(self, user_id: str) -> None:
+        try:
+            await self.client.delete(self._key(user_id))
+        except Exception as e:
+            logger.warning(f"⚠️ Profile cache L2 delete failed: {e}")
+
+
+class UserProfileCache:
+    """Per-process cache of user rows in front of the users table."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 30.0,
+        negative_ttl_seconds: float = 5.0,
+        max_entries: int = 10000,
+        l2: Optional[RedisProfileStore] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: How long a loaded profile is served from cache; also
+                bounds how stale another worker's copy can be after a change
+            negative_ttl_seconds: How long a missing user is remembered
+            max_entries: LRU bound of the per-process cache
+            l2: Optional shared store consulted before the database
+            clock: Time source (for tests)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self.l2 = l2
+        self.clock = clock
+
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._generation: Dict[str, int] = {}
+        self.stats = {"hits": 0, "l2_hits": 0, "misses": 0, "negative_hits": 0, "invalidations": 0}
+
+    def _lookup(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, row = entry
+        if expires_at <= self.clock():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return row
+
+    def _store(self, user_id: str, row: Dict[str, Any]) -> None:
+        ttl = self.negative_ttl_seconds if row is _MISSING else self.ttl_seconds
+        self._entries[user_id] = (self.clock() + ttl, row)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, user_id: str, loader: ProfileLoader) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached row for user_id, loading it on a miss.
+
+        Concurrent misses for the same user share one load. Loader errors
+        are raised and not cached; a None result is cached as missing.
+        """
+        row = self._lookup(user_id)
+        if row is not None:
+            if row is _MISSING:
+                self.stats["negative_hits"] += 1
+                return None
+            self.stats["hits"] += 1
+            return dict(row)
+
+        pending = self._loading.get(user_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(user_id, loader))
+            self._loading[user_id] = pending
+            pending.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        row = await asyncio.shield(pending)
+        return None if row is _MISSING else dict(row)
+
+    async def _load(self, user_id: str, loader: ProfileLoader) -> Dict[str, Any]:
+        generation = self._generation.get(user_id, 0)
+
+        if self.l2 is not None:
+            shared = await self.l2.get(user_id)
+            if shared is not None:
+                self.stats["l2_hits"] += 1
+                row = _MISSING if shared.get("__missing__") else shared
+                self._store(user_id, row)
+                return row
+
+        self.stats["misses"] += 1
+        loaded = await loader()
+        row = _public_profile(loaded) if loaded else _MISSING
+
+        # An invalidation during the load means the row may already be stale
+        if self._generation.get(user_id, 0) == generation:
+            self._store(user_id, row)
+            if self.l2 is not None:
+                ttl = self.negative_ttl_seconds if row is _MISSING else self.ttl_seconds
+                await self.l2.set(user_id, row, ttl)
+        return row
+
+    async def invalidate(self, user_id: str) -> None:
+        """Forget a user in this process and in the shared store."""
+        user_id = str(user_id)
+        self._entries.pop(user_id, None)
+        self._generation[user_id] = self._generation.get(user_id, 0) + 1
+        self.stats["invalidations"] += 1
+        if self.l2 is not None:
+            await self.l2.delete(user_id)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries)}
+
+
+def create_user_profile_cache() -> UserProfileCache:
+    """Build the cache from settings (USER_CACHE_* and REDIS_URL)."""
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    l2 = None
+    if settings.USER_CACHE_BACKEND.lower() == "redis":
+        l2 = RedisProfileStore(settings.REDIS_URL)
+    return UserProfileCache(
+        ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+        negative_ttl_seconds=settings.USER_CACHE_NEGATIVE_TTL_SECONDS,
+        l2=l2,
+    )
+
+
+_user_profile_cache: Optional[UserProfileCache] = None
+
+
+def get_user_profile_cache() -> UserProfileCache:
+    """Get the global user profile cache."""
+    global _user_profile_cache
+    if _user_profile_cache is None:
+        _user_profile_cache = create_user_profile_cache()
+    return _user_profile_cache
+
+
+def set_user_profile_cache(cache: Optional[UserProfileCache]) -> None:
+    """Replace the global user profile cache (used by tests)."""
+    global _user_profile_cache
+    _user_profile_cache = cache
+
+
+async def invalidate_user_profile(user_id: Any) -> None:
+    """Drop a user's cached profile after it changed; never raises."""
+    try:
+        await get_user_profile_cache().invalidate(str(user_id))
+    except Exception as e:
+        logger.error(f"❌ Could not invalidate cached profile for {user_id}: {e}")
@@ -0,0 +1,497 @@
+"""
+Write-behind queue for authentication bookkeeping.
+
+Login only needs the credential check, the user row and the session row
+before it can hand out tokens. The audit log entry and the last-login update
+are queued here and written by a background task in batches. Session rows
+are not: a dropped or still queued session would make the refresh token
+fail, so they are written inline.
+
+Provides:
+- PendingWrite: one queued upsert or update
+- SupabaseWriteTarget: executes batches with the Supabase client (in a
+  thread, since the client is synchronous)
+- AuthWriteBehind: bounded queue, batching, update coalescing, retries with
+  backoff, a dead letter for rows that keep failing and an optional journal
+  for at-least-once delivery
+- get_auth_writer(), set_auth_writer(), shutdown_auth_writer(): global
+  instance
+
+Delivery is at-least-once: a batch stays queued until it was written, and
+with a journal file queued writes survive a restart. Journal entries are
+buffered and appended (and fsynced) from a worker thread by the background
+task, so enqueueing never touches the disk. Inserts are upserts on the row
+id, so replaying a write is harmless. Writes of a batch are in flight until
+it finished: updates arriving meanwhile are queued as new writes instead of
+changing values that are being sent. A table group that fails
+max_attempts times is split until the rows the database rejects on their
+own are found; those are dead-lettered so they cannot block the table.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingWrite:
+    """A row waiting to be written."""
+
+    table: str
+    op: str  # "upsert" or "update"
+    values: Dict[str, Any]
+    match: Dict[str, Any] = field(default_factory=dict)  # update filter
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+
+    @property
+    def coalesce_key(self) -> Optional[Tuple]:
+        """Updates of the same row are merged; upserts are never merged."""
+        if self.op != "update":
+            return None
+        return (self.table, tuple(sorted(self.match.items())))
+
+
+class SupabaseWriteTarget:
+    """Writes batches with a Supabase client."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def _upsert(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        self.client.table(table).upsert(rows, on_conflict="id").execute()
+
+    def _update(self, table: str, values: Dict[str, Any], match: Dict[str, Any]) -> None:
+        query = self.client.table(table).update(values)
+        for column, value in match.items():
+            query = query.eq(column, value)
+        query.execute()
+
+    async def upsert(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self._upsert, table, rows)
+
+    async def update(self, table: str, values: Dict[str, Any], match: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._update, table, values, match)
+
+
+class AuthWriteBehind:
+    """Batches auth bookkeeping writes off the request path."""
+
+    def __init__(
+        self,
+        target: Any,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 0.25,
+        max_queue_size: int = 10000,
+        journal_path: Optional[str] = None,
+        base_retry_delay: float = 0.5,
+        max_retry_delay: float = 30.0,
+        max_attempts: int = 5,
+        dead_letter_path: Optional[str] = None,
+    ):
+        """
+        Initialize the writer.
+
+        Args:
+            target: Object with async upsert(table, rows) and
+                update(table, values, match), e.g. SupabaseWriteTarget
+            batch_size: Maximum writes taken per flush
+            flush_interval_seconds: How long the writer waits to fill a batch
+            max_queue_size: Writes beyond this are rejected and counted as dropped
+            journal_path: Append-only file recording queued and acknowledged
+                writes; pending writes are replayed from it on start
+            base_retry_delay: First backoff after a failed batch
+            max_retry_delay: Backoff cap
+            max_attempts: Attempts before a failing group is split and the
+                rows still failing alone are dead-lettered
+            dead_letter_path: JSONL file receiving dead-lettered writes
+                (they are always logged)
+        """
+        self.target = target
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_queue_size = max_queue_size
+        self.journal_path = journal_path
+        self.base_retry_delay = base_retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+
+        self._pending: "OrderedDict[str, PendingWrite]" = OrderedDict()
+        self._coalesced: Dict[Tuple, str] = {}
+        self._in_flight: set = set()
+        self._journal_lines: List[str] = []
+        self._journal_lock = threading.Lock()
+        self._journal_appends = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._replayed = False
+
+        self.stats = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "written": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "dropped": 0,
+            "dead_lettered": 0,
+            "replayed": 0,
+        }
+
+    # ===================== ENQUEUE =====================
+
+    def upsert(self, table: str, row: Dict[str, Any]) -> bool:
+        """Queue a row insert (written as an upsert on its id)."""
+        return self._submit(PendingWrite(table=table, op="upsert", values=dict(row)))
+
+    def update(self, table: str, values: Dict[str, Any], **match: Any) -> bool:
+        """Queue an update; queued updates of the same row are merged."""
+        return self._submit(
+            PendingWrite(table=table, op="update", values=dict(values), match=match)
+        )
+
+    def _submit(self, write: PendingWrite) -> bool:
+        key = write.coalesce_key
+        if key is not None and key in self._coalesced:
+            queued = self._pending.get(self._coalesced[key])
+            if queued is not None and queued.id not in self._in_flight:
+                queued.values.update(write.values)
+                self._journal({"write": asdict(queued)})
+                self.stats["coalesced"] += 1
+                return True
+
+        if len(self._pending) >= self.max_queue_size:
+            self.stats["dropped"] += 1
+            logger.error(f"❌ Auth write queue full, dropping {write.op} on {write.table}")
+            return False
+
+        self._journal({"write": asdict(write)})
+        self._pending[write.id] = write
+        if key is not None:
+            self._coalesced[key] = write.id
+        self.stats["enqueued"] += 1
+        self._ensure_running()
+        return True
+
+    # ===================== BACKGROUND WRITER =====================
+
+    def _ensure_running(self) -> None:
+        if self._task is not None and not self._task.done():
+            # Wake an idle writer, or cut the batching window short when full
+            if self._idle.is_set() or len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop yet; the writer starts on the next async submit or flush
+        self._replay_journal()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="auth_write_behind")
+
+    async def _run(self) -> None:
+        while True:
+            await self._sync_journal()
+            if not self._pending:
+                self._idle.set()
+                await self._compact_journal()
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            self._idle.clear()
+
+            if len(self._pending) < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.flush_interval_seconds
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+            if not await self._write_batch():
+                self._failures += 1
+                delay = min(
+                    self.max_retry_delay,
+                    self.base_retry_delay * (2 ** (self._failures - 1)),
+                )
+                await asyncio.sleep(delay)
+            else:
+                self._failures = 0
+
+    async def _write_batch(self) -> bool:
+        """Write up to batch_size queued writes; failed ones stay queued."""
+        batch = list(self._pending.values())[: self.batch_size]
+        self._in_flight.update(write.id for write in batch)
+        try:
+            return await self._write_writes(batch)
+        finally:
+            for write in batch:
+                self._in_flight.discard(write.id)
+                self._fold_into_newer(write)
+
+    async def _write_writes(self, batch: List[PendingWrite]) -> bool:
+        upserts: Dict[str, List[PendingWrite]] = defaultdict(list)
+        updates: List[PendingWrite] = []
+        for write in batch:
+            (upserts[write.table] if write.op == "upsert" else updates).append(write)
+
+        success = True
+        groups = [(table, writes) for table, writes in upserts.items()]
+        groups += [(write.table, [write]) for write in updates]
+        for table, writes in groups:
+            for write in writes:
+                write.attempts += 1
+            try:
+                await self._execute(table, writes)
+            except Exception as e:
+                success = False
+                attempts = max(write.attempts for write in writes)
+                logger.warning(
+                    f"⚠️ Auth write to {table} failed "
+                    f"(attempt {attempts}, {len(writes)} rows): {e}"
+                )
+                if attempts >= self.max_attempts:
+                    await self._isolate(table, writes, e)
+                continue
+            self._acknowledge(writes)
+
+        self.stats["batches"] += 1
+        if not success:
+            self.stats["failed_batches"] += 1
+        return success
+
+    async def _execute(self, table: str, writes: List[PendingWrite]) -> None:
+        if writes[0].op == "upsert":
+            await self.target.upsert(table, [w.values for w in writes])
+        else:
+            await self.target.update(table, writes[0].values, writes[0].match)
+
+    async def _isolate(
+        self, table: str, writes: List[PendingWrite], error: Exception
+    ) -> None:
+        """
+        Split a group that keeps failing until the failing rows are alone.
+
+        Halves that go through are acknowledged. A row failing on its own is
+        dead-lettered once it used up its attempts; rows that joined the group
+        recently stay queued for their remaining attempts.
+        """
+        if len(writes) == 1:
+            if writes[0].attempts >= self.max_attempts:
+                await self._dead_letter(writes[0], error)
+            return
+
+        middle = len(writes) // 2
+        for half in (writes[:middle], writes[middle:]):
+            try:
+                await self._execute(table, half)
+            except Exception as e:
+                await self._isolate(table, half, e)
+            else:
+                self._acknowledge(half)
+
+    async def _dead_letter(self, write: PendingWrite, error: Exception) -> None:
+        """Drop a write the database keeps rejecting, keeping a record of it."""
+        logger.error(
+            f"❌ Dead-lettering auth {write.op} on {write.table} after "
+            f"{write.attempts} attempts: {error} ({json.dumps(write.values, default=str)})"
+        )
+        if self.dead_letter_path:
+            line = json.dumps({"write": asdict(write), "error": str(error)}, default=str)
+            try:
+                await asyncio.to_thread(self._append_dead_letter, line)
+            except OSError as e:
+                logger.error(f"❌ Could not append to auth write dead letter: {e}")
+        self._forget(write)
+        self.stats["dead_lettered"] += 1
+
+    def _append_dead_letter(self, line: str) -> None:
+        with open(self.dead_letter_path, "a", encoding="utf-8") as dead_letter:
+            dead_letter.write(line + "\n")
+
+    def _fold_into_newer(self, write: PendingWrite) -> None:
+        """
+        Merge a failed update into the update of the same row queued after it.
+
+        Otherwise retrying the older write could overwrite the newer values.
+        """
+        key = write.coalesce_key
+        newer_id = self._coalesced.get(key) if key is not None else None
+        if write.id not in self._pending or newer_id in (None, write.id):
+            return
+        newer = self._pending.get(newer_id)
+        if newer is None or newer_id in self._in_flight:
+            return
+        newer.values = {**write.values, **newer.values}
+        self._journal({"write": asdict(newer)})
+        self._forget(write)
+        self.stats["coalesced"] += 1
+
+    def _acknowledge(self, writes: List[PendingWrite]) -> None:
+        for write in writes:
+            self._forget(write)
+        self.stats["written"] += len(writes)
+
+    def _forget(self, write: PendingWrite) -> None:
+        """Remove a write from the queue and the journal."""
+        self._pending.pop(write.id, None)
+        key = write.coalesce_key
+        if key is not None and self._coalesced.get(key) == write.id:
+            del self._coalesced[key]
+        self._journal({"ack": write.id})
+
+    # ===================== JOURNAL =====================
+
+    def _journal(self, entry: Dict[str, Any]) -> None:
+        """Buffer a journal entry; the writer task appends it off the loop."""
+        if self.journal_path:
+            self._journal_lines.append(json.dumps(entry, default=str) + "\n")
+
+    async def _sync_journal(self) -> None:
+        """Append and fsync the buffered journal entries in a worker thread."""
+        if not self._journal_lines:
+            return
+        lines, self._journal_lines = self._journal_lines, []
+        try:
+            await asyncio.to_thread(self._append_journal, lines)
+        except OSError as e:
+            logger.error(f"❌ Could not append to auth write journal: {e}")
+
+    def _append_journal(self, lines: List[str]) -> None:
+        with self._journal_lock:
+            with open(self.journal_path, "a", encoding="utf-8") as journal:
+                journal.writelines(lines)
+                journal.flush()
+                os.fsync(journal.fileno())
+            self._journal_appends += 1
+
+    def _replay_journal(self) -> None:
+        """Re-queue writes journaled by a previous process but never acknowledged."""
+        if self._replayed or not self.journal_path:
+            return
+        self._replayed = True
+        if not os.path.exists(self.journal_path):
+            return
+
+        journaled: "OrderedDict[str, PendingWrite]" = OrderedDict()
+        with open(self.journal_path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line after a crash
+                if "write" in entry:
+                    write = PendingWrite(**entry["write"])
+                    journaled[write.id] = write
+                elif "ack" in entry:
+                    journaled.pop(entry["ack"], None)
+
+        for write_id, write in journaled.items():
+            if write_id not in self._pending:
+                self._pending[write_id] = write
+                if write.coalesce_key is not None:
+                    self._coalesced.setdefault(write.coalesce_key, write_id)
+                self.stats["replayed"] += 1
+        if journaled:
+            logger.info(f"🔁 Replaying {len(journaled)} journaled auth writes")
+
+    async def _compact_journal(self) -> None:
+        """Start a fresh journal once everything journaled was written."""
+        if not self.journal_path or self._pending or self._journal_lines:
+            return
+        try:
+            await asyncio.to_thread(self._remove_journal, self._journal_appends)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not compact auth write journal: {e}")
+
+    def _remove_journal(self, appends: int) -> None:
+        with self._journal_lock:
+            # Entries appended since the writer went idle must be kept
+            if appends == self._journal_appends and os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    # ===================== LIFECYCLE =====================
+
+    async def start(self) -> None:
+        """Start the writer, replaying journaled writes from a previous run."""
+        self._ensure_running()
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued write was written; True if the queue drained."""
+        self._ensure_running()
+        if self._task is None:
+            return not self._pending
+        self._wakeup.set()
+        try:
+            while self._pending:
+                self._wakeup.set()
+                await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+                if self._pending:
+                    self._idle.clear()
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush what can be written within timeout, then stop the writer."""
+        if self._task is None:
+            return
+        if not await self.flush(timeout=timeout):
+            logger.warning(
+                f"⚠️ Stopping auth writer with {len(self._pending)} writes pending"
+                + (" (kept in journal)" if self.journal_path else "")
+            )
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await self._sync_journal()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._pending)}
+
+
+_auth_writer: Optional[AuthWriteBehind] = None
+
+
+def get_auth_writer(client: Any = None) -> AuthWriteBehind:
+    """
+    Get the global auth writer.
+
+    The first call must pass the Supabase client the writes go to.
+    AUTH_WRITE_JOURNAL enables the on-disk journal and AUTH_WRITE_DEAD_LETTER
+    the dead-letter file.
+    """
+    global _auth_writer
+    if _auth_writer is None:
+        if client is None:
+            raise RuntimeError("get_auth_writer() needs a client on first use")
+        _auth_writer = AuthWriteBehind(
+            SupabaseWriteTarget(client),
+            journal_path=os.getenv("AUTH_WRITE_JOURNAL") or None,
+            dead_letter_path=os.getenv("AUTH_WRITE_DEAD_LETTER") or None,
+        )
+    return _auth_writer
+
+
+def set_auth_writer(writer: Optional[AuthWriteBehind]) -> None:
+    """Replace the global auth writer (used by tests)."""
+    global _auth_writer
+    _auth_writer = writer
+
+
+async def shutdown_auth_writer(timeout: float = 10.0) -> None:
+    """Flush and stop the global auth writer on application shutdown."""
+    if _auth_writer is not None:
+        await _auth_writer.stop(timeout=timeout)
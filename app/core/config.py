@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     APP_VERSION: str = "2.0.0"
     DEBUG: bool = Field(default=False, description="Debug mode")
     ENVIRONMENT: str = Field(default="development", description="Environment name")
+    WEB_CONCURRENCY: int = Field(
+        default=1,
+        description="Server worker processes (read by uvicorn and gunicorn as --workers)",
+    )
 
     # API Configuration
     API_V1_STR: str = "/api/v1"
@@ -87,6 +91,60 @@ class Settings(BaseSettings):
     RATE_LIMIT_PER_MINUTE: int = Field(
         default=100, description="Default rate limit per minute"
     )
+    RATE_LIMIT_BACKEND: str = Field(
+        default="memory", description="Rate limit state backend (memory or redis)"
+    )
+
+    # User profile cache
+    USER_CACHE_TTL_SECONDS: float = Field(
+        default=30.0, description="Seconds a cached user profile is served"
+    )
+    USER_CACHE_NEGATIVE_TTL_SECONDS: float = Field(
+        default=5.0, description="Seconds a missing user is remembered"
+    )
+    USER_CACHE_BACKEND: str = Field(
+        default="memory", description="User profile cache L2 (memory or redis)"
+    )
+
+    # Webhook ingestion
+    WEBHOOK_INGEST_BACKEND: str = Field(
+        default="file", description="Webhook ingest log backend (file or redis)"
+    )
+    WEBHOOK_INGEST_PATH: str = Field(
+        default="./data/webhook_ingest.log",
+        description="Log file of the file webhook ingest backend",
+    )
+    WEBHOOK_INGEST_FSYNC: bool = Field(
+        default=False, description="fsync every appended webhook"
+    )
+    WEBHOOK_INGEST_BATCH_SIZE: int = Field(
+        default=100, description="Webhooks handled per consumer batch"
+    )
+    WEBHOOK_DEDUPE_TTL_SECONDS: int = Field(
+        default=86400, description="Seconds processed webhook keys are remembered"
+    )
+
+    # Outbound webhooks
+    WEBHOOK_DELIVERY_MAX_CONNECTIONS: int = Field(
+        default=100, description="Connection pool size for webhook deliveries"
+    )
+    WEBHOOK_DELIVERY_MAX_ATTEMPTS: int = Field(
+        default=6, description="Delivery attempts before a webhook is dead-lettered"
+    )
+    WEBHOOK_DEAD_LETTER_PATH: str = Field(
+        default="", description="JSONL file for dead-lettered webhook deliveries"
+    )
+
+    # Integration store
+    INTEGRATION_STORE_BACKEND: str = Field(
+        default="auto", description="Integration store (auto, supabase or sqlite)"
+    )
+    INTEGRATION_STORE_PATH: str = Field(
+        default="./data/integrations.db", description="SQLite integration store file"
+    )
+    INTEGRATION_CACHE_TTL_SECONDS: float = Field(
+        default=30.0, description="Seconds a user's integrations are cached"
+    )
 
     # Monitoring
     PROMETHEUS_METRICS_PATH: str = Field(
@@ -543,6 +601,19 @@ class MCPConfig(BaseSettings):
     mcp_retry_jitter: bool = Field(
         default=True, description="Add random jitter to retry delays"
     )
+    mcp_retry_budget_ratio: float = Field(
+        default=0.2,
+        description="Retries allowed per service as a fraction of its requests",
+    )
+    mcp_retry_budget_min_per_second: float = Field(
+        default=1.0,
+        description="Retries per second always allowed per service by the budget",
+    )
+    mcp_run_deadline_seconds: int = Field(
+        default=300,
+        description="Deadline for the retried MCP calls (connections, credentials, "
+        "token refreshes) made during one agent run",
+    )
 
     # Circuit Breaker Settings
     mcp_circuit_breaker_failure_threshold: int = Field(
@@ -555,6 +626,17 @@ class MCPConfig(BaseSettings):
     mcp_circuit_breaker_half_open_max_calls: int = Field(
         default=3, description="Maximum calls in half-open state"
     )
+    mcp_circuit_breaker_failure_rate: float = Field(
+        default=0.5,
+        description="Failure rate within the window that opens the circuit breaker",
+    )
+    mcp_circuit_breaker_window_seconds: int = Field(
+        default=60, description="Sliding window for the circuit breaker failure rate"
+    )
+    mcp_circuit_breaker_backend: str = Field(
+        default="memory",
+        description="Circuit breaker state store: memory (per process) or redis (shared)",
+    )
 
     # Health Monitoring Settings
     mcp_health_check_interval: int = Field(
@@ -620,6 +702,39 @@ class MCPConfig(BaseSettings):
     mcp_oauth_max_refresh_attempts: int = Field(
         default=3, description="Maximum attempts to refresh OAuth tokens"
     )
+    mcp_oauth_refresh_scheduler_enabled: bool = Field(
+        default=True,
+        description="Refresh OAuth tokens in the background before they expire",
+    )
+    mcp_oauth_refresh_concurrency: int = Field(
+        default=8, description="Maximum concurrent background token refreshes"
+    )
+    mcp_oauth_refresh_rate_per_second: float = Field(
+        default=5.0, description="Background token refreshes per second per provider"
+    )
+    mcp_oauth_refresh_scan_interval: int = Field(
+        default=900,
+        description="Seconds between full user_accounts scans by the refresh scheduler",
+    )
+    mcp_oauth_refresh_lock_backend: str = Field(
+        default="memory",
+        description="OAuth refresh single-flight scope: memory (per process) or redis (all workers)",
+    )
+    mcp_oauth_refresh_lock_ttl: int = Field(
+        default=45,
+        description="Seconds a cross-worker OAuth refresh lock is held at most",
+    )
+    mcp_oauth_analytics_flush_interval: float = Field(
+        default=5.0, description="Longest an OAuth analytics event stays buffered"
+    )
+    mcp_oauth_analytics_buffer_size: int = Field(
+        default=10000,
+        description="OAuth analytics ring buffer size; oldest events are dropped beyond it",
+    )
+    mcp_oauth_analytics_spill_path: str = Field(
+        default="",
+        description="File for OAuth analytics batches that could not be stored (empty: drop)",
+    )
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -646,6 +761,8 @@ class MCPConfig(BaseSettings):
             "failure_threshold": self.mcp_circuit_breaker_failure_threshold,
             "recovery_timeout": self.mcp_circuit_breaker_recovery_timeout,
             "half_open_max_calls": self.mcp_circuit_breaker_half_open_max_calls,
+            "failure_rate": self.mcp_circuit_breaker_failure_rate,
+            "window_seconds": self.mcp_circuit_breaker_window_seconds,
         }
 
     def get_health_check_config(self) -> dict:
@@ -0,0 +1,242 @@
+"""
+In-process pub/sub bus for agent progress events.
+
+Workflows, handoff callbacks and function tools publish events; the
+/ws/agent-events WebSocket subscribes and forwards them to the UI.
+
+Provides:
+- AgentEvent: one progress event (type, workflow, user, payload)
+- EventSubscription: bounded per-client queue filtered by user and
+  workflow; when a slow client falls behind the oldest events are dropped
+  and counted instead of blocking publishers
+- AgentEventBus: fan-out to matching subscriptions
+- event_context(): binds the workflow and user of the current task so tools
+  can publish without passing ids around
+- publish_event(): publish on the global bus using the bound context
+- get_event_bus(), set_event_bus(): global instance
+
+Publishing never blocks and is safe from worker threads (sync tools run
+through asyncio.to_thread).
+"""
+
+import asyncio
+import contextvars
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_event_workflow: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "agent_event_workflow", default=None
+)
+_event_user: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "agent_event_user", default=None
+)
+
+
+@dataclass
+class AgentEvent:
+    """A progress event published by an agent workflow."""
+
+    type: str
+    workflow_id: Optional[str] = None
+    user_id: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+    seq: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "workflow_id": self.workflow_id,
+            "ts": self.ts,
+            "seq": self.seq,
+            "data": self.data,
+        }
+
+
+class EventSubscription:
+    """Bounded event queue of one subscriber, with drop-oldest backpressure."""
+
+    def __init__(
+        self,
+        user_id: Optional[str] = None,
+        workflow_id: Optional[str] = None,
+        max_queue: int = 256,
+    ):
+        """
+        Args:
+            user_id: Only receive events of this user (None: all users)
+            workflow_id: Only receive events of this workflow (None: all)
+            max_queue: Queued events kept before the oldest are dropped
+        """
+        self.user_id = user_id
+        self.workflow_id = workflow_id
+        self.queue: Deque[AgentEvent] = deque(maxlen=max_queue)
+        self.dropped = 0
+        self.delivered = 0
+        self.closed = False
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def matches(self, event: AgentEvent) -> bool:
+        if self.user_id is not None and event.user_id != self.user_id:
+            return False
+        if self.workflow_id is not None and event.workflow_id != self.workflow_id:
+            return False
+        return True
+
+    def _put(self, event: AgentEvent) -> None:
+        if self.closed:
+            return
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1  # deque drops the oldest on append
+        self.queue.append(event)
+        self._ready.set()
+
+    def put(self, event: AgentEvent) -> None:
+        """Enqueue from any thread without blocking."""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._put(event)
+        else:
+            self._loop.call_soon_threadsafe(self._put, event)
+
+    async def get(self) -> AgentEvent:
+        """Wait for the next event."""
+        while not self.queue:
+            self._ready.clear()
+            await self._ready.wait()
+        self.delivered += 1
+        return self.queue.popleft()
+
+    def close(self) -> None:
+        self.closed = True
+        self.queue.clear()
+
+
+class AgentEventBus:
+    """Fans out agent events to matching subscriptions."""
+
+    def __init__(self, default_max_queue: int = 256):
+        self.default_max_queue = default_max_queue
+        self._subscriptions: Set[EventSubscription] = set()
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self.stats = {"published": 0, "delivered": 0}
+
+    def subscribe(
+        self,
+        user_id: Optional[str] = None,
+        workflow_id: Optional[str] = None,
+        max_queue: Optional[int] = None,
+    ) -> EventSubscription:
+        """Register a subscriber; call from the event loop that will consume it."""
+        subscription = EventSubscription(
+            user_id, workflow_id, max_queue or self.default_max_queue
+        )
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription) -> None:
+        subscription.close()
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def has_subscribers(
+        self, user_id: Optional[str] = None, workflow_id: Optional[str] = None
+    ) -> bool:
+        probe = AgentEvent("probe", workflow_id=workflow_id, user_id=user_id)
+        with self._lock:
+            return any(sub.matches(probe) for sub in self._subscriptions)
+
+    def publish(
+        self,
+        event_type: str,
+        workflow_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        **data: Any,
+    ) -> int:
+        """Publish an event and return the number of subscribers it reached."""
+        event = AgentEvent(
+            event_type,
+            workflow_id=workflow_id,
+            user_id=user_id,
+            data=data,
+            seq=next(self._seq),
+        )
+        with self._lock:
+            targets = [sub for sub in self._subscriptions if sub.matches(event)]
+            self.stats["published"] += 1
+            self.stats["delivered"] += len(targets)
+
+        for subscription in targets:
+            try:
+                subscription.put(event)
+            except RuntimeError:
+                # The subscriber's loop is closed: it can no longer consume
+                self.unsubscribe(subscription)
+        return len(targets)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return {
+            **self.stats,
+            "subscribers": len(subscriptions),
+            "queued": sum(len(sub.queue) for sub in subscriptions),
+            "dropped": sum(sub.dropped for sub in subscriptions),
+        }
+
+
+_event_bus: Optional[AgentEventBus] = None
+
+
+def get_event_bus() -> AgentEventBus:
+    """Get the global agent event bus."""
+    global _event_bus
+    if _event_bus is None:
+        _event_bus = AgentEventBus()
+    return _event_bus
+
+
+def set_event_bus(bus: Optional[AgentEventBus]) -> None:
+    """Replace the global event bus (used by tests)."""
+    global _event_bus
+    _event_bus = bus
+
+
+@contextmanager
+def event_context(workflow_id: Optional[str], user_id: Optional[str]) -> Iterator[None]:
+    """Bind the workflow and user that publish_event() attributes events to."""
+    workflow_token = _event_workflow.set(workflow_id)
+    user_token = _event_user.set(user_id)
+    try:
+        yield
+    finally:
+        _event_workflow.reset(workflow_token)
+        _event_user.reset(user_token)
+
+
+def publish_event(event_type: str, **data: Any) -> int:
+    """Publish on the global bus for the workflow bound by event_context()."""
+    try:
+        return get_event_bus().publish(
+            event_type,
+            workflow_id=_event_workflow.get(),
+            user_id=_event_user.get(),
+            **data,
+        )
+    except Exception as e:  # progress events must never break a workflow
+        logger.debug(f"Agent event publish failed: {e}")
+        return 0
@@ -0,0 +1,311 @@
+"""
+Integration Store
+
+Persistent storage for per-user platform integrations (Calendly, WhatsApp,
+social, email, MCP), replacing the module-level dict in app/api/integrations.py
+that lost everything on restart and differed between workers.
+
+Provides:
+- SupabaseIntegrationBackend: user_integrations table (see
+  app/scripts/create_user_integrations_table.sql)
+- SQLiteIntegrationBackend: local file for development
+- IntegrationStore: read-through cache holding a per-user index
+  (user_id -> platform -> config); a user's integrations are loaded in one
+  query and served from memory until the TTL expires or they are written
+- get_integration_cipher(): Fernet instance with a stable key, built once;
+  outside development a key must be configured
+- get_integration_store(), set_integration_store(): global instance
+
+Configuration (Settings):
+- INTEGRATION_STORE_BACKEND: "auto" (Supabase when SUPABASE_URL is set,
+  SQLite otherwise), "supabase" or "sqlite"
+- INTEGRATION_STORE_PATH: SQLite database file
+- INTEGRATION_CACHE_TTL_SECONDS: how long another worker's writes may be unseen
+
+The store API is synchronous like the helpers it backs; reads are served from
+the cache, and a miss costs one query for all of the user's integrations.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.fernet import Fernet
+
+logger = logging.getLogger(__name__)
+
+INTEGRATIONS_TABLE = "user_integrations"
+
+# Per-user index: platform -> config
+UserIntegrations = Dict[str, Dict[str, Any]]
+
+
+def _to_json(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Make a config JSON-safe (datetimes become ISO strings)."""
+    return json.loads(json.dumps(config, default=str))
+
+
+class SupabaseIntegrationBackend:
+    """Integrations stored in the Supabase user_integrations table."""
+
+    def __init__(self, client: Any = None):
+        self._client = client
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            from app.supabase.supabase_client import get_supabase_admin_client
+
+            self._client = get_supabase_admin_client().client
+        return self._client
+
+    def load_user(self, user_id: str) -> UserIntegrations:
+        result = (
+            self.client.table(INTEGRATIONS_TABLE)
+            .select("platform, config")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        return {row["platform"]: row["config"] or {} for row in result.data or []}
+
+    def save(self, user_id: str, platform: str, config: Dict[str, Any]) -> None:
+        self.client.table(INTEGRATIONS_TABLE).upsert(
+            {
+                "user_id": user_id,
+                "platform": platform,
+                "config": config,
+                "updated_at": datetime.utcnow().isoformat(),
+            },
+            on_conflict="user_id,platform",
+        ).execute()
+
+    def delete(self, user_id: str, platform: str) -> bool:
+        result = (
+            self.client.table(INTEGRATIONS_TABLE)
+            .delete()
+            .eq("user_id", user_id)
+            .eq("platform", platform)
+            .execute()
+        )
+        return bool(result.data)
+
+
+class SQLiteIntegrationBackend:
+    """Integrations stored in a local SQLite file."""
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # The primary key doubles as the per-user index
+            self._conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {INTEGRATIONS_TABLE} (
+                    user_id TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    config TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (user_id, platform)
+                )"""
+            )
+
+    def load_user(self, user_id: str) -> UserIntegrations:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT platform, config FROM {INTEGRATIONS_TABLE} WHERE user_id = ?",
+                (user_id,),
+            ).fetchall()
+        return {platform: json.loads(config) for platform, config in rows}
+
+    def save(self, user_id: str, platform: str, config: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"""INSERT INTO {INTEGRATIONS_TABLE} (user_id, platform, config, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user_id, platform)
+                    DO UPDATE SET config = excluded.config, updated_at = excluded.updated_at""",
+                (user_id, platform, json.dumps(config), datetime.utcnow().isoformat()),
+            )
+
+    def delete(self, user_id: str, platform: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"DELETE FROM {INTEGRATIONS_TABLE} WHERE user_id = ? AND platform = ?",
+                (user_id, platform),
+            )
+        return cursor.rowcount > 0
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class IntegrationStore:
+    """Read-through cache over an integration backend."""
+
+    def __init__(self, backend: Any, ttl_seconds: float = 30.0, max_users: int = 10000):
+        """
+        Initialize the store.
+
+        Args:
+            backend: SupabaseIntegrationBackend, SQLiteIntegrationBackend or
+                compatible object
+            ttl_seconds: How long a user's cached integrations are served
+            max_users: Users kept in the cache; the least recently used are evicted
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._lock = threading.RLock()
+        self._users: "OrderedDict[str, Tuple[float, UserIntegrations]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+    def _user_index(self, user_id: str) -> UserIntegrations:
+        with self._lock:
+            cached = self._users.get(user_id)
+            if cached is not None and cached[0] > time.monotonic():
+                self._users.move_to_end(user_id)
+                self.stats["hits"] += 1
+                return cached[1]
+
+        integrations = self.backend.load_user(user_id)
+        with self._lock:
+            self.stats["misses"] += 1
+            self._users[user_id] = (time.monotonic() + self.ttl_seconds, integrations)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return integrations
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user's cached integrations, or the whole cache."""
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+    def get_all(self, user_id: str) -> UserIntegrations:
+        """All of a user's integrations (platform -> config), one query on a miss."""
+        return {
+            platform: dict(config)
+            for platform, config in self._user_index(user_id).items()
+        }
+
+    def get(self, user_id: str, platform: str) -> Optional[Dict[str, Any]]:
+        config = self._user_index(user_id).get(platform)
+        return dict(config) if config is not None else None
+
+    def save(self, user_id: str, platform: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        stored = _to_json(
+            {
+                **config,
+                "updated_at": datetime.utcnow(),
+                "user_id": user_id,
+                "platform": platform,
+            }
+        )
+        self.backend.save(user_id, platform, stored)
+        with self._lock:
+            self.stats["writes"] += 1
+            cached = self._users.get(user_id)
+            if cached is not None:
+                cached[1][platform] = stored
+        return dict(stored)
+
+    def delete(self, user_id: str, platform: str) -> bool:
+        deleted = self.backend.delete(user_id, platform)
+        with self._lock:
+            self.stats["writes"] += 1
+            cached = self._users.get(user_id)
+            if cached is not None:
+                cached[1].pop(platform, None)
+        return deleted
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "cached_users": len(self._users)}
+
+
+# Settings app.core.security derives a real key from
+_SECURITY_KEY_VARIABLES = ("OAUTH_ENCRYPTION_KEY", "OAUTH_ENCRYPTION_PASSWORD")
+
+
+@lru_cache(maxsize=1)
+def get_integration_cipher() -> Fernet:
+    """
+    Fernet instance for integration secrets.
+
+    Uses PIPEWISE_FERNET_KEY when set, otherwise the application encryption
+    key from app.core.security (OAUTH_ENCRYPTION_KEY or
+    OAUTH_ENCRYPTION_PASSWORD), so every worker and restart decrypts what
+    the others encrypted.
+
+    Raises:
+        RuntimeError: No key is configured outside development, where the
+            built-in default password and salt would protect nothing
+    """
+    key = os.getenv("PIPEWISE_FERNET_KEY")
+    if key:
+        return Fernet(key.encode())
+
+    from app.core.config import get_settings
+    from app.core.security import get_fernet
+
+    if not any(os.getenv(name) for name in _SECURITY_KEY_VARIABLES):
+        if not get_settings().is_development():
+            raise RuntimeError(
+                "No integration encryption key configured: set PIPEWISE_FERNET_KEY "
+                "(or OAUTH_ENCRYPTION_KEY / OAUTH_ENCRYPTION_PASSWORD)"
+            )
+        logger.error(
+            "❌ Encrypting integration secrets with the built-in development key; "
+            "set PIPEWISE_FERNET_KEY before storing real credentials"
+        )
+    return get_fernet()
+
+
+def create_integration_store() -> IntegrationStore:
+    """Build the store from Settings."""
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    backend_name = settings.INTEGRATION_STORE_BACKEND.lower()
+    if backend_name == "auto":
+        backend_name = "supabase" if os.getenv("SUPABASE_URL") else "sqlite"
+
+    if backend_name == "supabase":
+        backend = SupabaseIntegrationBackend()
+    else:
+        backend = SQLiteIntegrationBackend(settings.INTEGRATION_STORE_PATH)
+    logger.info(f"🗄️ Integration store using {backend_name}")
+
+    return IntegrationStore(backend, ttl_seconds=settings.INTEGRATION_CACHE_TTL_SECONDS)
+
+
+_integration_store: Optional[IntegrationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_integration_store() -> IntegrationStore:
+    """Get the global integration store."""
+    global _integration_store
+    if _integration_store is None:
+        with _store_lock:
+            if _integration_store is None:
+                _integration_store = create_integration_store()
+    return _integration_store
+
+
+def set_integration_store(store: Optional[IntegrationStore]) -> None:
+    """Replace the global integration store (used by tests)."""
+    global _integration_store
+    _integration_store = store
@@ -12,6 +12,7 @@ import uuid
 from prometheus_client import Counter, Histogram
 
 from app.core.config import get_settings
+from app.core.rate_limit import RateLimitDecision, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
@@ -195,8 +196,6 @@ class RateLimitMiddleware:
     def __init__(self, app):
         self.app = app
         self.settings = get_settings()
-        # In production, use Redis for distributed rate limiting
-        self.rate_limit_store = {}  # Simple in-memory store for development
     
     async def __call__(self, request: Request, call_next: Callable) -> Response:
         # Skip rate limiting for public endpoints
@@ -208,11 +207,12 @@ class RateLimitMiddleware:
             return await call_next(request)
         
         # Check rate limit
-        is_allowed = await self._check_rate_limit(tenant_id, request)
-        if not is_allowed:
+        decision = await self._check_rate_limit(tenant_id, request)
+        if not decision.allowed:
             return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={"error": "Rate limit exceeded"}
+                content={"error": "Rate limit exceeded"},
+                headers=decision.to_headers(),
             )
         
         return await call_next(request)
@@ -222,31 +222,13 @@ class RateLimitMiddleware:
         public_paths = ["/health", "/metrics", "/docs", "/openapi.json"]
         return any(path.startswith(public_path) for public_path in public_paths)
     
-    async def _check_rate_limit(self, tenant_id: str, request: Request) -> bool:
+    async def _check_rate_limit(self, tenant_id: str, request: Request) -> RateLimitDecision:
         """
-        Check if request is within rate limits
-        In production, implement with Redis sliding window
+        Check if request is within the tenant's per-minute limit
         """
-        # Simple implementation for development
-        current_time = int(time.time())
-        window_start = current_time - 60  # 1-minute window
-        
-        key = f"{tenant_id}:{current_time // 60}"  # Per-minute bucket
-        
-        if key not in self.rate_limit_store:
-            self.rate_limit_store[key] = 0
-        
-        self.rate_limit_store[key] += 1
-        
-        # Clean old entries
-        old_keys = [k for k in self.rate_limit_store.keys() 
-                   if int(k.split(":")[1]) < window_start // 60]
-        for old_key in old_keys:
-            del self.rate_limit_store[old_key]
-        
-        # Check limit (default 100 requests per minute)
-        limit = self.settings.RATE_LIMIT_PER_MINUTE
-        return self.rate_limit_store[key] <= limit
+        return await get_rate_limiter().check(
+            f"tenant:{tenant_id}", self.settings.RATE_LIMIT_PER_MINUTE, period=60
+        )
 
 
 class CORSMiddleware:
@@ -0,0 +1,349 @@
+"""
+Rate Limiting Engine
+
+One rate limiter shared by the HTTP middleware, the agent events WebSocket
+and the auth client. Limits are enforced with GCRA (generic cell rate
+algorithm), the token-bucket equivalent that only stores one timestamp per
+key - the "theoretical arrival time" (TAT) of the next request - so a check
+is a single read-modify-write instead of counting rows in a window.
+
+Provides:
+- RateLimitDecision: outcome of one check (allowed, remaining, retry_after)
+- gcra(): pure GCRA step shared by the backends
+- InMemoryRateLimitBackend: per-process sharded dict (default)
+- RedisRateLimitBackend: one Lua script per check, shared across workers
+- RateLimiter: check(key, limit, period, cost) against a backend, failing
+  open when the backend is unavailable
+- get_rate_limiter(), set_rate_limiter(): global instance
+- TokenBucket: in-process token bucket for pacing outbound calls (alert
+  notifications, background OAuth refreshes)
+
+A limit of N per period allows bursts of up to N requests and then one
+request every period / N seconds.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a rate limit check"""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0  # seconds until this request would be allowed
+    reset_after: float = 0.0  # seconds until the full burst is available again
+
+    def to_headers(self) -> Dict[str, str]:
+        """Standard rate limit response headers."""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def gcra(
+    tat: Optional[float], now: float, limit: int, period: float, cost: int = 1
+) -> Tuple[Optional[float], RateLimitDecision]:
+    """
+    One GCRA step.
+
+    Returns the new TAT to store (None when the request is rejected and the
+    stored value must not change) and the decision.
+    """
+    if limit <= 0:
+        return None, RateLimitDecision(False, limit, 0, retry_after=period, reset_after=period)
+
+    interval = period / limit
+    tat = max(tat or now, now)
+    new_tat = tat + interval * cost
+    allow_at = new_tat - period
+
+    if now < allow_at:
+        return None, RateLimitDecision(
+            allowed=False,
+            limit=limit,
+            remaining=0,
+            retry_after=allow_at - now,
+            reset_after=tat - now,
+        )
+
+    remaining = int((period - (new_tat - now)) / interval + 1e-9)
+    return new_tat, RateLimitDecision(
+        allowed=True,
+        limit=limit,
+        remaining=max(0, remaining),
+        reset_after=new_tat - now,
+    )
+
+
+class InMemoryRateLimitBackend:
+    """
+    Keeps TATs in a sharded dict.
+
+    Each shard has its own lock so concurrent checks on different keys do not
+    contend. Keys whose TAT is in the past carry no state (the bucket is full)
+    and are swept from a shard every sweep_interval checks.
+    """
+
+    def __init__(
+        self,
+        shards: int = 16,
+        sweep_interval: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._shards: List[Dict[str, float]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._operations = [0] * shards
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+
+    def _shard(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % len(self._shards)
+
+    def _sweep(self, shard: Dict[str, float], now: float) -> None:
+        expired = [key for key, tat in shard.items() if tat <= now]
+        for key in expired:
+            del shard[key]
+
+    def check_sync(self, key: str, limit: int, period: float, cost: int = 1) -> RateLimitDecision:
+        index = self._shard(key)
+        shard = self._shards[index]
+        with self._locks[index]:
+            now = self.clock()
+            new_tat, decision = gcra(shard.get(key), now, limit, period, cost)
+            if new_tat is not None:
+                shard[key] = new_tat
+
+            self._operations[index] += 1
+            if self._operations[index] >= self.sweep_interval:
+                self._operations[index] = 0
+                self._sweep(shard, now)
+        return decision
+
+    async def check(self, key: str, limit: int, period: float, cost: int = 1) -> RateLimitDecision:
+        return self.check_sync(key, limit, period, cost)
+
+    async def reset(self, key: str) -> None:
+        index = self._shard(key)
+        with self._locks[index]:
+            self._shards[index].pop(key, None)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+# Same algorithm as gcra(), evaluated atomically inside Redis. Time comes from
+# the Redis server so workers with skewed clocks agree. Values are returned in
+# microseconds because Lua numbers are truncated to integers on the way out.
+GCRA_LUA = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+local interval = period / limit
+
+local tat = tonumber(redis.call('GET', key))
+if tat == nil or tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval * cost
+local allow_at = new_tat - period
+
+if now < allow_at then
+    return {0, 0, allow_at - now, tat - now}
+end
+
+redis.call('SET', key, string.format('%d', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+local remaining = math.floor((period - (new_tat - now)) / interval + 1e-9)
+return {1, remaining, 0, new_tat - now}
+"""
+
+_MICROSECONDS = 1_000_000
+
+
+class RedisRateLimitBackend:
+    """Keeps TATs in Redis; each check is one EVALSHA round trip."""
+
+    def __init__(
+        self,
+        redis_url: str = "",
+        namespace: str = "pipewise:ratelimit",
+        client: Any = None,
+    ):
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is required for the Redis rate limiter")
+
+        self.client = client or aioredis.from_url(redis_url)
+        self.namespace = namespace
+        self._script = self.client.register_script(GCRA_LUA)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def check(self, key: str, limit: int, period: float, cost: int = 1) -> RateLimitDecision:
+        if limit <= 0:
+            return gcra(None, 0.0, limit, period, cost)[1]
+
+        allowed, remaining, retry_after, reset_after = await self._script(
+            keys=[self._key(key)],
+            args=[limit, int(period * _MICROSECONDS), cost],
+        )
+        return RateLimitDecision(
+            allowed=bool(allowed),
+            limit=limit,
+            remaining=max(0, int(remaining)),
+            retry_after=int(retry_after) / _MICROSECONDS,
+            reset_after=int(reset_after) / _MICROSECONDS,
+        )
+
+    async def reset(self, key: str) -> None:
+        await self.client.delete(self._key(key))
+
+
+class RateLimiter:
+    """Rate limit checks against a pluggable backend"""
+
+    def __init__(self, backend: Any = None, fail_open: bool = True):
+        self.backend = backend if backend is not None else InMemoryRateLimitBackend()
+        self.fail_open = fail_open
+        self.allowed = 0
+        self.rejected = 0
+        self.errors = 0
+
+    async def check(
+        self, key: str, limit: int, period: float = 60, cost: int = 1
+    ) -> RateLimitDecision:
+        """
+        Consume cost units from key's limit of `limit` per `period` seconds.
+
+        When the backend fails the request is allowed (or rejected if
+        fail_open is False) so an unavailable store never takes the API down.
+        """
+        try:
+            decision = await self.backend.check(key, limit, period, cost)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Rate limit backend error for {key}: {e}")
+            return RateLimitDecision(
+                allowed=self.fail_open,
+                limit=limit,
+                remaining=limit if self.fail_open else 0,
+                retry_after=0.0 if self.fail_open else period,
+            )
+
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+            logger.debug(f"🚦 Rate limit exceeded for {key}")
+        return decision
+
+    async def reset(self, key: str) -> None:
+        """Forget the state of a key."""
+        await self.backend.reset(key)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the limiter from settings (RATE_LIMIT_BACKEND)."""
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    if settings.RATE_LIMIT_BACKEND.lower() == "redis":
+        return RateLimiter(RedisRateLimitBackend(settings.REDIS_URL))
+    return RateLimiter(InMemoryRateLimitBackend())
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the global rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = create_rate_limiter()
+    return _rate_limiter
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]) -> None:
+    """Replace the global rate limiter (used by tests)."""
+    global _rate_limiter
+    _rate_limiter = limiter
+
+
+class TokenBucket:
+    """Token bucket rate limiter."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Initialize the token bucket.
+
+        Args:
+            rate_per_second: Tokens added per second
+            capacity: Maximum number of tokens (burst size)
+        """
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second
+        )
+        self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available without waiting."""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def time_until_available(self, tokens: float = 1.0) -> float:
+        """Seconds until the requested tokens are available."""
+        self._refill()
+        if self.tokens >= tokens or self.rate_per_second <= 0:
+            return 0.0
+        return (tokens - self.tokens) / self.rate_per_second
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until tokens are available and take them."""
+        while not self.try_acquire(tokens):
+            await asyncio.sleep(max(self.time_until_available(tokens), 0.01))
@@ -12,6 +12,7 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +55,17 @@ def _get_encryption_key() -> bytes:
     return key
 
 
+@lru_cache(maxsize=1)
+def get_fernet() -> Fernet:
+    """
+    Fernet instance for the encryption key.
+
+    The key derivation (PBKDF2, 100k iterations) runs once per process
+    instead of on every encrypt and decrypt.
+    """
+    return Fernet(_get_encryption_key())
+
+
 def encrypt_oauth_tokens(tokens: Dict[str, Any]) -> str:
     """
     Encrypt OAuth tokens for secure storage.
@@ -72,9 +84,7 @@ def encrypt_oauth_tokens(tokens: Dict[str, Any]) -> str:
         tokens_json = json.dumps(tokens, default=str)
         tokens_bytes = tokens_json.encode("utf-8")
 
-        # Get encryption key and create Fernet instance
-        key = _get_encryption_key()
-        fernet = Fernet(key)
+        fernet = get_fernet()
 
         # Encrypt the tokens
         encrypted_tokens = fernet.encrypt(tokens_bytes)
@@ -104,9 +114,7 @@ def decrypt_oauth_tokens(encrypted_tokens: str) -> Dict[str, Any]:
         # Decode from base64
         encrypted_bytes = base64.urlsafe_b64decode(encrypted_tokens.encode("utf-8"))
 
-        # Get encryption key and create Fernet instance
-        key = _get_encryption_key()
-        fernet = Fernet(key)
+        fernet = get_fernet()
 
         # Decrypt the tokens
         decrypted_bytes = fernet.decrypt(encrypted_bytes)
@@ -0,0 +1,563 @@
+"""
+Span-based tracing for agent workflows.
+
+Provides:
+- Nested spans tracked through contextvars (safe across asyncio tasks)
+- Decorators for sync and async functions, including @function_tool bodies
+- Instrumentation helpers for Supabase clients and MCP servers
+- A flamegraph-style summary (folded stacks + self-time tree) per root span
+- Export to a local JSON-lines file and, when available, OpenTelemetry/OTLP
+- An opt-in pyinstrument sampling profiler triggered by a request header
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional OpenTelemetry bridge
+try:
+    from opentelemetry import trace as otel_trace
+
+    OTEL_AVAILABLE = True
+except ImportError:
+    otel_trace = None
+    OTEL_AVAILABLE = False
+
+# Optional sampling profiler
+try:
+    from pyinstrument import Profiler
+
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    Profiler = None
+    PYINSTRUMENT_AVAILABLE = False
+
+
+PROFILE_HEADER = "X-Profile"
+TRACE_ID_HEADER = "X-Trace-ID"
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start_time_ns: int = field(default_factory=time.time_ns)
+    end_time_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "OK"
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time_ns if self.end_time_ns is not None else time.time_ns()
+        return (end - self.start_time_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, error: BaseException) -> None:
+        self.status = "ERROR"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize using OTLP/JSON field names."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_time_ns,
+            "endTimeUnixNano": self.end_time_ns,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.error or ""},
+        }
+
+
+@dataclass
+class TraceRun:
+    """All spans recorded under one root span."""
+
+    root: Span
+    spans: List[Span] = field(default_factory=list)
+    summary: Optional["FlameSummary"] = None
+
+    @property
+    def trace_id(self) -> str:
+        return self.root.trace_id
+
+
+@dataclass
+class FlameSummary:
+    """Flamegraph-style breakdown of a trace run."""
+
+    trace_id: str
+    root_name: str
+    total_ms: float
+    # "root;child;grandchild" -> self time in microseconds
+    folded_stacks: Dict[str, int]
+    # One line per span path with total and self time
+    tree_lines: List[str]
+
+    def folded(self) -> str:
+        """Folded-stack text accepted by flamegraph.pl and speedscope."""
+        return "\n".join(
+            f"{stack} {self_us}" for stack, self_us in self.folded_stacks.items()
+        )
+
+    def render(self) -> str:
+        header = f"Trace {self.trace_id} {self.root_name}: {self.total_ms:.1f}ms"
+        return "\n".join([header, *self.tree_lines])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "root": self.root_name,
+            "total_ms": round(self.total_ms, 3),
+            "folded_stacks": self.folded_stacks,
+            "tree": self.tree_lines,
+        }
+
+
+def build_flame_summary(spans: List[Span]) -> FlameSummary:
+    """
+    Aggregate spans by call path.
+
+    Spans with the same path (e.g. repeated calls of one tool) are merged.
+    Self time is the span duration minus its children, floored at zero so
+    concurrent children do not produce negative values.
+    """
+    by_id = {span.span_id: span for span in spans}
+    children: Dict[Optional[str], List[Span]] = defaultdict(list)
+    for span in spans:
+        parent_id = span.parent_id if span.parent_id in by_id else None
+        children[parent_id].append(span)
+
+    totals: Dict[str, float] = defaultdict(float)
+    self_times: Dict[str, float] = defaultdict(float)
+    counts: Dict[str, int] = defaultdict(int)
+    order: List[Tuple[int, str]] = []
+
+    def visit(span: Span, prefix: str, depth: int) -> None:
+        path = f"{prefix};{span.name}" if prefix else span.name
+        child_spans = sorted(children.get(span.span_id, []), key=lambda s: s.start_time_ns)
+        child_ms = sum(child.duration_ms for child in child_spans)
+
+        if path not in totals:
+            order.append((depth, path))
+        totals[path] += span.duration_ms
+        self_times[path] += max(span.duration_ms - child_ms, 0.0)
+        counts[path] += 1
+
+        for child in child_spans:
+            visit(child, path, depth + 1)
+
+    roots = sorted(children.get(None, []), key=lambda s: s.start_time_ns)
+    for root in roots:
+        visit(root, "", 0)
+
+    total_ms = sum(root.duration_ms for root in roots)
+    tree_lines = []
+    for depth, path in order:
+        share = (totals[path] / total_ms * 100) if total_ms else 0.0
+        tree_lines.append(
+            f"{'  ' * depth}{path.rsplit(';', 1)[-1]} "
+            f"x{counts[path]} total={totals[path]:.1f}ms "
+            f"self={self_times[path]:.1f}ms ({share:.0f}%)"
+        )
+
+    return FlameSummary(
+        trace_id=roots[0].trace_id if roots else "",
+        root_name=roots[0].name if roots else "",
+        total_ms=total_ms,
+        folded_stacks={
+            path: int(self_times[path] * 1000) for _, path in order
+        },
+        tree_lines=tree_lines,
+    )
+
+
+class JSONLinesSpanExporter:
+    """Append finished spans and run summaries to a local JSON-lines file."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def export(self, run: TraceRun) -> None:
+        lines = [json.dumps({"span": span.to_dict()}, default=str) for span in run.spans]
+        if run.summary:
+            lines.append(json.dumps({"summary": run.summary.to_dict()}, default=str))
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write("\n".join(lines) + "\n")
+
+
+class OpenTelemetrySpanExporter:
+    """
+    Re-emit finished spans through the OpenTelemetry API.
+
+    With only opentelemetry-api installed this is a no-op; once an SDK
+    TracerProvider is configured (see configure_otlp_export) the spans are
+    shipped to the collector with their original timestamps and parents.
+    """
+
+    def __init__(self, instrumentation_name: str = "pipewise"):
+        self.tracer = otel_trace.get_tracer(instrumentation_name)
+
+    def export(self, run: TraceRun) -> None:
+        otel_spans: Dict[str, Any] = {}
+        for span in sorted(run.spans, key=lambda s: s.start_time_ns):
+            parent = otel_spans.get(span.parent_id)
+            context = otel_trace.set_span_in_context(parent) if parent else None
+            otel_span = self.tracer.start_span(
+                span.name,
+                context=context,
+                start_time=span.start_time_ns,
+                attributes={
+                    key: value
+                    for key, value in span.attributes.items()
+                    if isinstance(value, (str, bool, int, float))
+                },
+            )
+            if span.status == "ERROR":
+                otel_span.set_status(
+                    otel_trace.Status(otel_trace.StatusCode.ERROR, span.error)
+                )
+            otel_spans[span.span_id] = otel_span
+
+        for span in run.spans:
+            otel_spans[span.span_id].end(end_time=span.end_time_ns)
+
+
+def configure_otlp_export(endpoint: str, service_name: str = "pipewise") -> bool:
+    """
+    Install an OTLP-exporting TracerProvider if the SDK packages are present.
+
+    Returns:
+        True if OTLP export was configured
+    """
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning(
+            "OTLP export requested but opentelemetry-sdk/exporter-otlp are not installed"
+        )
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+    otel_trace.set_tracer_provider(provider)
+    return True
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "pipewise_current_span", default=None
+)
+_current_run: contextvars.ContextVar[Optional[TraceRun]] = contextvars.ContextVar(
+    "pipewise_current_run", default=None
+)
+
+
+class Tracer:
+    """Records spans, summarizes finished runs and hands them to exporters."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        exporters: Optional[List[Any]] = None,
+        max_recent_runs: int = 50,
+        log_summaries: bool = False,
+    ):
+        """
+        Initialize the tracer.
+
+        Args:
+            enabled: When False spans are not recorded at all
+            exporters: Objects with an export(run) method
+            max_recent_runs: Number of finished runs kept for inspection
+            log_summaries: Log the flamegraph summary of every finished run at
+                INFO; off by default since standalone traced calls (each a
+                root span) would log one summary apiece
+        """
+        self.enabled = enabled
+        self.exporters = exporters or []
+        self.log_summaries = log_summaries
+        self.recent_runs: Deque[TraceRun] = deque(maxlen=max_recent_runs)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Record a span around the enclosed block."""
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        run = _current_run.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            attributes=attributes,
+        )
+
+        is_root = parent is None or run is None
+        if is_root:
+            run = TraceRun(root=span)
+        run.spans.append(span)
+
+        span_token = _current_span.set(span)
+        run_token = _current_run.set(run)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end_time_ns = time.time_ns()
+            _current_span.reset(span_token)
+            _current_run.reset(run_token)
+            if is_root:
+                self._finish_run(run)
+
+    def _finish_run(self, run: TraceRun) -> None:
+        run.summary = build_flame_summary(run.spans)
+        self.recent_runs.append(run)
+
+        if self.log_summaries:
+            logger.info(f"🔥 {run.summary.render()}")
+
+        for exporter in self.exporters:
+            try:
+                exporter.export(run)
+            except Exception as e:
+                logger.warning(f"Span export via {type(exporter).__name__} failed: {e}")
+
+    def get_run(self, trace_id: str) -> Optional[TraceRun]:
+        for run in reversed(self.recent_runs):
+            if run.trace_id == trace_id:
+                return run
+        return None
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the global tracer, configured from environment variables:
+
+    - TRACING_ENABLED: "false" disables span recording
+    - TRACING_LOG_SUMMARIES: "true" logs a flamegraph summary per finished run
+    - TRACING_EXPORT_PATH: JSON-lines file receiving spans and summaries
+    - TRACING_OTLP_ENDPOINT: OTLP/HTTP collector endpoint
+    """
+    global _tracer
+    if _tracer is None:
+        exporters: List[Any] = []
+
+        export_path = os.getenv("TRACING_EXPORT_PATH")
+        if export_path:
+            exporters.append(JSONLinesSpanExporter(export_path))
+
+        otlp_endpoint = os.getenv("TRACING_OTLP_ENDPOINT")
+        if OTEL_AVAILABLE and otlp_endpoint and configure_otlp_export(otlp_endpoint):
+            exporters.append(OpenTelemetrySpanExporter())
+
+        _tracer = Tracer(
+            enabled=os.getenv("TRACING_ENABLED", "true").lower() == "true",
+            exporters=exporters,
+            log_summaries=os.getenv("TRACING_LOG_SUMMARIES", "false").lower() == "true",
+        )
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """Replace the global tracer (used by tests and custom exporters)."""
+    global _tracer
+    _tracer = tracer
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def trace_span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a span on the global tracer; usable from sync and async code."""
+    with get_tracer().span(name, **attributes) as span:
+        yield span
+
+
+def traced(name: Optional[str] = None, **attributes: Any) -> Callable:
+    """
+    Decorate a sync or async function so every call records a span.
+
+    The wrapper keeps the wrapped signature, annotations and docstring, so it
+    can sit directly under @function_tool.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with trace_span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            with trace_span(span_name, **attributes):
+                return func(*args, **kwargs)
+
+        return sync_wrapper
+
+    return decorator
+
+
+def traced_methods(
+    prefix: str,
+    exclude: Tuple[str, ...] = (),
+    exclude_prefixes: Tuple[str, ...] = (),
+) -> Callable:
+    """
+    Class decorator wrapping every public method in a "<prefix>.<method>" span.
+
+    Used for data clients where each public method maps to one query.
+    """
+
+    def decorator(cls: type) -> type:
+        for attr_name, attr in list(vars(cls).items()):
+            if attr_name.startswith("_") or attr_name in exclude:
+                continue
+            if exclude_prefixes and attr_name.startswith(exclude_prefixes):
+                continue
+            if inspect.isfunction(attr):
+                setattr(
+                    cls,
+                    attr_name,
+                    traced(f"{prefix}.{attr_name}", component=prefix)(attr),
+                )
+        return cls
+
+    return decorator
+
+
+MCP_TRACED_METHODS = ("call_tool", "list_tools", "list_prompts", "get_prompt")
+
+
+def instrument_mcp_server(server: Any) -> Any:
+    """
+    Wrap the MCP calls of a connected server instance in spans.
+
+    Idempotent; servers without the MCP client methods are returned unchanged.
+    """
+    if getattr(server, "_pipewise_traced", False):
+        return server
+
+    server_name = getattr(server, "name", type(server).__name__)
+    for method_name in MCP_TRACED_METHODS:
+        method = getattr(server, method_name, None)
+        if method is None or not callable(method):
+            continue
+        setattr(
+            server,
+            method_name,
+            traced(f"mcp.{method_name}", server=server_name)(method),
+        )
+
+    try:
+        server._pipewise_traced = True
+    except AttributeError:
+        pass
+    return server
+
+
+class RequestProfiler:
+    """
+    Opt-in pyinstrument profiling for HTTP requests.
+
+    A request is profiled when PROFILING_ENABLED=true and it carries the
+    X-Profile header. The whole request also runs under a root span, so the
+    response gets both a sampling profile and the span flame summary.
+    Profiles are written to PROFILING_OUTPUT_DIR as HTML and text.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, output_dir: Optional[str] = None):
+        self.enabled = (
+            enabled
+            if enabled is not None
+            else os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+        )
+        self.output_dir = Path(output_dir or os.getenv("PROFILING_OUTPUT_DIR", "profiles"))
+
+    def should_profile(self, request: Any) -> bool:
+        return self.enabled and bool(request.headers.get(PROFILE_HEADER))
+
+    async def __call__(self, request: Any, call_next: Callable) -> Any:
+        if not self.should_profile(request):
+            return await call_next(request)
+
+        profiler = None
+        if PYINSTRUMENT_AVAILABLE:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+        else:
+            logger.warning("X-Profile requested but pyinstrument is not installed")
+
+        try:
+            with trace_span(
+                "http.request", method=request.method, path=request.url.path
+            ) as span:
+                response = await call_next(request)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+
+        profile_id = span.trace_id if span is not None else secrets.token_hex(16)
+        if span is not None:
+            response.headers[TRACE_ID_HEADER] = span.trace_id
+        if profiler is not None:
+            self._write_profile(profiler, profile_id)
+            response.headers["X-Profile-ID"] = profile_id
+        return response
+
+    def _write_profile(self, profiler: Any, profile_id: str) -> None:
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            (self.output_dir / f"{profile_id}.html").write_text(
+                profiler.output_html(), encoding="utf-8"
+            )
+            (self.output_dir / f"{profile_id}.txt").write_text(
+                profiler.output_text(unicode=True), encoding="utf-8"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write profile {profile_id}: {e}")
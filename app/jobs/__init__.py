@@ -0,0 +1,58 @@
+"""
+Background job subsystem for PipeWise.
+
+Long-running work such as multi-agent lead workflows is queued here instead
+of being executed inside the HTTP request, and inbound webhooks are appended
+to a durable ingest log drained by a consumer. Outbound webhooks are
+delivered by a per-destination delivery engine.
+"""
+
+from app.jobs.delivery import (
+    UnsafeDestinationError,
+    WebhookDeliveryEngine,
+    WebhookDestination,
+    WebhookDestinationStore,
+    get_webhook_delivery,
+    shutdown_webhook_delivery,
+)
+from app.jobs.ingest import (
+    IngestRecord,
+    WebhookIngestConsumer,
+    get_webhook_ingest,
+    shutdown_webhook_ingest,
+)
+from app.jobs.queue import (
+    InMemoryJobBackend,
+    Job,
+    JobQueue,
+    JobStatus,
+    RedisJobBackend,
+)
+from app.jobs.workflows import (
+    LEAD_WORKFLOW_JOB,
+    enqueue_lead_workflow,
+    get_job_queue,
+    shutdown_job_queue,
+)
+
+__all__ = [
+    "UnsafeDestinationError",
+    "WebhookDeliveryEngine",
+    "WebhookDestination",
+    "WebhookDestinationStore",
+    "get_webhook_delivery",
+    "shutdown_webhook_delivery",
+    "IngestRecord",
+    "WebhookIngestConsumer",
+    "get_webhook_ingest",
+    "shutdown_webhook_ingest",
+    "InMemoryJobBackend",
+    "Job",
+    "JobQueue",
+    "JobStatus",
+    "RedisJobBackend",
+    "LEAD_WORKFLOW_JOB",
+    "enqueue_lead_workflow",
+    "get_job_queue",
+    "shutdown_job_queue",
+]
@@ -0,0 +1,747 @@
+"""
+Outbound webhook delivery.
+
+Events such as lead_created or meeting_scheduled are pushed to the endpoints
+customers registered. Publishing only queues the event; delivery happens in
+the background, one queue and worker pool per destination, so a slow or failing
+endpoint never holds up the others. A destination belongs to a user and only
+receives that user's events.
+
+Provides:
+- WebhookDestination: a registered endpoint, its owner, signing secret and
+  the events it subscribes to
+- WebhookDestinationStore: destinations persisted in the IntegrationStore
+  (app.core.integration_store) with encrypted secrets, so they survive
+  restarts and are seen by every worker
+- sign_payload() / verify_signature(): HMAC-SHA256 signatures
+- check_destination_url() / check_destination_headers(): SSRF guards; only
+  https URLs resolving to public addresses and no hop-by-hop, Host or
+  credential headers
+- WebhookDeliveryEngine: per-destination queues over one pooled
+  httpx.AsyncClient, batching for endpoints that accept batches, retries
+  with exponential backoff (honouring Retry-After) and a dead letter
+- get_webhook_delivery(), set_webhook_delivery(), shutdown_webhook_delivery():
+  global instance
+
+Every request carries:
+- X-PipeWise-Event: the event type, or "batch"
+- X-PipeWise-Delivery: delivery id, stable across retries
+- X-PipeWise-Signature: "t=<unix time>,v1=<hex HMAC-SHA256 of "<t>.<body>">"
+
+Batched deliveries post {"events": [...]}. Destination URLs are checked when
+registered and again before every request, since DNS can change in between;
+redirects are not followed. For load tests, point destinations at
+app.ai_agents.mcp.notification_dispatcher.LocalHTTPSink with
+verify_destinations=False (see app/scripts/webhook_delivery_load_test.py).
+"""
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+import random
+import secrets
+import socket
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-PipeWise-Signature"
+EVENT_HEADER = "X-PipeWise-Event"
+DELIVERY_HEADER = "X-PipeWise-Delivery"
+
+# Responses worth retrying; any other 4xx is dead-lettered at once
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Custom headers a destination may not set: hop-by-hop, routing and credentials
+FORBIDDEN_HEADERS = {
+    "authorization",
+    "connection",
+    "content-length",
+    "content-type",
+    "cookie",
+    "expect",
+    "host",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "proxy-connection",
+    "set-cookie",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+}
+FORBIDDEN_HEADER_PREFIXES = ("proxy-", "x-pipewise-")
+
+
+@dataclass
+class WebhookDestination:
+    """An endpoint receiving webhook events."""
+
+    url: str
+    secret: str = field(default_factory=lambda: secrets.token_hex(32))
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    events: List[str] = field(default_factory=list)  # empty: every event
+    batch: bool = False  # endpoint accepts {"events": [...]}
+    max_batch_size: int = 50
+    enabled: bool = True
+    headers: Dict[str, str] = field(default_factory=dict)
+    owner_id: Optional[str] = None  # None: only events published without an owner
+
+    def wants(self, event_type: str, owner_id: Optional[str] = None) -> bool:
+        return (
+            self.enabled
+            and self.owner_id == owner_id
+            and (not self.events or event_type in self.events)
+        )
+
+    def to_public_dict(self) -> Dict[str, Any]:
+        """Destination without its secret."""
+        data = asdict(self)
+        del data["secret"]
+        return data
+
+
+def sign_payload(secret: str, timestamp: int, body: bytes) -> str:
+    """Signature header value for a request body."""
+    digest = hmac.new(
+        secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256
+    ).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(
+    secret: str, header: str, body: bytes, tolerance_seconds: float = 300.0
+) -> bool:
+    """Check a signature header, rejecting timestamps outside the tolerance."""
+    try:
+        parts = dict(item.split("=", 1) for item in header.split(","))
+        timestamp = int(parts["t"])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance_seconds:
+        return False
+    expected = sign_payload(secret, timestamp, body)
+    return hmac.compare_digest(expected, header)
+
+
+class UnsafeDestinationError(ValueError):
+    """A destination URL or header could reach internal services."""
+
+
+def check_destination_headers(headers: Dict[str, str]) -> None:
+    """Reject custom headers that could hijack routing, framing or credentials."""
+    for name in headers:
+        lowered = name.strip().lower()
+        if lowered in FORBIDDEN_HEADERS or lowered.startswith(FORBIDDEN_HEADER_PREFIXES):
+            raise UnsafeDestinationError(f"header {name!r} is not allowed")
+
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # drop IPv6 zone ids
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not (
+        ip.is_loopback
+        or ip.is_private
+        or ip.is_link_local
+        or ip.is_reserved
+        or ip.is_multicast
+        or ip.is_unspecified
+    )
+
+
+async def check_destination_url(url: str) -> List[str]:
+    """
+    Require an https URL whose host resolves only to public addresses.
+
+    Returns:
+        The resolved addresses
+
+    Raises:
+        UnsafeDestinationError: Wrong scheme, unresolvable host, or an address
+            that is loopback, private, link-local, reserved, multicast or
+            unspecified
+    """
+    try:
+        parsed = httpx.URL(url)
+    except Exception as e:
+        raise UnsafeDestinationError(f"invalid URL: {e}")
+    if parsed.scheme != "https":
+        raise UnsafeDestinationError("destination URL must use https")
+    if not parsed.host:
+        raise UnsafeDestinationError("destination URL has no host")
+
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parsed.host, parsed.port or 443, type=socket.SOCK_STREAM
+        )
+    except OSError as e:
+        raise UnsafeDestinationError(f"cannot resolve {parsed.host}: {e}")
+
+    addresses = sorted({info[4][0] for info in infos})
+    if not addresses:
+        raise UnsafeDestinationError(f"cannot resolve {parsed.host}")
+    for address in addresses:
+        if not _is_public_address(address):
+            raise UnsafeDestinationError(
+                f"{parsed.host} resolves to non-public address {address}"
+            )
+    return addresses
+
+
+@dataclass
+class QueuedEvent:
+    """An event waiting for delivery to one destination."""
+
+    event_type: str
+    payload: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class DeliveryError(Exception):
+    """A delivery attempt failed."""
+
+    def __init__(self, message: str, retryable: bool, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to the backoff
+
+
+# IntegrationStore platform of a destination: "webhook_destination:<id>"
+DESTINATION_PLATFORM_PREFIX = "webhook_destination:"
+
+
+class WebhookDestinationStore:
+    """Per-user webhook destinations kept in the IntegrationStore."""
+
+    def __init__(self, store: Any = None, cipher: Any = None):
+        self._store = store
+        self._cipher = cipher
+
+    @property
+    def store(self) -> Any:
+        if self._store is None:
+            from app.core.integration_store import get_integration_store
+
+            self._store = get_integration_store()
+        return self._store
+
+    @property
+    def cipher(self) -> Any:
+        if self._cipher is None:
+            from app.core.integration_store import get_integration_cipher
+
+            self._cipher = get_integration_cipher()
+        return self._cipher
+
+    def save(self, destination: WebhookDestination) -> None:
+        if not destination.owner_id:
+            raise ValueError("only destinations with an owner can be stored")
+        config = destination.to_public_dict()
+        config["secret_encrypted"] = self.cipher.encrypt(destination.secret.encode()).decode()
+        self.store.save(
+            destination.owner_id, f"{DESTINATION_PLATFORM_PREFIX}{destination.id}", config
+        )
+
+    def delete(self, owner_id: str, destination_id: str) -> bool:
+        return self.store.delete(owner_id, f"{DESTINATION_PLATFORM_PREFIX}{destination_id}")
+
+    def load(self, owner_id: str) -> List[WebhookDestination]:
+        destinations = []
+        for platform, config in self.store.get_all(owner_id).items():
+            if not platform.startswith(DESTINATION_PLATFORM_PREFIX):
+                continue
+            try:
+                destinations.append(
+                    WebhookDestination(
+                        url=config["url"],
+                        secret=self.cipher.decrypt(config["secret_encrypted"].encode()).decode(),
+                        id=config["id"],
+                        events=list(config.get("events") or []),
+                        batch=bool(config.get("batch", False)),
+                        max_batch_size=int(config.get("max_batch_size", 50)),
+                        enabled=bool(config.get("enabled", True)),
+                        headers=dict(config.get("headers") or {}),
+                        owner_id=owner_id,
+                    )
+                )
+            except Exception as e:
+                logger.error(f"❌ Skipping unreadable webhook destination {platform}: {e}")
+        return destinations
+
+
+class WebhookDeliveryEngine:
+    """Queue-backed delivery of webhook events to registered destinations."""
+
+    def __init__(
+        self,
+        http_client: Optional[httpx.AsyncClient] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        request_timeout_seconds: float = 10.0,
+        max_queue_size: int = 10000,
+        workers_per_destination: int = 1,
+        batch_window_seconds: float = 0.5,
+        max_attempts: int = 6,
+        base_retry_delay: float = 1.0,
+        max_retry_delay: float = 300.0,
+        dead_letter_path: Optional[str] = None,
+        destination_store: Optional[WebhookDestinationStore] = None,
+        verify_destinations: bool = True,
+        idle_worker_seconds: float = 300.0,
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            http_client: Client to deliver with; one is created (and closed by
+                stop()) when omitted
+            transport: httpx transport for the created client (tests)
+            max_connections: Connection pool size shared by all destinations
+            max_keepalive_connections: Idle connections kept open
+            request_timeout_seconds: Timeout of a single delivery request
+            max_queue_size: Per-destination bound; events beyond it are dropped
+            workers_per_destination: Concurrent requests per destination; with
+                more than one, deliveries to a destination may arrive out of order
+            batch_window_seconds: How long a batching destination waits to fill a batch
+            max_attempts: Attempts before an event is dead-lettered
+            base_retry_delay: First backoff after a failed attempt
+            max_retry_delay: Backoff cap
+            dead_letter_path: JSONL file receiving dead-lettered events
+            destination_store: Where owned destinations are persisted; without
+                one they live in this engine only
+            verify_destinations: Apply check_destination_url() on registration
+                and before every request; disable only for local sinks in tests
+            idle_worker_seconds: A destination's workers exit after this long
+                without events and are restarted by the next publish
+        """
+        self._owns_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient(
+            transport=transport,
+            timeout=request_timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+        self.max_queue_size = max_queue_size
+        self.workers_per_destination = workers_per_destination
+        self.batch_window_seconds = batch_window_seconds
+        self.max_attempts = max_attempts
+        self.base_retry_delay = base_retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.dead_letter_path = dead_letter_path
+        self.destination_store = destination_store
+        self.verify_destinations = verify_destinations
+        self.idle_worker_seconds = idle_worker_seconds
+
+        self.destinations: Dict[str, WebhookDestination] = {}
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.workers: Dict[str, List[asyncio.Task]] = defaultdict(list)
+
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {
+                "enqueued": 0,
+                "delivered": 0,
+                "requests": 0,
+                "retries": 0,
+                "dropped": 0,
+                "dead_lettered": 0,
+            }
+        )
+
+    # ===================== DESTINATIONS =====================
+
+    def register(self, destination: WebhookDestination) -> WebhookDestination:
+        """Add or replace a destination."""
+        self.destinations[destination.id] = destination
+        return destination
+
+    def unregister(self, destination_id: str) -> bool:
+        """Remove a destination; events already queued for it are discarded."""
+        destination = self.destinations.pop(destination_id, None)
+        for worker in self.workers.pop(destination_id, []):
+            worker.cancel()
+        self.queues.pop(destination_id, None)
+        return destination is not None
+
+    async def add_destination(self, destination: WebhookDestination) -> WebhookDestination:
+        """
+        Check, persist (when there is a destination store) and register a destination.
+
+        Raises:
+            UnsafeDestinationError: The URL or a custom header is not allowed
+        """
+        check_destination_headers(destination.headers)
+        if self.verify_destinations:
+            await check_destination_url(destination.url)
+        if self.destination_store is not None:
+            await asyncio.to_thread(self.destination_store.save, destination)
+        return self.register(destination)
+
+    async def remove_destination(self, owner_id: str, destination_id: str) -> bool:
+        """Delete one of an owner's destinations from the store and this engine."""
+        deleted = False
+        if self.destination_store is not None:
+            deleted = await asyncio.to_thread(
+                self.destination_store.delete, owner_id, destination_id
+            )
+        destination = self.destinations.get(destination_id)
+        if destination is not None and destination.owner_id == owner_id:
+            deleted = self.unregister(destination_id) or deleted
+        return deleted
+
+    async def load_destinations(self, owner_id: str) -> List[WebhookDestination]:
+        """
+        An owner's destinations, refreshed from the destination store.
+
+        Picks up registrations made on other workers or before a restart
+        (the store caches them per user) and drops deleted ones.
+        """
+        if self.destination_store is not None:
+            stored = await asyncio.to_thread(self.destination_store.load, owner_id)
+            stored_ids = {destination.id for destination in stored}
+            for destination in list(self.destinations.values()):
+                if destination.owner_id == owner_id and destination.id not in stored_ids:
+                    self.unregister(destination.id)
+            for destination in stored:
+                self.register(destination)
+        return [d for d in self.destinations.values() if d.owner_id == owner_id]
+
+    # ===================== PUBLISH =====================
+
+    def publish(
+        self, event_type: str, payload: Dict[str, Any], owner_id: Optional[str] = None
+    ) -> int:
+        """
+        Queue an event for the owner's subscribed destinations without waiting.
+
+        Only destinations registered in this engine are considered; call
+        load_destinations() (or use publish_for_owner()) to include
+        persisted ones.
+
+        Returns:
+            Number of destinations the event was queued for
+        """
+        queued = 0
+        for destination in list(self.destinations.values()):
+            if not destination.wants(event_type, owner_id):
+                continue
+            stats = self.stats[destination.id]
+            try:
+                self._get_queue(destination.id).put_nowait(
+                    QueuedEvent(event_type=event_type, payload=payload)
+                )
+            except asyncio.QueueFull:
+                stats["dropped"] += 1
+                logger.warning(f"⚠️ Webhook queue full for {destination.url}, dropping {event_type}")
+                continue
+            stats["enqueued"] += 1
+            self._ensure_workers(destination.id)
+            queued += 1
+        return queued
+
+    async def publish_for_owner(
+        self, event_type: str, payload: Dict[str, Any], owner_id: str
+    ) -> int:
+        """Load the owner's persisted destinations, then publish to them."""
+        await self.load_destinations(owner_id)
+        return self.publish(event_type, payload, owner_id=owner_id)
+
+    async def publish_event(self, webhook_event: Any, owner_id: str) -> int:
+        """Queue a WebhookEvent (app.schemas.crm_schema) for the owner's destinations."""
+        payload = webhook_event.model_dump(mode="json")
+        return await self.publish_for_owner(webhook_event.event_type, payload, owner_id)
+
+    def _get_queue(self, destination_id: str) -> asyncio.Queue:
+        queue = self.queues.get(destination_id)
+        if queue is None:
+            queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self.queues[destination_id] = queue
+        return queue
+
+    def _ensure_workers(self, destination_id: str) -> None:
+        workers = [task for task in self.workers[destination_id] if not task.done()]
+        while len(workers) < self.workers_per_destination:
+            workers.append(
+                asyncio.create_task(
+                    self._worker(destination_id),
+                    name=f"webhook_delivery_{destination_id}",
+                )
+            )
+        self.workers[destination_id] = workers
+
+    # ===================== WORKERS =====================
+
+    async def _collect_batch(
+        self, queue: asyncio.Queue, destination: WebhookDestination
+    ) -> List[QueuedEvent]:
+        """
+        Wait for one event; batching destinations also take what arrives in the window.
+
+        Returns an empty batch when nothing arrived within idle_worker_seconds.
+        """
+        try:
+            batch = [await asyncio.wait_for(queue.get(), timeout=self.idle_worker_seconds)]
+        except asyncio.TimeoutError:
+            return []
+        if not destination.batch:
+            return batch
+
+        deadline = time.monotonic() + self.batch_window_seconds
+        while len(batch) < destination.max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self, destination_id: str) -> None:
+        queue = self.queues[destination_id]
+
+        while True:
+            destination = self.destinations.get(destination_id)
+            if destination is None:
+                return
+            batch = await self._collect_batch(queue, destination)
+            if not batch:
+                self._retire_worker(destination_id)
+                return
+            try:
+                await self._deliver_with_retry(destination, batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Webhook worker error for {destination.url}: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _retire_worker(self, destination_id: str) -> None:
+        """Forget an idle worker; the last one also drops the empty queue."""
+        current = asyncio.current_task()
+        workers = [task for task in self.workers.get(destination_id, []) if task is not current]
+        if workers:
+            self.workers[destination_id] = workers
+            return
+        self.workers.pop(destination_id, None)
+        queue = self.queues.get(destination_id)
+        if queue is not None and queue.empty():
+            del self.queues[destination_id]
+
+    def _build_request(
+        self, destination: WebhookDestination, batch: List[QueuedEvent]
+    ) -> Tuple[bytes, Dict[str, str]]:
+        if destination.batch:
+            event_type = "batch"
+            body = {
+                "events": [
+                    {"id": e.id, "event_type": e.event_type, "data": e.payload}
+                    for e in batch
+                ]
+            }
+        else:
+            (event,) = batch
+            event_type = event.event_type
+            body = {"id": event.id, "event_type": event.event_type, "data": event.payload}
+
+        raw = json.dumps(body, default=str, separators=(",", ":")).encode()
+        headers = {
+            **destination.headers,
+            "Content-Type": "application/json",
+            EVENT_HEADER: event_type,
+            DELIVERY_HEADER: batch[0].id,
+            SIGNATURE_HEADER: sign_payload(destination.secret, int(time.time()), raw),
+        }
+        return raw, headers
+
+    async def _send(self, destination: WebhookDestination, batch: List[QueuedEvent]) -> None:
+        # Re-checked on every attempt: the host may now resolve elsewhere
+        try:
+            check_destination_headers(destination.headers)
+            if self.verify_destinations:
+                await check_destination_url(destination.url)
+        except UnsafeDestinationError as e:
+            raise DeliveryError(f"Unsafe destination: {e}", retryable=False)
+
+        # Re-signed on every attempt so retries carry a fresh timestamp
+        body, headers = self._build_request(destination, batch)
+        self.stats[destination.id]["requests"] += 1
+        try:
+            response = await self.http_client.post(destination.url, content=body, headers=headers)
+        except httpx.HTTPError as e:
+            raise DeliveryError(f"{type(e).__name__}: {e}", retryable=True)
+
+        if response.is_success:
+            return
+        raise DeliveryError(
+            f"HTTP {response.status_code}",
+            retryable=response.status_code in RETRYABLE_STATUS_CODES,
+            retry_after=_retry_after_seconds(response),
+        )
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = min(self.max_retry_delay, self.base_retry_delay * 2 ** attempt)
+        delay *= random.uniform(0.8, 1.2)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_delay))
+        return delay
+
+    async def _deliver_with_retry(
+        self, destination: WebhookDestination, batch: List[QueuedEvent]
+    ) -> bool:
+        stats = self.stats[destination.id]
+
+        for attempt in range(self.max_attempts):
+            try:
+                await self._send(destination, batch)
+            except DeliveryError as e:
+                if not e.retryable or attempt + 1 >= self.max_attempts:
+                    self._dead_letter(destination, batch, str(e), attempt + 1)
+                    return False
+                stats["retries"] += 1
+                logger.warning(
+                    f"⚠️ Webhook delivery to {destination.url} failed "
+                    f"(attempt {attempt + 1}): {e}"
+                )
+                await asyncio.sleep(self._backoff(attempt, e.retry_after))
+            else:
+                stats["delivered"] += len(batch)
+                return True
+        return False
+
+    def _dead_letter(
+        self,
+        destination: WebhookDestination,
+        batch: List[QueuedEvent],
+        error: str,
+        attempts: int,
+    ) -> None:
+        self.stats[destination.id]["dead_lettered"] += len(batch)
+        logger.error(
+            f"❌ Dead-lettering {len(batch)} webhook events for {destination.url} "
+            f"after {attempts} attempts: {error}"
+        )
+        if not self.dead_letter_path:
+            return
+        try:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as dead_letter:
+                for event in batch:
+                    dead_letter.write(
+                        json.dumps(
+                            {
+                                "destination_id": destination.id,
+                                "url": destination.url,
+                                "event": asdict(event),
+                                "error": error,
+                                "attempts": attempts,
+                                "failed_at": datetime.utcnow().isoformat(),
+                            },
+                            default=str,
+                        )
+                        + "\n"
+                    )
+        except OSError as e:
+            logger.error(f"❌ Could not write webhook dead letter: {e}")
+
+    # ===================== LIFECYCLE =====================
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait until every queued event was delivered or dead-lettered."""
+        await asyncio.wait_for(
+            asyncio.gather(*(queue.join() for queue in self.queues.values())),
+            timeout=timeout,
+        )
+
+    async def stop(self, drain_timeout: Optional[float] = 10.0) -> None:
+        """Drain the queues (up to drain_timeout), stop the workers and close the pool."""
+        if drain_timeout:
+            try:
+                await self.drain(timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("⚠️ Timed out draining webhook delivery queues")
+
+        workers = [task for tasks in self.workers.values() for task in tasks]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self.workers.clear()
+        if self._owns_client:
+            await self.http_client.aclose()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Per-destination delivery statistics and queue depths."""
+        return {
+            destination_id: {
+                **stats,
+                "queue_depth": self.queues[destination_id].qsize()
+                if destination_id in self.queues
+                else 0,
+            }
+            for destination_id, stats in self.stats.items()
+        }
+
+
+_webhook_delivery: Optional[WebhookDeliveryEngine] = None
+
+
+def get_webhook_delivery() -> WebhookDeliveryEngine:
+    """
+    Get the global delivery engine.
+
+    WEBHOOK_DEAD_LETTER_PATH (Settings) enables the dead-letter file;
+    destinations are persisted in the global IntegrationStore.
+    """
+    global _webhook_delivery
+    if _webhook_delivery is None:
+        from app.core.config import get_settings
+
+        settings = get_settings()
+        _webhook_delivery = WebhookDeliveryEngine(
+            max_connections=settings.WEBHOOK_DELIVERY_MAX_CONNECTIONS,
+            max_attempts=settings.WEBHOOK_DELIVERY_MAX_ATTEMPTS,
+            dead_letter_path=settings.WEBHOOK_DEAD_LETTER_PATH or None,
+            destination_store=WebhookDestinationStore(),
+        )
+    return _webhook_delivery
+
+
+def set_webhook_delivery(engine: Optional[WebhookDeliveryEngine]) -> None:
+    """Replace the global delivery engine (used by tests)."""
+    global _webhook_delivery
+    _webhook_delivery = engine
+
+
+async def shutdown_webhook_delivery(timeout: float = 10.0) -> None:
+    """Drain and stop the global engine on application shutdown."""
+    global _webhook_delivery
+    if _webhook_delivery is not None:
+        await _webhook_delivery.stop(drain_timeout=timeout)
+        _webhook_delivery = None
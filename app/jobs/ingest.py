@@ -0,0 +1,1036 @@
+"""
+Durable webhook ingestion.
+
+Inbound webhooks (lead capture, form submissions, email events) are only
+validated and appended to a durable log inside the request, so the endpoint
+answers in a few milliseconds and bursts queue up instead of piling up as
+in-process background tasks. A consumer drains the log in batches.
+
+Provides:
+- IngestRecord: one received webhook and the owner it was posted for
+- create_inbound_webhook_token(), resolve_inbound_webhook_owner(): per-user
+  secrets identifying whose account an inbound webhook belongs to
+- FileIngestLog: append-only JSONL log with a committed offset (single
+  process, locked on open)
+- RedisStreamIngestLog: Redis stream with a consumer group (several workers)
+- MemoryProcessedKeys / RedisProcessedKeys: idempotency keys already processed
+- LeadWebhookHandler: batch-inserts leads, triggers lead workflows and
+  records email events on the owner's matching leads
+- WebhookIngestConsumer: at-least-once consumer with dedupe, retries with
+  backoff, a dead letter for the records of a batch that keep failing (the
+  batch is bisected so valid records still go through), and lag/throughput
+  metrics
+- get_webhook_ingest(), set_webhook_ingest(), shutdown_webhook_ingest():
+  global instance
+
+Webhooks are unauthenticated, so the owner of a lead never comes from the
+payload: each user gets a secret token (stored hashed in the integration
+store) and posts to the endpoints with ?owner=<user id> and the token in the
+X-PipeWise-Webhook-Token header, never in the URL where proxies and access
+logs would record it. The
+endpoint resolves the owner and stores it on the record; records without an
+owner are dead-lettered instead of processed.
+
+Delivery is at-least-once: entries are acknowledged only after the handler
+succeeded, and unacknowledged entries are delivered again after a failure or
+a restart. Replays are harmless: processed idempotency keys are skipped, lead
+ids are derived from owner and email and inserted with ignore-duplicates, and
+workflows are queued under an idempotency key.
+
+Configuration (Settings):
+- WEBHOOK_INGEST_BACKEND: "file" (default, single process; refused when
+  WEB_CONCURRENCY > 1) or "redis" (uses REDIS_URL)
+- WEBHOOK_INGEST_PATH: log file of the file backend
+- WEBHOOK_INGEST_FSYNC: fsync every append (slower, survives power loss)
+- WEBHOOK_INGEST_BATCH_SIZE: entries handled per batch
+- WEBHOOK_DEDUPE_TTL_SECONDS: how long processed keys are remembered
+"""
+
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import socket
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional Redis backend
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+# Optional exclusive lock on the file backend's log (POSIX only)
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+# Header carrying the inbound webhook token
+INBOUND_TOKEN_HEADER = "X-PipeWise-Webhook-Token"
+
+LEAD_CAPTURE = "lead_capture"
+FORM_SUBMISSION = "form_submission"
+EMAIL_EVENT = "email_event"
+
+# Namespace of the lead ids derived from owner and email
+WEBHOOK_LEAD_NAMESPACE = uuid.UUID("5b0c7c52-8f1e-4a53-9d47-2f0e6f1d3a9b")
+
+# Integration store platform holding a user's inbound webhook token hash
+INBOUND_WEBHOOK_PLATFORM = "inbound_webhook"
+
+# Payload fields that identify a delivery when the sender provides one
+IDEMPOTENCY_FIELDS = ("idempotency_key", "event_id", "sg_event_id", "id")
+
+
+@dataclass
+class IngestRecord:
+    """A webhook accepted by an endpoint and waiting to be processed."""
+
+    kind: str
+    payload: Dict[str, Any]
+    idempotency_key: str
+    received_at: float = field(default_factory=time.time)
+    client_ip: Optional[str] = None
+    owner_id: Optional[str] = None  # resolved by the endpoint, never the payload
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=str)
+
+    @classmethod
+    def from_json(cls, data: str) -> "IngestRecord":
+        return cls(**json.loads(data))
+
+
+def webhook_idempotency_key(
+    kind: str,
+    payload: Dict[str, Any],
+    header_key: Optional[str] = None,
+    owner_id: Optional[str] = None,
+) -> str:
+    """
+    Idempotency key of a webhook delivery.
+
+    An Idempotency-Key header wins, then an id supplied in the payload;
+    otherwise the key is a hash of the payload, so an identical redelivery
+    maps to the same key. Keys are scoped to the owner, so two accounts
+    sending the same key do not suppress each other's webhooks.
+    """
+    prefix = f"{owner_id}:{kind}" if owner_id else kind
+    explicit = header_key or next(
+        (payload[name] for name in IDEMPOTENCY_FIELDS if payload.get(name)), None
+    )
+    if explicit:
+        return f"{prefix}:{explicit}"
+    material = json.dumps([kind, payload], sort_keys=True, default=str)
+    return f"{prefix}:{hashlib.sha256(material.encode()).hexdigest()[:32]}"
+
+
+def webhook_lead_id(owner_id: Optional[str], email: str) -> str:
+    """Stable lead id for an owner and email, so replays insert nothing new."""
+    return str(uuid.uuid5(WEBHOOK_LEAD_NAMESPACE, f"{owner_id or ''}:{email.lower()}"))
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_inbound_webhook_token(owner_id: str, store: Any = None) -> str:
+    """
+    Issue a new inbound webhook token for a user, revoking the previous one.
+
+    Only a hash is stored; the token is returned once to be put in the
+    webhook URLs the user configures.
+    """
+    if store is None:
+        from app.core.integration_store import get_integration_store
+
+        store = get_integration_store()
+    token = secrets.token_urlsafe(32)
+    store.save(
+        owner_id,
+        INBOUND_WEBHOOK_PLATFORM,
+        {"token_sha256": _token_digest(token), "enabled": True},
+    )
+    return token
+
+
+def resolve_inbound_webhook_owner(
+    owner_id: Optional[str], token: Optional[str], store: Any = None
+) -> Optional[str]:
+    """The owner a webhook was posted for, or None unless the token is theirs."""
+    if not owner_id or not token:
+        return None
+    if store is None:
+        from app.core.integration_store import get_integration_store
+
+        store = get_integration_store()
+    config = store.get(owner_id, INBOUND_WEBHOOK_PLATFORM)
+    if not config or not config.get("enabled") or not config.get("token_sha256"):
+        return None
+    if not hmac.compare_digest(config["token_sha256"], _token_digest(token)):
+        return None
+    return owner_id
+
+
+# Delivered entry: (entry id, record); the record is None when unreadable
+LogEntry = Tuple[str, Optional[IngestRecord]]
+
+
+# ===================== LOG BACKENDS =====================
+
+
+class FileIngestLog:
+    """
+    Append-only JSONL log with a committed byte offset.
+
+    Appends are a single buffered write (plus fsync when enabled). The
+    consumer's position is persisted in "<path>.offset" on every ack, and the
+    file is truncated once everything in it was acknowledged. Dead-lettered
+    records go to "<path>.dead". One process owns a log file: it is locked
+    exclusively on open, so a second worker fails to start instead of
+    truncating entries and overwriting the offset of the first; use the Redis
+    backend for several workers.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.offset_path = f"{path}.offset"
+        self.dead_letter_path = f"{path}.dead"
+        self.fsync = fsync
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._file = open(path, "ab")
+        self._lock()
+        self._committed = self._read_committed_offset()
+        self._end = self._recover_end()
+        self._committed = min(self._committed, self._end)
+        self._read_pos = self._committed
+        self._pending = self._count_lines(self._committed, self._end)
+        # Delivered but not yet acknowledged: start offset -> end offset
+        self._unacked: "OrderedDict[int, int]" = OrderedDict()
+        self._appended: Optional[asyncio.Event] = None
+
+    def _lock(self) -> None:
+        if not FCNTL_AVAILABLE:
+            return
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            raise RuntimeError(
+                f"{self.path} is used by another process; the file ingest log is "
+                "single-process, set WEBHOOK_INGEST_BACKEND=redis for several workers"
+            )
+
+    def _read_committed_offset(self) -> int:
+        try:
+            with open(self.offset_path, encoding="utf-8") as offset_file:
+                return int(offset_file.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _recover_end(self) -> int:
+        """Drop a torn last line left by a crash mid-append."""
+        size = os.path.getsize(self.path)
+        if size == 0:
+            return 0
+        with open(self.path, "rb") as log_file:
+            data = log_file.read()
+        end = data.rfind(b"\n") + 1
+        if end != size:
+            logger.warning(f"⚠️ Truncating torn webhook log entry in {self.path}")
+            self._file.truncate(end)
+        return end
+
+    def _count_lines(self, start: int, end: int) -> int:
+        if end <= start:
+            return 0
+        with open(self.path, "rb") as log_file:
+            log_file.seek(start)
+            return log_file.read(end - start).count(b"\n")
+
+    def _notify(self) -> None:
+        if self._appended is not None:
+            self._appended.set()
+
+    async def append(self, record: IngestRecord) -> str:
+        line = (record.to_json() + "\n").encode()
+        entry_id = self._end
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._end += len(line)
+        self._pending += 1
+        self._notify()
+        return str(entry_id)
+
+    async def read(self, count: int, block_seconds: float) -> List[LogEntry]:
+        """Deliver up to count entries; unacknowledged ones are delivered again first."""
+        if self._unacked:
+            self._read_pos = self._committed
+            self._unacked.clear()
+
+        if self._read_pos >= self._end and block_seconds > 0:
+            if self._appended is None:
+                self._appended = asyncio.Event()
+            self._appended.clear()
+            try:
+                await asyncio.wait_for(self._appended.wait(), timeout=block_seconds)
+            except asyncio.TimeoutError:
+                return []
+
+        entries: List[LogEntry] = []
+        with open(self.path, "rb") as log_file:
+            log_file.seek(self._read_pos)
+            while len(entries) < count and self._read_pos < self._end:
+                line = log_file.readline()
+                start, self._read_pos = self._read_pos, self._read_pos + len(line)
+                self._unacked[start] = self._read_pos
+                try:
+                    entries.append((str(start), IngestRecord.from_json(line.decode())))
+                except (ValueError, TypeError) as e:
+                    # Unreadable entries are skipped but still acknowledged
+                    logger.error(f"❌ Skipping unreadable webhook log entry at {start}: {e}")
+                    entries.append((str(start), None))
+        return entries
+
+    async def ack(self, entry_ids: List[str]) -> None:
+        for entry_id in entry_ids:
+            if self._unacked.pop(int(entry_id), None) is not None:
+                self._pending -= 1
+        committed = next(iter(self._unacked), self._read_pos)
+        if committed == self._committed:
+            return
+        self._committed = committed
+
+        if self._committed >= self._end:
+            # Everything was processed: start a fresh log
+            self._file.truncate(0)
+            self._end = self._read_pos = self._committed = 0
+        self._write_committed_offset()
+
+    def _write_committed_offset(self) -> None:
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as offset_file:
+            offset_file.write(str(self._committed))
+        os.replace(tmp_path, self.offset_path)
+
+    async def dead_letter(self, records: List[IngestRecord], error: str) -> None:
+        with open(self.dead_letter_path, "a", encoding="utf-8") as dead_letter:
+            for record in records:
+                dead_letter.write(
+                    json.dumps({"record": asdict(record), "error": error}, default=str)
+                    + "\n"
+                )
+
+    async def backlog(self) -> int:
+        """Entries appended but not yet acknowledged."""
+        return self._pending
+
+    async def close(self) -> None:
+        self._file.close()
+
+
+class RedisStreamIngestLog:
+    """
+    Redis stream consumed by a consumer group.
+
+    Each process reads as its own consumer. Entries stay in the group's
+    pending list until acknowledged; a consumer re-reads its own pending
+    entries first and periodically claims entries left idle by a consumer
+    that died. Dead-lettered records are added to "<stream>:dead".
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        stream: str = "pipewise:webhooks:ingest",
+        group: str = "ingest",
+        consumer: Optional[str] = None,
+        max_length: int = 1_000_000,
+        claim_idle_seconds: float = 60.0,
+        client: Any = None,
+    ):
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is required for the Redis ingest log")
+
+        self.client = client or aioredis.from_url(redis_url, decode_responses=True)
+        self.stream = stream
+        self.dead_letter_stream = f"{stream}:dead"
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.max_length = max_length
+        self.claim_idle_seconds = claim_idle_seconds
+        self._group_ready = False
+        self._last_claim = 0.0
+
+    async def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            await self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def append(self, record: IngestRecord) -> str:
+        return await self.client.xadd(
+            self.stream,
+            {"record": record.to_json()},
+            maxlen=self.max_length,
+            approximate=True,
+        )
+
+    @staticmethod
+    def _decode(messages: List[Tuple[str, Optional[Dict[str, str]]]]) -> List[LogEntry]:
+        entries: List[LogEntry] = []
+        for entry_id, fields in messages:
+            try:
+                record = IngestRecord.from_json(fields["record"]) if fields else None
+            except (KeyError, ValueError, TypeError) as e:
+                logger.error(f"❌ Skipping unreadable webhook stream entry {entry_id}: {e}")
+                record = None
+            entries.append((entry_id, record))  # None: trimmed or unreadable
+        return entries
+
+    async def read(self, count: int, block_seconds: float) -> List[LogEntry]:
+        """Deliver up to count entries; own pending entries are delivered again first."""
+        await self._ensure_group()
+
+        pending = await self.client.xreadgroup(
+            self.group, self.consumer, {self.stream: "0"}, count=count
+        )
+        if pending and pending[0][1]:
+            return self._decode(pending[0][1])
+
+        now = time.monotonic()
+        if now - self._last_claim >= self.claim_idle_seconds:
+            self._last_claim = now
+            claimed = await self.client.xautoclaim(
+                self.stream,
+                self.group,
+                self.consumer,
+                min_idle_time=int(self.claim_idle_seconds * 1000),
+                start_id="0-0",
+                count=count,
+            )
+            if claimed and claimed[1]:
+                logger.info(f"🔁 Claimed {len(claimed[1])} stale webhook entries")
+                return self._decode(claimed[1])
+
+        fresh = await self.client.xreadgroup(
+            self.group,
+            self.consumer,
+            {self.stream: ">"},
+            count=count,
+            block=int(block_seconds * 1000) or None,
+        )
+        return self._decode(fresh[0][1]) if fresh else []
+
+    async def ack(self, entry_ids: List[str]) -> None:
+        if entry_ids:
+            await self.client.xack(self.stream, self.group, *entry_ids)
+
+    async def dead_letter(self, records: List[IngestRecord], error: str) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for record in records:
+            pipe.xadd(
+                self.dead_letter_stream,
+                {"record": record.to_json(), "error": error},
+                maxlen=self.max_length,
+                approximate=True,
+            )
+        await pipe.execute()
+
+    async def backlog(self) -> int:
+        """Entries not yet delivered to the group plus delivered but unacknowledged."""
+        await self._ensure_group()
+        for info in await self.client.xinfo_groups(self.stream):
+            if info.get("name") == self.group:
+                lag = info.get("lag")
+                if lag is None:  # Redis < 7 does not report lag
+                    lag = await self.client.xlen(self.stream)
+                return int(lag) + int(info.get("pending", 0))
+        return 0
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+# ===================== PROCESSED KEYS =====================
+
+
+class MemoryProcessedKeys:
+    """Recently processed idempotency keys, bounded and expiring."""
+
+    def __init__(self, ttl_seconds: float = 24 * 3600, max_keys: int = 100_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._keys: "OrderedDict[str, float]" = OrderedDict()
+
+    async def seen(self, keys: List[str]) -> Set[str]:
+        now = time.time()
+        return {key for key in keys if self._keys.get(key, 0) > now}
+
+    async def mark(self, keys: List[str]) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        for key in keys:
+            self._keys[key] = expires_at
+            self._keys.move_to_end(key)
+        while len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisProcessedKeys:
+    """Processed idempotency keys shared by all workers."""
+
+    def __init__(
+        self,
+        client: Any,
+        namespace: str = "pipewise:webhooks:processed",
+        ttl_seconds: float = 24 * 3600,
+    ):
+        self.client = client
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def seen(self, keys: List[str]) -> Set[str]:
+        if not keys:
+            return set()
+        values = await self.client.mget([self._key(key) for key in keys])
+        return {key for key, value in zip(keys, values) if value is not None}
+
+    async def mark(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(self._key(key), "1", ex=int(self.ttl_seconds))
+        await pipe.execute()
+
+    async def close(self) -> None:
+        pass  # The client belongs to the Redis ingest log
+
+
+# ===================== HANDLER =====================
+
+MAX_EMAIL_LENGTH = 320
+
+
+def _text_field(data: Dict[str, Any], name: str) -> Optional[str]:
+    """A text column of a lead row; numbers are accepted, objects are not."""
+    value = data.get(name)
+    if value is None or isinstance(value, str):
+        return value.strip() if isinstance(value, str) else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"{name} must be text")
+
+
+class LeadWebhookHandler:
+    """
+    Turns a batch of webhook records into CRM writes.
+
+    Lead captures and form submissions with an email become leads of the
+    record's owner, inserted in one upsert that ignores existing ids, and
+    each gets a lead workflow; newly inserted leads are published as
+    lead_created webhooks. Email events are merged into the metadata of the
+    owner's lead with that email in one bulk update. Records without an owner
+    are returned as rejected, for the consumer to dead-letter.
+    """
+
+    def __init__(
+        self,
+        crm_client: Any = None,
+        enqueue_workflow: Optional[Callable[..., Awaitable[Any]]] = None,
+    ):
+        self._crm_client = crm_client
+        self._enqueue_workflow = enqueue_workflow
+
+    @property
+    def crm_client(self) -> Any:
+        if self._crm_client is None:
+            from app.supabase.supabase_client import get_supabase_admin_client
+
+            self._crm_client = get_supabase_admin_client()
+        return self._crm_client
+
+    async def __call__(self, records: List[IngestRecord]) -> Dict[str, Any]:
+        rejected = [
+            (record, "webhook has no owner") for record in records if not record.owner_id
+        ]
+        records = [record for record in records if record.owner_id]
+
+        leads = []
+        for record in records:
+            try:
+                lead = self._lead_row(record)
+            except ValueError as e:
+                rejected.append((record, str(e)))
+                continue
+            if lead:
+                leads.append(lead)
+        # bulk_update_leads only touches one owner's leads per call
+        email_updates: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for record in records:
+            if record.kind == EMAIL_EVENT:
+                email_updates[record.owner_id].extend(self._email_event_updates(record))
+
+        if leads:
+            inserted = await asyncio.to_thread(
+                self.crm_client.bulk_upsert_leads, leads, ignore_duplicates=True
+            )
+            await self._trigger_workflows(leads)
+            await self._publish_created(inserted or [])
+        for owner_id, updates in email_updates.items():
+            if updates:
+                await asyncio.to_thread(self.crm_client.bulk_update_leads, updates, owner_id)
+
+        return {
+            "leads": len(leads),
+            "email_events": sum(len(updates) for updates in email_updates.values()),
+            "rejected": rejected,
+        }
+
+    @staticmethod
+    def _lead_row(record: IngestRecord) -> Optional[Dict[str, Any]]:
+        """
+        Lead row of a capture or form submission; None when it carries no email.
+
+        Raises:
+            ValueError: A value the leads table would reject, which would
+                otherwise fail the whole bulk upsert
+        """
+        if record.kind not in (LEAD_CAPTURE, FORM_SUBMISSION):
+            return None
+        data = record.payload
+        email = _text_field(data, "email") or ""
+        if "@" not in email:
+            return None
+        if len(email) > MAX_EMAIL_LENGTH:
+            raise ValueError("email is too long")
+
+        try:
+            owner_id = str(uuid.UUID(str(record.owner_id)))
+        except ValueError:
+            raise ValueError(f"owner id {record.owner_id!r} is not a UUID")
+        utm_params = data.get("utm_params")
+        if utm_params is not None and not isinstance(utm_params, dict):
+            raise ValueError("utm_params must be an object")
+
+        # Every row lists the same columns, as the bulk upsert requires
+        return {
+            "id": webhook_lead_id(owner_id, email),
+            "name": _text_field(data, "name") or email.split("@")[0],
+            "email": email,
+            "company": _text_field(data, "company") or "",
+            "phone": _text_field(data, "phone"),
+            "message": _text_field(data, "message"),
+            "source": _text_field(data, "source") or record.kind,
+            "owner_id": owner_id,
+            "user_id": owner_id,
+            "utm_params": utm_params,
+            "metadata": {
+                "webhook": {
+                    "kind": record.kind,
+                    "idempotency_key": record.idempotency_key,
+                    "ip_address": record.client_ip,
+                    "received_at": record.received_at,
+                }
+            },
+        }
+
+    @staticmethod
+    def _email_event_updates(record: IngestRecord) -> List[Dict[str, Any]]:
+        # Providers such as SendGrid post arrays of events
+        events = record.payload.get("events") or [record.payload]
+        if not isinstance(events, list):
+            return []
+        updates = []
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            email = event.get("email")
+            if not email or not isinstance(email, str):
+                continue
+            event_type = event.get("event", "unknown")
+            patch: Dict[str, Any] = {
+                "last_email_event": event_type,
+                "last_email_event_at": event.get("timestamp", record.received_at),
+            }
+            if event_type in ("bounce", "dropped"):
+                patch["email_bounced"] = True
+            elif event_type in ("spamreport", "complaint"):
+                patch["email_complaint"] = True
+            updates.append({"email": email, "metadata": patch})
+        return updates
+
+    @staticmethod
+    async def _publish_created(inserted: List[Any]) -> None:
+        """Push lead_created to the owner's endpoints (new leads only, not replays)."""
+        if not inserted:
+            return
+        from app.jobs.delivery import get_webhook_delivery
+
+        delivery = get_webhook_delivery()
+        owned = [lead for lead in inserted if lead.owner_id]
+        for owner_id in {str(lead.owner_id) for lead in owned}:
+            await delivery.load_destinations(owner_id)
+        for lead in owned:
+            delivery.publish(
+                "lead_created", lead.model_dump(mode="json"), owner_id=str(lead.owner_id)
+            )
+
+    async def _trigger_workflows(self, leads: List[Dict[str, Any]]) -> None:
+        enqueue = self._enqueue_workflow
+        if enqueue is None:
+            from app.jobs.workflows import enqueue_lead_workflow as enqueue
+
+        async def trigger(lead: Dict[str, Any]) -> None:
+            tenant = {
+                "tenant_id": "default",
+                "user_id": lead["owner_id"],
+                "is_premium": False,
+                "api_limits": {"calls_per_hour": 100},
+                "features_enabled": ["lead_qualification", "meeting_scheduling"],
+            }
+            await enqueue(
+                {**lead, "workflow_source": "webhook"},
+                tenant,
+                idempotency_key=f"webhook:{lead['id']}",
+            )
+
+        await asyncio.gather(*(trigger(lead) for lead in leads))
+
+
+# ===================== CONSUMER =====================
+
+# Batch handler: receives the deduplicated records of one batch
+BatchHandler = Callable[[List[IngestRecord]], Awaitable[Any]]
+
+
+def _rejected_records(result: Any) -> List[Tuple[IngestRecord, str]]:
+    """(record, reason) pairs a handler returned under "rejected"."""
+    return list(result.get("rejected") or []) if isinstance(result, dict) else []
+
+
+class WebhookIngestConsumer:
+    """Drains an ingest log in batches, at least once."""
+
+    def __init__(
+        self,
+        log: Any,
+        handler: BatchHandler,
+        processed_keys: Any = None,
+        batch_size: int = 100,
+        block_seconds: float = 1.0,
+        max_attempts: int = 5,
+        base_retry_delay: float = 0.5,
+        max_retry_delay: float = 30.0,
+        throughput_window_seconds: float = 60.0,
+    ):
+        """
+        Initialize the consumer.
+
+        Args:
+            log: FileIngestLog, RedisStreamIngestLog or compatible log
+            handler: Coroutine processing a batch; raising leaves it unacknowledged,
+                and records it returns under "rejected" as (record, reason)
+                pairs are dead-lettered
+            processed_keys: Store of processed idempotency keys
+            batch_size: Maximum entries read and handled at once
+            block_seconds: How long an idle consumer waits for new entries
+            max_attempts: Failed attempts before a batch is bisected and the
+                records that fail alone are dead-lettered
+            base_retry_delay: First backoff after a failed batch
+            max_retry_delay: Backoff cap
+            throughput_window_seconds: Window of the throughput metric
+        """
+        self.log = log
+        self.handler = handler
+        self.processed_keys = processed_keys or MemoryProcessedKeys()
+        self.batch_size = batch_size
+        self.block_seconds = block_seconds
+        self.max_attempts = max_attempts
+        self.base_retry_delay = base_retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.throughput_window_seconds = throughput_window_seconds
+
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._attempts: Dict[str, int] = {}
+        self._completions: Deque[Tuple[float, int]] = deque()
+        self._last_lag_seconds = 0.0
+
+        self.stats = {
+            "appended": 0,
+            "processed": 0,
+            "duplicates": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "dead_lettered": 0,
+        }
+
+    # ===================== INGEST =====================
+
+    async def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        client_ip: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        owner_id: Optional[str] = None,
+    ) -> IngestRecord:
+        """Append a webhook to the log; the only work done inside the request."""
+        record = IngestRecord(
+            kind=kind,
+            payload=payload,
+            idempotency_key=webhook_idempotency_key(
+                kind, payload, idempotency_key, owner_id
+            ),
+            client_ip=client_ip,
+            owner_id=owner_id,
+        )
+        await self.log.append(record)
+        self.stats["appended"] += 1
+        self._ensure_running()
+        return record
+
+    # ===================== BACKGROUND CONSUMER =====================
+
+    def _ensure_running(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="webhook_ingest_consumer")
+
+    async def _run(self) -> None:
+        failures = 0
+        while not self._stopping:
+            try:
+                entries = await self.log.read(self.batch_size, self.block_seconds)
+            except Exception as e:
+                logger.error(f"❌ Reading webhook log failed: {e}")
+                entries = []
+                failures += 1
+            else:
+                if not entries:
+                    continue
+                if await self._handle_batch(entries):
+                    failures = 0
+                    continue
+                failures += 1
+
+            delay = min(self.max_retry_delay, self.base_retry_delay * 2 ** (failures - 1))
+            await asyncio.sleep(delay)
+
+    async def _handle_batch(self, entries: List[LogEntry]) -> bool:
+        """Handle one delivered batch; True when it was acknowledged."""
+        entry_ids = [entry_id for entry_id, _ in entries]
+        records = [record for _, record in entries if record is not None]
+
+        # Drop keys processed earlier and duplicates within the batch
+        seen = await self.processed_keys.seen([r.idempotency_key for r in records])
+        unique: Dict[str, IngestRecord] = {}
+        for record in records:
+            if record.idempotency_key not in seen:
+                unique.setdefault(record.idempotency_key, record)
+        duplicates = len(records) - len(unique)
+
+        if unique:
+            self._last_lag_seconds = time.time() - min(
+                r.received_at for r in unique.values()
+            )
+            batch = list(unique.values())
+            try:
+                rejected = _rejected_records(await self.handler(batch))
+            except Exception as e:
+                self.stats["failed_batches"] += 1
+                attempts = self._attempts.get(entry_ids[0], 0) + 1
+                self._attempts[entry_ids[0]] = attempts
+                if attempts < self.max_attempts:
+                    logger.warning(
+                        f"⚠️ Webhook batch of {len(batch)} failed (attempt {attempts}): {e}"
+                    )
+                    return False
+                logger.error(
+                    f"❌ Webhook batch of {len(batch)} failed {attempts} times, "
+                    f"isolating the failing records: {e}"
+                )
+                rejected = await self._isolate(batch, e)
+
+            if rejected and not await self._dead_letter_rejected(rejected):
+                return False
+            for record, _ in rejected:
+                unique.pop(record.idempotency_key, None)
+            await self.processed_keys.mark(list(unique))
+
+        await self.log.ack(entry_ids)
+        self._attempts.pop(entry_ids[0], None)
+        self.stats["batches"] += 1
+        self.stats["duplicates"] += duplicates
+        self.stats["processed"] += len(unique)
+        self._completions.append((time.monotonic(), len(entry_ids)))
+        return True
+
+    async def _isolate(
+        self, records: List[IngestRecord], error: Exception
+    ) -> List[Tuple[IngestRecord, str]]:
+        """
+        Bisect a batch that keeps failing down to the records that fail alone.
+
+        Each half is handled again (the handler is idempotent, so records that
+        went through in an earlier attempt are harmless to resend); a single
+        record that still fails is returned for the dead letter, together with
+        records a successful half rejected. Everything else counts as processed.
+        """
+        if len(records) == 1:
+            return [(records[0], str(error))]
+
+        middle = len(records) // 2
+        rejected: List[Tuple[IngestRecord, str]] = []
+        for half in (records[:middle], records[middle:]):
+            try:
+                rejected += _rejected_records(await self.handler(half))
+            except Exception as e:
+                rejected += await self._isolate(half, e)
+        return rejected
+
+    async def _dead_letter_rejected(
+        self, rejected: List[Tuple[IngestRecord, str]]
+    ) -> bool:
+        """Dead-letter records the handler refused; False if that failed."""
+        try:
+            for record, reason in rejected:
+                logger.warning(
+                    f"⚠️ Dead-lettering webhook {record.idempotency_key}: {reason}"
+                )
+                await self.log.dead_letter([record], reason)
+        except Exception as e:
+            logger.error(f"❌ Could not dead-letter rejected webhooks: {e}")
+            return False
+        self.stats["dead_lettered"] += len(rejected)
+        return True
+
+    # ===================== LIFECYCLE =====================
+
+    async def start(self) -> None:
+        """Start consuming, including entries left by a previous run."""
+        self._ensure_running()
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the log backlog is empty; True if it drained."""
+        self._ensure_running()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while await self.log.backlog():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Process what can be processed within timeout, then stop the consumer."""
+        if self._task is not None:
+            if not await self.drain(timeout=timeout):
+                logger.warning("⚠️ Stopping webhook consumer with entries left in the log")
+            self._stopping = True
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.processed_keys.close()
+        await self.log.close()
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        """Counters plus consumer lag and throughput."""
+        now = time.monotonic()
+        while self._completions and now - self._completions[0][0] > self.throughput_window_seconds:
+            self._completions.popleft()
+        handled = sum(count for _, count in self._completions)
+        try:
+            backlog = await self.log.backlog()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read webhook log backlog: {e}")
+            backlog = None
+        return {
+            **self.stats,
+            "backlog": backlog,
+            "lag_seconds": round(self._last_lag_seconds, 3) if backlog else 0.0,
+            "throughput_per_second": round(handled / self.throughput_window_seconds, 3),
+        }
+
+
+def create_webhook_ingest() -> WebhookIngestConsumer:
+    """Build the ingest consumer from Settings."""
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    ttl = settings.WEBHOOK_DEDUPE_TTL_SECONDS
+
+    if settings.WEBHOOK_INGEST_BACKEND.lower() == "redis":
+        log = RedisStreamIngestLog(settings.REDIS_URL)
+        processed_keys = RedisProcessedKeys(log.client, ttl_seconds=ttl)
+    else:
+        if settings.WEB_CONCURRENCY > 1:
+            raise RuntimeError(
+                f"WEB_CONCURRENCY={settings.WEB_CONCURRENCY}: the file webhook ingest "
+                "backend is single-process, set WEBHOOK_INGEST_BACKEND=redis"
+            )
+        log = FileIngestLog(settings.WEBHOOK_INGEST_PATH, fsync=settings.WEBHOOK_INGEST_FSYNC)
+        processed_keys = MemoryProcessedKeys(ttl_seconds=ttl)
+
+    return WebhookIngestConsumer(
+        log,
+        LeadWebhookHandler(),
+        processed_keys=processed_keys,
+        batch_size=settings.WEBHOOK_INGEST_BATCH_SIZE,
+    )
+
+
+_webhook_ingest: Optional[WebhookIngestConsumer] = None
+
+
+def get_webhook_ingest() -> WebhookIngestConsumer:
+    """Get the global webhook ingest consumer."""
+    global _webhook_ingest
+    if _webhook_ingest is None:
+        _webhook_ingest = create_webhook_ingest()
+    return _webhook_ingest
+
+
+def set_webhook_ingest(consumer: Optional[WebhookIngestConsumer]) -> None:
+    """Replace the global webhook ingest consumer (used by tests)."""
+    global _webhook_ingest
+    _webhook_ingest = consumer
+
+
+async def shutdown_webhook_ingest(timeout: float = 10.0) -> None:
+    """Drain and stop the global consumer on application shutdown."""
+    global _webhook_ingest
+    if _webhook_ingest is not None:
+        await _webhook_ingest.stop(timeout=timeout)
+        _webhook_ingest = None
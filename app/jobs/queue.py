@@ -0,0 +1,593 @@
+"""
+Background job queue.
+
+Provides:
+- Job records with persisted status, result and error
+- Idempotency keys mapping repeated submissions to the same job
+- An in-process backend and a Redis backend (durable, at-least-once)
+- A bounded worker pool executing registered job handlers, optionally
+  ordered by a PriorityScheduler (lanes + per-tenant fair queuing)
+- Status subscriptions for polling and WebSocket endpoints
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional Redis backend
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    aioredis = None
+    REDIS_AVAILABLE = False
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of a job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+TERMINAL_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED}
+
+
+@dataclass
+class Job:
+    """A unit of background work and its outcome."""
+
+    job_type: str
+    payload: Dict[str, Any]
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: Optional[str] = None
+    idempotency_key: Optional[str] = None
+    status: JobStatus = JobStatus.QUEUED
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["status"] = self.status.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        return cls(**{**data, "status": JobStatus(data["status"])})
+
+
+# Job handler: receives the job and returns its JSON-serializable result
+JobHandler = Callable[[Job], Awaitable[Optional[Dict[str, Any]]]]
+
+# Lane resolver: maps a job to its (scheduler lane, tenant fairness key)
+LaneResolver = Callable[[Job], Tuple[str, str]]
+
+
+class InMemoryJobBackend:
+    """
+    Job store and FIFO broker living in the current process.
+
+    Suitable for development, tests and single-process deployments; jobs do
+    not survive a restart.
+    """
+
+    # Only this process pops from the broker
+    shared = False
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.idempotency_keys: Dict[str, Tuple[str, float]] = {}
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.in_flight: Set[str] = set()
+
+    async def save(self, job: Job) -> None:
+        self.jobs[job.id] = json.loads(json.dumps(job.to_dict(), default=str))
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        data = self.jobs.get(job_id)
+        return Job.from_dict(data) if data else None
+
+    async def claim_idempotency_key(
+        self, key: str, job_id: str, ttl_seconds: int
+    ) -> Optional[str]:
+        """Bind key to job_id unless already bound; return the existing job id."""
+        existing = self.idempotency_keys.get(key)
+        if existing and existing[1] > time.time():
+            return existing[0]
+        self.idempotency_keys[key] = (job_id, time.time() + ttl_seconds)
+        return None
+
+    async def replace_idempotency_key(
+        self, key: str, job_id: str, ttl_seconds: int
+    ) -> None:
+        self.idempotency_keys[key] = (job_id, time.time() + ttl_seconds)
+
+    async def push(self, job_id: str) -> None:
+        self.queue.put_nowait(job_id)
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        try:
+            job_id = await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.in_flight.add(job_id)
+        return job_id
+
+    async def ack(self, job_id: str) -> None:
+        self.in_flight.discard(job_id)
+
+    async def requeue(self, job_id: str) -> None:
+        """Hand a popped job that did not finish back to the queue."""
+        self.in_flight.discard(job_id)
+        self.queue.put_nowait(job_id)
+
+    async def heartbeat(self) -> None:
+        """Nothing to renew: no other process shares the queue."""
+
+    async def recover(self) -> int:
+        """Nothing to recover: in-flight jobs die with the process."""
+        return 0
+
+    async def release(self) -> None:
+        pass
+
+    async def depth(self) -> int:
+        return self.queue.qsize()
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisJobBackend:
+    """
+    Redis job store and reliable list broker.
+
+    Every backend instance is a consumer with its own processing list: popped
+    job ids are moved atomically into it and removed on ack. A consumer holds
+    a lease it renews through heartbeat(); recover() re-queues only the
+    processing lists of consumers whose lease expired (crashed workers), so
+    jobs other live workers are running are never started twice.
+    """
+
+    # Several processes pop from the same lists
+    shared = True
+
+    def __init__(
+        self,
+        redis_url: str,
+        namespace: str = "pipewise:jobs",
+        result_ttl_seconds: int = 7 * 24 * 3600,
+        client: Any = None,
+        lease_seconds: int = 60,
+        consumer_id: Optional[str] = None,
+    ):
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is required for the Redis job backend")
+
+        self.client = client or aioredis.from_url(redis_url, decode_responses=True)
+        self.namespace = namespace
+        self.result_ttl_seconds = result_ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.consumer_id = consumer_id or uuid.uuid4().hex
+        self.queue_key = f"{namespace}:queue"
+        self.consumers_key = f"{namespace}:consumers"
+        self.processing_key = self._processing_key(self.consumer_id)
+        # Shared processing list used before consumers had their own
+        self.legacy_processing_key = f"{namespace}:processing"
+        self._legacy_recovered = False
+
+    def _processing_key(self, consumer_id: str) -> str:
+        return f"{self.namespace}:processing:{consumer_id}"
+
+    def _lease_key(self, consumer_id: str) -> str:
+        return f"{self.namespace}:lease:{consumer_id}"
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.namespace}:job:{job_id}"
+
+    def _idempotency_key(self, key: str) -> str:
+        return f"{self.namespace}:idem:{key}"
+
+    async def save(self, job: Job) -> None:
+        await self.client.set(
+            self._job_key(job.id),
+            json.dumps(job.to_dict(), default=str),
+            ex=self.result_ttl_seconds,
+        )
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        data = await self.client.get(self._job_key(job_id))
+        return Job.from_dict(json.loads(data)) if data else None
+
+    async def claim_idempotency_key(
+        self, key: str, job_id: str, ttl_seconds: int
+    ) -> Optional[str]:
+        redis_key = self._idempotency_key(key)
+        if await self.client.set(redis_key, job_id, nx=True, ex=ttl_seconds):
+            return None
+        return await self.client.get(redis_key)
+
+    async def replace_idempotency_key(
+        self, key: str, job_id: str, ttl_seconds: int
+    ) -> None:
+        await self.client.set(self._idempotency_key(key), job_id, ex=ttl_seconds)
+
+    async def push(self, job_id: str) -> None:
+        await self.client.rpush(self.queue_key, job_id)
+
+    async def pop(self, timeout: float) -> Optional[str]:
+        return await self.client.blmove(
+            self.queue_key, self.processing_key, timeout, "LEFT", "RIGHT"
+        )
+
+    async def ack(self, job_id: str) -> None:
+        await self.client.lrem(self.processing_key, 1, job_id)
+
+    async def requeue(self, job_id: str) -> None:
+        """Hand a popped job that did not finish back to the head of the queue."""
+        # Pushed before it leaves the processing list: a crash in between
+        # duplicates the id rather than losing the job
+        await self.client.lpush(self.queue_key, job_id)
+        await self.client.lrem(self.processing_key, 1, job_id)
+
+    async def heartbeat(self) -> None:
+        """Renew this consumer's lease on the jobs in its processing list."""
+        await self.client.sadd(self.consumers_key, self.consumer_id)
+        await self.client.set(
+            self._lease_key(self.consumer_id), "1", ex=self.lease_seconds
+        )
+
+    async def _drain(self, processing_key: str) -> int:
+        recovered = 0
+        while await self.client.lmove(processing_key, self.queue_key, "RIGHT", "LEFT"):
+            recovered += 1
+        return recovered
+
+    async def recover(self) -> int:
+        """Re-queue the jobs of consumers whose lease expired."""
+        recovered = 0
+        for consumer_id in await self.client.smembers(self.consumers_key):
+            if consumer_id == self.consumer_id:
+                continue
+            if await self.client.exists(self._lease_key(consumer_id)):
+                continue  # alive: its jobs are running
+            recovered += await self._drain(self._processing_key(consumer_id))
+            await self.client.srem(self.consumers_key, consumer_id)
+
+        if not self._legacy_recovered:
+            recovered += await self._drain(self.legacy_processing_key)
+            self._legacy_recovered = True
+        return recovered
+
+    async def release(self) -> None:
+        """Drop the lease on shutdown so live consumers recover anything left."""
+        await self.client.delete(self._lease_key(self.consumer_id))
+
+    async def depth(self) -> int:
+        return await self.client.llen(self.queue_key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class JobQueue:
+    """Enqueue jobs and run them on a bounded pool of workers."""
+
+    def __init__(
+        self,
+        backend: Optional[Any] = None,
+        concurrency: int = 4,
+        job_timeout_seconds: Optional[float] = 600.0,
+        idempotency_ttl_seconds: int = 3600,
+        poll_timeout_seconds: float = 1.0,
+        scheduler: Optional[Any] = None,
+        lane_resolver: Optional[LaneResolver] = None,
+        prefetch: int = 0,
+    ):
+        """
+        Initialize the job queue.
+
+        Args:
+            backend: InMemoryJobBackend or RedisJobBackend
+            concurrency: Maximum number of jobs executing at once (without a
+                scheduler; the scheduler's max_concurrency applies otherwise)
+            job_timeout_seconds: Jobs running longer are failed
+            idempotency_ttl_seconds: How long an idempotency key maps to a job
+            poll_timeout_seconds: Broker wait before workers re-check shutdown
+            scheduler: PriorityScheduler deciding execution order; when set,
+                it also enforces the concurrency limits
+            lane_resolver: Maps jobs to (lane, tenant) for the scheduler
+            prefetch: Jobs pulled into the scheduler beyond its free slots so
+                it can reorder a local backlog; ignored for shared brokers,
+                where unstarted jobs must stay claimable by other workers
+        """
+        self.backend = backend or InMemoryJobBackend()
+        self.concurrency = concurrency
+        self.job_timeout_seconds = job_timeout_seconds
+        self.idempotency_ttl_seconds = idempotency_ttl_seconds
+        self.poll_timeout_seconds = poll_timeout_seconds
+        self.scheduler = scheduler
+        self.lane_resolver = lane_resolver or (
+            lambda job: (job.payload.get("lane", "default"), job.user_id or "default")
+        )
+        self.prefetch = prefetch
+
+        self.handlers: Dict[str, JobHandler] = {}
+        self.workers: List[asyncio.Task] = []
+        self._maintenance: Optional[asyncio.Task] = None
+        self.running_jobs: Set[str] = set()
+        self._running = False
+        self._listeners: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+        self.stats = {"enqueued": 0, "deduplicated": 0, "completed": 0, "failed": 0}
+
+    def register_handler(self, job_type: str, handler: JobHandler) -> None:
+        self.handlers[job_type] = handler
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of jobs this queue executes at once."""
+        if self.scheduler is not None:
+            return self.scheduler.max_concurrency
+        return self.concurrency
+
+    async def start(self) -> None:
+        """Start the worker pool; safe to call more than once."""
+        if self._running:
+            return
+        self._running = True
+
+        await self.backend.heartbeat()
+        recovered = await self.backend.recover()
+        if recovered:
+            logger.info(f"Re-queued {recovered} interrupted jobs")
+        self._maintenance = asyncio.create_task(
+            self._maintain(), name="job_queue_maintenance"
+        )
+
+        # Each worker holds at most one job, so the worker count bounds how many
+        # jobs this process takes off the broker: never more than it can run,
+        # unless the broker is local and a scheduler can use the backlog.
+        worker_count = self.capacity
+        if self.scheduler is not None and not getattr(self.backend, "shared", False):
+            worker_count += self.prefetch
+        self.workers = [
+            asyncio.create_task(self._worker(i), name=f"job_worker_{i}")
+            for i in range(worker_count)
+        ]
+        logger.info(f"Job queue started with {worker_count} workers")
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop taking new jobs and wait up to timeout for running ones."""
+        if not self._running:
+            return
+        self._running = False
+
+        done, pending = await asyncio.wait(self.workers, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self.workers = []
+
+        if self._maintenance is not None:
+            self._maintenance.cancel()
+            await asyncio.gather(self._maintenance, return_exceptions=True)
+            self._maintenance = None
+        try:
+            await self.backend.release()
+        except Exception as e:
+            logger.warning(f"Could not release job queue lease: {e}")
+        await self.backend.close()
+        logger.info("Job queue stopped")
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        user_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[Job, bool]:
+        """
+        Persist and queue a job.
+
+        Returns:
+            (job, created). If the idempotency key already maps to a queued,
+            running or completed job, that job is returned with created=False.
+            Failed jobs can be resubmitted under the same key.
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type '{job_type}'")
+
+        job = Job(
+            job_type=job_type,
+            payload=payload,
+            user_id=user_id,
+            idempotency_key=idempotency_key,
+        )
+
+        if idempotency_key:
+            existing_id = await self.backend.claim_idempotency_key(
+                idempotency_key, job.id, self.idempotency_ttl_seconds
+            )
+            if existing_id:
+                existing = await self.backend.get(existing_id)
+                if existing and existing.status != JobStatus.FAILED:
+                    self.stats["deduplicated"] += 1
+                    return existing, False
+                await self.backend.replace_idempotency_key(
+                    idempotency_key, job.id, self.idempotency_ttl_seconds
+                )
+
+        await self.backend.save(job)
+        await self.backend.push(job.id)
+        self.stats["enqueued"] += 1
+        self._notify(job)
+        return job, True
+
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        return await self.backend.get(job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Receive status updates for a job published by this process."""
+        updates: asyncio.Queue = asyncio.Queue(maxsize=16)
+        self._listeners[job_id].append(updates)
+        return updates
+
+    def unsubscribe(self, job_id: str, updates: asyncio.Queue) -> None:
+        listeners = self._listeners.get(job_id)
+        if listeners and updates in listeners:
+            listeners.remove(updates)
+        if not listeners:
+            self._listeners.pop(job_id, None)
+
+    def _notify(self, job: Job) -> None:
+        for updates in self._listeners.get(job.id, []):
+            if updates.full():
+                updates.get_nowait()
+            updates.put_nowait(job.to_dict())
+
+    async def _maintain(self) -> None:
+        """Renew the broker lease and re-queue jobs of crashed workers."""
+        interval = max(getattr(self.backend, "lease_seconds", 30) / 3, 0.1)
+        while self._running:
+            await asyncio.sleep(interval)
+            try:
+                await self.backend.heartbeat()
+                recovered = await self.backend.recover()
+                if recovered:
+                    logger.info(f"Re-queued {recovered} jobs of a stopped worker")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Job queue heartbeat failed: {e}")
+
+    async def _requeue(self, job: Optional[Job], job_id: str) -> None:
+        """Return an unfinished job to the broker, marking it queued again."""
+        try:
+            if job is not None and job.status == JobStatus.RUNNING:
+                job.status = JobStatus.QUEUED
+                job.started_at = None
+                await self.backend.save(job)
+                self._notify(job)
+            await self.backend.requeue(job_id)
+        except Exception as e:
+            # Still in this worker's processing list; recovered once its lease lapses
+            logger.error(f"Could not re-queue job {job_id}: {e}")
+
+    async def _mark_failed(self, job: Job, error: Exception) -> bool:
+        """Persist a job the worker could not run as failed; False if that failed too."""
+        job.status = JobStatus.FAILED
+        job.error = str(error)
+        job.finished_at = time.time()
+        try:
+            await self.backend.save(job)
+        except Exception:
+            return False
+        self.stats["failed"] += 1
+        self._notify(job)
+        return True
+
+    async def _worker(self, index: int) -> None:
+        while self._running:
+            try:
+                job_id = await self.backend.pop(timeout=self.poll_timeout_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} failed to poll broker: {e}")
+                await asyncio.sleep(self.poll_timeout_seconds)
+                continue
+
+            if job_id is None:
+                continue
+
+            job = None
+            try:
+                job = await self.backend.get(job_id)
+                if job is not None and not job.is_terminal:
+                    if self.scheduler is not None:
+                        lane, tenant_id = self.lane_resolver(job)
+                        await self.scheduler.run(lane, tenant_id, self._run_job, job)
+                    else:
+                        await self._run_job(job)
+            except asyncio.CancelledError:
+                # Stopped before the job finished: it must run again elsewhere
+                await self._requeue(job, job_id)
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} error on job {job_id}: {e}")
+                if job is None or not await self._mark_failed(job, e):
+                    await self._requeue(job, job_id)
+                    continue
+
+            # Acked only once the job is missing or reached a terminal status
+            try:
+                await self.backend.ack(job_id)
+            except Exception as e:
+                logger.error(f"Job worker {index} failed to ack job {job_id}: {e}")
+
+    async def _run_job(self, job: Job) -> None:
+        job.status = JobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = time.time()
+        await self.backend.save(job)
+        self._notify(job)
+        self.running_jobs.add(job.id)
+
+        try:
+            handler = self.handlers[job.job_type]
+            job.result = await asyncio.wait_for(
+                handler(job), timeout=self.job_timeout_seconds
+            )
+            job.status = JobStatus.COMPLETED
+            self.stats["completed"] += 1
+        except asyncio.TimeoutError:
+            job.status = JobStatus.FAILED
+            job.error = f"Job timed out after {self.job_timeout_seconds}s"
+            self.stats["failed"] += 1
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            self.stats["failed"] += 1
+            logger.error(f"Job {job.id} ({job.job_type}) failed: {e}")
+        finally:
+            self.running_jobs.discard(job.id)
+
+        job.finished_at = time.time()
+        await self.backend.save(job)
+        self._notify(job)
+
+    async def get_statistics(self) -> Dict[str, Any]:
+        stats = {
+            **self.stats,
+            "queue_depth": await self.backend.depth(),
+            "running": len(self.running_jobs),
+            "concurrency": self.capacity,
+            "fetch_workers": len(self.workers),
+            "workers_running": self._running,
+        }
+        if self.scheduler is not None:
+            stats["scheduler"] = self.scheduler.get_statistics()
+        return stats
@@ -0,0 +1,305 @@
+"""
+Priority scheduler for agent workflows.
+
+Work is split into lanes that are served in strict priority order:
+- inbound_message: replies to prospects (process_incoming_message)
+- inbound_lead: new single leads (speed-to-lead)
+- bulk_outreach: prospect_list campaigns
+
+Within a lane, tenants share capacity through start-time fair queuing
+(weighted fair queuing by virtual start tags), so one tenant's large batch
+cannot starve another tenant in the same lane. Each lane has its own
+concurrency cap below the global cap, which keeps slots free for the hot
+lanes while bulk work is running. Time spent waiting in the queue is
+exported per lane as a Prometheus histogram (when prometheus_client is
+installed) and in get_statistics().
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional Prometheus export
+try:
+    from prometheus_client import Histogram
+
+    QUEUE_WAIT_SECONDS = Histogram(
+        "pipewise_workflow_queue_wait_seconds",
+        "Time workflows wait in the scheduler before running",
+        ["lane"],
+        buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+    )
+except ImportError:
+    QUEUE_WAIT_SECONDS = None
+
+
+class Lane:
+    """Scheduler lane names."""
+
+    INBOUND_MESSAGE = "inbound_message"
+    INBOUND_LEAD = "inbound_lead"
+    BULK_OUTREACH = "bulk_outreach"
+
+
+@dataclass
+class LaneConfig:
+    """Scheduling parameters of a lane."""
+
+    name: str
+    priority: int  # lower value is served first
+    max_concurrency: int
+
+
+DEFAULT_LANES = [
+    LaneConfig(Lane.INBOUND_MESSAGE, priority=0, max_concurrency=8),
+    LaneConfig(Lane.INBOUND_LEAD, priority=1, max_concurrency=8),
+    LaneConfig(Lane.BULK_OUTREACH, priority=2, max_concurrency=2),
+]
+
+
+def classify_lead_workflow(lead_data: Dict[str, Any]) -> str:
+    """Pick the lane for a process_lead_workflow input."""
+    if lead_data.get("prospect_list") or lead_data.get("workflow_type") in (
+        "prospect_list",
+        "bulk_outreach",
+        "outreach",
+    ):
+        return Lane.BULK_OUTREACH
+    return Lane.INBOUND_LEAD
+
+
+@dataclass(order=True)
+class _ScheduledItem:
+    start_tag: float
+    seq: int
+    tenant_id: str = field(compare=False)
+    lane: str = field(compare=False)
+    func: Callable[..., Awaitable[Any]] = field(compare=False)
+    args: Tuple[Any, ...] = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+class _LaneState:
+    def __init__(self, config: LaneConfig):
+        self.config = config
+        self.heap: List[_ScheduledItem] = []
+        self.running = 0
+        self.virtual_time = 0.0
+        self.last_finish: Dict[str, float] = {}
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+
+class PriorityScheduler:
+    """Lane-based priority scheduler with per-tenant fair queuing."""
+
+    def __init__(
+        self,
+        lanes: Optional[List[LaneConfig]] = None,
+        max_concurrency: int = 8,
+        tenant_weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            lanes: Lane configurations (defaults to DEFAULT_LANES)
+            max_concurrency: Global cap on running work across all lanes
+            tenant_weights: Relative share per tenant (default weight 1.0)
+        """
+        self.max_concurrency = max_concurrency
+        self.tenant_weights = tenant_weights or {}
+        self.lanes: Dict[str, _LaneState] = {
+            config.name: _LaneState(config) for config in (lanes or DEFAULT_LANES)
+        }
+        self._lane_order = sorted(
+            self.lanes.values(), key=lambda lane: lane.config.priority
+        )
+        self._seq = itertools.count()
+        self.running = 0
+        self._tasks: set = set()
+
+    def submit(
+        self,
+        lane: str,
+        tenant_id: str,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        cost: float = 1.0,
+        **kwargs: Any,
+    ) -> asyncio.Future:
+        """
+        Queue func(*args, **kwargs) on a lane and return a future for its result.
+
+        Args:
+            lane: Lane name
+            tenant_id: Fairness key within the lane
+            func: Coroutine function to run
+            cost: Relative size of the work, used for fair queuing
+        """
+        state = self.lanes.get(lane)
+        if state is None:
+            raise ValueError(f"Unknown scheduler lane '{lane}'")
+
+        if not state.heap and not state.running:
+            # Lane is idle: tags from the previous busy period are obsolete
+            state.last_finish.clear()
+            state.virtual_time = 0.0
+
+        weight = self.tenant_weights.get(tenant_id, 1.0)
+        start_tag = max(state.virtual_time, state.last_finish.get(tenant_id, 0.0))
+        state.last_finish[tenant_id] = start_tag + cost / weight
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            state.heap,
+            _ScheduledItem(
+                start_tag=start_tag,
+                seq=next(self._seq),
+                tenant_id=tenant_id,
+                lane=lane,
+                func=func,
+                args=args,
+                kwargs=kwargs,
+                future=future,
+            ),
+        )
+        state.stats["submitted"] += 1
+        self._dispatch()
+        return future
+
+    async def run(
+        self,
+        lane: str,
+        tenant_id: str,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        cost: float = 1.0,
+        **kwargs: Any,
+    ) -> Any:
+        """Submit and wait for the result."""
+        return await self.submit(lane, tenant_id, func, *args, cost=cost, **kwargs)
+
+    def _next_item(self) -> Optional[_ScheduledItem]:
+        for state in self._lane_order:
+            if state.heap and state.running < state.config.max_concurrency:
+                item = heapq.heappop(state.heap)
+                state.virtual_time = max(state.virtual_time, item.start_tag)
+                return item
+        return None
+
+    def _dispatch(self) -> None:
+        while self.running < self.max_concurrency:
+            item = self._next_item()
+            if item is None:
+                return
+            if item.future.cancelled():
+                continue
+
+            state = self.lanes[item.lane]
+            wait_seconds = time.monotonic() - item.enqueued_at
+            if QUEUE_WAIT_SECONDS is not None:
+                QUEUE_WAIT_SECONDS.labels(lane=item.lane).observe(wait_seconds)
+            state.stats["total_wait_seconds"] += wait_seconds
+            state.stats["max_wait_seconds"] = max(
+                state.stats["max_wait_seconds"], wait_seconds
+            )
+
+            state.running += 1
+            self.running += 1
+            task = asyncio.create_task(self._execute(item))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            # A caller that stops waiting (run() cancelled) stops the work too
+            item.future.add_done_callback(
+                lambda future, task=task: task.cancel() if future.cancelled() else None
+            )
+
+    async def _execute(self, item: _ScheduledItem) -> None:
+        state = self.lanes[item.lane]
+        try:
+            result = await item.func(*item.args, **item.kwargs)
+            state.stats["completed"] += 1
+            if not item.future.done():
+                item.future.set_result(result)
+        except asyncio.CancelledError:
+            if not item.future.done():
+                item.future.cancel()
+            raise
+        except Exception as e:
+            state.stats["failed"] += 1
+            if not item.future.done():
+                item.future.set_exception(e)
+        finally:
+            state.running -= 1
+            self.running -= 1
+            self._dispatch()
+
+    def queue_depth(self, lane: Optional[str] = None) -> int:
+        if lane is not None:
+            return len(self.lanes[lane].heap)
+        return sum(len(state.heap) for state in self.lanes.values())
+
+    def get_statistics(self) -> Dict[str, Any]:
+        lanes = {}
+        for name, state in self.lanes.items():
+            started = state.stats["completed"] + state.stats["failed"] + state.running
+            lanes[name] = {
+                **state.stats,
+                "queued": len(state.heap),
+                "running": state.running,
+                "max_concurrency": state.config.max_concurrency,
+                "avg_wait_seconds": state.stats["total_wait_seconds"] / started
+                if started
+                else 0.0,
+            }
+        return {
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "lanes": lanes,
+        }
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def get_workflow_scheduler() -> PriorityScheduler:
+    """
+    Get the global workflow scheduler.
+
+    SCHEDULER_MAX_CONCURRENCY sets the global cap (default 8) and
+    SCHEDULER_BULK_CONCURRENCY the bulk outreach lane cap (default 2).
+    """
+    global _scheduler
+    if _scheduler is None:
+        max_concurrency = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "8"))
+        bulk_concurrency = int(os.getenv("SCHEDULER_BULK_CONCURRENCY", "2"))
+        _scheduler = PriorityScheduler(
+            lanes=[
+                LaneConfig(Lane.INBOUND_MESSAGE, 0, max_concurrency),
+                LaneConfig(Lane.INBOUND_LEAD, 1, max_concurrency),
+                LaneConfig(Lane.BULK_OUTREACH, 2, min(bulk_concurrency, max_concurrency)),
+            ],
+            max_concurrency=max_concurrency,
+        )
+    return _scheduler
+
+
+def set_workflow_scheduler(scheduler: Optional[PriorityScheduler]) -> None:
+    """Replace the global scheduler (used by tests)."""
+    global _scheduler
+    _scheduler = scheduler
@@ -0,0 +1,167 @@
+"""
+Lead workflow jobs.
+
+Runs ModernLeadProcessor.process_lead_workflow on the background job queue
+so HTTP endpoints can answer 202 Accepted immediately.
+
+Configuration (environment):
+- JOB_BACKEND: "memory" (default) or "redis"; Redis uses CELERY_BROKER_URL
+- JOB_TIMEOUT_SECONDS: per-workflow timeout (default 600)
+
+Jobs are ordered by the workflow PriorityScheduler: single inbound leads
+run ahead of bulk prospect_list outreach, with fair sharing per tenant.
+Concurrency is capped by the scheduler (SCHEDULER_MAX_CONCURRENCY and
+SCHEDULER_BULK_CONCURRENCY).
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from app.jobs.queue import InMemoryJobBackend, Job, JobQueue, RedisJobBackend
+from app.jobs.scheduler import classify_lead_workflow, get_workflow_scheduler
+
+logger = logging.getLogger(__name__)
+
+LEAD_WORKFLOW_JOB = "lead_workflow"
+
+
+class WorkflowJobError(Exception):
+    """Raised when a workflow finishes with an error result."""
+
+
+def lead_idempotency_key(user_id: str, lead_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Derive the idempotency key for a workflow submission.
+
+    An explicit "idempotency_key" wins; otherwise the key is derived from the
+    user, workflow type and lead identity (id, email or prospect list), so a
+    double-submitted lead maps to the job already processing it.
+    """
+    explicit = lead_data.get("idempotency_key")
+    if explicit:
+        return f"{user_id}:{explicit}"
+
+    identity = (
+        lead_data.get("id")
+        or lead_data.get("email")
+        or lead_data.get("prospect_list")
+    )
+    if not identity:
+        return None
+
+    material = json.dumps(
+        [user_id, lead_data.get("workflow_type", "single_lead"), identity],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+
+def tenant_fairness_key(tenant: Dict[str, Any]) -> str:
+    """Fair-queuing key: the tenant, refined by user for the shared default tenant."""
+    return f"{tenant.get('tenant_id', 'default')}:{tenant.get('user_id', 'system')}"
+
+
+def resolve_job_lane(job: Job) -> Tuple[str, str]:
+    """Scheduler lane and fairness key of a queued workflow job."""
+    lane = job.payload.get("lane") or classify_lead_workflow(
+        job.payload.get("lead_data", {})
+    )
+    return lane, tenant_fairness_key(job.payload.get("tenant", {}))
+
+
+async def run_lead_workflow_job(job: Job) -> Dict[str, Any]:
+    """Job handler running one lead workflow."""
+    from app.ai_agents.agents import ModernLeadProcessor, TenantContext
+
+    tenant_context = TenantContext(**job.payload["tenant"])
+    processor = ModernLeadProcessor(tenant_context)
+
+    result = await processor.process_lead_workflow(job.payload["lead_data"])
+    if result.get("status") == "error":
+        raise WorkflowJobError(result.get("error", "Workflow failed"))
+    return result
+
+
+def create_job_queue() -> JobQueue:
+    """Build the job queue from environment configuration."""
+    backend_name = os.getenv("JOB_BACKEND", "memory").lower()
+
+    if backend_name == "redis":
+        from app.core.config import get_settings
+
+        backend = RedisJobBackend(get_settings().CELERY_BROKER_URL)
+    else:
+        backend = InMemoryJobBackend()
+
+    queue = JobQueue(
+        backend=backend,
+        job_timeout_seconds=float(os.getenv("JOB_TIMEOUT_SECONDS", "600")),
+        scheduler=get_workflow_scheduler(),
+        lane_resolver=resolve_job_lane,
+    )
+    queue.register_handler(LEAD_WORKFLOW_JOB, run_lead_workflow_job)
+    return queue
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Get the global job queue instance."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = create_job_queue()
+    return _job_queue
+
+
+def set_job_queue(queue: Optional[JobQueue]) -> None:
+    """Replace the global job queue (used by tests)."""
+    global _job_queue
+    _job_queue = queue
+
+
+async def enqueue_lead_workflow(
+    lead_data: Dict[str, Any],
+    tenant: Dict[str, Any],
+    idempotency_key: Optional[str] = None,
+) -> Tuple[Job, bool]:
+    """
+    Queue a lead workflow, starting the worker pool on first use.
+
+    Args:
+        lead_data: Workflow input passed to process_lead_workflow
+        tenant: TenantContext keyword arguments (JSON-serializable)
+        idempotency_key: Overrides the key derived from the lead (e.g. an
+            Idempotency-Key header); scoped to the user like the derived key
+
+    Returns:
+        (job, created) as returned by JobQueue.enqueue
+    """
+    queue = get_job_queue()
+    await queue.start()
+
+    user_id = tenant["user_id"]
+    return await queue.enqueue(
+        LEAD_WORKFLOW_JOB,
+        {
+            "lead_data": lead_data,
+            "tenant": tenant,
+            "lane": classify_lead_workflow(lead_data),
+        },
+        user_id=user_id,
+        idempotency_key=(
+            f"{user_id}:{idempotency_key}"
+            if idempotency_key
+            else lead_idempotency_key(user_id, lead_data)
+        ),
+    )
+
+
+async def shutdown_job_queue(timeout: float = 30.0) -> None:
+    """Stop the global job queue if it was started."""
+    if _job_queue is not None:
+        await _job_queue.stop(timeout=timeout)
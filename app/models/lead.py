@@ -23,6 +23,7 @@ class Lead(BaseModel):
     user_id: UUID | None = None  # Campo faltante
     utm_params: dict | None = None
     metadata: dict | None = None
+    version: int | None = None  # Optimistic concurrency (patch_lead_metadata)
 
     @field_validator("contacted", mode="before")
     @classmethod
@@ -0,0 +1,92 @@
+-- Lead update functions for PipeWise
+-- Lets the agent tools update one or many leads in a single round trip,
+-- merging metadata server-side instead of read-modify-write in Python.
+--
+-- leads.version is bumped by every update (trigger below) and enables
+-- optimistic concurrency checks (expected_version).
+ALTER TABLE leads
+ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0;
+CREATE OR REPLACE FUNCTION bump_lead_version() RETURNS TRIGGER AS $$ BEGIN NEW.version = OLD.version + 1;
+RETURN NEW;
+END;
+$$ language 'plpgsql';
+DROP TRIGGER IF EXISTS bump_lead_version ON leads;
+CREATE TRIGGER bump_lead_version BEFORE
+UPDATE ON leads FOR EACH ROW EXECUTE FUNCTION bump_lead_version();
+--
+-- bulk_update_leads(p_owner uuid, updates jsonb) takes the owner of the leads
+-- and an array of objects:
+--   {"id": "<uuid>"} or {"email": "<email>"}   -- lead reference
+--   "qualified", "contacted", "meeting_scheduled", "status"   -- optional
+--   "metadata": {...}   -- merged into leads.metadata with ||
+--   "expected_version": n   -- optional, skip the lead unless version = n
+-- and returns the updated rows. Unknown or conflicting leads are skipped.
+--
+-- Only leads with owner_id = p_owner are matched, whichever the reference;
+-- an email reference updates at most one of them (the most recent). Emails
+-- are not unique across owners, so a reference must never reach another
+-- owner's leads. Authenticated callers may only pass their own id.
+DROP FUNCTION IF EXISTS bulk_update_leads(jsonb);
+CREATE OR REPLACE FUNCTION bulk_update_leads(p_owner uuid, updates jsonb) RETURNS SETOF leads AS $$
+WITH refs AS (
+    SELECT u.item,
+        u.ord
+    FROM jsonb_array_elements(updates) WITH ORDINALITY AS u(item, ord)
+    WHERE auth.uid() IS NULL
+        OR auth.uid() = p_owner
+),
+targets AS (
+    SELECT DISTINCT ON (r.ord) r.item,
+        l.id AS lead_id
+    FROM refs AS r
+        JOIN leads AS l ON l.owner_id = p_owner
+        AND (
+            (
+                r.item ? 'id'
+                AND l.id = (r.item->>'id')::uuid
+            )
+            OR (
+                NOT r.item ? 'id'
+                AND l.email = r.item->>'email'
+            )
+        )
+    WHERE NOT r.item ? 'expected_version'
+        OR l.version = (r.item->>'expected_version')::integer
+    ORDER BY r.ord,
+        l.created_at DESC
+)
+UPDATE leads AS l
+SET qualified = COALESCE((t.item->>'qualified')::boolean, l.qualified),
+    contacted = COALESCE((t.item->>'contacted')::boolean, l.contacted),
+    meeting_scheduled = COALESCE(
+        (t.item->>'meeting_scheduled')::boolean,
+        l.meeting_scheduled
+    ),
+    status = COALESCE(t.item->>'status', l.status),
+    metadata = COALESCE(l.metadata, '{}'::jsonb) || COALESCE(t.item->'metadata', '{}'::jsonb)
+FROM targets AS t
+WHERE l.id = t.lead_id
+RETURNING l.*;
+$$ LANGUAGE sql;
+GRANT EXECUTE ON FUNCTION bulk_update_leads(uuid, jsonb) TO authenticated,
+    service_role;
+-- patch_lead_metadata merges a patch into one lead's metadata atomically.
+-- With expected_version the patch only applies if nobody updated the lead
+-- since it was read; no row is returned on a version conflict.
+CREATE OR REPLACE FUNCTION patch_lead_metadata(
+        lead_id_param UUID,
+        patch_param JSONB,
+        expected_version_param INTEGER DEFAULT NULL
+    ) RETURNS SETOF leads AS $$
+UPDATE leads
+SET metadata = COALESCE(metadata, '{}'::jsonb) || patch_param
+WHERE id = lead_id_param
+    AND (
+        expected_version_param IS NULL
+        OR version = expected_version_param
+    )
+RETURNING *;
+$$ LANGUAGE sql;
+GRANT EXECUTE ON FUNCTION patch_lead_metadata(UUID, JSONB, INTEGER) TO authenticated,
+    service_role;
+SELECT 'Lead update functions created successfully' as status;
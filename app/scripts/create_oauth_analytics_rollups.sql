@@ -0,0 +1,108 @@
+-- OAuth analytics rollups for PipeWise
+-- Keeps per-day event counts next to the raw oauth_analytics events, so the
+-- analytics summaries read a few rollup rows instead of every raw event.
+--
+-- oauth_analytics_daily holds one row per day, user, service, provider,
+-- event type and status. A statement-level trigger adds each insert batch
+-- to it, so the rollup stays current without a scheduled job. The trigger
+-- function runs as its owner, since row level security only lets users read
+-- their own rollup rows.
+CREATE TABLE IF NOT EXISTS oauth_analytics_daily (
+    day DATE NOT NULL,
+    user_id TEXT NOT NULL,
+    service_name TEXT NOT NULL,
+    oauth_provider TEXT NOT NULL DEFAULT '',
+    event_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    event_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (
+        day,
+        user_id,
+        service_name,
+        oauth_provider,
+        event_type,
+        status
+    )
+);
+CREATE INDEX IF NOT EXISTS idx_oauth_analytics_daily_user_day ON oauth_analytics_daily (user_id, day);
+CREATE OR REPLACE FUNCTION rollup_oauth_analytics() RETURNS TRIGGER AS $$ BEGIN
+INSERT INTO oauth_analytics_daily AS d (
+        day,
+        user_id,
+        service_name,
+        oauth_provider,
+        event_type,
+        status,
+        event_count
+    )
+SELECT n.timestamp::date,
+    n.user_id::text,
+    n.service_name,
+    COALESCE(n.oauth_provider, ''),
+    n.event_type,
+    n.status,
+    COUNT(*)
+FROM new_rows AS n
+GROUP BY 1,
+    2,
+    3,
+    4,
+    5,
+    6 ON CONFLICT (
+        day,
+        user_id,
+        service_name,
+        oauth_provider,
+        event_type,
+        status
+    ) DO
+UPDATE
+SET event_count = d.event_count + EXCLUDED.event_count;
+RETURN NULL;
+END;
+$$ language 'plpgsql' SECURITY DEFINER
+SET search_path = public;
+--
+-- Backfill from the events stored so far, then install the trigger, in one
+-- transaction. The lock keeps new events out until the trigger exists, so
+-- every event is counted exactly once; on a re-run the backfill skips groups
+-- that are already rolled up.
+BEGIN;
+LOCK TABLE oauth_analytics IN SHARE ROW EXCLUSIVE MODE;
+DROP TRIGGER IF EXISTS rollup_oauth_analytics ON oauth_analytics;
+INSERT INTO oauth_analytics_daily (
+        day,
+        user_id,
+        service_name,
+        oauth_provider,
+        event_type,
+        status,
+        event_count
+    )
+SELECT timestamp::date,
+    user_id::text,
+    service_name,
+    COALESCE(oauth_provider, ''),
+    event_type,
+    status,
+    COUNT(*)
+FROM oauth_analytics
+GROUP BY 1,
+    2,
+    3,
+    4,
+    5,
+    6 ON CONFLICT DO NOTHING;
+CREATE TRIGGER rollup_oauth_analytics
+AFTER
+INSERT ON oauth_analytics REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION rollup_oauth_analytics();
+COMMIT;
+--
+-- Users only read their own rollups.
+ALTER TABLE oauth_analytics_daily ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS oauth_analytics_daily_owner ON oauth_analytics_daily;
+CREATE POLICY oauth_analytics_daily_owner ON oauth_analytics_daily FOR
+SELECT TO authenticated USING (user_id = auth.uid()::text);
+GRANT SELECT ON oauth_analytics_daily TO authenticated,
+    service_role;
+SELECT 'OAuth analytics rollups created successfully' as status;
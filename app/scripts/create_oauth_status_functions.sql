@@ -0,0 +1,22 @@
+-- OAuth status functions for PipeWise
+-- Lets the OAuth status endpoint read the last use of every service in one
+-- round trip instead of one ordered query per service.
+--
+-- The index serves both oauth_last_used() and the per-user "recent events"
+-- fallback used where the function is not installed.
+CREATE INDEX IF NOT EXISTS idx_oauth_analytics_user_service_timestamp ON oauth_analytics (user_id, service_name, timestamp DESC);
+--
+-- oauth_last_used(user_id_param) returns one row per service the user has
+-- events for: (service_name, last_used).
+CREATE OR REPLACE FUNCTION oauth_last_used(
+        user_id_param oauth_analytics.user_id%TYPE
+    ) RETURNS TABLE (service_name TEXT, last_used TIMESTAMPTZ) AS $$
+SELECT a.service_name::text,
+    MAX(a.timestamp)::timestamptz
+FROM oauth_analytics AS a
+WHERE a.user_id = user_id_param
+GROUP BY a.service_name;
+$$ LANGUAGE sql STABLE;
+GRANT EXECUTE ON FUNCTION oauth_last_used(oauth_analytics.user_id%TYPE) TO authenticated,
+    service_role;
+SELECT 'OAuth status functions created successfully' as status;
@@ -0,0 +1,23 @@
+-- User integrations table for PipeWise
+-- Persists the per-user platform integrations (Calendly, WhatsApp, social,
+-- email, MCP) that were previously kept in process memory.
+--
+-- One row per user and platform; config holds the integration settings with
+-- secrets already Fernet-encrypted by the application. The primary key also
+-- serves the per-user read that loads all of a user's integrations at once.
+CREATE TABLE IF NOT EXISTS user_integrations (
+    user_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    config JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, platform)
+);
+ALTER TABLE user_integrations ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS user_integrations_owner ON user_integrations;
+CREATE POLICY user_integrations_owner ON user_integrations FOR ALL TO authenticated USING (user_id = auth.uid()::text) WITH CHECK (user_id = auth.uid()::text);
+GRANT SELECT,
+    INSERT,
+    UPDATE,
+    DELETE ON user_integrations TO authenticated,
+    service_role;
+SELECT 'User integrations table created successfully' as status;
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Load test for outbound webhook delivery.
+
+Starts local HTTP sinks as customer endpoints, publishes events through a
+WebhookDeliveryEngine and reports throughput, requests made and whether the
+signatures verify. Nothing leaves the machine.
+
+Usage:
+    python app/scripts/webhook_delivery_load_test.py [--destinations 10]
+        [--events 5000] [--batch] [--workers 1] [--latency 0.02]
+        [--fail-status 503]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path to import our modules
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from app.ai_agents.mcp.notification_dispatcher import LocalHTTPSink
+from app.jobs.delivery import (
+    SIGNATURE_HEADER,
+    WebhookDeliveryEngine,
+    WebhookDestination,
+    verify_signature,
+)
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+
+async def run(args: argparse.Namespace) -> None:
+    sinks = [
+        await LocalHTTPSink(
+            delay_seconds=args.latency,
+            status_code=args.fail_status or 200,
+        ).start()
+        for _ in range(args.destinations)
+    ]
+    engine = WebhookDeliveryEngine(
+        max_connections=args.max_connections,
+        workers_per_destination=args.workers,
+        batch_window_seconds=0.05,
+        max_attempts=2 if args.fail_status else 6,
+        base_retry_delay=0.01,
+        verify_destinations=False,  # sinks listen on localhost
+    )
+    destinations = [
+        engine.register(WebhookDestination(url=f"{sink.url}/hook", batch=args.batch))
+        for sink in sinks
+    ]
+
+    started = time.perf_counter()
+    for i in range(args.events):
+        engine.publish("lead_created", {"lead_id": i, "email": f"lead{i}@example.com"})
+    publish_seconds = time.perf_counter() - started
+
+    await engine.drain()
+    elapsed = time.perf_counter() - started
+
+    stats = engine.get_statistics()
+    delivered = sum(s["delivered"] for s in stats.values())
+    requests = sum(s["requests"] for s in stats.values())
+    dead_lettered = sum(s["dead_lettered"] for s in stats.values())
+    verified = all(
+        verify_signature(destination.secret, request["headers"][SIGNATURE_HEADER.lower()], request["body"])
+        for destination, sink in zip(destinations, sinks)
+        for request in sink.requests[:10]
+    )
+
+    print(f"events published:   {args.events * args.destinations} ({publish_seconds * 1000:.1f} ms)")
+    print(f"events delivered:   {delivered}")
+    print(f"dead-lettered:      {dead_lettered}")
+    print(f"HTTP requests:      {requests}")
+    print(f"elapsed:            {elapsed:.2f} s")
+    print(f"throughput:         {delivered / elapsed:.0f} events/s")
+    print(f"signatures valid:   {verified}")
+
+    await engine.stop()
+    for sink in sinks:
+        await sink.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Webhook delivery load test")
+    parser.add_argument("--destinations", type=int, default=10)
+    parser.add_argument("--events", type=int, default=5000, help="events per destination")
+    parser.add_argument("--batch", action="store_true", help="batching destinations")
+    parser.add_argument("--latency", type=float, default=0.0, help="sink response delay")
+    parser.add_argument("--fail-status", type=int, default=0, help="status every sink returns")
+    parser.add_argument("--workers", type=int, default=1, help="workers per destination")
+    parser.add_argument("--max-connections", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from supabase import create_client, Client
 from postgrest.exceptions import APIError
 
 # IMPORTACIONES FALTANTES - Necesarias para los tipos
+from app.core.tracing import traced_methods
 from app.models.lead import Lead
 from app.models.conversation import Conversation
 from app.models.message import Message
@@ -25,6 +26,31 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class LeadVersionConflictError(Exception):
+    """Raised when a versioned lead update finds a newer version of the lead."""
+
+    def __init__(self, lead_id: str, expected_version: int, current_version: Any):
+        self.lead_id = lead_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"Lead {lead_id} is at version {current_version}, expected {expected_version}"
+        )
+
+
+# Every query method records a "supabase.<method>" span; the async_* variants
+# delegate to the sync methods and are skipped to avoid duplicate spans, and
+# the *_update builders do no I/O.
+@traced_methods(
+    "supabase",
+    exclude=(
+        "table",
+        "qualification_update",
+        "contacted_update",
+        "meeting_update",
+    ),
+    exclude_prefixes=("async_",),
+)
 class SupabaseCRMClient:
     """Cliente completo para operaciones CRM con Supabase"""
 
@@ -215,6 +241,209 @@ class SupabaseCRMClient:
             self._handle_error("list_leads", e)
             return []
 
+    def get_leads_by_emails(
+        self, emails: List[str], user_id: Union[str, UUID]
+    ) -> Dict[str, Lead]:
+        """Obtener los leads de un usuario por email en una sola consulta (email -> Lead)"""
+        if not emails:
+            return {}
+        try:
+            result = (
+                self.client.table("leads")
+                .select("*")
+                .eq("user_id", str(user_id))
+                .in_("email", list(dict.fromkeys(emails)))
+                .execute()
+            )
+            return {lead["email"]: Lead(**lead) for lead in result.data}
+
+        except Exception as e:
+            self._handle_error("get_leads_by_emails", e)
+            raise
+
+    @staticmethod
+    def lead_reference(identifier: Union[str, UUID]) -> Dict[str, str]:
+        """Referencia a un lead por email o por ID para bulk_update_leads"""
+        identifier = str(identifier)
+        return {"email": identifier} if "@" in identifier else {"id": identifier}
+
+    def bulk_update_leads(
+        self, updates: List[Dict[str, Any]], owner_id: Union[str, UUID]
+    ) -> List[Lead]:
+        """
+        Update many leads in one round trip via the bulk_update_leads function.
+
+        Each update holds a lead reference ("id" or "email", see lead_reference),
+        optional qualified/contacted/meeting_scheduled/status values and a
+        "metadata" patch that is merged server-side (metadata || patch).
+        Unknown leads are skipped; the updated leads are returned.
+
+        Only leads of owner_id are updated, whichever the reference; an email
+        reference updates at most one of them.
+        """
+        if not updates:
+            return []
+        if not owner_id:
+            raise ValueError("bulk_update_leads needs the owner of the leads")
+        try:
+            result = self.client.rpc(
+                "bulk_update_leads",
+                {"p_owner": str(owner_id), "updates": serialize_for_json(updates)},
+            ).execute()
+            return [Lead(**lead) for lead in result.data or []]
+
+        except Exception as e:
+            self._handle_error("bulk_update_leads", e)
+            raise
+
+    def patch_lead_metadata(
+        self,
+        lead_id: Union[str, UUID],
+        patch: Dict[str, Any],
+        expected_version: Optional[int] = None,
+    ) -> Lead:
+        """
+        Merge a patch into a lead's metadata server-side (metadata || patch).
+
+        No read is needed and concurrent patches from parallel agent runs are
+        all kept. Pass expected_version (the version the caller last read) to
+        apply the patch only if the lead was not updated in between.
+
+        Raises:
+            LeadVersionConflictError: The lead is at a different version
+            ValueError: The lead does not exist
+        """
+        try:
+            result = self.client.rpc(
+                "patch_lead_metadata",
+                {
+                    "lead_id_param": str(lead_id),
+                    "patch_param": serialize_for_json(patch),
+                    "expected_version_param": expected_version,
+                },
+            ).execute()
+        except Exception as e:
+            self._handle_error("patch_lead_metadata", e)
+            raise
+
+        if result.data:
+            return Lead(**result.data[0])
+
+        # Only the failure path pays for a read, to report why nothing matched
+        current = self.get_lead(lead_id) if expected_version is not None else None
+        if current is not None:
+            raise LeadVersionConflictError(
+                str(lead_id), expected_version, current.version
+            )
+        raise ValueError(f"Lead {lead_id} not found")
+
+    def _update_single_lead(
+        self,
+        lead_id: Union[str, UUID],
+        update: Dict[str, Any],
+        owner_id: Union[str, UUID],
+    ) -> Lead:
+        leads = self.bulk_update_leads([update], owner_id)
+        if not leads:
+            raise ValueError(f"Lead {lead_id} not found or update failed")
+        return leads[0]
+
+    def qualification_update(
+        self,
+        lead_id: Union[str, UUID],
+        qualified: bool,
+        reason: Optional[str] = None,
+        score: Optional[float] = None,
+        qualified_by: str = "ai_agent",
+    ) -> Dict[str, Any]:
+        """Construir la actualización de calificación para bulk_update_leads"""
+        return {
+            **self.lead_reference(lead_id),
+            "qualified": qualified,
+            "status": "qualified" if qualified else "new",
+            "metadata": {
+                "qualification_reason": reason,
+                "qualification_score": score,
+                "qualified_at": self._get_current_timestamp(),
+                "qualified_by": qualified_by,
+            },
+        }
+
+    def contacted_update(
+        self,
+        lead_id: Union[str, UUID],
+        contact_method: Optional[str] = None,
+        contact_details: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Construir la actualización de contacto para bulk_update_leads"""
+        metadata = {
+            "last_contact_method": contact_method,
+            "last_contacted": self._get_current_timestamp(),
+        }
+        if contact_details:
+            metadata["last_contact_details"] = contact_details
+        return {
+            **self.lead_reference(lead_id),
+            "contacted": True,
+            "status": "contacted",
+            "metadata": metadata,
+        }
+
+    def meeting_update(
+        self,
+        lead_id: Union[str, UUID],
+        meeting_url: str,
+        meeting_type: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Construir la actualización de reunión para bulk_update_leads"""
+        return {
+            **self.lead_reference(lead_id),
+            "meeting_scheduled": True,
+            "status": "meeting_scheduled",
+            "metadata": {
+                "meeting_url": meeting_url,
+                "meeting_scheduled_at": self._get_current_timestamp(),
+                "meeting_type": meeting_type,
+            },
+        }
+
+    def bulk_upsert_leads(
+        self, rows: List[Dict[str, Any]], ignore_duplicates: bool = False
+    ) -> List[Lead]:
+        """
+        Insert or update many leads in one round trip.
+
+        Rows are matched on id; rows without an id are created. All rows must
+        carry the same columns, since the upsert writes every listed column.
+        With ignore_duplicates, rows whose id exists are left untouched and
+        only the inserted leads are returned.
+        """
+        if not rows:
+            return []
+        try:
+            now = self._get_current_timestamp()
+            payload = []
+            for row in rows:
+                row = serialize_for_json(dict(row))
+                if not row.get("id"):
+                    row["id"] = str(uuid4())
+                if "created_at" in row and not row["created_at"]:
+                    row["created_at"] = now
+                row.pop("updated_at", None)
+                payload.append(row)
+
+            result = (
+                self.client.table("leads")
+                .upsert(payload, on_conflict="id", ignore_duplicates=ignore_duplicates)
+                .execute()
+            )
+            logger.info(f"Bulk upserted {len(result.data)} leads")
+            return [Lead(**lead) for lead in result.data]
+
+        except Exception as e:
+            self._handle_error("bulk_upsert_leads", e)
+            raise
+
     # ===================== OPERACIONES CONVERSATIONS =====================
 
     def create_conversation(
@@ -379,38 +608,43 @@ class SupabaseCRMClient:
         """Obtener conversaciones activas"""
         return self.list_conversations(lead_id=lead_id, status="active")
 
-    def mark_lead_as_qualified(self, lead_id: Union[str, UUID]) -> Lead:
-        """Marcar un lead como calificado"""
-        updates = LeadUpdate(qualified=True, status="qualified")
-        return self.update_lead(lead_id, updates)
+    def mark_lead_as_qualified(
+        self, lead_id: Union[str, UUID], *, owner_id: Union[str, UUID]
+    ) -> Lead:
+        """Marcar un lead del usuario owner_id como calificado"""
+        return self._update_single_lead(
+            lead_id,
+            {**self.lead_reference(lead_id), "qualified": True, "status": "qualified"},
+            owner_id,
+        )
 
     def mark_lead_as_contacted(
-        self, lead_id: Union[str, UUID], contact_method: Optional[str] = None
+        self,
+        lead_id: Union[str, UUID],
+        contact_method: Optional[str] = None,
+        contact_details: Optional[str] = None,
+        *,
+        owner_id: Union[str, UUID],
     ) -> Lead:
-        """Marcar un lead como contactado"""
-        metadata = {
-            "last_contact_method": contact_method,
-            "last_contacted": self._get_current_timestamp(),
-        }
-        updates = LeadUpdate(contacted=True, status="contacted", metadata=metadata)
-        return self.update_lead(lead_id, updates)
+        """Marcar un lead del usuario owner_id como contactado"""
+        return self._update_single_lead(
+            lead_id,
+            self.contacted_update(lead_id, contact_method, contact_details),
+            owner_id,
+        )
 
     def schedule_meeting_for_lead(
         self,
         lead_id: Union[str, UUID],
         meeting_url: str,
         meeting_type: Optional[str] = None,
+        *,
+        owner_id: Union[str, UUID],
     ) -> Lead:
-        """Marcar un lead con reunión agendada"""
-        metadata = {
-            "meeting_url": meeting_url,
-            "meeting_scheduled_at": self._get_current_timestamp(),
-            "meeting_type": meeting_type,
-        }
-        updates = LeadUpdate(
-            meeting_scheduled=True, status="meeting_scheduled", metadata=metadata
+        """Marcar un lead del usuario owner_id con reunión agendada"""
+        return self._update_single_lead(
+            lead_id, self.meeting_update(lead_id, meeting_url, meeting_type), owner_id
         )
-        return self.update_lead(lead_id, updates)
 
     def close_conversation(
         self, conversation_id: Union[str, UUID], summary: Optional[str] = None
@@ -766,6 +1000,15 @@ class SupabaseCRMClient:
         """Versión async de update_lead para function calling"""
         return self.update_lead(lead_id, updates)
 
+    async def async_patch_lead_metadata(
+        self,
+        lead_id: Union[str, UUID],
+        patch: Dict[str, Any],
+        expected_version: Optional[int] = None,
+    ) -> Lead:
+        """Versión async de patch_lead_metadata para function calling"""
+        return self.patch_lead_metadata(lead_id, patch, expected_version)
+
     async def async_list_leads(self, **kwargs) -> List[Lead]:
         """Versión async de list_leads para function calling"""
         return self.list_leads(**kwargs)
@@ -802,24 +1045,34 @@ class SupabaseCRMClient:
         """Versión async de get_messages para function calling"""
         return self.get_messages(conversation_id, limit)
 
-    async def async_mark_lead_as_qualified(self, lead_id: Union[str, UUID]) -> Lead:
+    async def async_mark_lead_as_qualified(
+        self, lead_id: Union[str, UUID], *, owner_id: Union[str, UUID]
+    ) -> Lead:
         """Versión async de mark_lead_as_qualified para function calling"""
-        return self.mark_lead_as_qualified(lead_id)
+        return self.mark_lead_as_qualified(lead_id, owner_id=owner_id)
 
     async def async_mark_lead_as_contacted(
-        self, lead_id: Union[str, UUID], contact_method: Optional[str] = None
+        self,
+        lead_id: Union[str, UUID],
+        contact_method: Optional[str] = None,
+        *,
+        owner_id: Union[str, UUID],
     ) -> Lead:
         """Versión async de mark_lead_as_contacted para function calling"""
-        return self.mark_lead_as_contacted(lead_id, contact_method)
+        return self.mark_lead_as_contacted(lead_id, contact_method, owner_id=owner_id)
 
     async def async_schedule_meeting_for_lead(
         self,
         lead_id: Union[str, UUID],
         meeting_url: str,
         meeting_type: Optional[str] = None,
+        *,
+        owner_id: Union[str, UUID],
     ) -> Lead:
         """Versión async de schedule_meeting_for_lead para function calling"""
-        return self.schedule_meeting_for_lead(lead_id, meeting_url, meeting_type)
+        return self.schedule_meeting_for_lead(
+            lead_id, meeting_url, meeting_type, owner_id=owner_id
+        )
 
     async def async_delete_lead(self, lead_id: Union[str, UUID]) -> bool:
         """Versión async de delete_lead para function calling"""
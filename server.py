@@ -42,6 +42,16 @@ import pyotp
 import qrcode
 
 # Import application models and schemas
+from app.api.jobs import job_accepted_response, router as jobs_router
+from app.core.tracing import RequestProfiler
+from app.jobs.workflows import enqueue_lead_workflow, shutdown_job_queue
+from app.auth.user_cache import get_user_profile_cache, invalidate_user_profile
+from app.auth.write_behind import shutdown_auth_writer
+from app.ai_agents.mcp.oauth_refresh_scheduler import (
+    shutdown_refresh_scheduler,
+    start_refresh_scheduler,
+)
+from app.ai_agents.mcp.oauth_analytics_logger import shutdown_oauth_analytics_logger
 from app.models.lead import Lead as AppLead
 from app.schemas.lead_schema import (
     LeadCreate as AppLeadCreate,
@@ -327,6 +337,7 @@ class SupabaseAuth:
                     "Using non-admin client for user insertion - this might fail due to RLS policies"
                 )
                 self.supabase.table("users").insert(user_profile).execute()
+            await invalidate_user_profile(auth_response.user.id)
 
             return UserRegisterResponse(
                 user_id=auth_response.user.id,
@@ -396,6 +407,7 @@ class SupabaseAuth:
                     "created_at": datetime.utcnow().isoformat(),
                 }
                 self.supabase_admin.table("users").insert(profile_data).execute()
+                await invalidate_user_profile(user_id)
             else:
                 raise
 
@@ -461,28 +473,33 @@ class SupabaseAuth:
 
             user = auth_response.user
 
-            # Preferir cliente admin para evitar RLS, pero hacer fallback si no existe
-            if self.supabase_admin:
-                profile_response = (
-                    self.supabase_admin.table("users")
-                    .select("*")
-                    .eq("id", user.id)
-                    .single()
-                    .execute()
-                )
-            else:
-                logger.warning(
-                    "Supabase admin client not configured. Falling back to regular client; this may be limited by RLS policies."
-                )
-                profile_response = (
-                    self.supabase.table("users")
-                    .select("*")
-                    .eq("id", user.id)
-                    .single()
-                    .execute()
-                )
-
-            if not profile_response.data:
+            async def load_profile() -> Optional[Dict]:
+                # Preferir cliente admin para evitar RLS, pero hacer fallback si no existe
+                if self.supabase_admin:
+                    profile_response = (
+                        self.supabase_admin.table("users")
+                        .select("*")
+                        .eq("id", user.id)
+                        .single()
+                        .execute()
+                    )
+                else:
+                    logger.warning(
+                        "Supabase admin client not configured. Falling back to regular client; this may be limited by RLS policies."
+                    )
+                    profile_response = (
+                        self.supabase.table("users")
+                        .select("*")
+                        .eq("id", user.id)
+                        .single()
+                        .execute()
+                    )
+                return profile_response.data or None
+
+            # El perfil se sirve desde caché; solo los fallos de caché consultan Supabase
+            profile = await get_user_profile_cache().get(str(user.id), load_profile)
+
+            if not profile:
                 logger.warning(
                     "No profile row found for %s during token validation – inserting one",
                     user.id,
@@ -509,12 +526,13 @@ class SupabaseAuth:
                         ).execute()
                     else:
                         self.supabase.table("users").insert(basic_profile).execute()
+                    await invalidate_user_profile(user.id)
                     return basic_profile
                 except Exception as insert_err:
                     logger.error("Failed to insert profile on the fly: %s", insert_err)
                     return None
 
-            return profile_response.data
+            return profile
 
         except Exception as e:
             logger.error(f"Error al validar token: {e}")
@@ -589,6 +607,7 @@ class SupabaseAuth:
             self.supabase.table("users").update(
                 {"has_2fa": True, "totp_secret": secret, "totp_secret_temp": None}
             ).eq("id", user_id).execute()
+            await invalidate_user_profile(user_id)
 
             return True
 
@@ -616,6 +635,7 @@ class SupabaseAuth:
             self.supabase.table("users").update(
                 {"has_2fa": False, "totp_secret": None, "backup_codes": None}
             ).eq("id", user_id).execute()
+            await invalidate_user_profile(user_id)
 
             return True
 
@@ -766,12 +786,21 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Supabase connection failed: {e}")
 
+    try:
+        await start_refresh_scheduler()
+    except Exception as e:
+        logger.error(f"OAuth refresh scheduler failed to start: {e}")
+
     logger.info("PipeWise CRM Server started successfully")
 
     yield
 
     # Shutdown
     logger.info("Shutting down PipeWise CRM Server...")
+    await shutdown_job_queue()
+    await shutdown_refresh_scheduler()
+    await shutdown_oauth_analytics_logger()
+    await shutdown_auth_writer()
     logger.info("Server shutdown complete")
 
 
@@ -781,6 +810,7 @@ app = FastAPI(
     title="PipeWise Main Server",
     description="Main server hosting the CRM API and other services",
     version="2.0.0",
+    lifespan=lifespan,
 )
 
 # ===================== CONFIGURACIÓN DE CORS =====================
@@ -804,6 +834,15 @@ app.add_middleware(
 # ===================== MIDDLEWARE =====================
 
 
+request_profiler = RequestProfiler()
+
+
+@app.middleware("http")
+async def profiling_middleware(request: Request, call_next):
+    """Opt-in pyinstrument profile and span summary via the X-Profile header"""
+    return await request_profiler(request, call_next)
+
+
 @app.middleware("http")
 async def logging_middleware(request: Request, call_next):
     """Middleware de logging"""
@@ -1575,6 +1614,7 @@ except ImportError as e:
     logger.warning(f"Could not load OAuth router: {e}")
 
 app.include_router(contacts_router)
+app.include_router(jobs_router)
 
 # FIXED: Include user configuration router for integration account management
 try:
@@ -1603,50 +1643,51 @@ async def test_connection():
     }
 
 
-@app.post("/api/process-lead-workflow")
+@app.post("/api/process-lead-workflow", status_code=202)
 async def process_lead_workflow_endpoint(
-    lead_data: dict, current_user: dict = Depends(get_current_user)
+    lead_data: dict, request: Request, current_user: dict = Depends(get_current_user)
 ):
     """
-    Endpoint REAL para procesar workflows de leads desde el frontend.
-    Utiliza el sistema de agentes ModernLeadProcessor para procesar workflows reales.
+    Endpoint REAL para encolar workflows de leads desde el frontend.
+    El workflow se ejecuta con ModernLeadProcessor en el pool de workers en
+    segundo plano; la respuesta 202 incluye el job_id para consultar el estado
+    en /api/jobs/{job_id} (polling) o /api/jobs/{job_id}/ws (WebSocket).
     """
     try:
         # Obtener el user_id del usuario autenticado
         user_id = current_user["id"]
 
-        logger.info(f"🚀 Processing REAL workflow request for user: {user_id}")
+        logger.info(f"🚀 Queueing REAL workflow request for user: {user_id}")
         logger.info(f"📋 Lead data received: {lead_data}")
 
-        # Importar las clases necesarias
-        from app.ai_agents.agents import ModernLeadProcessor, TenantContext
+        # Contexto de tenant real con el user_id del usuario autenticado
+        tenant = {
+            "tenant_id": "default",
+            "user_id": user_id,  # Use authenticated user's ID
+            "is_premium": True,
+            "api_limits": {"calls_per_hour": 1000},
+            "features_enabled": ["lead_processing", "workflow_tracking", "ai_agents"],
+        }
 
-        # Crear contexto de tenant real con el user_id del usuario autenticado
-        tenant_context = TenantContext(
-            tenant_id="default",
-            user_id=user_id,  # Use authenticated user's ID
-            is_premium=True,
-            api_limits={"calls_per_hour": 1000},
-            features_enabled=["lead_processing", "workflow_tracking", "ai_agents"],
+        job, created = await enqueue_lead_workflow(
+            lead_data,
+            tenant,
+            idempotency_key=request.headers.get("Idempotency-Key"),
         )
 
-        # Inicializar el procesador moderno REAL
-        processor = ModernLeadProcessor(tenant_context)
-
-        # Procesar el workflow REAL con agentes AI
-        result = await processor.process_lead_workflow(lead_data)
-
         logger.info(
-            f"✅ REAL Workflow processed successfully for user {user_id}: {result['status']}"
+            f"✅ REAL Workflow queued as job {job.id} for user {user_id} (new={created})"
         )
 
-        return {
-            "success": True,
-            "data": result,
-            "message": "Real workflow processed successfully with AI agents",
-            "workflow_type": "REAL_AI_WORKFLOW",
-            "user_id": user_id,
-        }
+        return JSONResponse(
+            status_code=202,
+            content={
+                **job_accepted_response(job.to_dict(), created),
+                "message": "Workflow queued for processing with AI agents",
+                "workflow_type": "REAL_AI_WORKFLOW",
+                "user_id": user_id,
+            },
+        )
 
     except Exception as e:
         logger.error(f"❌ Error in REAL workflow endpoint: {e}")
@@ -0,0 +1,178 @@
+"""
+Tests for the agent event bus and the /ws/agent-events WebSocket.
+
+This module tests:
+- Fan-out filtered by user and workflow
+- Drop-oldest backpressure on slow subscribers
+- Publishing from worker threads and the bound event context
+- Mapping of Agents SDK stream events
+- WebSocket authentication, filtering and cleanup
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.ai_agents.streaming import stream_event_payload
+from app.api import events as events_module
+from app.core.event_bus import (
+    AgentEventBus,
+    event_context,
+    get_event_bus,
+    publish_event,
+    set_event_bus,
+)
+
+
+@pytest.fixture
+def bus():
+    bus = AgentEventBus(default_max_queue=8)
+    set_event_bus(bus)
+    yield bus
+    set_event_bus(None)
+
+
+class TestAgentEventBus:
+    """Test fan-out, filtering and backpressure."""
+
+    @pytest.mark.asyncio
+    async def test_filters_by_user_and_workflow(self, bus):
+        """Test subscribers only receive their own user's and workflow's events."""
+        user_sub = bus.subscribe(user_id="u1")
+        workflow_sub = bus.subscribe(user_id="u1", workflow_id="wf-2")
+        other_sub = bus.subscribe(user_id="u2")
+
+        reached = bus.publish("agent.token", workflow_id="wf-1", user_id="u1", delta="Hi")
+        bus.publish("workflow.completed", workflow_id="wf-2", user_id="u1")
+
+        assert reached == 1
+        assert (await user_sub.get()).type == "agent.token"
+        assert (await user_sub.get()).type == "workflow.completed"
+        assert (await workflow_sub.get()).type == "workflow.completed"
+        assert len(other_sub.queue) == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_drops_oldest(self, bus):
+        """Test a full queue keeps the newest events and counts the dropped ones."""
+        subscription = bus.subscribe(max_queue=3)
+
+        for i in range(5):
+            bus.publish("agent.token", delta=str(i))
+
+        assert subscription.dropped == 2
+        received = [(await subscription.get()).data["delta"] for _ in range(3)]
+        assert received == ["2", "3", "4"]
+        assert bus.get_statistics()["dropped"] == 2
+
+    @pytest.mark.asyncio
+    async def test_publish_from_worker_thread(self, bus):
+        """Test sync tools running in threads deliver to the loop's subscriber."""
+        subscription = bus.subscribe(user_id="u1")
+
+        def tool():
+            publish_event("lead.updated", lead_id="lead-1")
+
+        with event_context("wf-1", "u1"):
+            await asyncio.to_thread(tool)
+
+        event = await asyncio.wait_for(subscription.get(), timeout=1)
+        assert event.type == "lead.updated"
+        assert event.workflow_id == "wf-1" and event.data == {"lead_id": "lead-1"}
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_stops_delivery(self, bus):
+        """Test unsubscribed clients no longer receive or hold events."""
+        subscription = bus.subscribe()
+        bus.unsubscribe(subscription)
+
+        assert bus.publish("agent.token") == 0
+        assert subscription.closed and bus.get_statistics()["subscribers"] == 0
+
+
+class TestStreamEventMapping:
+    """Test Agents SDK stream events are translated for the UI."""
+
+    def test_token_and_tool_events(self):
+        """Test text deltas and tool calls map to agent events."""
+        delta = SimpleNamespace(
+            type="raw_response_event",
+            data=SimpleNamespace(type="response.output_text.delta", delta="Hel"),
+        )
+        agent = SimpleNamespace(name="PipeWise Coordinator")
+        tool_call = SimpleNamespace(
+            type="run_item_stream_event",
+            name="tool_called",
+            item=SimpleNamespace(agent=agent, raw_item=SimpleNamespace(name="mark_leads_contacted")),
+        )
+        reasoning = SimpleNamespace(
+            type="run_item_stream_event", name="reasoning_item_created", item=None
+        )
+
+        assert stream_event_payload(delta) == ("agent.token", {"delta": "Hel"})
+        assert stream_event_payload(tool_call) == (
+            "tool.called",
+            {"agent": "PipeWise Coordinator", "tool": "mark_leads_contacted"},
+        )
+        assert stream_event_payload(reasoning) is None
+
+
+class TestAgentEventsSocket:
+    """Test the WebSocket forwards bus events to authorized clients."""
+
+    @pytest.fixture
+    def client(self, bus):
+        async def resolver(token):
+            return {"token-u1": "u1"}.get(token)
+
+        events_module.set_token_resolver(resolver)
+        app = FastAPI()
+        app.include_router(events_module.router)
+        yield TestClient(app)
+        events_module.set_token_resolver(None)
+
+    @staticmethod
+    def wait_for_subscribers(count):
+        deadline = time.time() + 2
+        while get_event_bus().get_statistics()["subscribers"] != count:
+            assert time.time() < deadline, "subscriber count not reached"
+            time.sleep(0.01)
+
+    def test_streams_own_workflow_events(self, client, bus):
+        """Test a client receives only its workflow's events, then unsubscribes."""
+        with client.websocket_connect("/ws/agent-events?token=token-u1&workflow_id=wf-1") as ws:
+            self.wait_for_subscribers(1)
+            bus.publish("agent.token", workflow_id="wf-1", user_id="u2", delta="other user")
+            bus.publish("agent.token", workflow_id="wf-9", user_id="u1", delta="other workflow")
+            bus.publish("agent.token", workflow_id="wf-1", user_id="u1", delta="mine")
+
+            message = ws.receive_json()
+            assert message["type"] == "agent.token"
+            assert message["data"] == {"delta": "mine"}
+
+        self.wait_for_subscribers(0)
+
+    def test_rejects_invalid_token(self, client):
+        """Test unknown tokens are refused before subscribing."""
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect("/ws/agent-events?token=bogus") as ws:
+                ws.receive_json()
+
+    def test_thread_publish_reaches_socket(self, client, bus):
+        """Test events published from another thread are forwarded."""
+        with client.websocket_connect("/ws/agent-events?token=token-u1") as ws:
+            self.wait_for_subscribers(1)
+            worker = threading.Thread(
+                target=bus.publish,
+                args=("workflow.completed",),
+                kwargs={"workflow_id": "wf-3", "user_id": "u1"},
+            )
+            worker.start()
+            worker.join()
+
+            assert ws.receive_json()["type"] == "workflow.completed"
@@ -0,0 +1,244 @@
+"""
+Tests for the auth write-behind queue.
+
+This module tests:
+- Batching of queued rows into one upsert per table
+- Coalescing of repeated last-login updates
+- Retries keeping writes queued until they succeed
+- Rows rejected on every attempt isolated and dead-lettered
+- Journal replay after a restart (at-least-once)
+- Updates arriving while a batch is in flight
+- Journal appends made by the writer task, not on enqueue
+- Login-path latency with and without the writer
+"""
+
+import asyncio
+import statistics
+import time
+
+import pytest
+
+from app.auth.write_behind import AuthWriteBehind
+
+
+class FakeTarget:
+    """Write target recording calls, optionally slow or failing."""
+
+    def __init__(self, latency=0.0, failures=0, rejected_ids=()):
+        self.latency = latency
+        self.failures = failures
+        self.rejected_ids = set(rejected_ids)
+        self.upserts = []
+        self.updates = []
+
+    async def _call(self):
+        await asyncio.sleep(self.latency)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("supabase unavailable")
+
+    async def upsert(self, table, rows):
+        await self._call()
+        if self.rejected_ids & {row["id"] for row in rows}:
+            raise ValueError("column \"actor\" does not exist")
+        self.upserts.append((table, list(rows)))
+
+    async def update(self, table, values, match):
+        await self._call()
+        self.updates.append((table, dict(values), dict(match)))
+
+
+class TestAuthWriteBehind:
+    """Test batching, coalescing and delivery."""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_batched_per_table(self):
+        """Test many queued rows become one upsert per table."""
+        target = FakeTarget()
+        writer = AuthWriteBehind(target, flush_interval_seconds=0.05)
+
+        for i in range(10):
+            writer.upsert("auth_audit_logs", {"id": f"log-{i}", "action": "login"})
+        writer.upsert("user_sessions", {"id": "session-1"})
+
+        assert await writer.flush(timeout=1)
+        assert sorted((table, len(rows)) for table, rows in target.upserts) == [
+            ("auth_audit_logs", 10),
+            ("user_sessions", 1),
+        ]
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_last_login_updates_coalesce(self):
+        """Test repeated updates of one user collapse into the latest values."""
+        target = FakeTarget()
+        writer = AuthWriteBehind(target, flush_interval_seconds=0.05)
+
+        writer.update("users", {"last_login": "t1", "last_activity": "t1"}, id="u1")
+        writer.update("users", {"last_login": "t2", "last_activity": "t2"}, id="u1")
+        writer.update("users", {"last_login": "t3"}, id="u2")
+
+        assert await writer.flush(timeout=1)
+        assert sorted(target.updates, key=lambda u: u[2]["id"]) == [
+            ("users", {"last_login": "t2", "last_activity": "t2"}, {"id": "u1"}),
+            ("users", {"last_login": "t3"}, {"id": "u2"}),
+        ]
+        assert writer.get_statistics()["coalesced"] == 1
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_batches_are_retried(self):
+        """Test writes stay queued through failures and are delivered once it recovers."""
+        target = FakeTarget(failures=2)
+        writer = AuthWriteBehind(
+            target, flush_interval_seconds=0.01, base_retry_delay=0.01
+        )
+
+        writer.upsert("auth_audit_logs", {"id": "log-1"})
+
+        assert await writer.flush(timeout=2)
+        assert target.upserts == [("auth_audit_logs", [{"id": "log-1"}])]
+        stats = writer.get_statistics()
+        assert stats["failed_batches"] == 2 and stats["pending"] == 0
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_rejected_row_is_dead_lettered_without_blocking_table(self, tmp_path):
+        """Test a row the database keeps rejecting is isolated and dead-lettered."""
+        dead_letter = tmp_path / "auth-dead.jsonl"
+        target = FakeTarget(rejected_ids={"log-3"})
+        writer = AuthWriteBehind(
+            target,
+            flush_interval_seconds=0.01,
+            base_retry_delay=0.01,
+            max_attempts=3,
+            dead_letter_path=str(dead_letter),
+        )
+
+        for i in range(8):
+            writer.upsert("auth_audit_logs", {"id": f"log-{i}"})
+
+        assert await writer.flush(timeout=2)
+        written = sorted(row["id"] for _, rows in target.upserts for row in rows)
+        assert written == [f"log-{i}" for i in range(8) if i != 3]
+        stats = writer.get_statistics()
+        assert stats["dead_lettered"] == 1 and stats["pending"] == 0
+        assert "log-3" in dead_letter.read_text()
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_journal_replays_after_restart(self, tmp_path):
+        """Test writes that were not delivered before shutdown are replayed."""
+        journal = str(tmp_path / "auth-writes.jsonl")
+        down = FakeTarget(failures=1000)
+        writer = AuthWriteBehind(down, journal_path=journal, base_retry_delay=0.01)
+        writer.upsert("auth_audit_logs", {"id": "log-1"})
+        writer.update("users", {"last_login": "t1"}, id="u1")
+        await writer.stop(timeout=0.05)
+
+        target = FakeTarget()
+        restarted = AuthWriteBehind(target, journal_path=journal, flush_interval_seconds=0.01)
+        await restarted.start()
+
+        assert await restarted.flush(timeout=1)
+        assert target.upserts == [("auth_audit_logs", [{"id": "log-1"}])]
+        assert target.updates == [("users", {"last_login": "t1"}, {"id": "u1"})]
+        assert restarted.get_statistics()["replayed"] == 2
+        await restarted.stop()
+        assert not (tmp_path / "auth-writes.jsonl").exists()
+
+    @pytest.mark.asyncio
+    async def test_update_during_write_is_not_lost(self):
+        """Test an update arriving while its row is being written is sent afterwards."""
+        target = FakeTarget(latency=0.05)
+        writer = AuthWriteBehind(target, flush_interval_seconds=0.01)
+
+        writer.update("users", {"last_login": "t1"}, id="u1")
+        await asyncio.sleep(0.03)  # first write in flight
+        writer.update("users", {"last_login": "t2"}, id="u1")
+
+        assert await writer.flush(timeout=1)
+        assert target.updates == [
+            ("users", {"last_login": "t1"}, {"id": "u1"}),
+            ("users", {"last_login": "t2"}, {"id": "u1"}),
+        ]
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_update_folds_into_newer_one(self):
+        """Test a failed in-flight update is merged under the update queued after it."""
+        target = FakeTarget(latency=0.05, failures=1)
+        writer = AuthWriteBehind(
+            target, flush_interval_seconds=0.01, base_retry_delay=0.01
+        )
+
+        writer.update("users", {"last_login": "t1", "last_activity": "t1"}, id="u1")
+        await asyncio.sleep(0.03)
+        writer.update("users", {"last_login": "t2"}, id="u1")
+
+        assert await writer.flush(timeout=1)
+        assert target.updates == [
+            ("users", {"last_login": "t2", "last_activity": "t1"}, {"id": "u1"}),
+        ]
+        await writer.stop()
+
+    @pytest.mark.asyncio
+    async def test_journal_is_written_by_the_writer_task(self, tmp_path):
+        """Test enqueueing only buffers journal entries; the writer appends them."""
+        journal = tmp_path / "auth-writes.jsonl"
+        writer = AuthWriteBehind(
+            FakeTarget(failures=1000), journal_path=str(journal), base_retry_delay=0.01
+        )
+
+        writer.upsert("auth_audit_logs", {"id": "log-1"})
+        assert not journal.exists()
+
+        assert not await writer.flush(timeout=0.05)
+        assert "log-1" in journal.read_text()
+        await writer.stop(timeout=0.01)
+
+
+class TestLoginLatency:
+    """Compare the login bookkeeping cost inline and behind the writer."""
+
+    @staticmethod
+    def percentiles(samples):
+        samples = sorted(samples)
+        return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+    @pytest.mark.asyncio
+    async def test_enqueue_is_off_the_login_path(self):
+        """Test p50/p99 of the login writes before and after queueing bookkeeping."""
+        target = FakeTarget(latency=0.005)
+        writer = AuthWriteBehind(target, flush_interval_seconds=0.01)
+
+        async def inline_login(i):
+            await target.upsert("user_sessions", [{"id": f"s{i}"}])
+            await target.update("users", {"last_login": "now"}, {"id": f"u{i}"})
+            await target.upsert("auth_audit_logs", [{"id": f"a{i}"}])
+
+        async def queued_login(i):
+            # The session row stays inline; only bookkeeping is queued
+            await target.upsert("user_sessions", [{"id": f"s{i}"}])
+            writer.update("users", {"last_login": "now"}, id=f"u{i}")
+            writer.upsert("auth_audit_logs", {"id": f"a{i}"})
+
+        def measure(login):
+            async def run():
+                samples = []
+                for i in range(100):
+                    started = time.perf_counter()
+                    await login(i)
+                    samples.append(time.perf_counter() - started)
+                return self.percentiles(samples)
+
+            return run()
+
+        before_p50, before_p99 = await measure(inline_login)
+        after_p50, after_p99 = await measure(queued_login)
+
+        assert before_p50 >= 0.015
+        assert after_p50 < before_p50 / 2
+        assert await writer.flush(timeout=5)
+        assert writer.get_statistics()["written"] == 200
+        await writer.stop()
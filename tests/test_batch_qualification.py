@@ -0,0 +1,283 @@
+"""
+Tests for batch lead qualification.
+
+This module tests the BatchQualificationEngine against a stubbed model:
+- Chunking with one bulk write per chunk
+- Concurrency bounded by the semaphore
+- Throughput (leads/minute) versus sequential qualification
+- Failure isolation for analyzer and writer errors
+- Prospects without an email and repeated emails
+- Row building for the Supabase bulk upsert
+- Cached analyses in AgentLeadAnalyzer
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai_agents.agents import LeadAnalysis
+from app.ai_agents.batch_qualification import (
+    AgentLeadAnalyzer,
+    BatchQualificationEngine,
+    SupabaseQualificationWriter,
+)
+from app.ai_agents.run_cache import AgentRunCache, DiskRunCacheBackend
+from app.models.lead import Lead
+
+MODEL_LATENCY = 0.02
+
+
+def make_prospects(count: int):
+    return [
+        {"email": f"lead{i}@example.com", "name": f"Lead {i}", "company": "Acme"}
+        for i in range(count)
+    ]
+
+
+class StubModel:
+    """Stands in for the structured-output LLM call."""
+
+    def __init__(self, latency: float = MODEL_LATENCY, fail_for=()):
+        self.latency = latency
+        self.fail_for = set(fail_for)
+        self.in_flight = 0
+        self.peak = 0
+
+    async def __call__(self, prospect):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if prospect["email"] in self.fail_for:
+                raise RuntimeError("model error")
+            score = 80.0 if prospect["email"].startswith("lead1") else 40.0
+            return LeadAnalysis(
+                lead_id=prospect["email"],
+                qualification_score=score,
+                qualified=score >= 70,
+                key_factors=["budget"],
+                recommendations=["book demo"],
+                risk_factors=[],
+                opportunity_size="medium",
+            )
+        finally:
+            self.in_flight -= 1
+
+
+class RecordingWriter:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, results):
+        self.calls.append(results)
+        if self.fail:
+            raise RuntimeError("db unavailable")
+        return len(results)
+
+
+class TestBatchQualificationEngine:
+    """Test chunking, concurrency and throughput."""
+
+    @pytest.mark.asyncio
+    async def test_one_bulk_write_per_chunk(self):
+        """Test results are written with one writer call per chunk."""
+        writer = RecordingWriter()
+        engine = BatchQualificationEngine(
+            analyzer=StubModel(latency=0), writer=writer, chunk_size=10
+        )
+
+        result = await engine.qualify(make_prospects(25))
+
+        assert result.chunks == 3
+        assert sorted(len(call) for call in writer.calls) == [5, 10, 10]
+        assert result.written == 25
+        assert result.total == 25 and result.failed == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test model calls in flight never exceed max_concurrency."""
+        model = StubModel()
+        engine = BatchQualificationEngine(
+            analyzer=model, writer=RecordingWriter(), chunk_size=5, max_concurrency=4
+        )
+
+        await engine.qualify(make_prospects(20))
+
+        assert model.peak == 4
+
+    @pytest.mark.asyncio
+    async def test_throughput_against_stubbed_model(self):
+        """Test concurrent qualification beats the sequential per-lead path."""
+        prospects = make_prospects(40)
+        sequential = await BatchQualificationEngine(
+            analyzer=StubModel(), writer=RecordingWriter(), max_concurrency=1
+        ).qualify(prospects)
+        batched = await BatchQualificationEngine(
+            analyzer=StubModel(), writer=RecordingWriter(), max_concurrency=10
+        ).qualify(prospects)
+
+        assert batched.leads_per_minute > 4 * sequential.leads_per_minute
+        assert batched.to_dict()["leads_per_minute"] > 0
+
+    @pytest.mark.asyncio
+    async def test_analyzer_failures_are_isolated(self):
+        """Test a failed analysis is reported without blocking the chunk write."""
+        writer = RecordingWriter()
+        engine = BatchQualificationEngine(
+            analyzer=StubModel(latency=0, fail_for={"lead3@example.com"}),
+            writer=writer,
+        )
+
+        result = await engine.qualify(make_prospects(5))
+
+        assert result.failed == 1
+        assert result.written == 4
+        assert [o.error for o in result.outcomes].count("model error") == 1
+
+    @pytest.mark.asyncio
+    async def test_writer_failure_marks_chunk(self):
+        """Test a failed bulk write marks the chunk's outcomes as failed."""
+        engine = BatchQualificationEngine(
+            analyzer=StubModel(latency=0),
+            writer=RecordingWriter(fail=True),
+            chunk_size=2,
+        )
+
+        result = await engine.qualify(make_prospects(4))
+
+        assert result.failed == 4 and result.written == 0
+
+    @pytest.mark.asyncio
+    async def test_string_prospects_are_emails(self):
+        """Test bare strings in a prospect list are treated as emails."""
+        writer = RecordingWriter()
+        engine = BatchQualificationEngine(analyzer=StubModel(latency=0), writer=writer)
+
+        await engine.qualify(["lead1@example.com"])
+
+        assert writer.calls[0][0][0] == {"email": "lead1@example.com"}
+
+    @pytest.mark.asyncio
+    async def test_missing_and_repeated_emails_fail_before_chunking(self):
+        """Test emailless prospects are reported and a repeated email is written once."""
+        writer = RecordingWriter()
+        engine = BatchQualificationEngine(
+            analyzer=StubModel(latency=0), writer=writer, chunk_size=2
+        )
+        prospects = make_prospects(3) + [{"name": "No Email"}, {"email": "lead0@example.com"}]
+
+        result = await engine.qualify(prospects)
+
+        written = [p["email"] for call in writer.calls for p, _ in call]
+        assert sorted(written) == ["lead0@example.com", "lead1@example.com", "lead2@example.com"]
+        assert result.total == 5 and result.written == 3 and result.failed == 2
+        assert {o.error for o in result.outcomes if o.error} == {
+            "prospect has no email",
+            "duplicate email lead0@example.com",
+        }
+
+
+class TestAgentLeadAnalyzer:
+    """Test the run cache in front of the qualification agent."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_prospect_is_served_from_cache(self, tmp_path):
+        """Test a re-submitted prospect reuses the analysis until the lead changes."""
+        cache = AgentRunCache(DiskRunCacheBackend(str(tmp_path)), ttl_seconds=60)
+        model = StubModel(latency=0)
+        calls = []
+
+        async def runner(agent, prompt):
+            calls.append(prompt)
+            return SimpleNamespace(final_output=await model({"email": "lead1@example.com"}))
+
+        analyzer = AgentLeadAnalyzer(user_id="u1", cache=cache, runner=runner)
+        other_user = AgentLeadAnalyzer(user_id="u2", cache=cache, runner=runner)
+        prospect = {"email": "lead1@example.com", "company": "Acme"}
+
+        first = await analyzer(prospect)
+        second = await analyzer(dict(prospect))
+        await other_user(prospect)
+
+        assert isinstance(second, LeadAnalysis) and second == first
+        assert len(calls) == 2
+
+        await cache.invalidate_lead("lead1@example.com")
+        await analyzer(prospect)
+        assert len(calls) == 3
+
+
+class TestSupabaseQualificationWriter:
+    """Test bulk upsert row building."""
+
+    def test_rows_merge_existing_and_create_new(self):
+        """Test existing leads keep their metadata and unknown prospects are created."""
+        db_client = SimpleNamespace(_get_current_timestamp=lambda: "2026-01-01T00:00:00")
+        writer = SupabaseQualificationWriter(db_client=db_client, user_id="u1")
+        analysis = LeadAnalysis(
+            lead_id="x",
+            qualification_score=90,
+            qualified=True,
+            key_factors=["budget", "timeline"],
+            recommendations=[],
+            risk_factors=[],
+            opportunity_size="large",
+        )
+        existing = {
+            "old@example.com": Lead(
+                id="3f0c6a52-8d6b-4d43-9a63-2b0f1c1e2a11",
+                name="Old Lead",
+                email="old@example.com",
+                company="Initech",
+                contacted=True,
+                created_at="2025-06-01T00:00:00",
+                metadata={"source_campaign": "q3"},
+            )
+        }
+
+        rows = writer.build_rows(
+            [({"email": "old@example.com"}, analysis), ({"email": "new@example.com"}, analysis)],
+            existing,
+        )
+
+        assert rows[0]["id"] == "3f0c6a52-8d6b-4d43-9a63-2b0f1c1e2a11"
+        assert rows[0]["company"] == "Initech" and rows[0]["contacted"] is True
+        assert rows[0]["metadata"]["source_campaign"] == "q3"
+        assert rows[0]["metadata"]["qualification_reason"] == "budget; timeline"
+        assert rows[0]["status"] == "qualified"
+        assert rows[1]["id"] is None
+        assert set(rows[0]) == set(rows[1])
+        assert rows[1]["user_id"] == "u1" and rows[1]["email"] == "new@example.com"
+
+    def test_existing_leads_are_looked_up_for_the_owner_only(self):
+        """Test the lookup is scoped to the writer's user and requires one."""
+        lookups = []
+
+        def get_leads_by_emails(emails, user_id):
+            lookups.append((emails, user_id))
+            return {}
+
+        db_client = SimpleNamespace(
+            _get_current_timestamp=lambda: "2026-01-01T00:00:00",
+            get_leads_by_emails=get_leads_by_emails,
+            bulk_upsert_leads=lambda rows: rows,
+        )
+        analysis = LeadAnalysis(
+            lead_id="x",
+            qualification_score=10,
+            qualified=False,
+            key_factors=[],
+            recommendations=[],
+            risk_factors=[],
+            opportunity_size="small",
+        )
+        results = [({"email": "a@example.com"}, analysis)]
+
+        writer = SupabaseQualificationWriter(db_client=db_client, user_id="u1")
+        assert writer.write_chunk(results) == 1
+        assert lookups == [(["a@example.com"], "u1")]
+
+        with pytest.raises(ValueError):
+            SupabaseQualificationWriter(db_client=db_client).write_chunk(results)
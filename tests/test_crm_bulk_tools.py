@@ -0,0 +1,304 @@
+"""
+Tests for the CRM lead update tools.
+
+This module tests that the agent tools talk to Supabase in one round trip:
+- Single-lead tools issue one bulk_update_leads RPC call
+- Bulk tools update many leads with one RPC call
+- Metadata patches are sent for server-side merging
+- Updates are limited to the leads of the agent run's user
+- Leads missing from the database are reported
+- patch_lead_metadata merges patches and detects version conflicts
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+from agents.tool_context import ToolContext
+
+from app.ai_agents import agents as agents_module
+from app.supabase.supabase_client import LeadVersionConflictError, SupabaseCRMClient
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return FakeQuery([row for row in self.rows if row[column] == value])
+
+    def execute(self):
+        return SimpleNamespace(data=[dict(row) for row in self.rows])
+
+
+class FakeSupabase:
+    """Records calls and emulates the lead update Postgres functions."""
+
+    def __init__(self, leads):
+        self.leads = {lead["id"]: lead for lead in leads}
+        self.rpc_calls = []
+        self.table_calls = 0
+
+    def table(self, name):
+        self.table_calls += 1
+        return FakeQuery(list(self.leads.values()))
+
+    def rpc(self, name, params):
+        self.rpc_calls.append((name, params))
+        if name == "patch_lead_metadata":
+            updated = self._patch_lead_metadata(**params)
+        else:
+            updated = self._bulk_update_leads(**params)
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=updated))
+
+    def _bulk_update_leads(self, p_owner, updates):
+        updated = []
+        for update in updates:
+            lead = next(
+                (
+                    lead
+                    for lead in self.leads.values()
+                    if lead["owner_id"] == p_owner
+                    and (
+                        lead["id"] == update.get("id")
+                        or ("id" not in update and lead["email"] == update.get("email"))
+                    )
+                ),
+                None,
+            )
+            if lead is None:
+                continue
+            for column in ("qualified", "contacted", "meeting_scheduled", "status"):
+                if column in update:
+                    lead[column] = update[column]
+            lead["metadata"] = {**lead["metadata"], **update.get("metadata", {})}
+            lead["version"] += 1
+            updated.append(dict(lead))
+        return updated
+
+    def _patch_lead_metadata(self, lead_id_param, patch_param, expected_version_param):
+        lead = self.leads.get(lead_id_param)
+        if lead is None or expected_version_param not in (None, lead["version"]):
+            return []
+        lead["metadata"] = {**lead["metadata"], **patch_param}
+        lead["version"] += 1
+        return [dict(lead)]
+
+
+OWNER_ID = "10000000-0000-0000-0000-000000000001"
+
+
+def make_lead(index):
+    return {
+        "id": f"00000000-0000-0000-0000-00000000000{index}",
+        "name": f"Lead {index}",
+        "email": f"lead{index}@example.com",
+        "company": "Acme",
+        "metadata": {"campaign": "q3"},
+        "version": 0,
+        "owner_id": OWNER_ID,
+    }
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db_client = SupabaseCRMClient.__new__(SupabaseCRMClient)
+    db_client.client = FakeSupabase([make_lead(i) for i in range(1, 4)])
+    monkeypatch.setattr(agents_module, "SupabaseCRMClient", lambda: db_client)
+    return db_client.client
+
+
+@pytest.fixture
+def db_client():
+    client = SupabaseCRMClient.__new__(SupabaseCRMClient)
+    client.client = FakeSupabase([make_lead(1)])
+    return client
+
+
+def tenant(user_id=OWNER_ID):
+    return agents_module.TenantContext(
+        tenant_id="default",
+        user_id=user_id,
+        is_premium=False,
+        api_limits={},
+        features_enabled=[],
+    )
+
+
+async def invoke(tool, run_context=None, **arguments):
+    payload = json.dumps(arguments)
+    context = ToolContext(
+        context=run_context or tenant(),
+        tool_name=tool.name,
+        tool_call_id="call",
+        tool_arguments=payload,
+    )
+    return await tool.on_invoke_tool(context, payload)
+
+
+class TestSingleLeadTools:
+    """Test the single-lead tools make one round trip."""
+
+    @pytest.mark.asyncio
+    async def test_update_lead_qualification_by_email(self, fake_db):
+        """Test qualification is one RPC call with a metadata patch."""
+        result = await invoke(
+            agents_module.update_lead_qualification,
+            lead_id="lead1@example.com",
+            qualified=True,
+            reason="budget approved",
+            score=85,
+        )
+
+        assert "qualified=True" in result
+        assert len(fake_db.rpc_calls) == 1 and fake_db.table_calls == 0
+        name, params = fake_db.rpc_calls[0]
+        assert name == "bulk_update_leads"
+        assert params["updates"][0]["email"] == "lead1@example.com"
+        assert fake_db.leads[make_lead(1)["id"]]["metadata"]["campaign"] == "q3"
+
+    @pytest.mark.asyncio
+    async def test_mark_lead_as_contacted_single_update(self, fake_db):
+        """Test status and contact details are written in one update."""
+        lead_id = make_lead(2)["id"]
+
+        result = await invoke(
+            agents_module.mark_lead_as_contacted,
+            lead_id=lead_id,
+            contact_method="email",
+            contact_details="intro sent",
+        )
+
+        assert "marked as contacted" in result
+        assert len(fake_db.rpc_calls) == 1
+        lead = fake_db.leads[lead_id]
+        assert lead["status"] == "contacted"
+        assert lead["metadata"]["last_contact_details"] == "intro sent"
+
+    @pytest.mark.asyncio
+    async def test_updates_are_scoped_to_the_run_user(self, fake_db):
+        """Test neither an email nor an id reference reaches another user's lead."""
+        other_owner = "20000000-0000-0000-0000-000000000002"
+        for lead_id in ("lead1@example.com", make_lead(1)["id"]):
+            result = await invoke(
+                agents_module.mark_lead_as_contacted,
+                run_context=tenant(other_owner),
+                lead_id=lead_id,
+                contact_method="email",
+            )
+            assert "not found" in result
+
+        assert {params["p_owner"] for _, params in fake_db.rpc_calls} == {other_owner}
+        assert fake_db.leads[make_lead(1)["id"]]["version"] == 0
+
+    @pytest.mark.asyncio
+    async def test_run_without_user_context_updates_nothing(self, fake_db):
+        """Test a tool refuses to update leads when the run has no owner."""
+        result = await invoke(
+            agents_module.update_lead_qualification,
+            run_context=SimpleNamespace(user_id=None),
+            lead_id="lead1@example.com",
+            qualified=True,
+            reason="fit",
+        )
+
+        assert "no user context" in result
+        assert fake_db.rpc_calls == []
+
+    @pytest.mark.asyncio
+    async def test_unknown_lead_reported(self, fake_db):
+        """Test a missing lead returns the not-found message."""
+        result = await invoke(
+            agents_module.schedule_meeting_for_lead,
+            lead_id="nobody@example.com",
+            meeting_url="https://cal.example.com/x",
+            event_type="demo",
+        )
+
+        assert "not found" in result
+
+
+class TestBulkLeadTools:
+    """Test the bulk tools update many leads per call."""
+
+    @pytest.mark.asyncio
+    async def test_update_leads_qualification(self, fake_db):
+        """Test many qualifications are applied with one RPC call."""
+        result = await invoke(
+            agents_module.update_leads_qualification,
+            updates=[
+                {"lead_id": f"lead{i}@example.com", "qualified": i != 3, "reason": "fit", "score": 70}
+                for i in range(1, 4)
+            ],
+        )
+
+        assert "3/3" in result
+        assert len(fake_db.rpc_calls) == 1
+        assert [lead["qualified"] for lead in fake_db.leads.values()] == [True, True, False]
+
+    @pytest.mark.asyncio
+    async def test_mark_leads_contacted_reports_missing(self, fake_db):
+        """Test unknown identifiers are listed in the bulk result."""
+        result = await invoke(
+            agents_module.mark_leads_contacted,
+            lead_ids=["lead1@example.com", make_lead(2)["id"], "ghost@example.com"],
+            contact_method="twitter",
+        )
+
+        assert "2/3" in result
+        assert "ghost@example.com" in result
+        assert len(fake_db.rpc_calls) == 1
+        assert fake_db.table_calls == 0
+
+    @pytest.mark.asyncio
+    async def test_schedule_meetings_for_leads(self, fake_db):
+        """Test meetings for several leads are recorded together."""
+        result = await invoke(
+            agents_module.schedule_meetings_for_leads,
+            meetings=[
+                {"lead_id": make_lead(i)["id"], "meeting_url": f"https://cal/{i}", "event_type": "demo"}
+                for i in (1, 2)
+            ],
+        )
+
+        assert "2/2" in result
+        assert len(fake_db.rpc_calls) == 1
+        assert fake_db.leads[make_lead(2)["id"]]["metadata"]["meeting_url"] == "https://cal/2"
+
+
+class TestPatchLeadMetadata:
+    """Test server-side metadata patches with optional version checks."""
+
+    def test_patch_merges_without_read(self, db_client):
+        """Test concurrent patches are both kept and no read is issued."""
+        lead_id = make_lead(1)["id"]
+
+        db_client.patch_lead_metadata(lead_id, {"agent_a": "replied"})
+        lead = db_client.patch_lead_metadata(lead_id, {"agent_b": "qualified"})
+
+        assert lead.metadata == {"campaign": "q3", "agent_a": "replied", "agent_b": "qualified"}
+        assert lead.version == 2
+        assert db_client.client.table_calls == 0
+
+    def test_expected_version_applies_once(self, db_client):
+        """Test a stale expected_version raises a conflict instead of overwriting."""
+        lead_id = make_lead(1)["id"]
+
+        lead = db_client.patch_lead_metadata(lead_id, {"step": 1}, expected_version=0)
+        assert lead.version == 1
+
+        with pytest.raises(LeadVersionConflictError) as conflict:
+            db_client.patch_lead_metadata(lead_id, {"step": 2}, expected_version=0)
+
+        assert conflict.value.current_version == 1
+        assert db_client.client.leads[lead_id]["metadata"]["step"] == 1
+
+    def test_unknown_lead(self, db_client):
+        """Test patching a missing lead raises ValueError."""
+        with pytest.raises(ValueError):
+            db_client.patch_lead_metadata(
+                "00000000-0000-0000-0000-000000000009", {"x": 1}, expected_version=0
+            )
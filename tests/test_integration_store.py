@@ -0,0 +1,140 @@
+"""
+Tests for the integration store.
+
+This module tests:
+- Integrations persisting across store instances (restarts)
+- The read-through cache serving a user's integrations from one load
+- Cache updates on writes and expiry after the TTL
+- Stable encryption of integration secrets and the required key outside
+  development
+"""
+
+import pytest
+from cryptography.fernet import Fernet
+
+from app.core import integration_store
+from app.core.config import get_settings
+from app.core.integration_store import IntegrationStore, SQLiteIntegrationBackend
+
+
+class CountingBackend(SQLiteIntegrationBackend):
+    """SQLite backend counting per-user loads."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.loads = 0
+
+    def load_user(self, user_id):
+        self.loads += 1
+        return super().load_user(user_id)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "integrations.db")
+
+
+class TestPersistence:
+    """Test integrations survive a restart."""
+
+    def test_saved_integration_survives_new_store(self, db_path):
+        """Test a second store on the same database sees earlier writes."""
+        IntegrationStore(SQLiteIntegrationBackend(db_path)).save(
+            "u1", "calendly", {"access_token": "enc", "enabled": True}
+        )
+
+        config = IntegrationStore(SQLiteIntegrationBackend(db_path)).get("u1", "calendly")
+
+        assert config["access_token"] == "enc"
+        assert config["platform"] == "calendly" and config["user_id"] == "u1"
+        assert isinstance(config["updated_at"], str)
+
+    def test_delete(self, db_path):
+        """Test deleted integrations are gone for every store."""
+        store = IntegrationStore(SQLiteIntegrationBackend(db_path))
+        store.save("u1", "email", {"smtp": "x"})
+
+        assert store.delete("u1", "email")
+        assert store.get("u1", "email") is None
+        assert IntegrationStore(SQLiteIntegrationBackend(db_path)).get_all("u1") == {}
+
+
+class TestReadThroughCache:
+    """Test the per-user cache."""
+
+    def test_one_load_serves_every_platform(self, db_path):
+        """Test a user's integrations are loaded once for all lookups."""
+        backend = CountingBackend(db_path)
+        IntegrationStore(backend).save("u1", "calendly", {"a": 1})
+        IntegrationStore(backend).save("u1", "whatsapp", {"b": 2})
+        backend.loads = 0
+        store = IntegrationStore(backend)
+
+        assert set(store.get_all("u1")) == {"calendly", "whatsapp"}
+        assert store.get("u1", "calendly")["a"] == 1
+        assert store.get("u1", "instagram") is None
+
+        assert backend.loads == 1
+        assert store.get_statistics()["hits"] == 2
+
+    def test_writes_update_cache_and_copies_are_isolated(self, db_path):
+        """Test writes are visible without a reload and callers cannot mutate the cache."""
+        backend = CountingBackend(db_path)
+        store = IntegrationStore(backend)
+        store.get_all("u1")
+
+        store.save("u1", "calendly", {"meetings_scheduled": 1})
+        config = store.get("u1", "calendly")
+        config["meetings_scheduled"] = 99
+
+        assert store.get("u1", "calendly")["meetings_scheduled"] == 1
+        assert backend.loads == 1
+
+    def test_expired_entries_are_reloaded(self, db_path):
+        """Test another worker's write is seen once the TTL expires."""
+        backend = CountingBackend(db_path)
+        store = IntegrationStore(backend, ttl_seconds=0)
+        other_worker = IntegrationStore(SQLiteIntegrationBackend(db_path))
+
+        assert store.get("u1", "calendly") is None
+        other_worker.save("u1", "calendly", {"a": 1})
+
+        assert store.get("u1", "calendly")["a"] == 1
+        assert backend.loads == 2
+
+
+class TestEncryption:
+    """Test the integration cipher."""
+
+    @pytest.fixture(autouse=True)
+    def no_configured_key(self, monkeypatch):
+        for name in ("PIPEWISE_FERNET_KEY", "OAUTH_ENCRYPTION_KEY", "OAUTH_ENCRYPTION_PASSWORD"):
+            monkeypatch.delenv(name, raising=False)
+        integration_store.get_integration_cipher.cache_clear()
+        yield
+        integration_store.get_integration_cipher.cache_clear()
+
+    def test_cipher_key_is_stable(self, monkeypatch):
+        """Test secrets encrypted by one cipher build decrypt with the next."""
+        monkeypatch.setenv("PIPEWISE_FERNET_KEY", Fernet.generate_key().decode())
+        token = integration_store.get_integration_cipher().encrypt(b"secret")
+
+        integration_store.get_integration_cipher.cache_clear()
+        assert integration_store.get_integration_cipher().decrypt(token) == b"secret"
+        assert integration_store.get_integration_cipher() is integration_store.get_integration_cipher()
+
+    def test_development_default_key_is_logged(self, monkeypatch, caplog):
+        """Test the built-in key still works in development but logs an error."""
+        monkeypatch.setattr(get_settings(), "ENVIRONMENT", "development")
+
+        token = integration_store.get_integration_cipher().encrypt(b"secret")
+
+        assert integration_store.get_integration_cipher().decrypt(token) == b"secret"
+        assert "built-in development key" in caplog.text
+
+    def test_key_is_required_outside_development(self, monkeypatch):
+        """Test production refuses to encrypt with the built-in key."""
+        monkeypatch.setattr(get_settings(), "ENVIRONMENT", "production")
+
+        with pytest.raises(RuntimeError, match="PIPEWISE_FERNET_KEY"):
+            integration_store.get_integration_cipher()
@@ -0,0 +1,445 @@
+"""
+Tests for the background job queue.
+
+This module tests the job subsystem with the in-process backend:
+- Enqueue, execution and persisted results
+- Bounded worker concurrency
+- Idempotency keys and resubmission of failed jobs
+- Job timeouts
+- Jobs interrupted by stop() are re-queued, not acknowledged
+- Redis consumer leases: only crashed workers' jobs are recovered
+- A shared broker is never prefetched beyond free execution slots
+- Status polling and WebSocket endpoints, visible only to the job's owner
+"""
+
+import asyncio
+import time
+from uuid import UUID
+
+import pytest
+from fastapi import FastAPI, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from app.jobs.queue import JobQueue, JobStatus, RedisJobBackend
+from app.jobs.scheduler import Lane, PriorityScheduler
+from app.jobs.workflows import (
+    LEAD_WORKFLOW_JOB,
+    enqueue_lead_workflow,
+    lead_idempotency_key,
+    resolve_job_lane,
+    set_job_queue,
+)
+
+
+class FakeRedis:
+    """The list, set and key commands RedisJobBackend uses, in memory."""
+
+    def __init__(self):
+        self.values = {}
+        self.expires = {}
+        self.lists = {}
+        self.sets = {}
+
+    def _alive(self, key):
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.values
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and self._alive(key):
+            return None
+        self.values[key] = value
+        if ex:
+            self.expires[key] = time.monotonic() + ex
+        return True
+
+    async def get(self, key):
+        return self.values[key] if self._alive(key) else None
+
+    async def exists(self, key):
+        return int(self._alive(key))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.expires.pop(key, None)
+
+    async def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    async def srem(self, key, member):
+        self.sets.get(key, set()).discard(member)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+
+    async def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    async def lrem(self, key, count, value):
+        if value in self.lists.get(key, []):
+            self.lists[key].remove(value)
+
+    async def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    async def lmove(self, source, destination, where_from, where_to):
+        items = self.lists.get(source)
+        if not items:
+            return None
+        value = items.pop(-1 if where_from == "RIGHT" else 0)
+        target = self.lists.setdefault(destination, [])
+        target.insert(len(target) if where_to == "RIGHT" else 0, value)
+        return value
+
+    async def blmove(self, source, destination, timeout, where_from, where_to):
+        value = await self.lmove(source, destination, where_from, where_to)
+        if value is None:
+            await asyncio.sleep(min(timeout, 0.01))
+        return value
+
+    async def aclose(self):
+        pass
+
+
+async def wait_for_status(queue: JobQueue, job_id: str, timeout: float = 2.0):
+    """Poll the store until the job reaches a terminal status."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = await queue.get_job(job_id)
+        if job.is_terminal or asyncio.get_running_loop().time() > deadline:
+            return job
+        await asyncio.sleep(0.01)
+
+
+class TestJobQueue:
+    """Test job execution with the in-memory backend."""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_and_stores_result(self):
+        """Test a queued job runs and its result is persisted."""
+        queue = JobQueue(concurrency=1, poll_timeout_seconds=0.05)
+
+        async def handler(job):
+            return {"echo": job.payload["value"]}
+
+        queue.register_handler("echo", handler)
+        await queue.start()
+
+        job, created = await queue.enqueue("echo", {"value": 42})
+        assert created
+        assert job.status == JobStatus.QUEUED
+
+        finished = await wait_for_status(queue, job.id)
+        assert finished.status == JobStatus.COMPLETED
+        assert finished.result == {"echo": 42}
+        assert finished.attempts == 1
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test no more than `concurrency` jobs execute at once."""
+        queue = JobQueue(concurrency=2, poll_timeout_seconds=0.05)
+        in_flight = 0
+        peak = 0
+
+        async def handler(job):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.02)
+            in_flight -= 1
+            return {}
+
+        queue.register_handler("work", handler)
+        await queue.start()
+
+        jobs = [(await queue.enqueue("work", {"i": i}))[0] for i in range(6)]
+        for job in jobs:
+            await wait_for_status(queue, job.id)
+
+        assert peak == 2
+        assert queue.stats["completed"] == 6
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_idempotency_key_deduplicates(self):
+        """Test resubmitting with the same key returns the existing job."""
+        queue = JobQueue(concurrency=1, poll_timeout_seconds=0.05)
+        calls = 0
+
+        async def handler(job):
+            nonlocal calls
+            calls += 1
+            return {}
+
+        queue.register_handler("work", handler)
+        await queue.start()
+
+        first, created_first = await queue.enqueue("work", {}, idempotency_key="lead-1")
+        second, created_second = await queue.enqueue(
+            "work", {}, idempotency_key="lead-1"
+        )
+        await wait_for_status(queue, first.id)
+
+        assert created_first and not created_second
+        assert second.id == first.id
+        assert calls == 1
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_job_can_be_resubmitted(self):
+        """Test a failed job releases its idempotency key."""
+        queue = JobQueue(concurrency=1, poll_timeout_seconds=0.05)
+        attempts = 0
+
+        async def handler(job):
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise RuntimeError("model unavailable")
+            return {"ok": True}
+
+        queue.register_handler("work", handler)
+        await queue.start()
+
+        first, _ = await queue.enqueue("work", {}, idempotency_key="lead-2")
+        failed = await wait_for_status(queue, first.id)
+        assert failed.status == JobStatus.FAILED
+        assert failed.error == "model unavailable"
+
+        retry, created = await queue.enqueue("work", {}, idempotency_key="lead-2")
+        assert created and retry.id != first.id
+        assert (await wait_for_status(queue, retry.id)).status == JobStatus.COMPLETED
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_job_timeout(self):
+        """Test jobs running past the timeout are failed."""
+        queue = JobQueue(
+            concurrency=1, job_timeout_seconds=0.05, poll_timeout_seconds=0.05
+        )
+
+        async def handler(job):
+            await asyncio.sleep(1)
+
+        queue.register_handler("slow", handler)
+        await queue.start()
+
+        job, _ = await queue.enqueue("slow", {})
+        finished = await wait_for_status(queue, job.id)
+
+        assert finished.status == JobStatus.FAILED
+        assert "timed out" in finished.error
+
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("scheduled", [False, True])
+    async def test_stopped_job_is_requeued(self, scheduled):
+        """Test a job interrupted by stop() goes back to the queue as queued."""
+        options = (
+            {"scheduler": PriorityScheduler(), "lane_resolver": resolve_job_lane}
+            if scheduled
+            else {}
+        )
+        queue = JobQueue(concurrency=1, poll_timeout_seconds=0.05, **options)
+        started = asyncio.Event()
+
+        async def handler(job):
+            started.set()
+            await asyncio.sleep(10)
+
+        queue.register_handler("slow", handler)
+        await queue.start()
+        job, _ = await queue.enqueue("slow", {"lane": Lane.INBOUND_LEAD})
+        await asyncio.wait_for(started.wait(), timeout=2)
+
+        await queue.stop(timeout=0.05)
+
+        stored = await queue.get_job(job.id)
+        assert stored.status == JobStatus.QUEUED and stored.attempts == 1
+        assert queue.backend.queue.get_nowait() == job.id
+
+    def test_unknown_job_type_rejected(self):
+        """Test enqueueing a job type without a handler fails fast."""
+        queue = JobQueue()
+        with pytest.raises(ValueError):
+            asyncio.run(queue.enqueue("missing", {}))
+
+    @pytest.mark.asyncio
+    async def test_explicit_idempotency_key_is_scoped_to_user(self):
+        """Test two users sending the same Idempotency-Key get separate jobs."""
+        queue = JobQueue(poll_timeout_seconds=0.05)
+        queue.register_handler(LEAD_WORKFLOW_JOB, lambda job: asyncio.sleep(0))
+        set_job_queue(queue)
+        lead = {"email": "ana@example.com"}
+
+        first, _ = await enqueue_lead_workflow(lead, {"user_id": "u1"}, "req-1")
+        second, created = await enqueue_lead_workflow(lead, {"user_id": "u2"}, "req-1")
+
+        assert created and first.id != second.id
+        assert second.idempotency_key == "u2:req-1"
+        await queue.stop()
+        set_job_queue(None)
+
+    def test_lead_idempotency_key(self):
+        """Test keys are derived from user, workflow type and lead identity."""
+        lead = {"email": "ana@example.com"}
+
+        assert lead_idempotency_key("u1", lead) == lead_idempotency_key("u1", lead)
+        assert lead_idempotency_key("u1", lead) != lead_idempotency_key("u2", lead)
+        assert lead_idempotency_key("u1", {"idempotency_key": "abc"}) == "u1:abc"
+        assert lead_idempotency_key("u1", {"name": "No identity"}) is None
+
+
+class TestRedisLeases:
+    """Test recovery of the Redis backend's per-consumer processing lists."""
+
+    @pytest.mark.asyncio
+    async def test_only_expired_consumers_are_recovered(self):
+        """Test a live worker's jobs stay put and a crashed worker's are re-queued."""
+        redis = FakeRedis()
+        running = RedisJobBackend("redis://unused", client=redis, lease_seconds=60)
+        starting = RedisJobBackend("redis://unused", client=redis, lease_seconds=60)
+
+        await running.heartbeat()
+        await running.push("job-1")
+        assert await running.pop(timeout=0.01) == "job-1"
+
+        assert await starting.recover() == 0
+        assert await starting.depth() == 0
+
+        await redis.delete(running._lease_key(running.consumer_id))  # lease expired
+        assert await starting.recover() == 1
+        assert await starting.pop(timeout=0.01) == "job-1"
+
+    @pytest.mark.asyncio
+    async def test_shared_broker_is_not_prefetched(self):
+        """Test a worker only takes as many jobs off Redis as it can run."""
+        backend = RedisJobBackend("redis://unused", client=FakeRedis())
+        queue = JobQueue(
+            backend=backend,
+            scheduler=PriorityScheduler(max_concurrency=2),
+            lane_resolver=resolve_job_lane,
+            poll_timeout_seconds=0.05,
+            prefetch=16,
+        )
+        release = asyncio.Event()
+
+        async def handler(job):
+            await release.wait()
+            return {}
+
+        queue.register_handler("work", handler)
+        for i in range(6):
+            await queue.enqueue("work", {"i": i, "lane": Lane.INBOUND_LEAD})
+
+        await queue.start()
+        for _ in range(100):
+            if len(queue.running_jobs) == 2:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+
+        assert await backend.depth() == 4
+        stats = await queue.get_statistics()
+        assert stats["concurrency"] == 2
+        assert stats["fetch_workers"] == 2
+
+        release.set()
+        await queue.stop()
+
+
+class TestJobStatusAPI:
+    """Test polling and WebSocket status endpoints."""
+
+    @pytest.fixture
+    def client(self):
+        pytest.importorskip("gotrue")  # app.api.jobs imports the auth middleware
+        from app.api.events import set_token_resolver
+        from app.api.jobs import router as jobs_router
+        from app.auth.middleware import get_current_user
+        from app.models.user import User
+
+        queue = JobQueue(concurrency=1, poll_timeout_seconds=0.05)
+
+        async def handler(job):
+            await asyncio.sleep(0.05)
+            return {"status": "completed"}
+
+        queue.register_handler("work", handler)
+        set_job_queue(queue)
+
+        # Bearer header and WebSocket token are both the user id
+        app = FastAPI()
+        app.include_router(jobs_router)
+        app.state.user_id = "u1"
+        app.dependency_overrides[get_current_user] = lambda: User(
+            id=UUID(int=int(app.state.user_id[1:])), email="u@example.com", full_name="U"
+        )
+
+        async def resolve(token):
+            return str(UUID(int=int(token[1:])))
+
+        set_token_resolver(resolve)
+
+        @app.post("/enqueue", status_code=202)
+        async def enqueue():
+            await queue.start()
+            job, _ = await queue.enqueue("work", {}, user_id=str(UUID(int=1)))
+            return {"job_id": job.id}
+
+        with TestClient(app) as client:
+            yield client
+
+        set_token_resolver(None)
+        set_job_queue(None)
+
+    def test_poll_until_completed(self, client):
+        """Test the polling endpoint reports the job through completion."""
+        response = client.post("/enqueue")
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        statuses = set()
+        for _ in range(100):
+            body = client.get(f"/api/jobs/{job_id}").json()
+            statuses.add(body["status"])
+            if body["status"] == "completed":
+                break
+            time.sleep(0.01)
+
+        assert body["result"] == {"status": "completed"}
+        assert "completed" in statuses
+        assert client.get("/api/jobs/unknown").status_code == 404
+
+    def test_websocket_streams_until_terminal(self, client):
+        """Test the WebSocket sends updates and closes when the job finishes."""
+        job_id = client.post("/enqueue").json()["job_id"]
+
+        with client.websocket_connect(f"/api/jobs/{job_id}/ws?token=u1") as ws:
+            updates = [ws.receive_json()]
+            while updates[-1]["status"] != "completed":
+                updates.append(ws.receive_json())
+
+        assert updates[-1]["result"] == {"status": "completed"}
+
+    def test_other_users_cannot_see_job(self, client):
+        """Test a job is 404 over HTTP and refused over WebSocket for other users."""
+        job_id = client.post("/enqueue").json()["job_id"]
+        client.app.state.user_id = "u2"
+
+        assert client.get(f"/api/jobs/{job_id}").status_code == 404
+        for url in (f"/api/jobs/{job_id}/ws?token=u2", f"/api/jobs/{job_id}/ws"):
+            with pytest.raises(WebSocketDisconnect):
+                with client.websocket_connect(url) as ws:
+                    ws.receive_json()
@@ -0,0 +1,188 @@
+"""
+Tests for the MCP alert evaluation engine.
+
+This module tests the indexed alert engine including:
+- Rule lookup by (alert_type, service)
+- Sliding-window thresholds for rate limit and auth failure events
+- Fingerprint deduplication of active alerts
+- Escalations driven by the timer heap
+- Event throughput at 10k events/sec
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.ai_agents.mcp.alert_manager import (
+    AlertRule,
+    AlertSeverity,
+    AlertType,
+    MCPAlertManager,
+)
+from app.ai_agents.mcp.health_monitor import ServiceStatus
+
+
+class TestAlertEngine:
+    """Test indexed, incremental alert evaluation."""
+
+    @pytest.fixture
+    def alert_manager(self):
+        """Alert manager without notification channels."""
+        manager = MCPAlertManager()
+        manager.notification_channels.clear()
+        manager.mcp_logger.logger.disabled = True
+        return manager
+
+    def test_rules_indexed_by_type_and_service(self, alert_manager):
+        """Test only rules for the type and service are matched."""
+        alert_manager.add_alert_rule(
+            AlertRule(
+                id="calendly_rate_limit",
+                name="Calendly rate limit",
+                alert_type=AlertType.RATE_LIMIT_EXCEEDED,
+                description="Calendly only",
+                service_names=["calendly"],
+                threshold_value=2,
+            )
+        )
+
+        calendly_rules = alert_manager.get_matching_rules(
+            AlertType.RATE_LIMIT_EXCEEDED, "calendly"
+        )
+        sendgrid_rules = alert_manager.get_matching_rules(
+            AlertType.RATE_LIMIT_EXCEEDED, "sendgrid"
+        )
+
+        assert {r.id for r in calendly_rules} == {
+            "rate_limit_exceeded",
+            "calendly_rate_limit",
+        }
+        assert {r.id for r in sendgrid_rules} == {"rate_limit_exceeded"}
+
+        alert_manager.remove_alert_rule("calendly_rate_limit")
+        assert len(
+            alert_manager.get_matching_rules(AlertType.RATE_LIMIT_EXCEEDED, "calendly")
+        ) == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_threshold(self, alert_manager):
+        """Test an alert fires once the window threshold is reached."""
+        for _ in range(4):
+            await alert_manager.check_rate_limiting("sendgrid", True)
+        assert not alert_manager.active_alerts
+
+        await alert_manager.check_rate_limiting("sendgrid", True)
+
+        alert = alert_manager.active_alerts[
+            "rate_limit_exceeded_sendgrid_rate_limit_exceeded"
+        ]
+        assert alert.context_data["incidents_count"] == 5
+
+    def test_sliding_window_expires_events(self, alert_manager):
+        """Test events older than the rule window stop counting."""
+        rule = alert_manager.alert_rules["rate_limit_exceeded"]
+        now = datetime.now()
+
+        alert_manager._record_window_event(rule, "sendgrid", now - timedelta(hours=1), 5)
+        counter = alert_manager._record_window_event(rule, "sendgrid", now, 5)
+
+        assert counter.count(now) == 1
+
+    @pytest.mark.asyncio
+    async def test_duplicate_alerts_collapse_by_fingerprint(self, alert_manager):
+        """Test repeated triggers and other users fold into the active alert."""
+        for user_id in ["user_1", "user_1", "user_1", "user_2", "user_2", "user_2"]:
+            await alert_manager.check_authentication_failures("google", user_id, True)
+
+        assert list(alert_manager.active_alerts) == [
+            "auth_failure_google_user_1_auth_failure_critical"
+        ]
+        alert = alert_manager.active_alerts[
+            "auth_failure_google_user_1_auth_failure_critical"
+        ]
+        assert alert.occurrence_count == 2
+        assert alert.context_data["user_id"] == "user_2"
+
+        await alert_manager.check_authentication_failures("google", "user_2", True)
+        assert alert.occurrence_count == 3
+
+    @pytest.mark.asyncio
+    async def test_rules_for_same_condition_share_alert(self, alert_manager):
+        """Test two rules matching the same type and service raise one alert."""
+        alert_manager.add_alert_rule(
+            AlertRule(
+                id="sendgrid_rate_limit",
+                name="SendGrid rate limit",
+                alert_type=AlertType.RATE_LIMIT_EXCEEDED,
+                description="SendGrid only",
+                service_names=["sendgrid"],
+                threshold_value=5,
+            )
+        )
+
+        for _ in range(5):
+            await alert_manager.check_rate_limiting("sendgrid", True)
+
+        assert len(alert_manager.active_alerts) == 1
+        alert = next(iter(alert_manager.active_alerts.values()))
+        assert alert.occurrence_count == 2
+
+    @pytest.mark.asyncio
+    async def test_recovery_resolves_service_alerts(self, alert_manager):
+        """Test a healthy status resolves unavailability alerts via the index."""
+        alert_manager.service_downtime["zoho"] = datetime.now() - timedelta(minutes=5)
+        await alert_manager.check_service_unavailability("zoho", ServiceStatus.UNHEALTHY)
+        assert len(alert_manager.active_alerts) == 1
+
+        await alert_manager.check_service_unavailability("zoho", ServiceStatus.HEALTHY)
+
+        assert not alert_manager.active_alerts
+        assert not alert_manager._active_fingerprints
+
+    @pytest.mark.asyncio
+    async def test_escalation_from_timer_heap(self, alert_manager):
+        """Test due escalations are popped from the heap and rescheduled."""
+        alert_manager.add_alert_rule(
+            AlertRule(
+                id="fast_escalation",
+                name="Fast escalation",
+                alert_type=AlertType.HIGH_ERROR_RATE,
+                description="Escalates immediately",
+                severity=AlertSeverity.ERROR,
+                escalation_delay_minutes=0,
+            )
+        )
+        rule = alert_manager.alert_rules["fast_escalation"]
+        alert = await alert_manager._create_alert(
+            "errors_pipedrive", rule, "pipedrive", "Errors", "high", {}
+        )
+
+        await alert_manager._check_escalations()
+
+        assert alert.escalation_level == 1
+        assert len(alert_manager._escalation_heap) == 1
+
+        await alert_manager.resolve_alert("errors_pipedrive", "test")
+        await alert_manager._check_escalations()
+
+        assert alert.escalation_level == 1
+        assert not alert_manager._escalation_heap
+
+    @pytest.mark.asyncio
+    async def test_throughput_10k_events_per_second(self, alert_manager):
+        """Benchmark: 10k mixed events are evaluated in under a second."""
+        services = [f"service_{i}" for i in range(50)]
+
+        start = time.perf_counter()
+        for i in range(10_000):
+            service_name = services[i % len(services)]
+            if i % 2:
+                await alert_manager.check_rate_limiting(service_name, True)
+            else:
+                await alert_manager.check_authentication_failures(
+                    service_name, f"user_{i % 200}", True, "invalid_grant"
+                )
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 1.0, f"10k events took {elapsed:.3f}s"
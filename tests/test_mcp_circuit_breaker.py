@@ -0,0 +1,211 @@
+"""
+Tests for the shared MCP circuit breakers.
+
+This module tests:
+- Sliding-window failure-rate tripping and window expiry
+- Half-open probe limits, recovery and reopening
+- Registry keys shared across server instances, per user or global
+- retry_mcp_operation short-circuiting while the breaker is open
+- Health-unrelated errors not tripping the breaker
+"""
+
+import pytest
+
+from app.ai_agents.mcp.circuit_breaker import (
+    BreakerState,
+    CircuitBreakerConfig,
+    CircuitBreakerRegistry,
+    InMemoryBreakerStore,
+    set_circuit_breaker_registry,
+)
+from app.ai_agents.mcp.error_handler import (
+    MCPAuthenticationError,
+    MCPCircuitOpenError,
+    MCPConnectionError,
+)
+from app.ai_agents.mcp.retry_handler import RetryStrategy, retry_mcp_operation
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def registry(clock):
+    config = CircuitBreakerConfig(
+        failure_rate=0.5,
+        minimum_calls=4,
+        window_seconds=10,
+        recovery_timeout=30,
+        half_open_max_calls=2,
+    )
+    registry = CircuitBreakerRegistry(InMemoryBreakerStore(), config=config, clock=clock)
+    set_circuit_breaker_registry(registry)
+    yield registry
+    set_circuit_breaker_registry(None)
+
+
+async def record(breaker, outcomes):
+    for ok in outcomes:
+        if ok:
+            await breaker.record_success()
+        else:
+            await breaker.record_failure()
+
+
+class TestCircuitBreaker:
+    """Test the breaker state machine."""
+
+    @pytest.mark.asyncio
+    async def test_opens_on_failure_rate(self, registry):
+        """Test the breaker opens once the window failure rate is reached."""
+        breaker = registry.get("calendly")
+
+        await record(breaker, [True, False, True])
+        assert breaker.state == BreakerState.CLOSED  # below minimum_calls
+
+        await breaker.record_failure()
+        assert breaker.state == BreakerState.OPEN
+        assert not await breaker.allow()
+
+    @pytest.mark.asyncio
+    async def test_old_failures_leave_the_window(self, registry, clock):
+        """Test failures older than the window no longer count."""
+        breaker = registry.get("calendly")
+
+        await record(breaker, [False, False, True])
+        clock.advance(11)
+        await record(breaker, [True, True, True, False])
+
+        assert breaker.state == BreakerState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_limit_and_recovery(self, registry, clock):
+        """Test only half_open_max_calls probes pass and successes close it."""
+        breaker = registry.get("calendly")
+        await record(breaker, [False] * 4)
+
+        clock.advance(31)
+        assert await breaker.allow() and await breaker.allow()
+        assert not await breaker.allow()  # probe limit reached
+        assert breaker.state == BreakerState.HALF_OPEN
+
+        await record(breaker, [True, True])
+        assert breaker.state == BreakerState.CLOSED
+        assert await breaker.allow()
+
+    @pytest.mark.asyncio
+    async def test_probe_failure_reopens(self, registry, clock):
+        """Test a failed probe reopens the breaker for another recovery period."""
+        breaker = registry.get("calendly")
+        await record(breaker, [False] * 4)
+        clock.advance(31)
+
+        assert await breaker.allow()
+        await breaker.record_failure()
+
+        assert breaker.state == BreakerState.OPEN
+        with pytest.raises(MCPCircuitOpenError) as rejected:
+            await breaker.check()
+        assert rejected.value.retry_after_seconds == pytest.approx(30)
+
+
+class TestCircuitBreakerRegistry:
+    """Test breaker sharing by key."""
+
+    @pytest.mark.asyncio
+    async def test_instances_share_state(self, registry, clock):
+        """Test breakers for the same key share state through the store."""
+        other_worker = CircuitBreakerRegistry(
+            registry.store, config=registry.config, clock=clock
+        )
+
+        await record(registry.get("calendly"), [False] * 4)
+
+        assert not await other_worker.get("calendly").allow()
+        assert await registry.get("calendly", user_id="user-1").allow()
+        assert await registry.get("sendgrid").allow()
+
+
+class TestRetryShortCircuit:
+    """Test retry_mcp_operation integration."""
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_skips_operation(self, registry):
+        """Test calls fail fast while the service breaker is open."""
+        calls = 0
+
+        @retry_mcp_operation(
+            service_name="calendly",
+            strategy=RetryStrategy(max_attempts=2, base_delay=0, jitter=False),
+            log_attempts=False,
+        )
+        async def create_event():
+            nonlocal calls
+            calls += 1
+            raise ConnectionError("connection refused")
+
+        for _ in range(2):
+            with pytest.raises(MCPConnectionError):
+                await create_event()
+        assert calls == 4
+
+        with pytest.raises(MCPCircuitOpenError):
+            await create_event()
+        assert calls == 4
+
+    @pytest.mark.asyncio
+    async def test_breaker_per_service_argument_and_auth_errors(self, registry):
+        """Test breakers keyed by the called service and that auth errors do not trip them."""
+
+        @retry_mcp_operation(
+            service_name="token_refresh",
+            strategy=RetryStrategy(max_attempts=1),
+            service_arg="service_name",
+            log_attempts=False,
+        )
+        async def refresh(user_id, service_name):
+            raise MCPAuthenticationError(service_name, "token revoked")
+
+        for _ in range(5):
+            with pytest.raises(MCPAuthenticationError):
+                await refresh("user-1", service_name="google_calendar")
+
+        breaker = registry.get("token_refresh:google_calendar")
+        assert breaker.state == BreakerState.CLOSED
+        assert registry.get_statistics()["breakers"] == 1
+
+    @pytest.mark.asyncio
+    async def test_outage_of_one_service_leaves_others_callable(self, registry):
+        """Test one provider's open breaker does not short-circuit another's calls."""
+
+        @retry_mcp_operation(
+            service_name="token_refresh",
+            strategy=RetryStrategy(max_attempts=1),
+            service_arg="service_name",
+            log_attempts=False,
+        )
+        async def refresh(user_id, service_name):
+            if service_name == "calendly":
+                raise ConnectionError("connection refused")
+            return service_name
+
+        for _ in range(4):
+            with pytest.raises(MCPConnectionError):
+                await refresh("user-1", "calendly")
+        with pytest.raises(MCPCircuitOpenError):
+            await refresh("user-1", "calendly")
+
+        assert await refresh("user-1", "google_calendar") == "google_calendar"
@@ -0,0 +1,143 @@
+"""
+Tests for concurrent MCP server connection.
+
+This module tests connect_mcp_servers_properly:
+- Servers connect concurrently rather than one after another
+- A hanging server times out without blocking the others
+- Retries are scoped to the failing server
+- Early return on quorum and on the overall deadline
+- The caller's deadline_scope() cutting the fan-out short
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.ai_agents.mcp.error_handler import MCPConnectionError, MCPErrorCategory
+from app.ai_agents.mcp.mcp_server_manager import connect_mcp_servers_properly
+from app.ai_agents.mcp.retry_handler import RetryStrategy, deadline_scope
+
+
+class FakeServer:
+    """MCP server stand-in with scripted connect behaviour."""
+
+    def __init__(self, name, latency=0.0, failures=0, hang=False):
+        self.name = name
+        self.latency = latency
+        self.failures = failures
+        self.hang = hang
+        self.connect_calls = 0
+        self.cancelled = False
+
+    async def connect(self):
+        self.connect_calls += 1
+        try:
+            if self.hang:
+                await asyncio.sleep(3600)
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.connect_calls <= self.failures:
+            raise ConnectionError(f"connection refused by {self.name}")
+
+
+@pytest.fixture
+def fast_retries():
+    return RetryStrategy(max_attempts=3, base_delay=0.01, jitter=False)
+
+
+class TestConnectMCPServers:
+    """Test the concurrent connection fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_servers_connect_concurrently(self, fast_retries):
+        """Test total time is close to the slowest server, not the sum."""
+        servers = [FakeServer(f"s{i}", latency=0.1) for i in range(5)]
+
+        started = time.perf_counter()
+        connected = await connect_mcp_servers_properly(servers, strategy=fast_retries)
+
+        assert connected == servers
+        assert time.perf_counter() - started < 0.3
+
+    @pytest.mark.asyncio
+    async def test_hanging_server_times_out(self, fast_retries):
+        """Test a hanging server is dropped after its timeout."""
+        hanging = FakeServer("pipedream", hang=True)
+        healthy = FakeServer("sendgrid", latency=0.01)
+
+        connected = await connect_mcp_servers_properly(
+            [hanging, healthy], connect_timeout=0.05, strategy=fast_retries
+        )
+
+        assert connected == [healthy]
+        assert hanging.connect_calls == 3
+        assert healthy.connect_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_retry_is_scoped_to_failing_server(self, fast_retries):
+        """Test only the failing server is reconnected."""
+        flaky = FakeServer("twitter", failures=1)
+        stable = FakeServer("calendly")
+
+        connected = await connect_mcp_servers_properly([flaky, stable], strategy=fast_retries)
+
+        assert connected == [flaky, stable]
+        assert flaky.connect_calls == 2
+        assert stable.connect_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_quorum_returns_early(self, fast_retries):
+        """Test the call returns once the quorum connected and cancels the rest."""
+        fast = [FakeServer(f"fast{i}", latency=0.01) for i in range(2)]
+        slow = FakeServer("slow", latency=5)
+
+        started = time.perf_counter()
+        connected = await connect_mcp_servers_properly(
+            fast + [slow], quorum=2, strategy=fast_retries
+        )
+
+        assert connected == fast
+        assert slow.cancelled
+        assert time.perf_counter() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_deadline_returns_partial_results(self, fast_retries):
+        """Test the overall deadline bounds the fan-out."""
+        fast = FakeServer("fast", latency=0.01)
+        slow = FakeServer("slow", latency=5)
+
+        connected = await connect_mcp_servers_properly(
+            [fast, slow], connect_timeout=10, deadline=0.1, strategy=fast_retries
+        )
+
+        assert connected == [fast]
+        assert slow.cancelled
+
+    @pytest.mark.asyncio
+    async def test_caller_deadline_bounds_fan_out(self, fast_retries):
+        """Test an agent run's deadline cuts the fan-out short of its own deadline."""
+        fast = FakeServer("fast", latency=0.01)
+        slow = FakeServer("slow", latency=5)
+
+        started = time.perf_counter()
+        with deadline_scope(0.1):
+            connected = await connect_mcp_servers_properly(
+                [fast, slow], connect_timeout=10, deadline=30, strategy=fast_retries
+            )
+
+        assert connected == [fast]
+        assert time.perf_counter() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_all_failures_raise(self):
+        """Test a connection error is raised when nothing connects."""
+        strategy = RetryStrategy(
+            max_attempts=1, retryable_errors=[MCPErrorCategory.CONNECTION]
+        )
+        servers = [FakeServer("a", failures=5), FakeServer("b", failures=5)]
+
+        with pytest.raises(MCPConnectionError):
+            await connect_mcp_servers_properly(servers, strategy=strategy)
@@ -0,0 +1,141 @@
+"""
+Tests for MCP health monitor scheduling and pooled HTTP probes.
+
+This module exercises the health monitor offline through StubHealthTransport:
+- Shared HTTP client reuse across probes
+- Concurrency limit on in-flight probes
+- Adaptive backoff and jittered scheduling for services
+- Independent probe schedules in the monitoring loop
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.ai_agents.mcp.health_monitor import (
+    MCPHealthMonitor,
+    ServiceStatus,
+    StubHealthTransport,
+)
+
+
+class TestHealthMonitorScheduling:
+    """Test pooled probes and per-service scheduling."""
+
+    @pytest.fixture
+    def transport(self):
+        """Stub transport answering every probe locally."""
+        return StubHealthTransport(default_latency_ms=5)
+
+    @pytest.fixture
+    def monitor(self, transport):
+        """Health monitor wired to the stub transport."""
+        return MCPHealthMonitor(
+            check_interval=60,
+            enable_auto_alerts=False,
+            max_concurrent_checks=2,
+            transport=transport,
+        )
+
+    @pytest.mark.asyncio
+    async def test_probes_share_one_client(self, monitor, transport):
+        """Test every probe goes through the same pooled client."""
+        monitor.register_service("sendgrid", {"api_key": "key"})
+        monitor.register_service("calendly", {"access_token": "token"})
+
+        first_client = monitor._get_http_client()
+        results = await monitor.check_all_services()
+
+        assert monitor._get_http_client() is first_client
+        assert transport.request_count == 2
+        assert all(r.status == ServiceStatus.HEALTHY for r in results.values())
+
+        await monitor.close()
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_status_from_stub(self, monitor, transport):
+        """Test per-host stub responses drive the service status."""
+        transport.host_status["api.calendly.com"] = 503
+        monitor.register_service("calendly", {"access_token": "token"})
+
+        result = await monitor.check_service_health("calendly")
+
+        assert result.status == ServiceStatus.DEGRADED
+        assert result.details["status_code"] == 503
+
+        await monitor.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, monitor):
+        """Test no more than max_concurrent_checks probes run at once."""
+        in_flight = 0
+        peak = 0
+
+        async def slow_checker(config):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return await monitor._check_sendgrid_health(config)
+
+        for i in range(6):
+            monitor.register_service(f"service_{i}", {}, health_checker=slow_checker)
+
+        await monitor.check_all_services()
+
+        assert peak == monitor.max_concurrent_checks
+
+        await monitor.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_probe_does_not_delay_other_services(self, monitor):
+        """Test a hanging probe leaves other services on their own schedule."""
+        calls = {"slow": 0, "fast": 0}
+
+        async def slow_checker(config):
+            calls["slow"] += 1
+            await asyncio.sleep(30)
+
+        async def fast_checker(config):
+            calls["fast"] += 1
+            return await monitor._check_sendgrid_health(config)
+
+        monitor.register_service("slow", {}, health_checker=slow_checker)
+        monitor.register_service("fast", {}, health_checker=fast_checker)
+        monitor.next_check_at = {"slow": 0, "fast": 0}
+        monitor._schedule_next_check = lambda name: monitor.next_check_at.__setitem__(
+            name, time.monotonic() + 0.02
+        )
+
+        await monitor.start_monitoring()
+        await asyncio.sleep(0.3)
+        await monitor.stop_monitoring()
+
+        assert calls["slow"] == 1
+        assert calls["fast"] >= 3
+
+    def test_backoff_for_unhealthy_service(self, monitor):
+        """Test the probe interval grows with consecutive failures."""
+        monitor.register_service("pipedrive", {}, check_interval=30)
+
+        assert monitor.get_check_interval("pipedrive") == 30
+
+        monitor.metrics["pipedrive"].consecutive_failures = 2
+        assert monitor.get_check_interval("pipedrive") == 120
+
+        monitor.metrics["pipedrive"].consecutive_failures = 20
+        assert monitor.get_check_interval("pipedrive") == monitor.max_backoff_interval
+
+    def test_jittered_schedule(self, monitor):
+        """Test the next probe lands within the jitter band of the interval."""
+        monitor.register_service("zoho", {})
+
+        before = time.monotonic()
+        monitor._schedule_next_check("zoho")
+        delay = monitor.next_check_at["zoho"] - before
+
+        spread = monitor.check_interval * monitor.jitter_ratio
+        assert monitor.check_interval - spread <= delay
+        assert delay <= monitor.check_interval + spread + 1
@@ -0,0 +1,263 @@
+"""
+Tests for queued alert notification delivery.
+
+This module tests the notification dispatcher including:
+- Token-bucket rate limiting
+- Digest coalescing of queued alerts
+- Retry with backoff on failed deliveries, recorded once with the attempt count
+- Escalation titles derived per notification
+- Channel isolation from slow endpoints
+- Webhook delivery end to end through LocalHTTPSink
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.ai_agents.mcp.alert_manager import (
+    AlertChannel,
+    AlertRule,
+    AlertType,
+    MCPAlertManager,
+    NotificationChannel,
+)
+from app.ai_agents.mcp.notification_dispatcher import LocalHTTPSink, NotificationDispatcher
+from app.ai_agents.mcp.retry_handler import RetryStrategy
+from app.core.rate_limit import TokenBucket
+
+
+def fast_retry_strategy(max_attempts: int = 3) -> RetryStrategy:
+    """Retry strategy without real waiting between attempts."""
+    return RetryStrategy(max_attempts=max_attempts, base_delay=0.001, jitter=False)
+
+
+class TestTokenBucket:
+    """Test the token bucket rate limiter."""
+
+    def test_burst_then_refill(self):
+        """Test the bucket allows a burst and then refuses until refilled."""
+        bucket = TokenBucket(rate_per_second=100, capacity=2)
+
+        assert bucket.try_acquire()
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+        assert 0 < bucket.time_until_available() <= 0.01
+
+        time.sleep(0.02)
+        assert bucket.try_acquire()
+
+
+class TestNotificationDispatcher:
+    """Test queue-backed notification delivery."""
+
+    @pytest.mark.asyncio
+    async def test_alerts_coalesce_into_digest(self):
+        """Test alerts queued within the digest window are delivered together."""
+        deliveries = []
+
+        async def deliver(channel_name, batch):
+            deliveries.append([item.alert for item in batch])
+            return True
+
+        dispatcher = NotificationDispatcher(deliver, digest_window_seconds=0.05)
+        for i in range(5):
+            dispatcher.submit("slack", f"alert_{i}", None)
+
+        await dispatcher.drain(timeout=1)
+
+        assert deliveries == [[f"alert_{i}" for i in range(5)]]
+        assert dispatcher.get_statistics()["slack"]["digests"] == 1
+
+        await dispatcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_delivery_is_retried(self):
+        """Test failed deliveries are retried with the retry strategy."""
+        attempts = 0
+
+        async def deliver(channel_name, batch):
+            nonlocal attempts
+            attempts += 1
+            return attempts == 3
+
+        dispatcher = NotificationDispatcher(
+            deliver, digest_window_seconds=0, retry_strategy=fast_retry_strategy()
+        )
+        dispatcher.submit("webhook", "alert", None)
+        await dispatcher.drain(timeout=1)
+
+        stats = dispatcher.get_statistics()["webhook"]
+        assert attempts == 3
+        assert stats["retries"] == 2
+        assert stats["delivered"] == 1
+
+        await dispatcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_slow_channel_does_not_block_others(self):
+        """Test a slow channel does not delay delivery on other channels."""
+        delivered_at = {}
+
+        async def deliver(channel_name, batch):
+            if channel_name == "slack":
+                await asyncio.sleep(0.5)
+            delivered_at[channel_name] = time.monotonic()
+            return True
+
+        dispatcher = NotificationDispatcher(deliver, digest_window_seconds=0)
+        start = time.monotonic()
+        dispatcher.submit("slack", "alert", None)
+        dispatcher.submit("email", "alert", None)
+
+        await asyncio.sleep(0.1)
+
+        assert delivered_at["email"] - start < 0.1
+        assert "slack" not in delivered_at
+
+        await dispatcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_alert(self):
+        """Test the queue bound drops new alerts instead of blocking."""
+
+        async def deliver(channel_name, batch):
+            await asyncio.sleep(1)
+            return True
+
+        dispatcher = NotificationDispatcher(deliver, max_queue_size=1)
+        assert dispatcher.submit("slack", "first", None)
+        assert not dispatcher.submit("slack", "second", None)
+        assert dispatcher.get_statistics()["slack"]["dropped"] == 1
+
+        await dispatcher.stop(drain_timeout=None)
+
+
+class TestAlertManagerDelivery:
+    """Test alert manager notifications through the dispatcher."""
+
+    @pytest.mark.asyncio
+    async def test_webhook_digest_reaches_local_sink(self):
+        """Test alerts created together arrive at the webhook as one digest."""
+        async with LocalHTTPSink() as sink:
+            manager = MCPAlertManager()
+            manager.mcp_logger.logger.disabled = True
+            manager.notification_channels.clear()
+            manager.notification_dispatcher.digest_window_seconds = 0.05
+            manager.add_notification_channel(
+                NotificationChannel(
+                    channel_type=AlertChannel.WEBHOOK,
+                    name="test_webhook",
+                    config={"url": f"{sink.url}/alerts"},
+                )
+            )
+            rule = AlertRule(
+                id="webhook_rule",
+                name="Webhook rule",
+                alert_type=AlertType.HIGH_ERROR_RATE,
+                description="Routes to the webhook",
+                channels=[AlertChannel.WEBHOOK],
+            )
+            manager.add_alert_rule(rule)
+
+            first = await manager._create_alert(
+                "errors_a", rule, "sendgrid", "Errors", "high", {}
+            )
+            second = await manager._create_alert(
+                "errors_b", rule, "calendly", "Errors", "high", {}
+            )
+
+            await manager.notification_dispatcher.drain(timeout=2)
+            await manager.stop_monitoring()
+            await manager.notification_dispatcher.stop()
+
+            assert len(sink.requests) == 1
+            payload = sink.requests[0]["json"]
+            assert payload["alert"]["context_data"]["alert_ids"] == [
+                "errors_a",
+                "errors_b",
+            ]
+            assert first.notifications_sent[0]["success"] is True
+            assert second.notifications_sent[0]["digest_id"] == payload["alert"]["id"]
+
+    @pytest.mark.asyncio
+    async def test_retried_delivery_recorded_once(self):
+        """Test a delivery that needed retries leaves one record with its attempts."""
+        manager = MCPAlertManager()
+        manager.mcp_logger.logger.disabled = True
+        manager.notification_channels.clear()
+        manager.notification_dispatcher.digest_window_seconds = 0
+        manager.notification_dispatcher.retry_strategy = fast_retry_strategy()
+        manager.add_notification_channel(
+            NotificationChannel(
+                channel_type=AlertChannel.WEBHOOK,
+                name="flaky_webhook",
+                config={"url": "http://flaky.test/alerts"},
+            )
+        )
+        rule = AlertRule(
+            id="webhook_rule",
+            name="Webhook rule",
+            alert_type=AlertType.HIGH_ERROR_RATE,
+            description="Routes to the webhook",
+            channels=[AlertChannel.WEBHOOK],
+        )
+        manager.add_alert_rule(rule)
+        results = iter([False, False, True])
+
+        async def send(channel, alert, rule):
+            return next(results)
+
+        manager._send_notification = send
+        alert = await manager._create_alert(
+            "errors_a", rule, "sendgrid", "Errors", "high", {}
+        )
+        await manager.notification_dispatcher.drain(timeout=1)
+        await manager.notification_dispatcher.stop()
+
+        assert len(alert.notifications_sent) == 1
+        assert alert.notifications_sent[0]["success"] is True
+        assert alert.notifications_sent[0]["attempts"] == 3
+
+    @pytest.mark.asyncio
+    async def test_escalation_title_is_not_stored_on_alert(self):
+        """Test escalated notifications carry the prefix without changing the alert."""
+        manager = MCPAlertManager()
+        manager.mcp_logger.logger.disabled = True
+        manager.notification_channels.clear()
+        manager.notification_dispatcher.digest_window_seconds = 0
+        manager.add_notification_channel(
+            NotificationChannel(
+                channel_type=AlertChannel.WEBHOOK,
+                name="test_webhook",
+                config={"url": "http://sink.test/alerts"},
+            )
+        )
+        rule = AlertRule(
+            id="fast_escalation",
+            name="Fast escalation",
+            alert_type=AlertType.HIGH_ERROR_RATE,
+            description="Escalates immediately",
+            channels=[AlertChannel.WEBHOOK],
+            escalation_delay_minutes=0,
+        )
+        manager.add_alert_rule(rule)
+        titles = []
+
+        async def send(channel, alert, rule):
+            titles.append(alert.title)
+            return True
+
+        manager._send_notification = send
+        alert = await manager._create_alert(
+            "errors_a", rule, "sendgrid", "Errors", "high", {}
+        )
+        await manager.notification_dispatcher.drain(timeout=1)
+        for _ in range(2):
+            await manager._check_escalations()
+            await manager.notification_dispatcher.drain(timeout=1)
+        await manager.notification_dispatcher.stop()
+
+        assert titles == ["Errors", "[ESCALATED 1x] Errors", "[ESCALATED 2x] Errors"]
+        assert alert.title == "Errors"
+        assert [n["escalation_level"] for n in alert.notifications_sent] == [0, 1, 2]
@@ -0,0 +1,231 @@
+"""
+Tests for retry budgets, deadlines and hedging in the MCP retry handler.
+
+This module tests:
+- The per-service retry budget caps retries during an outage
+- deadline_scope() stops retries and cancels slow attempts; with_deadline()
+  sets one for an entry point
+- Hedged requests for slow idempotent reads, cancelled with their caller
+- Sync retries never sleep on the event loop thread
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.ai_agents.mcp.error_handler import MCPConnectionError, MCPTimeoutError
+from app.ai_agents.mcp.retry_handler import (
+    LatencyTracker,
+    RetryBudget,
+    RetryStrategy,
+    deadline_scope,
+    get_latency_tracker,
+    hedged_call,
+    remaining_time,
+    retry_mcp_operation,
+    set_retry_budget,
+    with_deadline,
+)
+
+FAST_RETRIES = RetryStrategy(max_attempts=3, base_delay=0.01, jitter=False)
+
+
+@pytest.fixture
+def budget():
+    budget = RetryBudget(ratio=0.1, min_per_second=0.0, max_tokens=2)
+    set_retry_budget("budget_test", budget)
+    yield budget
+    set_retry_budget("budget_test", None)
+
+
+class TestRetryBudget:
+    """Test retries drawn from the shared token bucket."""
+
+    def test_bucket_refills_from_requests(self):
+        """Test requests deposit fractional tokens up to the cap."""
+        budget = RetryBudget(ratio=0.5, min_per_second=0.0, max_tokens=1)
+        assert budget.try_acquire()
+        assert not budget.try_acquire()
+
+        budget.record_request()
+        budget.record_request()
+        assert budget.try_acquire()
+        assert budget.rejected == 1
+
+    @pytest.mark.asyncio
+    async def test_outage_retries_are_capped(self, budget):
+        """Test only the budgeted retries happen across many failing calls."""
+        calls = 0
+
+        @retry_mcp_operation(
+            service_name="budget_test",
+            strategy=FAST_RETRIES,
+            circuit_breaker=False,
+            log_attempts=False,
+        )
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            raise ConnectionError("connection refused")
+
+        for _ in range(5):
+            with pytest.raises(MCPConnectionError):
+                await fetch()
+
+        # 5 first attempts + the 2 budgeted retries (deposits stay below 1 token)
+        assert calls == 7
+        assert budget.rejected >= 1
+
+
+class TestDeadlines:
+    """Test deadline propagation."""
+
+    @pytest.mark.asyncio
+    async def test_deadline_cancels_slow_attempt(self):
+        """Test an attempt running past the caller's deadline times out."""
+
+        @retry_mcp_operation(
+            service_name="deadline_test",
+            strategy=RetryStrategy(max_attempts=1),
+            circuit_breaker=False,
+            log_attempts=False,
+        )
+        async def slow():
+            await asyncio.sleep(5)
+
+        started = time.monotonic()
+        with deadline_scope(0.05):
+            with pytest.raises(MCPTimeoutError):
+                await slow()
+        assert time.monotonic() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_no_retry_past_deadline(self):
+        """Test a backoff longer than the remaining time is not slept."""
+        calls = 0
+
+        @retry_mcp_operation(
+            service_name="deadline_test",
+            strategy=RetryStrategy(max_attempts=3, base_delay=1.0, jitter=False),
+            circuit_breaker=False,
+            log_attempts=False,
+        )
+        async def flaky():
+            nonlocal calls
+            calls += 1
+            raise ConnectionError("connection reset")
+
+        started = time.monotonic()
+        with deadline_scope(0.5):
+            with pytest.raises(MCPConnectionError):
+                await flaky()
+
+        assert calls == 1
+        assert time.monotonic() - started < 0.5
+
+    @pytest.mark.asyncio
+    async def test_with_deadline_bounds_entry_point(self):
+        """Test with_deadline() gives the calls of an entry point a deadline."""
+
+        @with_deadline(lambda: 2)
+        async def run():
+            return remaining_time()
+
+        remaining = await run()
+        assert 0 < remaining <= 2
+        assert remaining_time() is None
+
+    def test_nested_scopes_keep_earliest(self):
+        """Test an inner scope cannot extend the caller's deadline."""
+        assert remaining_time() is None
+        with deadline_scope(1):
+            with deadline_scope(60):
+                assert remaining_time() <= 1
+
+
+class TestHedging:
+    """Test hedged requests for slow reads."""
+
+    @pytest.mark.asyncio
+    async def test_slow_request_is_hedged(self):
+        """Test a second request wins when the first exceeds p95 latency."""
+        tracker = get_latency_tracker("hedge_test:lookup")
+        for _ in range(tracker.min_samples):
+            tracker.record(0.01)
+        latencies = iter([5.0, 0.01])
+        calls = 0
+
+        @retry_mcp_operation(
+            service_name="hedge_test",
+            operation_name="lookup",
+            strategy=FAST_RETRIES,
+            circuit_breaker=False,
+            hedge=True,
+            log_attempts=False,
+        )
+        async def lookup():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(next(latencies))
+            return calls
+
+        started = time.monotonic()
+        result = await lookup()
+
+        assert result == 2 and calls == 2
+        assert time.monotonic() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_cancels_both_requests(self):
+        """Test cancelling a hedged call cancels the original and the hedge."""
+        started = []
+        cancelled = []
+
+        async def lookup():
+            started.append(True)
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        call = asyncio.create_task(hedged_call(lookup, 0.01))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        await asyncio.sleep(0)
+
+        assert len(started) == 2 and len(cancelled) == 2
+
+    def test_percentile_needs_samples(self):
+        """Test hedging is off until enough latencies were seen."""
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record(0.1)
+        assert tracker.percentile(0.95) is None
+
+
+class TestSyncRetries:
+    """Test sync operations are safe to call from async code."""
+
+    @pytest.mark.asyncio
+    async def test_sync_call_on_loop_does_not_sleep(self):
+        """Test a sync retry on the loop thread fails fast instead of sleeping."""
+        calls = 0
+
+        @retry_mcp_operation(
+            strategy=RetryStrategy(max_attempts=3, base_delay=5, jitter=False),
+            log_attempts=False,
+        )
+        def fetch():
+            nonlocal calls
+            calls += 1
+            raise ConnectionError("connection refused")
+
+        started = time.monotonic()
+        with pytest.raises(MCPConnectionError):
+            fetch()
+
+        assert calls == 1
+        assert time.monotonic() - started < 1
@@ -0,0 +1,100 @@
+"""
+Tests for the MCP structured logger statistics.
+
+This module tests the per-minute statistics buckets including:
+- Windowed usage statistics by service and agent
+- Authentication statistics by service
+- Bucket expiry on retention cleanup
+"""
+
+import pytest
+from datetime import datetime, timedelta
+
+from app.ai_agents.mcp.structured_logger import MCPStructuredLogger
+
+
+class TestStructuredLoggerStatistics:
+    """Test bucketed usage and authentication statistics."""
+
+    @pytest.fixture
+    def mcp_logger(self):
+        """Create a structured logger without a background cleanup task."""
+        logger = MCPStructuredLogger(logger_name="test_mcp_statistics")
+        logger.stop_cleanup_task()
+        return logger
+
+    def test_usage_statistics_aggregate_by_service_and_agent(self, mcp_logger):
+        """Test usage counters are summed per (service, agent) pair."""
+        mcp_logger.log_usage("sendgrid", "coordinator", "send", None, True, 100)
+        mcp_logger.log_usage("sendgrid", "coordinator", "send", None, False, 300)
+        mcp_logger.log_usage("calendly", "scheduler", "book", None, True, 50)
+
+        stats = mcp_logger.get_usage_statistics(time_window_hours=1)
+
+        assert stats["total_operations"] == 3
+        assert stats["successful_operations"] == 2
+        assert stats["failed_operations"] == 1
+        assert stats["avg_execution_time_ms"] == 150
+
+        sendgrid = stats["by_service_and_agent"]["sendgrid:coordinator"]
+        assert sendgrid["operations"] == 2
+        assert sendgrid["success"] == 1
+        assert sendgrid["avg_time"] == 200
+        assert sendgrid["success_rate"] == 50
+
+    def test_usage_statistics_service_filter(self, mcp_logger):
+        """Test filtering usage statistics by service name."""
+        mcp_logger.log_usage("sendgrid", "coordinator", "send", None, True, 100)
+        mcp_logger.log_usage("calendly", "scheduler", "book", None, True, 50)
+
+        stats = mcp_logger.get_usage_statistics(service_name="calendly")
+
+        assert stats["total_operations"] == 1
+        assert list(stats["by_service_and_agent"]) == ["calendly:scheduler"]
+
+    def test_usage_statistics_time_window(self, mcp_logger):
+        """Test events outside the time window are excluded."""
+        mcp_logger.log_usage("sendgrid", "coordinator", "send", None, True, 100)
+
+        # Age the only bucket past the window
+        mcp_logger.stat_buckets[0].minute -= timedelta(hours=3)
+        mcp_logger.log_usage("sendgrid", "coordinator", "send", None, True, 100)
+
+        assert mcp_logger.get_usage_statistics(time_window_hours=1)[
+            "total_operations"
+        ] == 1
+        assert mcp_logger.get_usage_statistics()["total_operations"] == 2
+
+    def test_authentication_statistics(self, mcp_logger):
+        """Test authentication counters and error types per service."""
+        mcp_logger.log_authentication("google", "refresh", True, "user_1")
+        mcp_logger.log_authentication(
+            "google", "refresh", False, "user_1", error_code="invalid_grant"
+        )
+        mcp_logger.log_authentication(
+            "google", "refresh", False, "user_2", error_code="invalid_grant"
+        )
+
+        stats = mcp_logger.get_authentication_statistics(time_window_hours=1)
+        google = stats["by_service"]["google"]
+
+        assert google["total_attempts"] == 3
+        assert google["successful_attempts"] == 1
+        assert google["failed_attempts"] == 2
+        assert google["error_types"]["invalid_grant"] == 2
+
+    def test_cleanup_drops_expired_buckets_and_logs(self, mcp_logger):
+        """Test retention cleanup drops old buckets and raw log entries."""
+        mcp_logger.log_usage("sendgrid", "coordinator", "send", None, True, 100)
+
+        expired = datetime.now() - timedelta(
+            hours=mcp_logger.metrics_retention_hours + 1
+        )
+        mcp_logger.stat_buckets[0].minute = expired
+        mcp_logger.usage_logs[0].timestamp = expired
+
+        mcp_logger.cleanup_old_metrics()
+
+        assert len(mcp_logger.stat_buckets) == 0
+        assert len(mcp_logger.usage_logs) == 0
+        assert mcp_logger.get_usage_statistics()["total_operations"] == 0
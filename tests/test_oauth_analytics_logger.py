@@ -0,0 +1,255 @@
+"""
+Tests for the OAuth analytics logger.
+
+This module tests:
+- Size- and time-triggered background flushes
+- The bounded ring buffer and its drop counter
+- Retries, spilling to disk and re-sending spilled events
+- Flushing on shutdown
+- Summaries computed from daily rollups, read past the PostgREST row cap
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.ai_agents.mcp.oauth_analytics_logger import (
+    OAuthAnalyticsLogger,
+    select_all_pages,
+)
+from app.ai_agents.mcp.oauth_integration import OAuthProvider
+
+
+class FakeStore:
+    """Event store recording inserted rows, optionally failing."""
+
+    def __init__(self, failing=False):
+        self.failing = failing
+        self.batches = []
+
+    def __call__(self, rows):
+        if self.failing:
+            raise ConnectionError("supabase unavailable")
+        self.batches.append(list(rows))
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def make_logger(store, **kwargs):
+    kwargs.setdefault("batch_size", 5)
+    kwargs.setdefault("flush_interval_seconds", 10)
+    kwargs.setdefault("max_buffer_size", 100)
+    kwargs.setdefault("spill_path", "")
+    kwargs.setdefault("base_retry_delay", 0.01)
+    return OAuthAnalyticsLogger(store=store, **kwargs)
+
+
+def log(analytics, count, user_id="u1"):
+    for i in range(count):
+        analytics.log_token_validation(
+            user_id=user_id,
+            service_name=f"service-{i}",
+            oauth_provider=OAuthProvider.GOOGLE,
+            success=True,
+        )
+
+
+class CappedQuery:
+    """Supabase query stand-in returning at most max_rows rows, like PostgREST."""
+
+    def __init__(self, rows, max_rows=1000):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.window = (0, len(rows) - 1)
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def execute(self):
+        start, end = self.window
+        page = self.rows[start : end + 1][: self.max_rows]
+        return type("Response", (), {"data": page})()
+
+
+async def wait_for_rows(store, count):
+    for _ in range(100):
+        if len(store.rows) >= count:
+            return
+        await asyncio.sleep(0.01)
+
+
+class TestBackgroundFlusher:
+    """Test when buffered events are written."""
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_flushed_early(self):
+        """Test a full batch is written without waiting for the interval."""
+        store = FakeStore()
+        analytics = make_logger(store)
+
+        log(analytics, 5)
+        assert store.rows == []  # logging never writes on the caller's coroutine
+
+        await wait_for_rows(store, 5)
+        assert len(store.batches) == 1 and len(store.rows) == 5
+        await analytics.stop()
+
+    @pytest.mark.asyncio
+    async def test_quiet_worker_flushes_on_interval(self):
+        """Test a single event is written once the interval passes."""
+        store = FakeStore()
+        analytics = make_logger(store, flush_interval_seconds=0.05)
+
+        log(analytics, 1)
+        await wait_for_rows(store, 1)
+
+        assert len(store.rows) == 1
+        await analytics.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_buffer(self):
+        """Test shutdown writes what is still buffered."""
+        store = FakeStore()
+        analytics = make_logger(store)
+
+        log(analytics, 3)
+        await analytics.stop()
+
+        assert len(store.rows) == 3
+        assert analytics.get_statistics()["buffered"] == 0
+
+
+class TestBoundedBuffer:
+    """Test the ring buffer."""
+
+    def test_oldest_events_are_dropped(self):
+        """Test a full buffer drops its oldest events and counts them."""
+        analytics = make_logger(FakeStore(), max_buffer_size=3)
+
+        log(analytics, 5)
+
+        stats = analytics.get_statistics()
+        assert stats["buffered"] == 3 and stats["dropped"] == 2
+        assert [e.service_name for e in analytics._event_buffer] == [
+            "service-2",
+            "service-3",
+            "service-4",
+        ]
+
+
+class TestSpill:
+    """Test retries and the spill file."""
+
+    @pytest.mark.asyncio
+    async def test_failed_batches_spill_and_are_resent(self, tmp_path):
+        """Test events survive an outage on disk and are re-sent afterwards."""
+        spill = tmp_path / "oauth-analytics.jsonl"
+        store = FakeStore(failing=True)
+        analytics = make_logger(store, spill_path=str(spill), max_attempts=2)
+
+        log(analytics, 7)
+        await analytics.flush()
+
+        spilled = [json.loads(line) for line in spill.read_text().splitlines()]
+        assert [len(batch["rows"]) for batch in spilled] == [5, 2]
+        stats = analytics.get_statistics()
+        assert stats["spilled"] == 7 and stats["failed_batches"] == 2
+
+        store.failing = False
+        log(analytics, 1, user_id="u2")
+        assert await analytics.flush() == 8
+        assert not spill.exists()
+        assert [row["user_id"] for row in store.rows].count("u1") == 7
+        assert json.dumps(store.rows[0])  # rows stay JSON-serializable
+        await analytics.stop()
+
+    @pytest.mark.asyncio
+    async def test_rejected_spilled_batch_is_dead_lettered(self, tmp_path):
+        """Test a spilled batch storage keeps rejecting stops blocking later ones."""
+        spill = tmp_path / "oauth-analytics.jsonl"
+        spill.write_text(
+            json.dumps({"attempts": 0, "rows": [{"user_id": "poison"}]})
+            + "\n"
+            + json.dumps({"user_id": "legacy"})  # one-row-per-line format
+            + "\n"
+        )
+
+        def store(rows):
+            if any(row["user_id"] == "poison" for row in rows):
+                raise ValueError("invalid input syntax")
+            store.rows.extend(rows)
+
+        store.rows = []
+        analytics = make_logger(
+            store, spill_path=str(spill), max_attempts=1, max_spill_attempts=2
+        )
+
+        await analytics.flush()  # no new rows: storage health unknown, nothing counted
+        assert json.loads(spill.read_text().splitlines()[0])["attempts"] == 0
+
+        for _ in range(2):
+            log(analytics, 1)
+            await analytics.flush()
+
+        assert [row["user_id"] for row in store.rows] == ["u1", "u1"]
+        assert analytics.get_statistics()["dead_lettered"] == 1
+        dead = json.loads((tmp_path / "oauth-analytics.jsonl.dead").read_text())
+        assert dead["rows"] == [{"user_id": "poison"}] and dead["attempts"] == 2
+
+        log(analytics, 1)
+        await analytics.flush()
+        assert "legacy" in [row["user_id"] for row in store.rows]
+        assert not spill.exists()
+        await analytics.stop()
+
+
+class TestRollupSummaries:
+    """Test summaries built from daily rollup rows."""
+
+    ROWS = [
+        {"day": "2026-10-01", "user_id": "u1", "service_name": "pipedrive",
+         "oauth_provider": "pipedrive", "event_type": "token_validation",
+         "status": "success", "event_count": 8},
+        {"day": "2026-10-01", "user_id": "u1", "service_name": "pipedrive",
+         "oauth_provider": "pipedrive", "event_type": "token_refresh",
+         "status": "failure", "event_count": 2},
+        {"day": "2026-10-02", "user_id": "u2", "service_name": "zoho_crm",
+         "oauth_provider": "", "event_type": "token_validation",
+         "status": "success", "event_count": 10},
+    ]
+
+    def test_user_summary(self, monkeypatch):
+        """Test the per-user summary adds up rollup counts."""
+        analytics = make_logger(FakeStore())
+        monkeypatch.setattr(analytics, "_load_rollups", lambda days, user_id=None: self.ROWS[:2])
+
+        summary = analytics.get_analytics_summary("u1")
+
+        assert summary["total_events"] == 10
+        assert summary["success_rate"] == 80.0
+        assert summary["event_types"] == {"token_validation": 8, "token_refresh": 2}
+        assert summary["daily_usage"] == {"2026-10-01": 10}
+
+    def test_system_summary(self, monkeypatch):
+        """Test system analytics count users, services and error rates."""
+        analytics = make_logger(FakeStore())
+        monkeypatch.setattr(analytics, "_load_rollups", lambda days, user_id=None: self.ROWS)
+
+        summary = analytics.get_system_analytics()
+
+        assert summary["total_events"] == 20 and summary["unique_users"] == 2
+        assert summary["top_services"] == [("pipedrive", 10), ("zoho_crm", 10)]
+        assert summary["top_providers"] == [("pipedrive", 10)]
+        assert summary["error_rate_by_service"] == {"pipedrive": 20.0, "zoho_crm": 0.0}
+
+    def test_rollups_are_read_past_the_row_cap(self):
+        """Test every page is read when there are more rows than one response holds."""
+        rows = [{"day": "2026-10-01", "event_count": i} for i in range(2500)]
+
+        loaded = select_all_pages(lambda: CappedQuery(rows))
+
+        assert loaded == rows
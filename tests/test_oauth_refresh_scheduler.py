@@ -0,0 +1,244 @@
+"""
+Tests for the proactive OAuth refresh scheduler.
+
+This module tests:
+- Building the schedule from one bulk account scan
+- Refreshing tokens ahead of expiry and rescheduling them
+- Bounded concurrency and per-provider rate limits
+- Coalescing of concurrent refreshes of the same token
+- Backoff after failed refreshes
+- Refresh requests while the scheduler is stopped
+- Refusing several workers without the Redis refresh lock
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.ai_agents.mcp import oauth_refresh_scheduler
+from app.ai_agents.mcp.oauth_refresh_scheduler import OAuthRefreshScheduler
+from app.ai_agents.mcp.oauth_token_refresh import RefreshResult
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeManager:
+    """Refresh manager stand-in recording refreshes."""
+
+    def __init__(self, clock, delay=0.0, fail=False):
+        self.clock = clock
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def refresh_mcp_token(self, user_id, service_name, force_refresh=False):
+        self.calls.append((user_id, service_name))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        if self.fail:
+            return RefreshResult(success=False, error_message="invalid_grant")
+        return RefreshResult(
+            success=True,
+            expires_at=datetime.fromtimestamp(self.clock() + 3600, tz=timezone.utc),
+        )
+
+
+def account(user_id, service, expires_in, clock, refresh_token="rt"):
+    expires_at = datetime.fromtimestamp(clock() + expires_in, tz=timezone.utc)
+    return {
+        "user_id": user_id,
+        "service": service,
+        "account_data": {
+            "access_token": "at",
+            "refresh_token": refresh_token,
+            "expires_at": expires_at.isoformat(),
+        },
+    }
+
+
+def make_scheduler(clock, manager, rows, **kwargs):
+    async def loader():
+        return rows
+
+    kwargs.setdefault("lead_seconds", 300)
+    kwargs.setdefault("concurrency", 4)
+    kwargs.setdefault("rate_per_second", 1000)
+    kwargs.setdefault("scan_interval_seconds", 3600)
+    return OAuthRefreshScheduler(
+        manager=manager, account_loader=loader, clock=clock, **kwargs
+    )
+
+
+class TestRefreshSchedule:
+    """Test schedule construction and due selection."""
+
+    @pytest.mark.asyncio
+    async def test_scan_schedules_refreshable_tokens(self):
+        """Test tokens are due lead_seconds before expiry; unrefreshable ones are skipped."""
+        clock = FakeClock()
+        rows = [
+            account("u1", "google_calendar", 3600, clock),
+            account("u2", "pipedrive", 200, clock),
+            account("u3", "sendgrid", 100, clock, refresh_token=None),
+        ]
+        scheduler = make_scheduler(clock, FakeManager(clock), rows)
+
+        assert await scheduler.scan() == 2
+        assert scheduler._pop_due(clock()) == [("u2", "pipedrive")]
+
+        clock.advance(3300)
+        assert scheduler._pop_due(clock()) == [("u1", "google_calendar")]
+
+    @pytest.mark.asyncio
+    async def test_due_tokens_are_refreshed_and_rescheduled(self):
+        """Test the loop refreshes due tokens and tracks their new expiry."""
+        clock = FakeClock()
+        manager = FakeManager(clock)
+        rows = [account("u1", "google_calendar", 60, clock)]
+        scheduler = make_scheduler(clock, manager, rows)
+
+        await scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+        assert manager.calls == [("u1", "google_calendar")]
+        stats = scheduler.get_statistics()
+        assert stats["refreshed"] == 1 and stats["tracked"] == 1
+        assert stats["next_due_in"] == pytest.approx(3300)
+
+
+class TestRefreshLimits:
+    """Test concurrency, rate limits and coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test no more than `concurrency` refreshes run at once."""
+        clock = FakeClock()
+        manager = FakeManager(clock, delay=0.02)
+        rows = [account(f"u{i}", "google_calendar", 10, clock) for i in range(10)]
+        scheduler = make_scheduler(clock, manager, rows, concurrency=3)
+
+        await scheduler.start()
+        for _ in range(100):
+            if scheduler.get_statistics()["refreshed"] == 10:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+
+        assert len(manager.calls) == 10
+        assert manager.max_active == 3
+
+    @pytest.mark.asyncio
+    async def test_provider_rate_limit(self):
+        """Test refreshes to one provider are spaced by its token bucket."""
+        clock = FakeClock()
+        manager = FakeManager(clock)
+        scheduler = make_scheduler(clock, manager, [], rate_per_second=20)
+
+        started = asyncio.get_running_loop().time()
+        await asyncio.gather(
+            *(scheduler.refresh_now(f"u{i}", "salesforce_rest_api") for i in range(21))
+        )
+        elapsed = asyncio.get_running_loop().time() - started
+
+        # 20 from the initial burst, the 21st waits for one token (~50 ms)
+        assert elapsed >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_coalesce(self):
+        """Test callers refreshing the same token share one provider call."""
+        clock = FakeClock()
+        manager = FakeManager(clock, delay=0.02)
+        scheduler = make_scheduler(clock, manager, [])
+
+        results = await asyncio.gather(
+            *(scheduler.refresh_now("u1", "google_calendar") for _ in range(5))
+        )
+
+        assert len(manager.calls) == 1
+        assert all(r.success for r in results)
+        assert scheduler.get_statistics()["coalesced"] == 4
+
+
+class TestRefreshFailures:
+    """Test failed refreshes back off and eventually stop."""
+
+    @pytest.mark.asyncio
+    async def test_failure_backs_off_then_gives_up(self):
+        """Test retries double the delay and stop after max_failures."""
+        clock = FakeClock()
+        manager = FakeManager(clock, fail=True)
+        scheduler = make_scheduler(
+            clock, manager, [], retry_delay_seconds=60, max_failures=2
+        )
+
+        await scheduler.refresh_now("u1", "zoho_crm")
+        assert scheduler._pop_due(clock() + 59) == []
+        assert scheduler._pop_due(clock() + 60) == [("u1", "zoho_crm")]
+
+        await scheduler.refresh_now("u1", "zoho_crm")
+        assert scheduler.get_statistics()["tracked"] == 0
+
+
+class TestStoppedScheduler:
+    """Test refresh requests are not lost when the scheduler is not running."""
+
+    @pytest.mark.asyncio
+    async def test_request_refresh_runs_inline_when_stopped(self):
+        """Test a request starts the refresh at once instead of queueing it."""
+        clock = FakeClock()
+        manager = FakeManager(clock)
+        scheduler = make_scheduler(clock, manager, [])
+
+        assert scheduler.request_refresh("u1", "pipedrive")
+        await asyncio.gather(*scheduler._inflight.values())
+
+        assert manager.calls == [("u1", "pipedrive")]
+
+    def test_request_refresh_without_loop_is_reported(self):
+        """Test a request from a thread without a loop reports it was dropped."""
+        clock = FakeClock()
+        manager = FakeManager(clock)
+        scheduler = make_scheduler(clock, manager, [])
+
+        assert not scheduler.request_refresh("u1", "pipedrive")
+        assert manager.calls == []
+
+
+class TestMultipleWorkers:
+    """Test startup refuses per-process refresh locks with several workers."""
+
+    @pytest.mark.asyncio
+    async def test_memory_lock_is_refused_with_several_workers(self, monkeypatch):
+        """Test the scheduler does not start when workers could race a refresh."""
+        from app.core.config import MCPConfig, Settings
+
+        config = MCPConfig(mcp_oauth_refresh_lock_backend="memory")
+        monkeypatch.setattr(oauth_refresh_scheduler, "get_mcp_config", lambda: config)
+        monkeypatch.setattr(
+            "app.core.config.get_settings", lambda: Settings(WEB_CONCURRENCY=2)
+        )
+        scheduler = make_scheduler(FakeClock(), FakeManager(FakeClock()), [])
+        oauth_refresh_scheduler.set_refresh_scheduler(scheduler)
+        try:
+            with pytest.raises(RuntimeError):
+                await oauth_refresh_scheduler.start_refresh_scheduler()
+            assert not scheduler.is_running
+        finally:
+            oauth_refresh_scheduler.set_refresh_scheduler(None)
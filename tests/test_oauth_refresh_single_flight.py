@@ -0,0 +1,185 @@
+"""
+Tests for single-flight OAuth token refreshes.
+
+This module tests:
+- Concurrent refreshes of one token making one provider call
+- The pooled per-provider HTTP client being reused
+- The cross-worker lock handing over tokens refreshed by another worker
+- Refreshing without the lock when the lock store fails
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.ai_agents.mcp.oauth_integration import OAuthProvider, OAuthTokens
+from app.ai_agents.mcp.oauth_token_refresh import OAuthTokenRefreshManager
+
+
+class TokenEndpoint:
+    """Google token endpoint stand-in counting refresh requests."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = 0
+
+    async def __call__(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        return httpx.Response(
+            200,
+            json={"access_token": f"access-{self.requests}", "expires_in": 3600},
+        )
+
+
+class MemoryLock:
+    """In-memory stand-in for RedisRefreshLock shared by several managers."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.held = {}
+
+    async def acquire(self, key, ttl_seconds):
+        if self.fail:
+            raise ConnectionError("redis unavailable")
+        if key in self.held:
+            return None
+        self.held[key] = "owner"
+        return "owner"
+
+    async def release(self, key, token):
+        if self.held.get(key) == token:
+            del self.held[key]
+
+    async def wait_released(self, key, timeout, poll_seconds=0.01):
+        deadline = time.monotonic() + timeout
+        while key in self.held:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll_seconds)
+        return True
+
+    async def close(self):
+        pass
+
+
+class StoredTokensManager(OAuthTokenRefreshManager):
+    """Manager reading and writing tokens in a shared dict instead of Supabase."""
+
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    async def _get_current_tokens(self, user_id, service_name):
+        return self.store.get((user_id, service_name))
+
+    async def _update_tokens_in_supabase(self, user_id, service_name, new_tokens):
+        self.store[(user_id, service_name)] = new_tokens
+
+
+def expired_tokens(user_id="u1"):
+    return OAuthTokens(
+        access_token="stale",
+        refresh_token="refresh",
+        expires_at=datetime.now() - timedelta(minutes=1),
+        provider=OAuthProvider.GOOGLE,
+        user_id=user_id,
+    )
+
+
+@pytest.fixture(autouse=True)
+def google_credentials(monkeypatch):
+    monkeypatch.setenv("GOOGLE_CLIENT_ID", "client")
+    monkeypatch.setenv("GOOGLE_CLIENT_SECRET", "secret")
+
+
+class TestSingleFlight:
+    """Test per-process deduplication and client pooling."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_make_one_call(self):
+        """Test a burst of refreshes for one token hits the provider once."""
+        endpoint = TokenEndpoint(delay=0.02)
+        store = {("u1", "google_calendar"): expired_tokens()}
+        manager = StoredTokensManager(
+            store, transport=httpx.MockTransport(endpoint)
+        )
+
+        results = await asyncio.gather(
+            *(manager.refresh_mcp_token("u1", "google_calendar") for _ in range(10))
+        )
+
+        assert endpoint.requests == 1
+        assert {r.new_tokens.access_token for r in results} == {"access-1"}
+        assert manager.stats["coalesced"] == 9
+        await manager.close()
+
+    @pytest.mark.asyncio
+    async def test_provider_client_is_pooled(self):
+        """Test refreshes for different users reuse one client per provider."""
+        endpoint = TokenEndpoint()
+        store = {
+            ("u1", "google_calendar"): expired_tokens("u1"),
+            ("u2", "google_calendar"): expired_tokens("u2"),
+        }
+        manager = StoredTokensManager(
+            store, transport=httpx.MockTransport(endpoint)
+        )
+
+        await manager.refresh_mcp_token("u1", "google_calendar")
+        client = manager._http_clients[OAuthProvider.GOOGLE]
+        await manager.refresh_mcp_token("u2", "google_calendar")
+
+        assert endpoint.requests == 2
+        assert manager._http_clients == {OAuthProvider.GOOGLE: client}
+        assert not client.is_closed
+
+        await manager.close()
+        assert client.is_closed
+
+
+class TestCrossWorkerLock:
+    """Test the lock shared between workers."""
+
+    @pytest.mark.asyncio
+    async def test_second_worker_uses_first_workers_tokens(self):
+        """Test a worker waiting on the lock returns the tokens the holder stored."""
+        endpoint = TokenEndpoint(delay=0.05)
+        store = {("u1", "google_calendar"): expired_tokens()}
+        lock = MemoryLock()
+        first = StoredTokensManager(
+            store, lock=lock, transport=httpx.MockTransport(endpoint)
+        )
+        second = StoredTokensManager(
+            store, lock=lock, transport=httpx.MockTransport(endpoint)
+        )
+
+        first_result, second_result = await asyncio.gather(
+            first.refresh_mcp_token("u1", "google_calendar"),
+            second.refresh_mcp_token("u1", "google_calendar"),
+        )
+
+        assert endpoint.requests == 1
+        assert first_result.new_tokens.access_token == "access-1"
+        assert second_result.new_tokens.access_token == "access-1"
+        assert second.stats["refreshed_elsewhere"] == 1
+        assert lock.held == {}
+        await first.close()
+        await second.close()
+
+    @pytest.mark.asyncio
+    async def test_lock_failure_refreshes_without_lock(self):
+        """Test an unavailable lock store does not block refreshes."""
+        endpoint = TokenEndpoint()
+        store = {("u1", "google_calendar"): expired_tokens()}
+        manager = StoredTokensManager(
+            store, lock=MemoryLock(fail=True), transport=httpx.MockTransport(endpoint)
+        )
+
+        result = await manager.refresh_mcp_token("u1", "google_calendar")
+
+        assert result.success and endpoint.requests == 1
+        await manager.close()
@@ -0,0 +1,173 @@
+"""
+Tests for the batched OAuth status endpoint.
+
+This module tests:
+- The status check making a constant number of queries
+- Per-service status derived in memory from the bulk read
+- Last-used dates from the aggregate and from the fallback query
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.ai_agents.mcp import oauth_status_api
+from app.supabase.supabase_client import SupabaseCRMClient
+
+
+class FakeQuery:
+    """Chainable Supabase query recording one round trip per execute()."""
+
+    def __init__(self, client, name, data):
+        self.client = client
+        self.name = name
+        self.data = data
+
+    def __getattr__(self, _):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.client.queries.append(self.name)
+        if isinstance(self.data, Exception):
+            raise self.data
+        return type("Response", (), {"data": self.data})()
+
+
+class FakeSupabase:
+    def __init__(self, tables, rpc_rows=None):
+        self.tables = tables
+        self.rpc_rows = rpc_rows
+        self.queries = []
+
+    def table(self, name):
+        return FakeQuery(self, name, self.tables.get(name, []))
+
+    def rpc(self, name, params):
+        data = self.rpc_rows if self.rpc_rows is not None else RuntimeError("missing")
+        return FakeQuery(self, f"rpc:{name}", data)
+
+
+class FakeAnalytics:
+    def __init__(self):
+        self.events = []
+
+    def __getattr__(self, name):
+        return lambda **kwargs: self.events.append((name, kwargs))
+
+
+def iso(delta):
+    return (datetime.now(timezone.utc) + delta).isoformat()
+
+
+ACCOUNTS = [
+    {
+        "service": "google_calendar",
+        "connected": True,
+        "account_data": {"access_token": "a", "expires_at": iso(timedelta(hours=1))},
+    },
+    {
+        "service": "pipedrive",
+        "connected": True,
+        "account_data": {"access_token": "b", "expires_at": iso(timedelta(minutes=5))},
+    },
+    {
+        "service": "zoho_crm",
+        "connected": True,
+        "account_data": {"access_token": "c", "expires_at": iso(-timedelta(hours=1))},
+    },
+    {"service": "twitter", "connected": False, "account_data": {}},
+]
+
+
+def crm_client(client):
+    """The real SupabaseCRMClient wrapper around a fake Supabase client."""
+    wrapper = SupabaseCRMClient.__new__(SupabaseCRMClient)
+    wrapper.client = client
+    return wrapper
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    def install(rpc_rows=None, events=()):
+        client = FakeSupabase(
+            {"user_accounts": ACCOUNTS, "oauth_analytics": list(events)}, rpc_rows
+        )
+        monkeypatch.setattr(
+            "app.supabase.supabase_client.get_supabase_admin_client",
+            lambda: crm_client(client),
+        )
+        monkeypatch.setattr(
+            "app.supabase.supabase_client.get_supabase_client",
+            lambda: crm_client(client),
+        )
+        monkeypatch.setattr(
+            oauth_status_api, "get_oauth_analytics_logger", lambda: FakeAnalytics()
+        )
+        return client
+
+    return install
+
+
+class TestUserOAuthStatus:
+    """Test the per-user status endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_constant_number_of_queries(self, supabase):
+        """Test all services are evaluated from one read plus one aggregate."""
+        client = supabase(rpc_rows=[])
+
+        response = await oauth_status_api.get_user_oauth_status("u1")
+
+        assert response.total_integrations == 7
+        assert sorted(client.queries) == ["rpc:oauth_last_used", "user_accounts"]
+
+    @pytest.mark.asyncio
+    async def test_status_is_derived_per_service(self, supabase):
+        """Test connection, validity and expiry come from the bulk rows."""
+        supabase(rpc_rows=[])
+
+        response = await oauth_status_api.get_user_oauth_status("u1")
+        status = {i.service_name: i for i in response.integrations}
+
+        assert status["google_calendar"].is_valid
+        assert not status["google_calendar"].expires_soon
+        assert status["pipedrive"].is_valid and status["pipedrive"].expires_soon
+        assert status["zoho_crm"].is_connected and not status["zoho_crm"].is_valid
+        assert not status["twitter"].is_connected
+        assert not status["sendgrid"].is_connected
+        assert response.connected_integrations == 3
+        assert response.valid_integrations == 2
+
+    @pytest.mark.asyncio
+    async def test_last_used_from_aggregate(self, supabase):
+        """Test last-used dates come from the oauth_last_used() rows."""
+        last = "2026-10-01T12:00:00+00:00"
+        supabase(rpc_rows=[{"service_name": "pipedrive", "last_used": last}])
+
+        response = await oauth_status_api.get_user_oauth_status("u1")
+        status = {i.service_name: i for i in response.integrations}
+
+        assert status["pipedrive"].last_used == datetime.fromisoformat(last)
+        assert status["google_calendar"].last_used is None
+
+    @pytest.mark.asyncio
+    async def test_last_used_fallback_is_one_query(self, supabase):
+        """Test a missing aggregate falls back to one recent-events query."""
+        client = supabase(
+            events=[
+                {"service_name": "pipedrive", "timestamp": "2026-10-02T08:00:00"},
+                {"service_name": "pipedrive", "timestamp": "2026-10-01T08:00:00"},
+                {"service_name": "zoho_crm", "timestamp": "2026-09-30T08:00:00"},
+            ]
+        )
+
+        response = await oauth_status_api.get_user_oauth_status("u1")
+        status = {i.service_name: i for i in response.integrations}
+
+        assert status["pipedrive"].last_used == datetime(2026, 10, 2, 8)
+        assert status["zoho_crm"].last_used == datetime(2026, 9, 30, 8)
+        assert sorted(client.queries) == [
+            "oauth_analytics",
+            "rpc:oauth_last_used",
+            "user_accounts",
+        ]
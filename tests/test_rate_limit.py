@@ -0,0 +1,191 @@
+"""
+Tests for the shared rate-limit engine.
+
+This module tests:
+- GCRA burst, steady rate, retry_after and cost
+- Sharded in-memory backend sweeping idle keys
+- Fail-open behaviour when the backend errors
+- Call sites: events WebSocket limiter and the Supabase auth client
+- The Redis Lua backend against a local redis-server (skipped if absent)
+"""
+
+import time
+import uuid
+
+import pytest
+import pytest_asyncio
+
+from app.api import events as events_module
+from app.core.rate_limit import (
+    REDIS_AVAILABLE,
+    InMemoryRateLimitBackend,
+    RateLimiter,
+    RedisRateLimitBackend,
+    gcra,
+    set_rate_limiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    limiter = RateLimiter(InMemoryRateLimitBackend(clock=clock))
+    set_rate_limiter(limiter)
+    yield limiter
+    set_rate_limiter(None)
+
+
+class TestGCRA:
+    """Test the pure GCRA step."""
+
+    def test_burst_then_steady_rate(self):
+        """Test limit requests pass at once, then one per period / limit."""
+        tat, now = None, 0.0
+        for expected_remaining in (2, 1, 0):
+            tat, decision = gcra(tat, now, limit=3, period=60)
+            assert decision.allowed and decision.remaining == expected_remaining
+
+        new_tat, decision = gcra(tat, now, limit=3, period=60)
+        assert new_tat is None and not decision.allowed
+        assert decision.retry_after == pytest.approx(20)
+
+        _, decision = gcra(tat, now + 20, limit=3, period=60)
+        assert decision.allowed
+
+    def test_cost_consumes_several_units(self):
+        """Test a weighted request uses cost units and can exceed the burst."""
+        tat, decision = gcra(None, 0.0, limit=10, period=10, cost=4)
+        assert decision.remaining == 6
+
+        _, decision = gcra(tat, 0.0, limit=10, period=10, cost=7)
+        assert not decision.allowed
+
+
+class TestRateLimiter:
+    """Test the limiter with the in-memory backend."""
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self, limiter, clock):
+        """Test one key hitting its limit does not affect another."""
+        for _ in range(2):
+            assert (await limiter.check("tenant:a", 2, period=60)).allowed
+        assert not (await limiter.check("tenant:a", 2, period=60)).allowed
+        assert (await limiter.check("tenant:b", 2, period=60)).allowed
+
+        clock.advance(30)
+        assert (await limiter.check("tenant:a", 2, period=60)).allowed
+        assert limiter.get_statistics()["rejected"] == 1
+
+    def test_idle_keys_are_swept(self, clock):
+        """Test keys whose bucket refilled are dropped from memory."""
+        backend = InMemoryRateLimitBackend(shards=1, sweep_interval=10, clock=clock)
+        for i in range(9):
+            backend.check_sync(f"ip:{i}", 5, period=1)
+        assert len(backend) == 9
+
+        clock.advance(2)
+        backend.check_sync("ip:new", 5, period=1)
+        assert len(backend) == 1
+
+    @pytest.mark.asyncio
+    async def test_backend_errors_fail_open(self):
+        """Test a broken backend allows requests and counts the error."""
+
+        class BrokenBackend:
+            async def check(self, *args):
+                raise ConnectionError("redis down")
+
+        limiter = RateLimiter(BrokenBackend())
+        assert (await limiter.check("tenant:a", 1)).allowed
+        assert limiter.get_statistics()["errors"] == 1
+
+        strict = RateLimiter(BrokenBackend(), fail_open=False)
+        assert not (await strict.check("tenant:a", 1)).allowed
+
+    def test_decision_is_fast(self):
+        """Test an in-memory decision takes well under a millisecond."""
+        backend = InMemoryRateLimitBackend()
+        started = time.perf_counter()
+        for i in range(10000):
+            backend.check_sync(f"tenant:{i % 100}", 1000, period=60)
+        assert (time.perf_counter() - started) / 10000 < 0.001
+
+
+class TestCallSites:
+    """Test the call sites share the engine."""
+
+    @pytest.mark.asyncio
+    async def test_websocket_limit(self, limiter, monkeypatch):
+        """Test the events socket limiter rejects past its budget."""
+        monkeypatch.setattr(events_module, "_RATE_LIMIT_MAX", 2)
+
+        assert await events_module._check_rate_limit("token-1")
+        assert await events_module._check_rate_limit("token-1")
+        assert not await events_module._check_rate_limit("token-1")
+        assert await events_module._check_rate_limit("token-2")
+
+    @pytest.mark.asyncio
+    async def test_auth_client_makes_no_database_calls(self, limiter):
+        """Test SupabaseAuthClient.check_rate_limit no longer touches tables."""
+        from app.auth.supabase_auth_client import SupabaseAuthClient
+
+        client = SupabaseAuthClient.__new__(SupabaseAuthClient)
+        client.client = None  # any table access would raise
+
+        first = await client.check_rate_limit("login:1.2.3.4", limit=2, window=60)
+        await client.check_rate_limit("login:1.2.3.4", limit=2, window=60)
+        third = await client.check_rate_limit("login:1.2.3.4", limit=2, window=60)
+
+        assert first["allowed"] and first["count"] == 1
+        assert not third["allowed"] and third["retry_after"] == pytest.approx(30)
+
+
+@pytest_asyncio.fixture
+async def redis_backend():
+    if not REDIS_AVAILABLE:
+        pytest.skip("redis package not installed")
+    import redis.asyncio as aioredis
+
+    client = aioredis.from_url("redis://localhost:6379/15")
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("no local redis-server")
+
+    backend = RedisRateLimitBackend(client=client, namespace=f"test:{uuid.uuid4().hex}")
+    yield backend
+    await client.aclose()
+
+
+class TestRedisBackend:
+    """Test the Lua script matches the in-memory behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_burst_and_reject(self, redis_backend):
+        """Test the burst passes, the next call is rejected with retry_after."""
+        for expected_remaining in (2, 1, 0):
+            decision = await redis_backend.check("tenant:a", 3, period=60)
+            assert decision.allowed and decision.remaining == expected_remaining
+
+        decision = await redis_backend.check("tenant:a", 3, period=60)
+        assert not decision.allowed
+        assert decision.retry_after == pytest.approx(20, abs=0.5)
+
+        await redis_backend.reset("tenant:a")
+        assert (await redis_backend.check("tenant:a", 3, period=60)).allowed
@@ -0,0 +1,185 @@
+"""
+Tests for the agent run result cache.
+
+This module tests AgentRunCache with the disk backend:
+- Repeated identical runs served from the cache
+- Key components (agent definition, normalized prompt, user, message and
+  lead state version)
+- Tool-calling agents flagged as not cacheable
+- TTL expiry and explicit invalidation
+- In-flight deduplication of concurrent identical runs
+- Failed runs are not cached
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from agents import Agent, function_tool
+
+from app.ai_agents.run_cache import (
+    AgentRunCache,
+    DiskRunCacheBackend,
+    agent_definition_version,
+    has_side_effects,
+    normalize_prompt,
+)
+
+
+class StubRunner:
+    """Stands in for Runner.run and counts model invocations."""
+
+    def __init__(self, latency: float = 0.0, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self, agent, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return SimpleNamespace(final_output=f"reply #{self.calls}")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AgentRunCache(DiskRunCacheBackend(str(tmp_path)), ttl_seconds=60)
+
+
+@pytest.fixture
+def coordinator():
+    return Agent(name="PipeWise Coordinator", instructions="Qualify and contact leads.")
+
+
+class TestAgentRunCache:
+    """Test cache hits, keys and invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_run_is_served_from_cache(self, cache, coordinator):
+        """Test a duplicate submission reuses the first run's output."""
+        runner = StubRunner()
+
+        first = await cache.run_agent(coordinator, "Lead: ana@x.com", "lead-1", runner=runner)
+        second = await cache.run_agent(coordinator, "Lead: ana@x.com", "lead-1", runner=runner)
+
+        assert runner.calls == 1
+        assert not first.cache_hit and second.cache_hit
+        assert second.final_output == "reply #1"
+        assert cache.get_statistics()["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_volatile_ids_and_whitespace_ignored(self, cache, coordinator):
+        """Test per-run workflow ids and formatting do not change the key."""
+        runner = StubRunner()
+
+        await cache.run_agent(
+            coordinator, "Workflow ID: wf-1\n  Lead: ana", "lead-1", volatile=("wf-1",), runner=runner
+        )
+        second = await cache.run_agent(
+            coordinator, "Workflow ID: wf-2 Lead:   ana", "lead-1", volatile=("wf-2",), runner=runner
+        )
+
+        assert second.cache_hit and runner.calls == 1
+        assert normalize_prompt(" a \n\t b ") == "a b"
+
+    @pytest.mark.asyncio
+    async def test_agent_definition_changes_key(self, cache, coordinator):
+        """Test edited instructions or tools miss the cache."""
+        runner = StubRunner()
+        edited = Agent(name="PipeWise Coordinator", instructions="New prompt version.")
+
+        await cache.run_agent(coordinator, "Lead: ana", "lead-1", runner=runner)
+        result = await cache.run_agent(edited, "Lead: ana", "lead-1", runner=runner)
+
+        assert not result.cache_hit and runner.calls == 2
+        assert agent_definition_version(coordinator) != agent_definition_version(edited)
+
+    @pytest.mark.asyncio
+    async def test_runs_are_scoped_to_user_and_message(self, cache, coordinator):
+        """Test other tenants and other messages never reuse a cached output."""
+        runner = StubRunner()
+
+        await cache.run_agent(coordinator, "Lead: ana", None, runner=runner, user_id="u1")
+        other_user = await cache.run_agent(
+            coordinator, "Lead: ana", None, runner=runner, user_id="u2"
+        )
+        other_message = await cache.run_agent(
+            coordinator, "Lead: ana", None, runner=runner, user_id="u1", message_id="m2"
+        )
+
+        assert not other_user.cache_hit and not other_message.cache_hit
+        assert runner.calls == 3
+
+    def test_tool_calling_agents_have_side_effects(self, coordinator):
+        """Test agents that can call tools, directly or via handoffs, are flagged."""
+
+        @function_tool
+        def send_reply(text: str) -> str:
+            """Send a reply."""
+            return text
+
+        outreach = Agent(name="Outreach", tools=[send_reply])
+
+        assert not has_side_effects(coordinator)
+        assert has_side_effects(outreach)
+        assert has_side_effects(Agent(name="Coordinator", handoffs=[outreach]))
+
+    @pytest.mark.asyncio
+    async def test_invalidate_lead(self, cache, coordinator):
+        """Test invalidating a lead forces a fresh run for it only."""
+        runner = StubRunner()
+        for lead_id in ("lead-1", "lead-2"):
+            await cache.run_agent(coordinator, "Follow up", lead_id, runner=runner)
+
+        await cache.invalidate_lead("lead-1")
+
+        refreshed = await cache.run_agent(coordinator, "Follow up", "lead-1", runner=runner)
+        untouched = await cache.run_agent(coordinator, "Follow up", "lead-2", runner=runner)
+        assert not refreshed.cache_hit and untouched.cache_hit
+        assert runner.calls == 3
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self, tmp_path, coordinator):
+        """Test entries expire after the TTL."""
+        cache = AgentRunCache(DiskRunCacheBackend(str(tmp_path)), ttl_seconds=0.05)
+        runner = StubRunner()
+
+        await cache.run_agent(coordinator, "Lead: ana", "lead-1", runner=runner)
+        await asyncio.sleep(0.1)
+        result = await cache.run_agent(coordinator, "Lead: ana", "lead-1", runner=runner)
+
+        assert not result.cache_hit and runner.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_share_one_run(self, cache, coordinator):
+        """Test concurrent identical requests wait for a single run."""
+        runner = StubRunner(latency=0.05)
+
+        results = await asyncio.gather(
+            *(
+                cache.run_agent(coordinator, "Lead: ana", "lead-1", runner=runner)
+                for _ in range(5)
+            )
+        )
+
+        assert runner.calls == 1
+        assert sum(result.shared for result in results) == 4
+        assert {result.final_output for result in results} == {"reply #1"}
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self, cache, coordinator):
+        """Test a failed run raises for every waiter and is retried next time."""
+        failing = StubRunner(latency=0.02, fail=True)
+
+        results = await asyncio.gather(
+            cache.run_agent(coordinator, "Lead: ana", "lead-1", runner=failing),
+            cache.run_agent(coordinator, "Lead: ana", "lead-1", runner=failing),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert failing.calls == 1
+
+        runner = StubRunner()
+        result = await cache.run_agent(coordinator, "Lead: ana", "lead-1", runner=runner)
+        assert not result.cache_hit and runner.calls == 1
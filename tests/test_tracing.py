@@ -0,0 +1,244 @@
+"""
+Tests for span-based workflow tracing.
+
+This module tests the tracing facility including:
+- Span nesting across sync code and asyncio tasks
+- Flamegraph-style summaries of finished runs
+- Tracing of function tools, data clients and MCP servers
+- JSON-lines export
+- Header-triggered request profiling
+"""
+
+import asyncio
+import json
+
+import pytest
+from agents import function_tool
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.tracing import (
+    JSONLinesSpanExporter,
+    RequestProfiler,
+    Tracer,
+    build_flame_summary,
+    instrument_mcp_server,
+    set_tracer,
+    trace_span,
+    traced,
+    traced_methods,
+)
+
+
+@pytest.fixture
+def tracer():
+    """Fresh global tracer without summary logging."""
+    tracer = Tracer(log_summaries=False)
+    set_tracer(tracer)
+    yield tracer
+    set_tracer(Tracer(log_summaries=False))
+
+
+class TestSpans:
+    """Test span recording and summaries."""
+
+    def test_nested_spans_form_one_run(self, tracer):
+        """Test child spans share the root trace and parent ids."""
+        with trace_span("workflow") as root:
+            with trace_span("memory_save") as child:
+                pass
+
+        run = tracer.recent_runs[-1]
+        assert [span.name for span in run.spans] == ["workflow", "memory_save"]
+        assert child.trace_id == root.trace_id
+        assert child.parent_id == root.span_id
+        assert run.summary.root_name == "workflow"
+
+    @pytest.mark.asyncio
+    async def test_spans_follow_asyncio_tasks(self, tracer):
+        """Test spans opened in child tasks attach to the enclosing span."""
+
+        @traced("tool.lookup")
+        async def lookup():
+            await asyncio.sleep(0.01)
+
+        with trace_span("workflow") as root:
+            await asyncio.gather(lookup(), lookup())
+
+        run = tracer.recent_runs[-1]
+        tool_spans = [span for span in run.spans if span.name == "tool.lookup"]
+        assert len(tool_spans) == 2
+        assert all(span.parent_id == root.span_id for span in tool_spans)
+
+    def test_exception_marks_span_error(self, tracer):
+        """Test exceptions are recorded on the span and re-raised."""
+        with pytest.raises(ValueError):
+            with trace_span("workflow"):
+                raise ValueError("boom")
+
+        span = tracer.recent_runs[-1].root
+        assert span.status == "ERROR"
+        assert "boom" in span.error
+
+    def test_flame_summary_self_time(self, tracer):
+        """Test repeated paths merge and self time excludes children."""
+        with trace_span("workflow"):
+            for _ in range(3):
+                with trace_span("supabase.get_lead"):
+                    pass
+
+        run = tracer.recent_runs[-1]
+        run.root.end_time_ns = run.root.start_time_ns + 100_000_000
+        for span in run.spans[1:]:
+            span.start_time_ns = run.root.start_time_ns
+            span.end_time_ns = span.start_time_ns + 10_000_000
+
+        summary = build_flame_summary(run.spans)
+
+        assert summary.folded_stacks == {
+            "workflow": 70_000,
+            "workflow;supabase.get_lead": 30_000,
+        }
+        assert "supabase.get_lead x3" in summary.render()
+        assert "workflow;supabase.get_lead 30000" in summary.folded()
+
+    def test_disabled_tracer_records_nothing(self):
+        """Test a disabled tracer yields no span and keeps no runs."""
+        tracer = Tracer(enabled=False)
+        with tracer.span("workflow") as span:
+            assert span is None
+        assert not tracer.recent_runs
+
+    def test_summaries_are_not_logged_by_default(self, caplog):
+        """Test standalone traced calls do not log a summary each."""
+        tracer = Tracer()
+        with caplog.at_level("INFO", logger="app.core.tracing"):
+            for _ in range(3):
+                with tracer.span("supabase.get_lead"):
+                    pass
+
+        assert len(tracer.recent_runs) == 3
+        assert "Trace" not in caplog.text
+
+
+class TestInstrumentation:
+    """Test decorators and instrumentation helpers."""
+
+    def test_function_tool_keeps_schema(self, tracer):
+        """Test @traced under @function_tool keeps the tool schema."""
+
+        @function_tool
+        @traced("tool.get_leads")
+        def get_leads(status: str, limit: int = 10) -> str:
+            """
+            Get leads.
+
+            Args:
+                status: Lead status
+                limit: Maximum leads
+            """
+            return status
+
+        assert get_leads.name == "get_leads"
+        assert set(get_leads.params_json_schema["properties"]) == {"status", "limit"}
+
+    def test_traced_methods_skips_excluded(self, tracer):
+        """Test class instrumentation wraps public methods only."""
+
+        @traced_methods("supabase", exclude=("table",), exclude_prefixes=("async_",))
+        class Client:
+            def get_lead(self):
+                return "lead"
+
+            def table(self):
+                return "table"
+
+            async def async_get_lead(self):
+                return self.get_lead()
+
+        client = Client()
+        client.get_lead()
+        client.table()
+        asyncio.run(client.async_get_lead())
+
+        assert [run.root.name for run in tracer.recent_runs] == [
+            "supabase.get_lead",
+            "supabase.get_lead",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_mcp_server_calls_are_traced(self, tracer):
+        """Test instrumented MCP servers record call_tool spans once."""
+
+        class FakeServer:
+            name = "sendgrid"
+
+            async def call_tool(self, tool_name, arguments):
+                return {"tool": tool_name}
+
+        server = instrument_mcp_server(instrument_mcp_server(FakeServer()))
+        with trace_span("workflow"):
+            result = await server.call_tool("send_email", {})
+
+        spans = tracer.recent_runs[-1].spans
+        assert result == {"tool": "send_email"}
+        assert [span.name for span in spans] == ["workflow", "mcp.call_tool"]
+        assert spans[1].attributes["server"] == "sendgrid"
+
+    def test_jsonl_export(self, tmp_path):
+        """Test spans and the summary are appended to the export file."""
+        path = tmp_path / "traces.jsonl"
+        tracer = Tracer(exporters=[JSONLinesSpanExporter(str(path))], log_summaries=False)
+
+        with tracer.span("workflow"):
+            with tracer.span("workflow.runner_run"):
+                pass
+
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["span"]["name"] for r in records[:2]] == [
+            "workflow",
+            "workflow.runner_run",
+        ]
+        assert records[2]["summary"]["root"] == "workflow"
+
+
+class TestRequestProfiler:
+    """Test header-triggered profiling middleware."""
+
+    def make_client(self, enabled: bool, tmp_path) -> TestClient:
+        app = FastAPI()
+        profiler = RequestProfiler(enabled=enabled, output_dir=str(tmp_path))
+
+        @app.middleware("http")
+        async def profiling_middleware(request: Request, call_next):
+            return await profiler(request, call_next)
+
+        @app.get("/work")
+        async def work():
+            with trace_span("workflow.runner_run"):
+                return {"ok": True}
+
+        return TestClient(app)
+
+    def test_profile_header_traces_request(self, tracer, tmp_path):
+        """Test X-Profile runs the request under a root span."""
+        client = self.make_client(True, tmp_path)
+
+        response = client.get("/work", headers={"X-Profile": "1"})
+
+        trace_id = response.headers["X-Trace-ID"]
+        run = tracer.get_run(trace_id)
+        assert [span.name for span in run.spans] == [
+            "http.request",
+            "workflow.runner_run",
+        ]
+
+    def test_requests_without_opt_in_are_untouched(self, tracer, tmp_path):
+        """Test profiling needs both the setting and the header."""
+        assert "X-Trace-ID" not in self.make_client(True, tmp_path).get("/work").headers
+        assert (
+            "X-Trace-ID"
+            not in self.make_client(False, tmp_path)
+            .get("/work", headers={"X-Profile": "1"})
+            .headers
+        )
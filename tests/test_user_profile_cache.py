@@ -0,0 +1,186 @@
+"""
+Tests for the user profile cache.
+
+This module tests:
+- Cache hits after the first load and TTL expiry
+- Negative caching of missing users
+- Single-flight loading for concurrent misses
+- Invalidation, including during an in-flight load
+- Secrets never being cached
+- The shared L2 store
+"""
+
+import asyncio
+
+import pytest
+
+from app.auth.user_cache import UserProfileCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeL2:
+    """In-memory stand-in for RedisProfileStore."""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def get(self, user_id):
+        return self.rows.get(user_id)
+
+    async def set(self, user_id, row, ttl_seconds):
+        self.rows[user_id] = dict(row)
+
+    async def delete(self, user_id):
+        self.rows.pop(user_id, None)
+
+
+class CountingLoader:
+    """Loader returning a user row and counting database calls."""
+
+    def __init__(self, row=None, delay=0.0):
+        self.row = row
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return dict(self.row) if self.row else None
+
+
+USER_ROW = {
+    "id": "u1",
+    "email": "ana@example.com",
+    "role": "admin",
+    "has_2fa": True,
+    "totp_secret": "JBSWY3DPEHPK3PXP",
+    "password_hash": "$2b$12$hash",
+}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestUserProfileCache:
+    """Test the per-process cache."""
+
+    @pytest.mark.asyncio
+    async def test_hit_until_ttl_expires(self, clock):
+        """Test the database is only queried again once the TTL passed."""
+        cache = UserProfileCache(ttl_seconds=30, clock=clock)
+        loader = CountingLoader(USER_ROW)
+
+        for _ in range(5):
+            assert (await cache.get("u1", loader))["role"] == "admin"
+        assert loader.calls == 1
+
+        clock.advance(31)
+        await cache.get("u1", loader)
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_secrets_are_not_cached(self, clock):
+        """Test password hashes and TOTP secrets are stripped."""
+        cache = UserProfileCache(clock=clock)
+        row = await cache.get("u1", CountingLoader(USER_ROW))
+
+        assert "totp_secret" not in row and "password_hash" not in row
+        assert row["has_2fa"] is True
+
+    @pytest.mark.asyncio
+    async def test_missing_users_are_negatively_cached(self, clock):
+        """Test unknown users hit the database once per negative TTL."""
+        cache = UserProfileCache(negative_ttl_seconds=5, clock=clock)
+        loader = CountingLoader(None)
+
+        assert await cache.get("ghost", loader) is None
+        assert await cache.get("ghost", loader) is None
+        assert loader.calls == 1
+
+        clock.advance(6)
+        await cache.get("ghost", loader)
+        assert loader.calls == 2
+        assert cache.get_statistics()["negative_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_load(self, clock):
+        """Test a burst of requests for a cold user makes one query."""
+        cache = UserProfileCache(clock=clock)
+        loader = CountingLoader(USER_ROW, delay=0.02)
+
+        rows = await asyncio.gather(*(cache.get("u1", loader) for _ in range(20)))
+
+        assert loader.calls == 1
+        assert all(row["email"] == "ana@example.com" for row in rows)
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reloads(self, clock):
+        """Test a role change is visible right after invalidation."""
+        cache = UserProfileCache(clock=clock)
+        loader = CountingLoader(USER_ROW)
+        await cache.get("u1", loader)
+
+        loader.row = {**USER_ROW, "role": "user"}
+        await cache.invalidate("u1")
+
+        assert (await cache.get("u1", loader))["role"] == "user"
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidation_during_load_is_not_overwritten(self, clock):
+        """Test a load that raced an invalidation does not cache its stale row."""
+        cache = UserProfileCache(clock=clock)
+        loader = CountingLoader(USER_ROW, delay=0.02)
+
+        load = asyncio.create_task(cache.get("u1", loader))
+        await asyncio.sleep(0.005)
+        await cache.invalidate("u1")
+        await load
+
+        await cache.get("u1", loader)
+        assert loader.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_loader_errors_are_not_cached(self, clock):
+        """Test a failing database call is retried on the next request."""
+        cache = UserProfileCache(clock=clock)
+
+        async def failing():
+            raise ConnectionError("supabase unavailable")
+
+        with pytest.raises(ConnectionError):
+            await cache.get("u1", failing)
+        assert (await cache.get("u1", CountingLoader(USER_ROW)))["id"] == "u1"
+
+
+class TestSharedL2:
+    """Test the cross-worker store."""
+
+    @pytest.mark.asyncio
+    async def test_second_worker_reads_from_l2(self, clock):
+        """Test a profile loaded by one worker is served to another without a query."""
+        l2 = FakeL2()
+        first = UserProfileCache(l2=l2, clock=clock)
+        second = UserProfileCache(l2=l2, clock=clock)
+        loader = CountingLoader(USER_ROW)
+
+        await first.get("u1", loader)
+        row = await second.get("u1", loader)
+
+        assert loader.calls == 1 and row["role"] == "admin"
+        assert second.get_statistics()["l2_hits"] == 1
+
+        await second.invalidate("u1")
+        assert "u1" not in l2.rows
@@ -0,0 +1,293 @@
+"""
+Tests for outbound webhook delivery.
+
+This module tests:
+- HMAC signatures and their verification
+- Delivery to a local HTTP sink, single and batched
+- Retries with backoff and the dead letter
+- Event subscriptions per destination
+- Owner scoping and persisted destinations
+- SSRF guards at registration and send time
+- Idle per-destination workers exiting
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from cryptography.fernet import Fernet
+
+from app.ai_agents.mcp.notification_dispatcher import LocalHTTPSink
+from app.core.integration_store import IntegrationStore, SQLiteIntegrationBackend
+from app.jobs.delivery import (
+    DELIVERY_HEADER,
+    SIGNATURE_HEADER,
+    UnsafeDestinationError,
+    WebhookDeliveryEngine,
+    WebhookDestination,
+    WebhookDestinationStore,
+    sign_payload,
+    verify_signature,
+)
+
+
+def make_engine(**kwargs):
+    kwargs.setdefault("base_retry_delay", 0.001)
+    kwargs.setdefault("batch_window_seconds", 0.05)
+    kwargs.setdefault("verify_destinations", False)  # local sinks and *.test hosts
+    return WebhookDeliveryEngine(**kwargs)
+
+
+class FlakyEndpoint:
+    """Endpoint answering with the given status codes, then 200."""
+
+    def __init__(self, *status_codes):
+        self.status_codes = list(status_codes)
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        status_code = self.status_codes.pop(0) if self.status_codes else 200
+        return httpx.Response(status_code)
+
+
+class TestSignatures:
+    """Test payload signing."""
+
+    def test_signature_round_trip(self):
+        """Test a signature verifies only for the same secret and body."""
+        body = b'{"event_type":"lead_created"}'
+        header = sign_payload("secret", int(time.time()), body)
+
+        assert verify_signature("secret", header, body)
+        assert not verify_signature("other", header, body)
+        assert not verify_signature("secret", header, body + b" ")
+
+    def test_stale_signature_is_rejected(self):
+        """Test signatures outside the tolerance window fail (replay protection)."""
+        body = b"{}"
+        header = sign_payload("secret", int(time.time()) - 3600, body)
+
+        assert not verify_signature("secret", header, body)
+
+
+class TestDelivery:
+    """Test deliveries to a local sink."""
+
+    @pytest.mark.asyncio
+    async def test_event_reaches_sink_signed(self):
+        """Test a published event is posted once with a valid signature."""
+        async with LocalHTTPSink() as sink:
+            engine = make_engine()
+            destination = engine.register(WebhookDestination(url=f"{sink.url}/hook"))
+
+            assert engine.publish("lead_created", {"lead_id": "l1"}) == 1
+            await engine.drain(timeout=2)
+
+            (request,) = sink.requests
+            assert request["json"]["data"] == {"lead_id": "l1"}
+            assert verify_signature(
+                destination.secret, request["headers"][SIGNATURE_HEADER.lower()], request["body"]
+            )
+            assert engine.get_statistics()[destination.id]["delivered"] == 1
+            await engine.stop()
+
+    @pytest.mark.asyncio
+    async def test_batching_destination_gets_one_request(self):
+        """Test events queued together reach a batching endpoint in one request."""
+        async with LocalHTTPSink() as sink:
+            engine = make_engine()
+            destination = engine.register(
+                WebhookDestination(url=f"{sink.url}/hook", batch=True)
+            )
+
+            for i in range(20):
+                engine.publish("lead_created", {"lead_id": i})
+            await engine.drain(timeout=2)
+
+            (request,) = sink.requests
+            assert [e["data"]["lead_id"] for e in request["json"]["events"]] == list(range(20))
+            assert engine.get_statistics()[destination.id]["requests"] == 1
+            await engine.stop()
+
+    @pytest.mark.asyncio
+    async def test_subscriptions_filter_events(self):
+        """Test destinations only receive the event types they subscribed to."""
+        engine = make_engine(transport=httpx.MockTransport(FlakyEndpoint()))
+        engine.register(WebhookDestination(url="http://a.test", events=["meeting_scheduled"]))
+        engine.register(WebhookDestination(url="http://b.test"))
+
+        assert engine.publish("lead_created", {}) == 1
+        assert engine.publish("meeting_scheduled", {}) == 2
+        await engine.stop()
+
+
+class TestRetries:
+    """Test failed deliveries."""
+
+    @pytest.mark.asyncio
+    async def test_transient_failures_are_retried(self):
+        """Test 503 and 429 responses are retried under the same delivery id."""
+        endpoint = FlakyEndpoint(503, 429)
+        engine = make_engine(transport=httpx.MockTransport(endpoint))
+        destination = engine.register(WebhookDestination(url="http://a.test/hook"))
+
+        engine.publish("lead_created", {"lead_id": "l1"})
+        await engine.drain(timeout=2)
+
+        stats = engine.get_statistics()[destination.id]
+        assert stats["delivered"] == 1 and stats["retries"] == 2
+        assert len({r.headers[DELIVERY_HEADER] for r in endpoint.requests}) == 1
+        await engine.stop()
+
+    @pytest.mark.asyncio
+    async def test_rejected_and_exhausted_events_are_dead_lettered(self, tmp_path):
+        """Test a 400 is dead-lettered at once and a 500 after max_attempts."""
+        dead_letter = tmp_path / "dead.jsonl"
+        rejecting = FlakyEndpoint(400)
+        failing = FlakyEndpoint(*[500] * 10)
+
+        def route(request):
+            return (rejecting if request.url.host == "a.test" else failing)(request)
+
+        engine = make_engine(
+            transport=httpx.MockTransport(route),
+            max_attempts=3,
+            dead_letter_path=str(dead_letter),
+        )
+        engine.register(WebhookDestination(url="http://a.test/hook"))
+        engine.register(WebhookDestination(url="http://b.test/hook"))
+
+        engine.publish("lead_created", {"lead_id": "l1"})
+        await engine.drain(timeout=2)
+
+        entries = [json.loads(line) for line in dead_letter.read_text().splitlines()]
+        assert sorted(e["attempts"] for e in entries) == [1, 3]
+        assert len(rejecting.requests) == 1 and len(failing.requests) == 3
+        await engine.stop()
+
+
+class TestOwnership:
+    """Test destinations only receive their owner's events."""
+
+    @pytest.mark.asyncio
+    async def test_events_go_to_the_owners_destinations_only(self):
+        """Test one tenant's event never reaches another tenant's endpoint."""
+        engine = make_engine(transport=httpx.MockTransport(FlakyEndpoint()))
+        engine.register(WebhookDestination(url="http://a.test", owner_id="user-a"))
+        engine.register(WebhookDestination(url="http://b.test", owner_id="user-b"))
+
+        assert engine.publish("lead_created", {}, owner_id="user-a") == 1
+        assert engine.publish("lead_created", {}, owner_id="user-c") == 0
+        assert engine.publish("lead_created", {}) == 0
+        await engine.stop()
+
+    @pytest.mark.asyncio
+    async def test_destinations_survive_a_restart(self, tmp_path):
+        """Test a destination saved by one engine is delivered to by the next."""
+        store = WebhookDestinationStore(
+            IntegrationStore(SQLiteIntegrationBackend(str(tmp_path / "integrations.db"))),
+            cipher=Fernet(Fernet.generate_key()),
+        )
+        endpoint = FlakyEndpoint()
+        first = make_engine(destination_store=store)
+        destination = await first.add_destination(
+            WebhookDestination(url="http://a.test/hook", owner_id="user-a")
+        )
+        await first.stop()
+
+        engine = make_engine(transport=httpx.MockTransport(endpoint), destination_store=store)
+        assert await engine.publish_for_owner("lead_created", {}, "user-a") == 1
+        await engine.drain(timeout=2)
+
+        (request,) = endpoint.requests
+        assert verify_signature(
+            destination.secret, request.headers[SIGNATURE_HEADER], request.content
+        )
+        assert not await engine.remove_destination("user-b", destination.id)
+        assert await engine.remove_destination("user-a", destination.id)
+        assert await engine.load_destinations("user-a") == []
+        await engine.stop()
+
+
+class TestDestinationSafety:
+    """Test destinations cannot target internal services."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "http://93.184.216.34/hook",
+            "https://127.0.0.1/hook",
+            "https://localhost/hook",
+            "https://10.0.0.5/hook",
+            "https://169.254.169.254/latest/meta-data",
+            "https://[::1]/hook",
+            "https://[::ffff:192.168.1.1]/hook",
+            "https://0.0.0.0/hook",
+        ],
+    )
+    async def test_unsafe_urls_are_rejected_at_registration(self, url):
+        """Test plain http and non-public addresses cannot be registered."""
+        engine = make_engine(verify_destinations=True)
+        with pytest.raises(UnsafeDestinationError):
+            await engine.add_destination(WebhookDestination(url=url, owner_id="user-a"))
+        assert engine.destinations == {}
+        await engine.stop()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "header", ["Host", "authorization", "Transfer-Encoding", "X-PipeWise-Signature"]
+    )
+    async def test_sensitive_headers_are_rejected(self, header):
+        """Test custom headers cannot override routing, framing or signatures."""
+        engine = make_engine()
+        destination = WebhookDestination(
+            url="http://a.test/hook", owner_id="user-a", headers={header: "x"}
+        )
+        with pytest.raises(UnsafeDestinationError):
+            await engine.add_destination(destination)
+        await engine.stop()
+
+    @pytest.mark.asyncio
+    async def test_private_address_is_rejected_at_send_time(self):
+        """Test a destination now resolving to a private address is dead-lettered unsent."""
+        endpoint = FlakyEndpoint()
+        engine = make_engine(
+            transport=httpx.MockTransport(endpoint), verify_destinations=True
+        )
+        destination = engine.register(WebhookDestination(url="https://127.0.0.1/hook"))
+
+        engine.publish("lead_created", {})
+        await engine.drain(timeout=2)
+
+        assert endpoint.requests == []
+        assert engine.stats[destination.id]["dead_lettered"] == 1
+        await engine.stop()
+
+
+class TestIdleWorkers:
+    """Test per-destination workers do not outlive their traffic."""
+
+    @pytest.mark.asyncio
+    async def test_idle_workers_exit_and_restart(self):
+        """Test an idle destination's worker exits and the next event starts a new one."""
+        endpoint = FlakyEndpoint()
+        engine = make_engine(
+            transport=httpx.MockTransport(endpoint), idle_worker_seconds=0.05
+        )
+        destination = engine.register(WebhookDestination(url="http://a.test/hook"))
+
+        engine.publish("lead_created", {})
+        await engine.drain(timeout=2)
+        (worker,) = engine.workers[destination.id]
+        await asyncio.wait_for(worker, timeout=2)
+        assert destination.id not in engine.workers
+        assert destination.id not in engine.queues
+
+        engine.publish("lead_created", {})
+        await engine.drain(timeout=2)
+        assert len(endpoint.requests) == 2
+        await engine.stop()
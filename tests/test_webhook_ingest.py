@@ -0,0 +1,453 @@
+"""
+Tests for durable webhook ingestion.
+
+This module tests:
+- The file ingest log: acknowledgement, redelivery, restart and torn writes,
+  and refusing to be shared by several processes
+- The consumer: dedupe by idempotency key, retries, and bisecting failing
+  batches so only their bad records reach the dead letter
+- Lead rows, workflow triggers and email event updates built by the handler
+- Inbound webhook tokens resolving the owner of a webhook
+- The webhook endpoints only appending to the log
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.integration_store import IntegrationStore, SQLiteIntegrationBackend
+from app.jobs import ingest
+from app.jobs.ingest import (
+    EMAIL_EVENT,
+    INBOUND_TOKEN_HEADER,
+    LEAD_CAPTURE,
+    FileIngestLog,
+    IngestRecord,
+    LeadWebhookHandler,
+    WebhookIngestConsumer,
+    create_inbound_webhook_token,
+    resolve_inbound_webhook_owner,
+    webhook_lead_id,
+)
+
+OWNER_ID = "10000000-0000-0000-0000-000000000001"
+
+
+def record(email="ada@example.com", kind=LEAD_CAPTURE, key=None, owner_id=OWNER_ID):
+    return IngestRecord(
+        kind=kind,
+        payload={"name": "Ada", "email": email},
+        idempotency_key=key or f"{kind}:{email}",
+        owner_id=owner_id,
+    )
+
+
+class RecordingHandler:
+    """Batch handler recording batches, failing a given number of times."""
+
+    def __init__(self, failures=0, poison=()):
+        self.failures = failures
+        self.poison = set(poison)
+        self.batches = []
+
+    async def __call__(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("supabase unavailable")
+        if self.poison & {r.payload["email"] for r in records}:
+            raise ValueError("invalid input syntax for type uuid")
+        self.batches.append([r.payload["email"] for r in records])
+
+    @property
+    def emails(self):
+        return [email for batch in self.batches for email in batch]
+
+
+async def _noop_enqueue(lead_data, tenant, idempotency_key=None):
+    pass
+
+
+class FakeCRM:
+    def __init__(self):
+        self.upserts = []
+        self.updates = []
+
+    def bulk_upsert_leads(self, rows, ignore_duplicates=False):
+        self.upserts.append((rows, ignore_duplicates))
+        return []
+
+    def bulk_update_leads(self, updates, owner_id):
+        self.updates.append((owner_id, updates))
+        return []
+
+
+class TestFileIngestLog:
+    """Test the append-only log and its committed offset."""
+
+    @pytest.mark.asyncio
+    async def test_unacked_entries_are_redelivered(self, tmp_path):
+        """Test entries read but not acknowledged are delivered again."""
+        log = FileIngestLog(str(tmp_path / "ingest.log"))
+        for email in ("a@x.io", "b@x.io"):
+            await log.append(record(email))
+
+        first = await log.read(10, block_seconds=0)
+        again = await log.read(10, block_seconds=0)
+
+        assert [e for e, _ in first] == [e for e, _ in again]
+        assert [r.payload["email"] for _, r in again] == ["a@x.io", "b@x.io"]
+        assert await log.backlog() == 2
+
+        await log.ack([entry_id for entry_id, _ in again])
+        assert await log.backlog() == 0
+        assert (tmp_path / "ingest.log").stat().st_size == 0  # drained log is truncated
+        await log.close()
+
+    @pytest.mark.asyncio
+    async def test_restart_resumes_after_committed_offset(self, tmp_path):
+        """Test a reopened log delivers only what was not acknowledged."""
+        path = str(tmp_path / "ingest.log")
+        log = FileIngestLog(path)
+        for email in ("a@x.io", "b@x.io", "c@x.io"):
+            await log.append(record(email))
+        entries = await log.read(1, block_seconds=0)
+        await log.ack([entries[0][0]])
+        await log.close()
+
+        reopened = FileIngestLog(path)
+        entries = await reopened.read(10, block_seconds=0)
+
+        assert [r.payload["email"] for _, r in entries] == ["b@x.io", "c@x.io"]
+        assert await reopened.backlog() == 2
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_torn_last_line_is_dropped(self, tmp_path):
+        """Test a partial append left by a crash is discarded on open."""
+        path = tmp_path / "ingest.log"
+        log = FileIngestLog(str(path))
+        await log.append(record("a@x.io"))
+        await log.close()
+        with open(path, "ab") as log_file:
+            log_file.write(b'{"kind": "lead_cap')
+
+        reopened = FileIngestLog(str(path))
+        entries = await reopened.read(10, block_seconds=0)
+
+        assert [r.payload["email"] for _, r in entries] == ["a@x.io"]
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_log_in_use_is_refused(self, tmp_path):
+        """Test a second opener of the same log fails instead of sharing it."""
+        if not ingest.FCNTL_AVAILABLE:
+            pytest.skip("file locks need fcntl")
+        path = str(tmp_path / "ingest.log")
+        log = FileIngestLog(path)
+
+        with pytest.raises(RuntimeError):
+            FileIngestLog(path)
+
+        await log.close()
+        reopened = FileIngestLog(path)
+        await reopened.close()
+
+    def test_file_backend_refused_with_several_workers(self, monkeypatch, tmp_path):
+        """Test the file backend is not built when WEB_CONCURRENCY > 1."""
+        from app.core.config import Settings
+
+        settings = Settings(
+            WEB_CONCURRENCY=4, WEBHOOK_INGEST_PATH=str(tmp_path / "ingest.log")
+        )
+        monkeypatch.setattr("app.core.config.get_settings", lambda: settings)
+
+        with pytest.raises(RuntimeError):
+            ingest.create_webhook_ingest()
+
+
+def make_consumer(tmp_path, handler, **kwargs):
+    kwargs.setdefault("block_seconds", 0.05)
+    kwargs.setdefault("base_retry_delay", 0.01)
+    return WebhookIngestConsumer(
+        FileIngestLog(str(tmp_path / "ingest.log")), handler, **kwargs
+    )
+
+
+class TestConsumer:
+    """Test batch processing."""
+
+    @pytest.mark.asyncio
+    async def test_duplicates_are_processed_once(self, tmp_path):
+        """Test repeated deliveries of one key reach the handler once."""
+        handler = RecordingHandler()
+        consumer = make_consumer(tmp_path, handler)
+
+        for _ in range(3):
+            await consumer.submit(LEAD_CAPTURE, {"email": "a@x.io"}, idempotency_key="k1")
+        await consumer.drain(timeout=2)
+        await consumer.submit(LEAD_CAPTURE, {"email": "a@x.io"}, idempotency_key="k1")
+        await consumer.submit(LEAD_CAPTURE, {"email": "b@x.io"})
+        await consumer.drain(timeout=2)
+
+        stats = await consumer.get_statistics()
+        assert handler.emails == ["a@x.io", "b@x.io"]
+        assert stats["duplicates"] == 3 and stats["processed"] == 2
+        assert stats["backlog"] == 0 and stats["throughput_per_second"] > 0
+        await consumer.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried(self, tmp_path):
+        """Test a batch stays in the log until the handler succeeds."""
+        handler = RecordingHandler(failures=2)
+        consumer = make_consumer(tmp_path, handler)
+
+        await consumer.submit(LEAD_CAPTURE, {"email": "a@x.io"})
+        assert await consumer.drain(timeout=2)
+
+        assert handler.emails == ["a@x.io"]
+        assert consumer.stats["failed_batches"] == 2
+        await consumer.stop()
+
+    @pytest.mark.asyncio
+    async def test_poison_batch_is_dead_lettered(self, tmp_path):
+        """Test a batch failing max_attempts times moves to the dead letter."""
+        handler = RecordingHandler(failures=100)
+        consumer = make_consumer(tmp_path, handler, max_attempts=2)
+
+        await consumer.submit(LEAD_CAPTURE, {"email": "a@x.io"})
+        assert await consumer.drain(timeout=2)
+
+        assert consumer.stats["dead_lettered"] == 1
+        assert "a@x.io" in (tmp_path / "ingest.log.dead").read_text()
+        await consumer.stop()
+
+
+    @pytest.mark.asyncio
+    async def test_rejected_records_are_dead_lettered(self, tmp_path):
+        """Test records the handler rejects go to the dead letter, the rest are processed."""
+
+        async def handler(records):
+            return {
+                "rejected": [(r, "no owner") for r in records if r.owner_id is None]
+            }
+
+        consumer = make_consumer(tmp_path, handler)
+        await consumer.submit(LEAD_CAPTURE, {"email": "a@x.io"}, owner_id=OWNER_ID)
+        await consumer.submit(LEAD_CAPTURE, {"email": "b@x.io"})
+        assert await consumer.drain(timeout=2)
+
+        assert consumer.stats["processed"] == 1 and consumer.stats["dead_lettered"] == 1
+        dead = (tmp_path / "ingest.log.dead").read_text()
+        assert "b@x.io" in dead and "a@x.io" not in dead
+        await consumer.stop()
+
+
+class TestInboundWebhookTokens:
+    """Test the per-user tokens identifying a webhook's owner."""
+
+    def test_token_resolves_only_its_owner(self, tmp_path):
+        """Test a token maps to its user, and rotating it revokes the old one."""
+        store = IntegrationStore(SQLiteIntegrationBackend(str(tmp_path / "i.db")))
+        token = create_inbound_webhook_token(OWNER_ID, store=store)
+
+        assert resolve_inbound_webhook_owner(OWNER_ID, token, store=store) == OWNER_ID
+        assert resolve_inbound_webhook_owner("someone-else", token, store=store) is None
+        assert resolve_inbound_webhook_owner(OWNER_ID, "guess", store=store) is None
+        assert token not in str(store.get(OWNER_ID, ingest.INBOUND_WEBHOOK_PLATFORM))
+
+        create_inbound_webhook_token(OWNER_ID, store=store)
+        assert resolve_inbound_webhook_owner(OWNER_ID, token, store=store) is None
+
+
+    @pytest.mark.asyncio
+    async def test_only_failing_records_of_a_batch_are_dead_lettered(self, tmp_path):
+        """Test a batch that keeps failing is bisected down to its bad record."""
+        emails = [f"{i}@x.io" for i in range(10)]
+        handler = RecordingHandler(poison={"7@x.io"})
+        consumer = make_consumer(tmp_path, handler, max_attempts=2)
+
+        for email in emails:
+            await consumer.submit(LEAD_CAPTURE, {"email": email})
+        assert await consumer.drain(timeout=2)
+
+        assert sorted(handler.emails) == sorted(set(emails) - {"7@x.io"})
+        assert consumer.stats["dead_lettered"] == 1 and consumer.stats["processed"] == 9
+        dead = (tmp_path / "ingest.log.dead").read_text()
+        assert "7@x.io" in dead and "6@x.io" not in dead
+        await consumer.stop()
+
+
+class TestLeadWebhookHandler:
+    """Test the CRM writes made for a batch."""
+
+    @pytest.mark.asyncio
+    async def test_leads_are_inserted_once_and_workflows_queued(self):
+        """Test leads get stable ids, one upsert and an idempotent workflow each."""
+        crm = FakeCRM()
+        queued = []
+
+        async def enqueue(lead_data, tenant, idempotency_key=None):
+            queued.append((lead_data["email"], tenant["user_id"], idempotency_key))
+
+        handler = LeadWebhookHandler(crm_client=crm, enqueue_workflow=enqueue)
+        await handler([record("a@x.io"), record("b@x.io")])
+
+        rows, ignore_duplicates = crm.upserts[0]
+        assert ignore_duplicates and len(crm.upserts) == 1
+        assert rows[0]["id"] == webhook_lead_id(OWNER_ID, "A@x.io")
+        assert rows[0]["source"] == LEAD_CAPTURE and rows[0]["owner_id"] == OWNER_ID
+        assert queued[0] == ("a@x.io", OWNER_ID, f"webhook:{rows[0]['id']}")
+        assert len(queued) == 2
+
+    @pytest.mark.asyncio
+    async def test_owner_comes_from_record_not_payload(self):
+        """Test a payload owner is ignored and ownerless records are rejected."""
+        crm = FakeCRM()
+        queued = []
+
+        async def enqueue(lead_data, tenant, idempotency_key=None):
+            queued.append(tenant["user_id"])
+
+        forged = record("a@x.io")
+        forged.payload["owner_id"] = "20000000-0000-0000-0000-000000000002"
+        ownerless = record("b@x.io", owner_id=None)
+
+        handler = LeadWebhookHandler(crm_client=crm, enqueue_workflow=enqueue)
+        result = await handler([forged, ownerless])
+
+        (rows, _), = crm.upserts
+        assert [row["owner_id"] for row in rows] == [OWNER_ID]
+        assert queued == [OWNER_ID]
+        assert [r.payload["email"] for r, _ in result["rejected"]] == ["b@x.io"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_rows_are_rejected_not_upserted(self):
+        """Test rows the leads table would refuse are rejected one by one."""
+        crm = FakeCRM()
+        bad_utm = record("a@x.io")
+        bad_utm.payload["utm_params"] = "utm_source=ads"
+        bad_owner = record("b@x.io", owner_id="not-a-uuid")
+        phone = record("c@x.io")
+        phone.payload["phone"] = 5551234
+
+        handler = LeadWebhookHandler(crm_client=crm, enqueue_workflow=_noop_enqueue)
+        result = await handler([bad_utm, bad_owner, phone])
+
+        (rows, _), = crm.upserts
+        assert [(row["email"], row["phone"]) for row in rows] == [("c@x.io", "5551234")]
+        assert [r.payload["email"] for r, _ in result["rejected"]] == ["a@x.io", "b@x.io"]
+
+    @pytest.mark.asyncio
+    async def test_email_events_update_matching_leads(self):
+        """Test a list of email events becomes one bulk metadata update."""
+        crm = FakeCRM()
+        events = IngestRecord(
+            kind=EMAIL_EVENT,
+            payload={
+                "events": [
+                    {"email": "a@x.io", "event": "open"},
+                    {"email": "b@x.io", "event": "bounce"},
+                ]
+            },
+            idempotency_key="email_event:1",
+            owner_id=OWNER_ID,
+        )
+
+        await LeadWebhookHandler(crm_client=crm)([events])
+
+        assert crm.upserts == []
+        ((owner_id, updates),) = crm.updates
+        assert owner_id == OWNER_ID
+        assert updates[0]["metadata"]["last_email_event"] == "open"
+        assert updates[1]["metadata"]["email_bounced"] is True
+
+    @pytest.mark.asyncio
+    async def test_malformed_email_events_are_skipped(self):
+        """Test non-object events are skipped instead of failing the batch."""
+        crm = FakeCRM()
+        events = IngestRecord(
+            kind=EMAIL_EVENT,
+            payload={"events": ["bounce", None, {"email": "a@x.io", "event": "open"}]},
+            idempotency_key="email_event:2",
+            owner_id=OWNER_ID,
+        )
+
+        await LeadWebhookHandler(crm_client=crm)([events])
+
+        ((_, updates),) = crm.updates
+        assert [update["email"] for update in updates] == ["a@x.io"]
+
+
+class TestEndpoints:
+    """Test the webhook endpoints append and acknowledge."""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        pytest.importorskip("gotrue")  # app.api.webhooks imports the auth middleware
+        from app.api.webhooks import router
+        from app.core.integration_store import set_integration_store
+
+        handler = RecordingHandler()
+        consumer = make_consumer(tmp_path, handler)
+        ingest.set_webhook_ingest(consumer)
+        store = IntegrationStore(SQLiteIntegrationBackend(str(tmp_path / "i.db")))
+        set_integration_store(store)
+        token = create_inbound_webhook_token(OWNER_ID, store=store)
+        app = FastAPI()
+        app.include_router(router)
+        test_client = TestClient(app, headers={INBOUND_TOKEN_HEADER: token})
+        yield test_client, consumer, f"?owner={OWNER_ID}"
+        set_integration_store(None)
+        ingest.set_webhook_ingest(None)
+
+    def test_lead_capture_is_appended(self, client):
+        """Test a valid lead is acknowledged after being appended to the log."""
+        test_client, consumer, query = client
+
+        response = test_client.post(
+            f"/webhooks/lead-capture{query}",
+            json={"name": "Ada", "email": "a@x.io"},
+            headers={"Idempotency-Key": "form-42"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["idempotency_key"] == f"{OWNER_ID}:lead_capture:form-42"
+        assert consumer.stats["appended"] == 1
+
+    def test_unknown_owner_is_rejected(self, client):
+        """Test webhooks without a valid owner token are refused."""
+        test_client, consumer, query = client
+        lead = {"name": "Ada", "email": "a@x.io", "owner_id": OWNER_ID}
+
+        missing = test_client.post("/webhooks/lead-capture", json=lead)
+        forged = test_client.post(
+            f"/webhooks/email-event{query}",
+            json={"event": "bounce", "email": "a@x.io"},
+            headers={INBOUND_TOKEN_HEADER: "guess"},
+        )
+
+        assert missing.status_code == 401 and forged.status_code == 401
+        assert consumer.stats["appended"] == 0
+
+    def test_token_in_url_is_refused(self, client):
+        """Test the token is only accepted from the header."""
+        test_client, consumer, query = client
+        token = test_client.headers.pop(INBOUND_TOKEN_HEADER)
+
+        response = test_client.post(
+            f"/webhooks/lead-capture{query}&token={token}",
+            json={"name": "Ada", "email": "a@x.io"},
+        )
+
+        assert response.status_code == 401
+        assert consumer.stats["appended"] == 0
+
+    def test_invalid_payloads_are_rejected(self, client):
+        """Test missing fields and non-JSON bodies are not appended."""
+        test_client, consumer, query = client
+
+        missing = test_client.post(f"/webhooks/lead-capture{query}", json={"name": "Ada"})
+        not_json = test_client.post(f"/webhooks/email-event{query}", content=b"not json")
+
+        assert missing.status_code == 400 and not_json.status_code == 400
+        assert consumer.stats["appended"] == 0
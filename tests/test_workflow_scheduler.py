@@ -0,0 +1,218 @@
+"""
+Tests for the workflow priority scheduler.
+
+This module tests lane-based scheduling including:
+- Strict priority of inbound lanes over bulk outreach
+- Per-lane concurrency caps
+- Weighted fair queuing across tenants within a lane
+- Queue-wait metrics
+- Job queue execution ordered by the scheduler
+"""
+
+import asyncio
+
+import pytest
+
+from app.jobs.queue import JobQueue
+from app.jobs.scheduler import (
+    Lane,
+    LaneConfig,
+    PriorityScheduler,
+    classify_lead_workflow,
+)
+from app.jobs.workflows import resolve_job_lane
+
+
+def make_scheduler(max_concurrency: int = 1, bulk_cap: int = 1, **kwargs):
+    return PriorityScheduler(
+        lanes=[
+            LaneConfig(Lane.INBOUND_MESSAGE, 0, max_concurrency),
+            LaneConfig(Lane.INBOUND_LEAD, 1, max_concurrency),
+            LaneConfig(Lane.BULK_OUTREACH, 2, bulk_cap),
+        ],
+        max_concurrency=max_concurrency,
+        **kwargs,
+    )
+
+
+class TestPriorityScheduler:
+    """Test lane priority, caps and fairness."""
+
+    @pytest.mark.asyncio
+    async def test_inbound_lead_jumps_bulk_backlog(self):
+        """Test a new inbound lead runs before queued bulk outreach."""
+        scheduler = make_scheduler()
+        order = []
+
+        async def work(name):
+            order.append(name)
+            await asyncio.sleep(0.001)
+
+        futures = [
+            scheduler.submit(Lane.BULK_OUTREACH, "t1", work, f"bulk_{i}")
+            for i in range(5)
+        ]
+        futures.append(scheduler.submit(Lane.INBOUND_LEAD, "t2", work, "lead"))
+        futures.append(scheduler.submit(Lane.INBOUND_MESSAGE, "t2", work, "reply"))
+        await asyncio.gather(*futures)
+
+        # bulk_0 was already running; the hot lanes go next
+        assert order[:3] == ["bulk_0", "reply", "lead"]
+
+    @pytest.mark.asyncio
+    async def test_bulk_lane_cap_reserves_capacity(self):
+        """Test bulk work never exceeds its lane cap."""
+        scheduler = make_scheduler(max_concurrency=4, bulk_cap=1)
+        peak_bulk = 0
+
+        async def bulk():
+            nonlocal peak_bulk
+            peak_bulk = max(peak_bulk, scheduler.lanes[Lane.BULK_OUTREACH].running)
+            await asyncio.sleep(0.01)
+
+        async def lead():
+            await asyncio.sleep(0.01)
+
+        futures = [scheduler.submit(Lane.BULK_OUTREACH, "t1", bulk) for _ in range(4)]
+        futures.append(scheduler.submit(Lane.INBOUND_LEAD, "t1", lead))
+
+        assert scheduler.running == 2
+        await asyncio.gather(*futures)
+        assert peak_bulk == 1
+
+    @pytest.mark.asyncio
+    async def test_fair_queuing_across_tenants(self):
+        """Test a tenant's backlog does not starve another tenant's work."""
+        scheduler = make_scheduler()
+        order = []
+
+        async def work(tenant):
+            order.append(tenant)
+            await asyncio.sleep(0.001)
+
+        futures = [
+            scheduler.submit(Lane.INBOUND_LEAD, "big", work, "big") for _ in range(6)
+        ]
+        futures += [
+            scheduler.submit(Lane.INBOUND_LEAD, "small", work, "small")
+            for _ in range(2)
+        ]
+        await asyncio.gather(*futures)
+
+        assert order[:5] == ["big", "small", "big", "small", "big"]
+
+    @pytest.mark.asyncio
+    async def test_tenant_weights(self):
+        """Test a weight-2 tenant gets two turns per turn of a weight-1 tenant."""
+        scheduler = make_scheduler(tenant_weights={"premium": 2.0})
+        order = []
+
+        async def work(tenant):
+            order.append(tenant)
+
+        futures = [
+            scheduler.submit(Lane.INBOUND_LEAD, tenant, work, tenant)
+            for tenant in ["basic"] * 4 + ["premium"] * 4
+        ]
+        await asyncio.gather(*futures)
+
+        assert order[1:7].count("premium") == 4
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_statistics(self):
+        """Test waits are recorded in the lane statistics."""
+        scheduler = make_scheduler()
+
+        async def work():
+            await asyncio.sleep(0.02)
+
+        await asyncio.gather(
+            *(scheduler.submit(Lane.INBOUND_MESSAGE, "t", work) for _ in range(3))
+        )
+
+        lane_stats = scheduler.get_statistics()["lanes"][Lane.INBOUND_MESSAGE]
+        assert lane_stats["completed"] == 3
+        assert lane_stats["max_wait_seconds"] >= 0.03
+        assert lane_stats["avg_wait_seconds"] > 0
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_histogram(self):
+        """Test waits are exported to the Prometheus histogram."""
+        prometheus_client = pytest.importorskip("prometheus_client")
+        scheduler = make_scheduler()
+
+        def wait_count():
+            return prometheus_client.REGISTRY.get_sample_value(
+                "pipewise_workflow_queue_wait_seconds_count",
+                {"lane": Lane.BULK_OUTREACH},
+            ) or 0
+
+        before = wait_count()
+
+        async def work():
+            pass
+
+        await scheduler.run(Lane.BULK_OUTREACH, "t", work)
+
+        assert wait_count() - before == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_caller(self):
+        """Test exceptions from scheduled work reach the awaiting caller."""
+        scheduler = make_scheduler()
+
+        async def boom():
+            raise RuntimeError("llm down")
+
+        with pytest.raises(RuntimeError):
+            await scheduler.run(Lane.INBOUND_LEAD, "t", boom)
+        assert scheduler.get_statistics()["lanes"][Lane.INBOUND_LEAD]["failed"] == 1
+        assert scheduler.running == 0
+
+    def test_classify_lead_workflow(self):
+        """Test prospect lists go to bulk outreach and single leads inbound."""
+        assert classify_lead_workflow({"prospect_list": ["a"]}) == Lane.BULK_OUTREACH
+        assert classify_lead_workflow({"email": "a@b.c"}) == Lane.INBOUND_LEAD
+
+
+class TestScheduledJobQueue:
+    """Test job queue execution through the scheduler."""
+
+    @pytest.mark.asyncio
+    async def test_inbound_job_preempts_bulk_jobs(self):
+        """Test inbound lead jobs start before queued bulk jobs."""
+        scheduler = make_scheduler()
+        queue = JobQueue(
+            scheduler=scheduler,
+            lane_resolver=resolve_job_lane,
+            poll_timeout_seconds=0.05,
+            prefetch=16,
+        )
+        order = []
+
+        async def handler(job):
+            order.append(job.payload["name"])
+            await asyncio.sleep(0.01)
+            return {}
+
+        queue.register_handler("workflow", handler)
+        tenant = {"tenant_id": "default", "user_id": "u1"}
+        for i in range(4):
+            await queue.enqueue(
+                "workflow",
+                {"name": f"bulk_{i}", "lane": Lane.BULK_OUTREACH, "tenant": tenant},
+            )
+        await queue.enqueue(
+            "workflow",
+            {"name": "lead", "lane": Lane.INBOUND_LEAD, "tenant": tenant},
+        )
+
+        await queue.start()
+        for _ in range(100):
+            if len(order) == 5:
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+        assert order.index("lead") <= 1
+        assert queue.stats["completed"] == 5